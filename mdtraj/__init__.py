@@ -32,12 +32,15 @@ from mdtraj.core import element
 from mdtraj.core.topology import Amide, Aromatic, Double, Single, Topology, Triple
 from mdtraj.core.trajectory import (
     Trajectory,
+    TrajectoryBuilder,
+    TrajectoryWriter,
     iterload,
     join,
     load,
     load_frame,
     load_topology,
     open,
+    save_iter,
 )
 from mdtraj.formats.amberrst import load_ncrestrt, load_restrt
 from mdtraj.formats.arc import load_arc
@@ -74,6 +77,7 @@ from mdtraj.geometry import (
     compute_dihedrals,
     compute_directors,
     compute_displacements,
+    compute_distance_matrix,
     compute_distances,
     compute_distances_t,
     compute_drid,
@@ -81,6 +85,7 @@ from mdtraj.geometry import (
     compute_gyration_tensor,
     compute_inertia_tensor,
     compute_neighborlist,
+    compute_neighborlist_csr,
     compute_neighbors,
     compute_nematic_order,
     compute_omega,
@@ -89,11 +94,13 @@ from mdtraj.geometry import (
     compute_rdf,
     compute_rdf_t,
     compute_rg,
+    compute_sasa,
     density,
     dipole_moments,
     find_closest_contact,
     isothermal_compressability_kappa_T,
     kabsch_sander,
+    lcpo,
     pi_stacking,
     principal_moments,
     relative_shape_antisotropy,
@@ -163,10 +170,13 @@ __all__ = (
     "Trajectory",
     "baker_hubbard",
     "shrake_rupley",
+    "lcpo",
+    "compute_sasa",
     "kabsch_sander",
     "compute_distances",
     "compute_distances_t",
     "compute_displacements",
+    "compute_distance_matrix",
     "compute_angles",
     "compute_dihedrals",
     "compute_phi",
@@ -187,6 +197,7 @@ __all__ = (
     "compute_dssp",
     "compute_neighbors",
     "compute_neighborlist",
+    "compute_neighborlist_csr",
     "compute_rdf",
     "compute_rdf_t",
     "compute_nematic_order",
@@ -22,12 +22,15 @@
 
 
 import ast
+import functools
+import operator
 import re
 import sys
 from ast import unparse
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from copy import deepcopy
 
+import numpy as np
 from pyparsing import (
     Group,
     Keyword,
@@ -46,7 +49,23 @@ from pyparsing import (
 # this number arises from the current selection language, if the cache size is exceeded, it hurts performance a bit.
 ParserElement.enablePackrat(cache_size_limit=304)
 
-__all__ = ["parse_selection"]
+from mdtraj.core.residue_names import (
+    _AMINO_ACID_CODES,
+    _PROTEIN_RESIDUES,
+    _WATER_RESIDUES,
+)
+
+__all__ = [
+    "parse_selection",
+    "AtomColumns",
+    "UnsupportedSelection",
+    "selection_mask",
+    "iter_frame_masks",
+    "uses_coordinates",
+    "LRUCache",
+    "get_selection_cache_size",
+    "set_selection_cache_size",
+]
 
 # ############################################################################
 # Globals
@@ -55,10 +74,29 @@ __all__ = ["parse_selection"]
 NUMS = ".0123456789"
 THIS_ATOM = ast.Name(id="atom", ctx=ast.Load())
 RE_MODULE = ast.Name(id="re", ctx=ast.Load())
-SINGLETON_NODE_IDS = {THIS_ATOM.id, RE_MODULE.id}
 
-SELECTION_GLOBALS = {"re": re}
+
+def _whole_topology_function(name):
+    # these need to see every atom at once, so they only work through the
+    # array-based evaluation in Topology.select and Trajectory.select
+    def function(*args):
+        raise ValueError(f"'{name}' selections cannot be evaluated one atom at a time")
+
+    function.__name__ = name
+    return function
+
+
+# within(cutoff, query) / around(cutoff, query) / same_residue(query)
+SELECTION_FUNCTIONS = {name: _whole_topology_function(name) for name in ("within", "around", "same_residue")}
+_GEOMETRIC_FUNCTIONS = {"within", "around"}
+SINGLETON_NODE_IDS = {THIS_ATOM.id, RE_MODULE.id} | set(SELECTION_FUNCTIONS)
+
+SELECTION_GLOBALS = {"re": re, **SELECTION_FUNCTIONS}
 _ParsedSelection = namedtuple("_ParsedSelection", ["expr", "source", "astnode"])
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# number of selection strings remembered by each cache
+_SELECTION_CACHE_SIZE = 256
 
 # ############################################################################
 # Utils
@@ -311,6 +349,620 @@ class InListCondition:
             )
 
 
+class DistanceCondition:
+    n_terms = 1
+    assoc = "RIGHT"
+    keyword_aliases = _kw(
+        (["within"], "within"),
+        (["around"], "around"),
+    )
+
+    def __init__(self, tokens):
+        tokens = tokens[0]
+        _check_n_tokens(tokens, 4, "distance condition")
+        self.op_token, self.cutoff, of, self.value_token = tokens
+        assert self.op_token in self.keyword_aliases and of == "of"
+        cutoff = self.cutoff.ast() if isinstance(self.cutoff, Literal) else None
+        if not (isinstance(cutoff, ast.Constant) and isinstance(cutoff.value, (int, float))):
+            raise ValueError(f"{self.op_token} takes a numeric distance cutoff (in nm)")
+        if isinstance(self.value_token, Literal):
+            raise ValueError("Cannot use literals as booleans.")
+
+    def ast(self):
+        return ast.Call(
+            func=ast.Name(id=self.keyword_aliases[self.op_token], ctx=ast.Load()),
+            args=[self.cutoff.ast(), self.value_token.ast()],
+            keywords=[],
+        )
+
+
+class SameResidueCondition:
+    n_terms = 1
+    assoc = "RIGHT"
+
+    def __init__(self, tokens):
+        tokens = tokens[0]
+        _check_n_tokens(tokens, 4, "same residue condition")
+        self.value_token = tokens[3]
+        if isinstance(self.value_token, Literal):
+            raise ValueError("Cannot use literals as booleans.")
+
+    def ast(self):
+        return ast.Call(
+            func=ast.Name(id="same_residue", ctx=ast.Load()),
+            args=[self.value_token.ast()],
+            keywords=[],
+        )
+
+
+class LRUCache:
+    """A mapping that keeps only its most recently used entries
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of entries. Zero disables caching.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Look up ``key``, returning None when it is not cached
+
+        Parameters
+        ----------
+        key : hashable
+            The key to look up.
+
+        Returns
+        -------
+        value : object or None
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` under ``key``, evicting the oldest entries if full
+
+        Parameters
+        ----------
+        key : hashable
+            The key to store under.
+        value : object
+            The value to store.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self.resize(self.maxsize)
+
+    def resize(self, maxsize):
+        """Change the maximum number of entries
+
+        Parameters
+        ----------
+        maxsize : int
+            The new maximum. Zero disables caching.
+        """
+        self.maxsize = maxsize
+        while len(self._data) > maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries, keeping the hit and miss counts"""
+        self._data.clear()
+
+    def info(self):
+        """Cache statistics
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of ``(hits, misses, maxsize, currsize)``.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+def get_selection_cache_size():
+    """Get how many selections are remembered
+
+    Returns
+    -------
+    maxsize : int
+        The number of selection strings each selection cache remembers.
+    """
+    return _SELECTION_CACHE_SIZE
+
+
+def set_selection_cache_size(maxsize):
+    """Set how many selections are remembered
+
+    This limits both the cache of parsed selection strings and the cache
+    of selection results that each ``Topology`` keeps.
+
+    Parameters
+    ----------
+    maxsize : int
+        The number of selection strings to remember. Zero disables caching.
+    """
+    global _SELECTION_CACHE_SIZE
+    if int(maxsize) != maxsize or maxsize < 0:
+        raise ValueError(f"maxsize must be a non-negative integer. you supplied {maxsize}")
+    _SELECTION_CACHE_SIZE = int(maxsize)
+    parse_selection._cache.resize(_SELECTION_CACHE_SIZE)
+
+
+# ############################################################################
+# Vectorized evaluation
+# ############################################################################
+
+
+class UnsupportedSelection(Exception):
+    """Raised when a selection cannot be evaluated with array operations.
+    Callers should fall back to applying the compiled lambda to each atom."""
+
+
+def _string_array(values):
+    # fixed-width unicode compares much faster than object arrays, but
+    # only holds strings
+    values = list(values)
+    if all(isinstance(v, str) for v in values):
+        return np.array(values, dtype=str)
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+class AtomColumns:
+    """Per-atom attribute arrays used to evaluate selections
+
+    Each column is keyed by the attribute path the selection grammar
+    generates for an atom, e.g. ``("residue", "name")`` for
+    ``atom.residue.name``, and is derived from ``Topology.arrays`` the
+    first time it is requested.
+
+    Parameters
+    ----------
+    arrays : mdtraj.core.topology.TopologyArrays
+        Columnar view of the topology.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.n_atoms = len(arrays.atom_name)
+        self._cache = {}
+
+    def __getitem__(self, attrs):
+        try:
+            return self._cache[attrs]
+        except KeyError:
+            pass
+        try:
+            builder = self._builders[attrs]
+        except KeyError:
+            raise UnsupportedSelection(".".join(("atom",) + attrs))
+        column = self._cache[attrs] = builder(self)
+        return column
+
+    def unique(self, attrs):
+        """The distinct values of a string column
+
+        Parameters
+        ----------
+        attrs : tuple of str
+            The attribute path of the column.
+
+        Returns
+        -------
+        unique : np.ndarray
+            The sorted distinct values of the column.
+        inverse : np.ndarray, shape=(n_atoms,)
+            The index in ``unique`` of each atom's value.
+        """
+        key = ("unique",) + attrs
+        if key not in self._cache:
+            column = self[attrs]
+            if _kind(column) != "str":
+                raise UnsupportedSelection(".".join(("atom",) + attrs))
+            unique, inverse = np.unique(column, return_inverse=True)
+            self._cache[key] = (unique, inverse.reshape(-1))
+        return self._cache[key]
+
+    def _residue_column(self, values):
+        return values[self.arrays.atom_residue]
+
+    def _elements(self):
+        # map the few distinct Element objects to their symbol and mass
+        # once, instead of touching every atom's element
+        if "elements" not in self._cache:
+            elements = self.arrays.atom_element
+            unique = list(dict.fromkeys(elements.tolist()))
+            lookup = {e: i for i, e in enumerate(unique)}
+            codes = np.fromiter(map(lookup.__getitem__, elements), dtype=np.intp, count=len(elements))
+            self._cache["elements"] = (unique, codes)
+        return self._cache["elements"]
+
+    def _element_symbol(self):
+        unique, codes = self._elements()
+        return _string_array([e.symbol for e in unique])[codes]
+
+    def _element_mass(self):
+        unique, codes = self._elements()
+        return np.array([e.mass for e in unique], dtype=float)[codes]
+
+    def _is_protein(self):
+        is_protein = np.isin(self.arrays.residue_name, list(_PROTEIN_RESIDUES))
+        return self._residue_column(is_protein)
+
+    def _is_water(self):
+        is_water = np.isin(self.arrays.residue_name, list(_WATER_RESIDUES))
+        return self._residue_column(is_water)
+
+    def _code(self):
+        codes = np.empty(len(self.arrays.residue_name), dtype=object)
+        codes[:] = [_AMINO_ACID_CODES.get(name) for name in self.arrays.residue_name.tolist()]
+        return self._residue_column(codes)
+
+    def _n_bonds(self):
+        return np.bincount(self.arrays.bonds.ravel(), minlength=self.n_atoms)
+
+    def _is_backbone(self):
+        return np.isin(self["name",], ["C", "CA", "N", "O"]) & self["residue", "is_protein"]
+
+    def _is_sidechain(self):
+        return ~np.isin(self["name",], ["C", "CA", "N", "O", "HA", "H"]) & self["residue", "is_protein"]
+
+    _builders = {
+        ("index",): lambda self: np.arange(self.n_atoms),
+        ("name",): lambda self: self.arrays.atom_name,
+        ("n_bonds",): _n_bonds,
+        ("is_backbone",): _is_backbone,
+        ("is_sidechain",): _is_sidechain,
+        ("segment_id",): lambda self: self._residue_column(self.arrays.residue_segment_id),
+        ("element", "symbol"): _element_symbol,
+        ("element", "mass"): _element_mass,
+        ("residue", "name"): lambda self: self._residue_column(self.arrays.residue_name),
+        ("residue", "index"): lambda self: self.arrays.atom_residue,
+        ("residue", "resSeq"): lambda self: self._residue_column(self.arrays.residue_resSeq),
+        ("residue", "is_protein"): _is_protein,
+        ("residue", "is_water"): _is_water,
+        ("residue", "code"): _code,
+        ("residue", "chain", "index"): lambda self: self.arrays.atom_chain,
+    }
+
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _kind(value):
+    """Classify a column or constant as 'str', 'number' or 'object'"""
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "U":
+            return "str"
+        if value.dtype.kind in "biuf":
+            return "number"
+        return "object"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, (int, float)):
+        return "number"
+    return "object"
+
+
+def _compare(left, op, right, n_atoms):
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if not isinstance(left, np.ndarray) or not isinstance(right, list):
+            raise UnsupportedSelection(op)
+        if _kind(left) == "object":
+            mask = np.zeros(n_atoms, dtype=bool)
+            for value in right:
+                mask |= left == value
+        else:
+            # values of another type can never compare equal
+            values = [v for v in right if _kind(v) == _kind(left)]
+            mask = np.isin(left, values)
+        return ~mask if isinstance(op, ast.NotIn) else mask
+
+    try:
+        func = _COMPARE_OPS[type(op)]
+    except KeyError:
+        raise UnsupportedSelection(op)
+    if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+        return np.full(n_atoms, func(left, right))
+
+    kinds = {_kind(left), _kind(right)}
+    if len(kinds) > 1 or "object" in kinds:
+        if isinstance(op, ast.Eq) and "object" not in kinds:
+            return np.zeros(n_atoms, dtype=bool)
+        if isinstance(op, ast.NotEq) and "object" not in kinds:
+            return np.ones(n_atoms, dtype=bool)
+        if isinstance(op, (ast.Eq, ast.NotEq)):
+            left, right = np.asarray(left, dtype=object), np.asarray(right, dtype=object)
+            return np.asarray(func(left, right), dtype=bool)
+        # ordering mixed types raises in python; let the fallback do it
+        raise UnsupportedSelection(op)
+    return np.asarray(func(left, right), dtype=bool)
+
+
+def _is_regex_match(node):
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == RE_MODULE.id
+        and node.func.attr == "match"
+        and len(node.args) == 2
+        and not node.keywords
+    )
+
+
+def _attribute_path(node):
+    attrs = []
+    while isinstance(node, ast.Attribute):
+        attrs.append(node.attr)
+        node = node.value
+    if not (isinstance(node, ast.Name) and node.id == THIS_ATOM.id):
+        raise UnsupportedSelection(node)
+    return tuple(reversed(attrs))
+
+
+def _selection_function(node):
+    """Name of the whole-topology function (``within``, ``around`` or
+    ``same_residue``) that ``node`` calls, or None"""
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in SELECTION_FUNCTIONS
+        and not node.keywords
+    ):
+        return node.func.id
+    return None
+
+
+def uses_coordinates(astnode):
+    """Whether a parsed selection depends on atom coordinates
+
+    Parameters
+    ----------
+    astnode : ast.AST
+        The ``astnode`` returned by ``parse_selection``.
+
+    Returns
+    -------
+    dynamic : bool
+        True if the selection contains ``within`` or ``around``.
+    """
+    return bool(_coordinate_nodes(astnode))
+
+
+def _coordinate_nodes(astnode):
+    """The ids of the nodes whose value depends on atom coordinates"""
+    dynamic = set()
+
+    def visit(node):
+        is_dynamic = _selection_function(node) in _GEOMETRIC_FUNCTIONS
+        for child in ast.iter_child_nodes(node):
+            is_dynamic = visit(child) or is_dynamic
+        if is_dynamic:
+            dynamic.add(id(node))
+        return is_dynamic
+
+    visit(astnode)
+    return dynamic
+
+
+class _MaskEvaluator:
+    """Evaluate a selection AST with array operations
+
+    Values are either constants, per-atom arrays of shape ``(n_atoms,)``,
+    or, below ``within``/``around``, per-frame arrays of shape
+    ``(n_frames, n_atoms)`` that broadcast against the per-atom ones.
+    """
+
+    def __init__(self, columns, traj=None, periodic=True, memo=None, dynamic=()):
+        self.columns = columns
+        self.n_atoms = columns.n_atoms
+        self.traj = traj
+        self.periodic = periodic
+        # values of the coordinate-independent subexpressions, shared
+        # between chunks of frames
+        self.memo = memo
+        self.dynamic = dynamic
+
+    def truth(self, node):
+        value = self.evaluate(node)
+        if not isinstance(value, np.ndarray):
+            return np.full(self.n_atoms, bool(value))
+        if value.dtype == bool:
+            return value
+        if value.dtype.kind == "U":
+            return value != ""
+        if value.dtype.kind in "iuf":
+            return value != 0
+        return np.array([bool(v) for v in value.tolist()], dtype=bool)
+
+    def evaluate(self, node):
+        if self.memo is None or id(node) in self.dynamic:
+            return self._evaluate(node)
+        if id(node) not in self.memo:
+            self.memo[id(node)] = self._evaluate(node)
+        return self.memo[id(node)]
+
+    def _evaluate(self, node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Attribute):
+            return self.columns[_attribute_path(node)]
+        if isinstance(node, ast.List):
+            values = [self.evaluate(e) for e in node.elts]
+            if any(isinstance(v, np.ndarray) for v in values):
+                raise UnsupportedSelection(node)
+            return values
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self.truth(node.operand)
+        if isinstance(node, ast.BoolOp):
+            masks = [self.truth(v) for v in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return functools.reduce(combine, masks)
+        if isinstance(node, ast.Compare):
+            return self._compare(node)
+        function = _selection_function(node)
+        if function == "same_residue":
+            return self._same_residue(node)
+        if function is not None:
+            return self._neighbors(node, exclude_query=function == "around")
+        raise UnsupportedSelection(node)
+
+    def _compare(self, node):
+        if _is_regex_match(node.left):
+            if (
+                len(node.ops) == 1
+                and isinstance(node.ops[0], (ast.Is, ast.IsNot))
+                and isinstance(node.comparators[0], ast.Constant)
+                and node.comparators[0].value is None
+            ):
+                mask = self._regex_mask(node.left)
+                return mask if isinstance(node.ops[0], ast.IsNot) else ~mask
+            raise UnsupportedSelection(node)
+        # a chained comparison a < b < c means (a < b) and (b < c)
+        operands = [self.evaluate(node.left)] + [self.evaluate(c) for c in node.comparators]
+        mask = np.ones(self.n_atoms, dtype=bool)
+        for left, op, right in zip(operands[:-1], node.ops, operands[1:]):
+            mask = mask & _compare(left, op, right, self.n_atoms)
+        return mask
+
+    def _regex_mask(self, node):
+        pattern = self.evaluate(node.args[0])
+        if not isinstance(pattern, str) or not isinstance(node.args[1], ast.Attribute):
+            raise UnsupportedSelection(node)
+        # only the distinct values need to go through the regex engine
+        unique, inverse = self.columns.unique(_attribute_path(node.args[1]))
+        regex = re.compile(pattern)
+        matched = np.array([regex.match(v) is not None for v in unique.tolist()], dtype=bool)
+        return matched[inverse]
+
+    def _same_residue(self, node):
+        (operand,) = node.args
+        mask = self.truth(operand)
+        atom_residue = self.columns.arrays.atom_residue
+        n_residues = len(self.columns.arrays.residue_name)
+        hit = np.zeros(mask.shape[:-1] + (n_residues,), dtype=bool)
+        frames, atoms = np.nonzero(mask.reshape(-1, self.n_atoms))
+        hit.reshape(-1, n_residues)[frames, atom_residue[atoms]] = True
+        return hit[..., atom_residue]
+
+    def _neighbors(self, node, exclude_query):
+        from mdtraj.geometry.neighbors import compute_neighbors
+
+        if self.traj is None:
+            raise ValueError(
+                "Distance-based selections need coordinates. Use Trajectory.select instead of Topology.select",
+            )
+        cutoff, operand = node.args
+        cutoff = self.evaluate(cutoff)
+        query = self.truth(operand)
+
+        out = np.zeros((self.traj.n_frames, self.n_atoms), dtype=bool)
+        if query.ndim == 1:
+            matches = compute_neighbors(self.traj, cutoff, np.flatnonzero(query), periodic=self.periodic)
+        else:
+            matches = [
+                compute_neighbors(self.traj[i], cutoff, np.flatnonzero(query[i]), periodic=self.periodic)[0]
+                for i in range(self.traj.n_frames)
+            ]
+        for i, indices in enumerate(matches):
+            out[i, indices] = True
+
+        # compute_neighbors never pairs a query atom with itself
+        if exclude_query:
+            return out & ~query
+        return out | query
+
+
+def selection_mask(astnode, columns):
+    """Evaluate a parsed selection for every atom at once
+
+    Parameters
+    ----------
+    astnode : ast.AST
+        The ``astnode`` returned by ``parse_selection``.
+    columns : AtomColumns
+        The atom attribute arrays of the topology to select from.
+
+    Returns
+    -------
+    mask : np.ndarray, shape=(n_atoms,), dtype=bool
+        Whether each atom satisfies the selection.
+
+    Raises
+    ------
+    UnsupportedSelection
+        If the expression uses a construct that has no array equivalent.
+        The result of applying ``parse_selection(...).expr`` to each atom
+        is the reference behavior in that case.
+    ValueError
+        If the expression depends on atom coordinates (``within`` or
+        ``around``).
+    """
+    return _MaskEvaluator(columns).truth(astnode)
+
+
+def iter_frame_masks(astnode, columns, traj, periodic=True, chunk_size=None):
+    """Evaluate a parsed selection for every atom in every frame
+
+    Parameters
+    ----------
+    astnode : ast.AST
+        The ``astnode`` returned by ``parse_selection``.
+    columns : AtomColumns
+        The atom attribute arrays of the trajectory's topology.
+    traj : md.Trajectory
+        The frames to evaluate distance-based selections against.
+    periodic : bool, default=True
+        If True and ``traj`` has unit cell information, distances are
+        computed under the minimum image convention.
+    chunk_size : int, optional
+        The number of frames to evaluate at once. By default, frames are
+        grouped so that each mask has around ten million elements.
+
+    Returns
+    -------
+    mask : np.ndarray, shape=(n_frames_in_chunk, n_atoms), dtype=bool
+        Whether each atom satisfies the selection in each frame of the
+        next chunk of frames.
+    """
+    dynamic = _coordinate_nodes(astnode)
+    if not dynamic:
+        # the same atoms are selected in every frame
+        mask = _MaskEvaluator(columns).truth(astnode)
+        yield np.broadcast_to(mask, (traj.n_frames, columns.n_atoms))
+        return
+
+    if chunk_size is None:
+        chunk_size = max(1, 10_000_000 // max(columns.n_atoms, 1))
+    memo = {}
+    for start in range(0, traj.n_frames, chunk_size):
+        evaluator = _MaskEvaluator(columns, traj[start : start + chunk_size], periodic, memo, dynamic)
+        mask = evaluator.truth(astnode)
+        yield np.broadcast_to(mask, (evaluator.traj.n_frames, columns.n_atoms))
+
+
 class parse_selection:
     """Parse an atom selection expression
 
@@ -338,11 +990,32 @@ class parse_selection:
     >>> source
     '(atom.residue.is_protein and (atom.element.symbol == CA))'
     >>> <_ast.BoolOp at 0x103969d50>
+
+    Notes
+    -----
+    Parsed selections are cached by selection string, so the returned
+    object is shared between calls and must not be modified. See
+    ``cache_info`` and ``set_selection_cache_size``.
     """
 
     def __init__(self):
         self.is_initialized = False
         self.expression = None
+        self._cache = LRUCache(_SELECTION_CACHE_SIZE)
+
+    def cache_info(self):
+        """Statistics of the parsed selection cache
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of ``(hits, misses, maxsize, currsize)``.
+        """
+        return self._cache.info()
+
+    def cache_clear(self):
+        """Forget all parsed selections"""
+        self._cache.clear()
 
     def _initialize(self):
         def keywords(klass):
@@ -356,7 +1029,8 @@ class parse_selection:
         # literals include words made of alphanumerics, numbers,
         # or quoted strings but we exclude any of the logical
         # operands (e.g. 'or') from being parsed literals
-        literal = ~(keywords(BinaryInfixOperand) | keywords(UnaryInfixOperand)) + (
+        reserved = MatchFirst([Keyword(kw) for kw in ["within", "around", "of", "same", "as"]])
+        literal = ~(keywords(BinaryInfixOperand) | keywords(UnaryInfixOperand) | reserved) + (
             Word(NUMS) | quotedString | Word(alphas, alphanums)
         )
         literal.setParseAction(Literal)
@@ -379,9 +1053,18 @@ class parse_selection:
         in_list_condition.setParseAction(InListCondition)
 
         expression = range_condition | in_list_condition | base_expression
+
+        # 'within 0.5 of resname LIG' and 'same residue as <expression>'
+        # bind tighter than 'not', so 'not within 0.5 of protein' works
+        distance_op = keywords(DistanceCondition) + literal + Keyword("of")
+        same_residue_op = Keyword("same") + Keyword("residue") + Keyword("as")
+        prefix = [
+            (distance_op, DistanceCondition.n_terms, opAssoc.RIGHT, DistanceCondition),
+            (same_residue_op, SameResidueCondition.n_terms, opAssoc.RIGHT, SameResidueCondition),
+        ]
         logical_expr = infixNotation(
             expression,
-            infix(UnaryInfixOperand) + infix(BinaryInfixOperand) + infix(RegexInfixOperand),
+            prefix + infix(UnaryInfixOperand) + infix(BinaryInfixOperand) + infix(RegexInfixOperand),
         )
 
         self.expression = logical_expr
@@ -390,6 +1073,13 @@ class parse_selection:
         self.transformer = _RewriteNames()
 
     def __call__(self, selection):
+        parsed = self._cache.get(selection)
+        if parsed is None:
+            parsed = self._parse(selection)
+            self._cache.put(selection, parsed)
+        return parsed
+
+    def _parse(self, selection):
         if not self.is_initialized:
             self._initialize()
 
@@ -61,7 +61,15 @@ from mdtraj.core.residue_names import (
     _PROTEIN_RESIDUES,
     _WATER_RESIDUES,
 )
-from mdtraj.core.selection import parse_selection
+from mdtraj.core.selection import (
+    AtomColumns,
+    CacheInfo,
+    LRUCache,
+    UnsupportedSelection,
+    get_selection_cache_size,
+    parse_selection,
+    selection_mask,
+)
 from mdtraj.utils import ensure_type, ilen, import_
 from mdtraj.utils.singleton import Singleton
 
@@ -73,6 +81,100 @@ if TYPE_CHECKING:
     import mdtraj as md
 
 
+class TopologyArrays(
+    namedtuple(
+        "TopologyArrays",
+        [
+            "atom_name",
+            "atom_element",
+            "atom_residue",
+            "atom_chain",
+            "atom_serial",
+            "atom_formal_charge",
+            "residue_name",
+            "residue_resSeq",
+            "residue_segment_id",
+            "residue_chain",
+            "chain_id",
+            "bonds",
+        ],
+    ),
+):
+    """Columnar (struct-of-arrays) view of a Topology
+
+    Every field is a read-only numpy array, indexed by atom, residue or
+    chain index. Obtain one with ``Topology.arrays``.
+
+    Attributes
+    ----------
+    atom_name : np.ndarray, shape=(n_atoms,), dtype=str
+        The name of each atom.
+    atom_element : np.ndarray, shape=(n_atoms,), dtype=object
+        The ``Element`` of each atom.
+    atom_residue : np.ndarray, shape=(n_atoms,), dtype=np.intp
+        The index of the residue each atom belongs to.
+    atom_chain : np.ndarray, shape=(n_atoms,), dtype=np.intp
+        The index of the chain each atom belongs to.
+    atom_serial : np.ndarray, shape=(n_atoms,), dtype=np.int64
+        The serial number of each atom, or -1 if it has none.
+    atom_formal_charge : np.ndarray, shape=(n_atoms,), dtype=np.float64
+        The formal charge of each atom, or NaN if it has none.
+    residue_name : np.ndarray, shape=(n_residues,), dtype=str
+        The name of each residue.
+    residue_resSeq : np.ndarray, shape=(n_residues,), dtype=np.int64
+        The sequence number of each residue.
+    residue_segment_id : np.ndarray, shape=(n_residues,), dtype=str
+        The segment label of each residue.
+    residue_chain : np.ndarray, shape=(n_residues,), dtype=np.intp
+        The index of the chain each residue belongs to.
+    chain_id : np.ndarray, shape=(n_chains,), dtype=object
+        The PDB chainID of each chain (which may be None).
+    bonds : np.ndarray, shape=(n_bonds, 2), dtype=np.intp
+        The indices of the two atoms in each bond.
+    """
+
+    __slots__ = ()
+
+
+class TopologyConnectivity(
+    namedtuple(
+        "TopologyConnectivity",
+        ["adjacency", "atom_molecule", "molecules", "sorted_bonds"],
+    ),
+):
+    """Bond graph of a Topology and the molecules it defines
+
+    Obtain one with ``Topology.connectivity``. Like ``Topology.arrays``, it
+    is built on first access and cached until the topology is modified.
+
+    Attributes
+    ----------
+    adjacency : scipy.sparse.csr_matrix, shape=(n_atoms, n_atoms), dtype=bool
+        Symmetric adjacency matrix of the bond graph.
+    atom_molecule : np.ndarray, shape=(n_atoms,), dtype=np.int32
+        The index of the molecule each atom belongs to. Molecules are
+        numbered in order of their lowest atom index, and an atom without
+        bonds is a molecule of its own.
+    molecules : list of np.ndarray, dtype=np.int32
+        The sorted atom indices of each molecule.
+    sorted_bonds : np.ndarray, shape=(n_tree_bonds, 2), dtype=np.int32
+        Breadth-first spanning tree of every molecule. The first atom of
+        each bond is always reached by an earlier bond (or is the root of
+        its molecule), which is the order ``Trajectory.make_molecules_whole``
+        needs.
+    """
+
+    __slots__ = ()
+
+
+def _float_or_nan(value) -> float:
+    """``float(value)``, or NaN for a missing value (None or ``pandas.NA``)"""
+    try:
+        return float(value)
+    except TypeError:
+        return np.nan
+
+
 def _topology_from_subset(topology: Topology, atom_indices: list[int]) -> Topology:
     """Create a new topology that only contains the supplied indices
 
@@ -89,80 +191,128 @@ def _topology_from_subset(topology: Topology, atom_indices: list[int]) -> Topolo
     atom_indices : array_like, dtype=int
         The indices of the atoms to keep
     """
-    np_indices = np.array(atom_indices)
+    np_indices = np.asarray(atom_indices, dtype=np.intp).reshape(-1)
     if len(np_indices) > 1:
         if (np_indices[1:] - np_indices[:-1]).min() < 1:
             warnings.warn("atom_indices are not monotonically increasing")
         if len(np.unique(np_indices)) < len(np_indices):
             warnings.warn("atom_indices are not unique")
 
+    # membership is tested against a boolean mask rather than the index
+    # list itself, which keeps this linear in the size of the topology.
+    # indices that don't name an atom are ignored.
+    n_atoms = topology.n_atoms
+    arrays = topology.arrays
+    keep = np.zeros(n_atoms, dtype=bool)
+    keep[np_indices[(np_indices >= 0) & (np_indices < n_atoms)]] = True
+    keep_residue = np.zeros(topology.n_residues, dtype=bool)
+    keep_residue[arrays.atom_residue[keep]] = True
+    keep_atom = keep.tolist()
+    keep_residue = keep_residue.tolist()
+
+    # build the new tree directly, skipping empty residues and chains, and
+    # numbering atoms in chain/residue order like add_atom() would
     newTopology = Topology()
-    old_atom_to_new_atom: dict[Atom, Atom] = {}
-
+    new_atoms = newTopology._atoms
+    new_residues = newTopology._residues
+    old_to_new = np.full(n_atoms, -1, dtype=np.intp)
     for chain in topology._chains:
-        newChain = newTopology.add_chain()
-        newChain.chain_id = chain.chain_id
-        for residue in chain._residues:
-            resSeq = getattr(residue, "resSeq", residue.index)
-            newResidue = None
+        residues = [r for r in chain._residues if keep_residue[r.index]]
+        if not residues:
+            continue
+        newChain = Chain(len(newTopology._chains), newTopology, chain.chain_id)
+        newTopology._chains.append(newChain)
+        for residue in residues:
+            newResidue = Residue(residue.name, len(new_residues), newChain, residue.resSeq, residue.segment_id)
+            new_residues.append(newResidue)
+            newChain._residues.append(newResidue)
+            residue_atoms = newResidue._atoms
             for atom in residue._atoms:
-                if atom.index in atom_indices:
-                    try:  # OpenMM Topology objects don't have serial attributes, so we have to check first.
-                        serial = atom.serial
-                    except AttributeError:
-                        serial = None
-                    if newResidue is None:
-                        newResidue = newTopology.add_residue(
-                            residue.name,
-                            newChain,
-                            resSeq,
-                            residue.segment_id,
-                        )
-                    newAtom = newTopology.add_atom(
-                        atom.name,
-                        atom.element,
-                        newResidue,
-                        serial=serial,
-                    )
-                    old_atom_to_new_atom[atom] = newAtom
+                if keep_atom[atom.index]:
+                    old_to_new[atom.index] = len(new_atoms)
+                    newAtom = Atom(atom.name, atom.element, len(new_atoms), newResidue, serial=atom.serial)
+                    new_atoms.append(newAtom)
+                    residue_atoms.append(newAtom)
+    newTopology._numAtoms = len(new_atoms)
+    newTopology._numResidues = len(new_residues)
+
+    # we only put bonds into the new topology if both of their partners
+    # were indexed and thus HAVE a new atom
+    pairs = old_to_new[arrays.bonds]
+    retained = np.flatnonzero((pairs >= 0).all(axis=1))
+    pairs = np.sort(pairs[retained], axis=1).tolist()
+    old_bonds = topology._bonds
+    newTopology._bonds = [
+        Bond(new_atoms[a], new_atoms[b], type=old_bonds[i].type, order=old_bonds[i].order)
+        for i, (a, b) in zip(retained.tolist(), pairs)
+    ]
 
-    bondsiter: Iterable[Bond] | Callable[[], Iterable[Bond]] = topology.bonds
-    if not hasattr(bondsiter, "__iter__"):
-        bondsiter = bondsiter()
+    return newTopology
 
-    for bond in bondsiter:
-        try:
-            atom1, atom2 = bond
-            newTopology.add_bond(
-                old_atom_to_new_atom[atom1],
-                old_atom_to_new_atom[atom2],
-                type=bond.type,
-                order=bond.order,
-            )
-        except KeyError:
-            pass
-            # we only put bonds into the new topology if both of their partners
-            # were indexed and thus HAVE a new atom
-
-    # Delete empty residues
-    newTopology._residues = [r for r in newTopology._residues if len(r._atoms) > 0]
-    for chain in newTopology._chains:
-        chain._residues = [r for r in chain._residues if len(r._atoms) > 0]
-
-    # Delete empty chains
-    newTopology._chains = [c for c in newTopology._chains if len(c._residues) > 0]
-    # Re-set the numAtoms and numResidues
-    newTopology._numAtoms = ilen(newTopology.atoms)
-    newTopology._numResidues = ilen(newTopology.residues)
-
-    # Reset the chain indices
-    for i, chain in enumerate(newTopology.chains):
-        chain.index = i
-    # Reset the residue indices
-    for i, res in enumerate(newTopology.residues):
-        res.index = i
 
-    return newTopology
+def _product_blocks(a_indices, b_indices, chunk_size=None):
+    """Yield the pairs (a, b) for a in a_indices and b in b_indices, a-major"""
+    if len(a_indices) == 0 or len(b_indices) == 0:
+        return
+    rows = len(a_indices) if chunk_size is None else max(1, chunk_size // len(b_indices))
+    for start in range(0, len(a_indices), rows):
+        a = a_indices[start : start + rows]
+        yield np.column_stack((np.repeat(a, len(b_indices)), np.tile(b_indices, len(a))))
+
+
+def _combination_blocks(indices, chunk_size=None):
+    """Yield the pairs (indices[i], indices[j]) for i < j, ordered by i and then j"""
+    n = len(indices)
+    if n < 2:
+        return
+    if chunk_size is None:
+        i, j = np.triu_indices(n, k=1)
+        yield np.column_stack((indices[i], indices[j]))
+        return
+    # row i holds the n - 1 - i pairs starting at offset starts[i]; cut the
+    # rows into runs of about chunk_size pairs each
+    counts = np.arange(n - 1, 0, -1)
+    starts = np.cumsum(counts) - counts
+    start = 0
+    while start < n - 1:
+        stop = max(start + 1, int(np.searchsorted(starts, starts[start] + chunk_size)))
+        i = np.repeat(np.arange(start, stop), counts[start:stop])
+        j = i + 1 + np.arange(len(i)) - (starts[i] - starts[start])
+        yield np.column_stack((indices[i], indices[j]))
+        start = stop
+
+
+def _pair_blocks(a_indices, b_indices, chunk_size=None):
+    """Yield the unique pairs between two sorted index arrays in blocks
+
+    This backs ``Topology.select_pairs`` and ``Topology.iter_select_pairs``.
+    With ``chunk_size=None`` every block is as large as it can be.
+    """
+    # Create unique pairs from the indices.
+    if np.array_equal(a_indices, b_indices):
+        yield from _combination_blocks(a_indices, chunk_size)
+    elif len(np.intersect1d(a_indices, b_indices)) == 0:
+        yield from _product_blocks(a_indices, b_indices, chunk_size)
+    else:
+        yield from _overlapping_pair_blocks(a_indices, b_indices, chunk_size)
+
+
+def _overlapping_pair_blocks(a_indices, b_indices, chunk_size=None):
+    """Yield the unique pairs between two overlapping index arrays, larger index first"""
+    # Split the indices into those in both selections and those in only one.
+    # Every unordered pair then comes from exactly one of the four groups
+    # below, so nothing needs to be deduplicated.
+    a_indices, b_indices = np.unique(a_indices), np.unique(b_indices)
+    common = np.intersect1d(a_indices, b_indices, assume_unique=True)
+    a_only = np.setdiff1d(a_indices, common, assume_unique=True)
+    b_only = np.setdiff1d(b_indices, common, assume_unique=True)
+    for block in itertools.chain(
+        _product_blocks(a_only, b_only, chunk_size),
+        _product_blocks(a_only, common, chunk_size),
+        _product_blocks(common, b_only, chunk_size),
+        _combination_blocks(common, chunk_size),
+    ):
+        yield np.column_stack((block.max(axis=1), block.min(axis=1)))
 
 
 class Topology:
@@ -214,6 +364,19 @@ class Topology:
     """
 
     _standardBonds: dict = {}
+    # _standardBonds compiled into (from offset, from name, to offset, to
+    # name) tables; the offset is -1, 0 or +1 residues along the chain
+    _standardBondTables: dict = {}
+    # columnar view and selection results, built on first use. _version
+    # counts the changes made through invalidate_caches() and _cache_version
+    # is the version the caches were built for; they are dropped on the next
+    # access once the two differ
+    _arrays: TopologyArrays | None = None
+    _columns: AtomColumns | None = None
+    _selection_cache: LRUCache | None = None
+    _connectivity: TopologyConnectivity | None = None
+    _version: int = 0
+    _cache_version: int = 0
 
     def __init__(self) -> None:
         """Create a new Topology object"""
@@ -249,18 +412,32 @@ class Topology:
         out : Topology
             A copy of this topology
         """
+        # build the new tree directly rather than through add_atom() and
+        # friends, numbering atoms in chain/residue order like they would
         out = Topology()
-        for chain in self.chains:
-            c = out.add_chain()
-            c.chain_id = chain.chain_id
-            for residue in chain.residues:
-                r = out.add_residue(residue.name, c, residue.resSeq, residue.segment_id)
-                for atom in residue.atoms:
-                    out.add_atom(atom.name, atom.element, r, serial=atom.serial)
+        new_atoms = out._atoms
+        new_residues = out._residues
+        for chain in self._chains:
+            c = Chain(len(out._chains), out, chain.chain_id)
+            out._chains.append(c)
+            for residue in chain._residues:
+                r = Residue(residue.name, len(new_residues), c, residue.resSeq, residue.segment_id)
+                new_residues.append(r)
+                c._residues.append(r)
+                residue_atoms = r._atoms
+                for atom in residue._atoms:
+                    a = Atom(atom.name, atom.element, len(new_atoms), r, serial=atom.serial)
+                    new_atoms.append(a)
+                    residue_atoms.append(a)
+        out._numAtoms = len(new_atoms)
+        out._numResidues = len(new_residues)
 
-        for bond in self.bonds:
+        for bond in self._bonds:
             a1, a2 = bond
-            out.add_bond(a1, a2, type=bond.type, order=bond.order)
+            if a1.index < a2.index:
+                out._bonds.append(Bond(a1, a2, type=bond.type, order=bond.order))
+            else:
+                out._bonds.append(Bond(a2, a1, type=bond.type, order=bond.order))
 
         return out
 
@@ -270,6 +447,13 @@ class Topology:
     def __deepcopy__(self, *args) -> Topology:
         return self.copy()
 
+    def __getstate__(self) -> dict:
+        # cached arrays and selections are rebuilt on demand, so don't pickle them
+        state = self.__dict__.copy()
+        for key in ("_arrays", "_columns", "_selection_cache", "_connectivity"):
+            state.pop(key, None)
+        return state
+
     def __hash__(self) -> int:
         hash_value = hash(tuple(self._chains))
         hash_value ^= hash(tuple(self._atoms))
@@ -504,50 +688,44 @@ class Topology:
             The atom indices and order are integers cast to float
         """
         pd = import_("pandas")
-        data = [
-            (
-                atom.serial,
-                atom.name,
-                atom.element.symbol,
-                atom.residue.resSeq,
-                atom.residue.name,
-                atom.residue.chain.index,
-                atom.segment_id,
-                atom.formal_charge,
-            )
-            for atom in self.atoms
-        ]
+        arrays = self.arrays
+        atom_residue = arrays.atom_residue
+
+        element_codes, elements = pd.factorize(arrays.atom_element)
+        symbols = np.array([e.symbol for e in elements], dtype=object)
+
+        serial = arrays.atom_serial
+        if (serial == -1).any():
+            # atoms without a serial number; let pandas infer the column
+            # from the original values, as it always has
+            serial = [atom.serial for atom in self._atoms]
 
         atoms = pd.DataFrame(
-            data,
-            columns=[
-                "serial",
-                "name",
-                "element",
-                "resSeq",
-                "resName",
-                "chainID",
-                "segmentID",
-                "formal_charge",
-            ],
+            {
+                "serial": serial,
+                "name": arrays.atom_name.astype(object),
+                "element": symbols[element_codes],
+                "resSeq": arrays.residue_resSeq[atom_residue],
+                "resName": arrays.residue_name.astype(object)[atom_residue],
+                "chainID": arrays.atom_chain.astype(np.int64),
+                "segmentID": arrays.residue_segment_id.astype(object)[atom_residue],
+                # Using Int64 makes the data type integer
+                # but allows for NA values in the column
+                "formal_charge": pd.array(arrays.atom_formal_charge, dtype="Float64").astype("Int64"),
+            },
         )
 
-        # Using Int64 makes the data type integer
-        # but allows for NA values in the column
-        atoms = atoms.astype({"formal_charge": "Int64"})
-
-        bonds: NDArray[np.float64] = np.zeros([len(self._bonds), 4], dtype=float)
-        for index, bond in enumerate(self.bonds):
-            if bond.order is None:
-                order = 0.0
-            else:
-                order = bond.order
+        def _bond_type(bond):
             try:
-                bond_type = float(bond.type) if bond.type is not None else 0.0
+                return float(bond.type) if bond.type is not None else 0.0
             except TypeError:
                 # Trap the None case
-                bond_type = 0.0
-            bonds[index] = bond.atom1.index, bond.atom2.index, bond_type, order
+                return 0.0
+
+        bonds: NDArray[np.float64] = np.zeros([len(self._bonds), 4], dtype=float)
+        bonds[:, :2] = arrays.bonds
+        bonds[:, 2] = [_bond_type(bond) for bond in self._bonds]
+        bonds[:, 3] = [0.0 if bond.order is None else bond.order for bond in self._bonds]
         return atoms, bonds
 
     @classmethod
@@ -621,60 +799,75 @@ class Topology:
                 "atoms must be uniquely numbered starting from zero.",
             )
 
-        out._atoms = [None for i in range(len(atoms))]  # type: ignore
-
-        c = None
-        r = None
-        previous_chainID = None
-        previous_resName = None
-        previous_resSeq = None
-        for atom_index, atom in atoms.iterrows():
-            int(atom_index)  # Fixes bizarre hashing issue on Py3K.  See #545
-
-            if atom["chainID"] != previous_chainID:
-                previous_chainID = atom["chainID"]
-
-                c = out.add_chain()
-
-            if (
-                atom["resSeq"] != previous_resSeq or atom["resName"] != previous_resName or c.n_atoms == 0  # type: ignore
-            ):
-                previous_resSeq = atom["resSeq"]
-                previous_resName = atom["resName"]
-
-                r = out.add_residue(
-                    atom["resName"],
-                    c,  # type: ignore
-                    atom["resSeq"],
-                    atom["segmentID"],
-                )
-
-            a = Atom(
-                atom["name"],
-                elem.get_by_symbol(atom["element"]),
-                atom_index,
-                r,  # type: ignore
-                serial=atom["serial"],
-                formal_charge=atom["formal_charge"],
+        # A new chain starts wherever chainID changes, and a new residue
+        # wherever the chain, resSeq or resName changes. Compare neighbouring
+        # rows column by column instead of walking the rows one at a time.
+        n_atoms = len(atoms)
+        chain_ids = atoms["chainID"].to_numpy()
+        res_seqs = atoms["resSeq"].to_numpy()
+        res_names = atoms["resName"].to_numpy()
+        new_chain = np.ones(n_atoms, dtype=bool)
+        new_chain[1:] = chain_ids[1:] != chain_ids[:-1]
+        new_residue = new_chain.copy()
+        new_residue[1:] |= (res_seqs[1:] != res_seqs[:-1]) | (res_names[1:] != res_names[:-1])
+        residue_starts = np.flatnonzero(new_residue)
+        residue_chain = (np.cumsum(new_chain) - 1)[residue_starts].tolist()
+        atom_residue = (np.cumsum(new_residue) - 1).tolist()
+
+        chains = [out.add_chain() for _ in range(int(new_chain.sum()))]
+        residue_rows = atoms.iloc[residue_starts]
+        residues = []
+        for index, (name, chain_index, resSeq, segment_id) in enumerate(
+            zip(
+                residue_rows["resName"].tolist(),
+                residue_chain,
+                residue_rows["resSeq"].tolist(),
+                residue_rows["segmentID"].tolist(),
+            ),
+        ):
+            chain = chains[chain_index]
+            r = Residue(name, index, chain, resSeq, segment_id)
+            chain._residues.append(r)
+            residues.append(r)
+        out._residues = residues
+        out._numResidues = len(residues)
+
+        # look up each distinct element symbol once
+        element_codes, symbols = pd.factorize(atoms["element"], use_na_sentinel=False)
+        elements = [elem.get_by_symbol(symbol) for symbol in symbols]
+
+        out._atoms = [
+            Atom(name, elements[code], index, residues[residue_index], serial=serial, formal_charge=formal_charge)
+            for index, (name, code, residue_index, serial, formal_charge) in enumerate(
+                zip(
+                    atoms["name"].tolist(),
+                    element_codes.tolist(),
+                    atom_residue,
+                    atoms["serial"].tolist(),
+                    atoms["formal_charge"].tolist(),
+                ),
             )
-            out._atoms[atom_index] = a
-            r._atoms.append(a)  # type: ignore
+        ]
+        for r, start, stop in zip(residues, residue_starts.tolist(), [*residue_starts[1:].tolist(), n_atoms]):
+            r._atoms.extend(out._atoms[start:stop])
+        out._numAtoms = n_atoms
+
+        if len(bonds):
+            pairs = bonds[:, :2].astype(int).tolist()
+            if bonds.shape[1] >= 4:
+                types = [float_to_bond_type(value) for value in bonds[:, 2]]
+                orders = [int(value) or None for value in bonds[:, 3]]
+            else:
+                types = orders = [None] * len(bonds)  # type: ignore
+            out_atoms = out._atoms
+            for (ai1, ai2), bond_type, bond_order in zip(pairs, types, orders):
+                atom1, atom2 = out_atoms[ai1], out_atoms[ai2]
+                if atom1.index < atom2.index:
+                    out._bonds.append(Bond(atom1, atom2, type=bond_type, order=bond_order))
+                else:
+                    out._bonds.append(Bond(atom2, atom1, type=bond_type, order=bond_order))
 
-        for bond in bonds:
-            ai1 = int(bond[0])
-            ai2 = int(bond[1])
-            try:
-                bond_type = float_to_bond_type(bond[2])
-                bond_order: int | None = int(bond[3])
-                if bond_order == 0:
-                    bond_order = None
-            except IndexError:
-                # Does not exist
-                bond_type = None
-                bond_order = None
-            out.add_bond(out.atom(ai1), out.atom(ai2), bond_type, bond_order)
-
-        out._numAtoms = out.n_atoms
+        out.invalidate_caches()
         return out
 
     def to_bondgraph(self) -> nx.Graph:
@@ -771,6 +964,7 @@ class Topology:
         """
         chain = Chain(len(self._chains), self, chain_id)
         self._chains.append(chain)
+        self.invalidate_caches()
         return chain
 
     def add_residue(self, name: str, chain: Chain, resSeq: int | None = None, segment_id: str = "") -> Residue:
@@ -801,6 +995,7 @@ class Topology:
         self._residues.append(residue)
         self._numResidues += 1
         chain._residues.append(residue)
+        self.invalidate_caches()
         return residue
 
     def insert_atom(
@@ -854,6 +1049,7 @@ class Topology:
             residue._atoms.append(atom)
         else:
             residue._atoms.insert(rindex, atom)
+        self.invalidate_caches()
         return atom
 
     def delete_atom_by_index(self, index: int) -> None:
@@ -881,6 +1077,7 @@ class Topology:
         a.residue._atoms.remove(a)
         self._atoms.remove(a)
         self._numAtoms -= 1
+        self.invalidate_caches()
 
     def add_atom(
         self,
@@ -923,6 +1120,7 @@ class Topology:
         self._atoms.append(atom)
         self._numAtoms += 1
         residue._atoms.append(atom)
+        self.invalidate_caches()
         return atom
 
     def add_bond(
@@ -949,6 +1147,7 @@ class Topology:
             self._bonds.append(Bond(atom1, atom2, type=type, order=order))
         else:
             self._bonds.append(Bond(atom2, atom1, type=type, order=order))
+        self.invalidate_caches()
 
     def chain(self, index: int) -> Chain:
         """Get a specific chain by index.  These indices
@@ -1090,65 +1289,275 @@ class Topology:
         """Get the number of bonds in the Topology"""
         return len(self._bonds)
 
+    @property
+    def arrays(self) -> TopologyArrays:
+        """Columnar view of the atoms, residues, chains and bonds
+
+        The arrays are built on first access and cached until the topology
+        is modified, so bulk operations can work on whole columns instead
+        of iterating over Atom objects. Edits made directly to Atom,
+        Residue or Chain attributes are not tracked; see
+        ``invalidate_caches``.
+
+        Returns
+        -------
+        arrays : TopologyArrays
+            Read-only arrays indexed by atom, residue or chain index.
+
+        Examples
+        --------
+        >>> arrays = topology.arrays
+        >>> ca = np.flatnonzero(arrays.atom_name == 'CA')
+        >>> resnames = arrays.residue_name[arrays.atom_residue[ca]]
+        """
+        self._check_caches()
+        if self._arrays is None:
+            self._arrays = self._build_arrays()
+        return self._arrays
+
+    def _build_arrays(self) -> TopologyArrays:
+        atoms = self._atoms
+        residues = self._residues
+        n_atoms, n_residues = len(atoms), len(residues)
+
+        atom_residue = np.fromiter((a.residue.index for a in atoms), dtype=np.intp, count=n_atoms)
+        residue_chain = np.fromiter((r.chain.index for r in residues), dtype=np.intp, count=n_residues)
+        atom_element = np.empty(n_atoms, dtype=object)
+        atom_element[:] = [a.element for a in atoms]
+        chain_id = np.empty(len(self._chains), dtype=object)
+        chain_id[:] = [c.chain_id for c in self._chains]
+
+        arrays = TopologyArrays(
+            atom_name=np.array([a.name for a in atoms], dtype=str),
+            atom_element=atom_element,
+            atom_residue=atom_residue,
+            atom_chain=residue_chain[atom_residue],
+            atom_serial=np.fromiter(
+                (-1 if a.serial is None else a.serial for a in atoms),
+                dtype=np.int64,
+                count=n_atoms,
+            ),
+            atom_formal_charge=np.fromiter(
+                (_float_or_nan(a.formal_charge) for a in atoms),
+                dtype=np.float64,
+                count=n_atoms,
+            ),
+            residue_name=np.array([r.name for r in residues], dtype=str),
+            residue_resSeq=np.fromiter((r.resSeq for r in residues), dtype=np.int64, count=n_residues),
+            residue_segment_id=np.array([r.segment_id for r in residues], dtype=str),
+            residue_chain=residue_chain,
+            chain_id=chain_id,
+            bonds=np.array(
+                [(b[0].index, b[1].index) for b in self._bonds],
+                dtype=np.intp,
+            ).reshape(-1, 2),
+        )
+        for array in arrays:
+            array.flags.writeable = False
+        return arrays
+
+    @property
+    def connectivity(self) -> TopologyConnectivity:
+        """Bond graph, molecules and molecule spanning trees
+
+        The graph is built once with ``scipy.sparse.csgraph`` and cached
+        until the topology is modified, so ``find_molecules``,
+        ``Trajectory.image_molecules`` and ``Trajectory.make_molecules_whole``
+        can share it.
+
+        Returns
+        -------
+        connectivity : TopologyConnectivity
+            The adjacency matrix, per-atom molecule labels, molecule atom
+            indices and spanning-tree bond order.
+        """
+        self._check_caches()
+        if self._connectivity is None:
+            self._connectivity = self._build_connectivity()
+        return self._connectivity
+
+    def _build_connectivity(self) -> TopologyConnectivity:
+        from scipy.sparse import csgraph, csr_matrix
+
+        n_atoms = self.n_atoms
+        bonds = self.arrays.bonds
+        rows = np.concatenate([bonds[:, 0], bonds[:, 1]])
+        cols = np.concatenate([bonds[:, 1], bonds[:, 0]])
+        adjacency = csr_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, cols)),
+            shape=(n_atoms, n_atoms),
+        )
+        n_molecules, atom_molecule = csgraph.connected_components(adjacency, directed=False)
+        atom_molecule = atom_molecule.astype(np.int32)
+
+        order = np.argsort(atom_molecule, kind="stable").astype(np.int32)
+        bounds = np.cumsum(np.bincount(atom_molecule, minlength=n_molecules))[:-1]
+        molecules = np.split(order, bounds) if n_atoms else []
+
+        # a single breadth-first search from a virtual root bonded to the
+        # first atom of every molecule spans all of the molecules at once
+        roots = order[np.concatenate([[0], bounds])] if n_atoms else order
+        graph = csr_matrix(
+            (
+                np.ones(len(rows) + len(roots), dtype=bool),
+                (np.concatenate([rows, roots]), np.concatenate([cols, np.full(len(roots), n_atoms)])),
+            ),
+            shape=(n_atoms + 1, n_atoms + 1),
+        )
+        nodes, predecessors = csgraph.breadth_first_order(
+            graph,
+            n_atoms,
+            directed=False,
+            return_predecessors=True,
+        )
+        parents = predecessors[nodes]
+        in_tree = (parents >= 0) & (parents != n_atoms)
+        sorted_bonds = np.column_stack([parents[in_tree], nodes[in_tree]]).astype(np.int32)
+
+        for array in [atom_molecule, sorted_bonds, *molecules]:
+            array.flags.writeable = False
+        return TopologyConnectivity(
+            adjacency=adjacency,
+            atom_molecule=atom_molecule,
+            molecules=molecules,
+            sorted_bonds=sorted_bonds,
+        )
+
+    def invalidate_caches(self) -> None:
+        """Drop the cached arrays, connectivity and selection results
+
+        The Topology methods that change it (``add_atom``, ``add_bond``,
+        ``delete_atom_by_index`` and so on) call this themselves. Editing
+        an attribute of an existing Atom, Residue or Chain in place, such
+        as ``atom.name = 'CA'``, is not tracked: call this afterwards if
+        ``arrays``, ``select`` or the other cached views were already used.
+
+        The caches are only rebuilt on their next use, so this is cheap to
+        call after every edit.
+        """
+        self._version += 1
+
+    def _check_caches(self) -> None:
+        if self._cache_version != self._version:
+            self._arrays = None
+            self._columns = None
+            self._connectivity = None
+            if self._selection_cache is not None:
+                self._selection_cache.clear()
+            self._cache_version = self._version
+
+    def _atom_columns(self) -> AtomColumns:
+        """Per-atom selection attributes, cached alongside ``arrays``"""
+        self._check_caches()
+        if self._columns is None:
+            self._columns = AtomColumns(self.arrays)
+        return self._columns
+
+    @classmethod
+    def _standard_bond_tables(cls) -> dict[str, list[tuple[int, str, int, str]]]:
+        """Standard bond definitions from residues.xml, parsed once per process"""
+        if len(Topology._standardBondTables) == 0:
+            if len(Topology._standardBonds) == 0:
+                # Load the standard bond defitions.
+
+                tree = etree.parse(
+                    os.path.join(
+                        os.path.dirname(__file__),
+                        "..",
+                        "formats",
+                        "pdb",
+                        "data",
+                        "residues.xml",
+                    ),
+                )
+                for residue in tree.getroot().findall("Residue"):
+                    bonds: list[tuple[str, str]] = []
+                    Topology._standardBonds[residue.attrib["name"]] = bonds
+                    for bond in residue.findall("Bond"):
+                        bonds.append((bond.attrib["from"], bond.attrib["to"]))
+
+            def split(name):
+                if name.startswith("-"):
+                    return -1, name[1:]
+                if name.startswith("+"):
+                    return 1, name[1:]
+                return 0, name
+
+            for name, bonds in Topology._standardBonds.items():
+                Topology._standardBondTables[name] = [(*split(bond[0]), *split(bond[1])) for bond in bonds]
+        return Topology._standardBondTables
+
     def create_standard_bonds(self) -> None:
         """Create bonds based on the atom and residue names for all standard residue types."""
-        if len(Topology._standardBonds) == 0:
-            # Load the standard bond defitions.
-
-            tree = etree.parse(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "..",
-                    "formats",
-                    "pdb",
-                    "data",
-                    "residues.xml",
-                ),
-            )
-            for residue in tree.getroot().findall("Residue"):
-                bonds: list[tuple[str, str]] = []
-                Topology._standardBonds[residue.attrib["name"]] = bonds
-                for bond in residue.findall("Bond"):
-                    bonds.append((bond.attrib["from"], bond.attrib["to"]))
-        for chain in self._chains:
-            # First build a map of atom names to atoms.
-
-            atomMaps = []
-            for residue in chain._residues:
-                atomMap: dict[str, Atom] = {}
-                atomMaps.append(atomMap)
-                for atom in residue._atoms:
-                    atomMap[atom.name] = atom
-
-            # Loop over residues and construct bonds.
-
-            for i in range(len(chain._residues)):
-                name = chain._residues[i].name
-                if name in Topology._standardBonds:
-                    for bond in Topology._standardBonds[name]:
-                        if bond[0].startswith("-") and i > 0:
-                            fromResidue = i - 1
-                            fromAtom = bond[0][1:]
-                        elif bond[0].startswith("+") and i < len(chain._residues):
-                            fromResidue = i + 1
-                            fromAtom = bond[0][1:]
-                        else:
-                            fromResidue = i
-                            fromAtom = bond[0]
-                        if bond[1].startswith("-") and i > 0:
-                            toResidue = i - 1
-                            toAtom = bond[1][1:]
-                        elif bond[1].startswith("+") and i < len(chain._residues):
-                            toResidue = i + 1
-                            toAtom = bond[1][1:]
-                        else:
-                            toResidue = i
-                            toAtom = bond[1]
-                        if fromAtom in atomMaps[fromResidue] and toAtom in atomMaps[toResidue]:
-                            self.add_bond(
-                                atomMaps[fromResidue][fromAtom],
-                                atomMaps[toResidue][toAtom],
-                            )
+        tables = self._standard_bond_tables()
+
+        # Residues in chain order, and whether each one starts or ends its
+        # chain (a "-" or "+" bond at a chain end looks up the literal name).
+        # This runs while a topology is being loaded, so it reads the Atom
+        # objects directly rather than building Topology.arrays.
+        residues = [r for c in self._chains for r in c._residues]
+        atoms = [a for r in residues for a in r._atoms]
+        if not atoms:
+            return
+        chain = np.fromiter((r.chain.index for r in residues), dtype=np.intp, count=len(residues))
+        first = np.ones(len(residues), dtype=bool)
+        first[1:] = chain[1:] != chain[:-1]
+        last = np.ones(len(residues), dtype=bool)
+        last[:-1] = first[1:]
+
+        # Look up atoms by (residue position, name) with a sorted array of
+        # integer keys. Among atoms with the same name, the last one in the
+        # residue wins.
+        n_residue_atoms = np.fromiter((len(r._atoms) for r in residues), dtype=np.intp, count=len(residues))
+        unique_names, atom_name = np.unique([a.name for a in atoms], return_inverse=True)
+        name_codes = {name: code for code, name in enumerate(unique_names.tolist())}
+        keys = np.repeat(np.arange(len(residues)), n_residue_atoms) * len(unique_names) + atom_name.reshape(-1)
+        key_order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[key_order]
+
+        def lookup(positions, name):
+            code = name_codes.get(name)
+            if code is None:
+                return np.full(len(positions), -1, dtype=np.intp)
+            query = positions * len(unique_names) + code
+            found = np.searchsorted(sorted_keys, query, side="right") - 1
+            return np.where((found >= 0) & (sorted_keys[found] == query), key_order[found], -1)
+
+        def endpoint(positions, offset, name):
+            if offset == 0:
+                return lookup(positions, name)
+            at_end = first[positions] if offset < 0 else last[positions]
+            found = lookup(np.where(at_end, positions, positions + offset), name)
+            if at_end.any():
+                found[at_end] = lookup(positions[at_end], ("-" if offset < 0 else "+") + name)
+            return found
+
+        # Resolve each template bond for all residues with that name at once
+        n_template = max((len(table) for table in tables.values()), default=0)
+        atom1, atom2, rank = [], [], []
+        residue_names = np.array([r.name for r in residues])
+        for name in np.unique(residue_names).tolist():
+            if name not in tables:
+                continue
+            positions = np.flatnonzero(residue_names == name)
+            for k, (from_offset, from_name, to_offset, to_name) in enumerate(tables[name]):
+                atom1.append(endpoint(positions, from_offset, from_name))
+                atom2.append(endpoint(positions, to_offset, to_name))
+                rank.append(positions * n_template + k)
+        if not rank:
+            return
+
+        # add the bonds residue by residue, in template order, with the
+        # lower atom index first like add_bond()
+        atom1, atom2, rank = np.concatenate(atom1), np.concatenate(atom2), np.concatenate(rank)
+        found = (atom1 >= 0) & (atom2 >= 0)
+        bond_order = np.argsort(rank[found], kind="stable")
+        atom1, atom2 = atom1[found][bond_order].tolist(), atom2[found][bond_order].tolist()
+        untyped = Bond._untyped
+        for a1, a2 in zip(atom1, atom2):
+            a1, a2 = atoms[a1], atoms[a2]
+            self._bonds.append(untyped(a1, a2) if a1.index < a2.index else untyped(a2, a1))
+        self.invalidate_caches()
 
     def create_disulfide_bonds(self, positions: list) -> None:
         """Identify disulfide bonds based on proximity and add them to the Topology.
@@ -1237,11 +1646,52 @@ class Topology:
         See Also
         --------
         select_expression, mdtraj.core.selection.parse_selection
+
+        Notes
+        -----
+        Results are cached per selection string until the topology is
+        modified. See ``selection_cache_info``. Edits made directly to
+        Atom, Residue or Chain attributes are not tracked; call
+        ``invalidate_caches`` after them.
         """
+        self._check_caches()
+        cache = self._selection_cache
+        if cache is None:
+            cache = self._selection_cache = LRUCache(get_selection_cache_size())
+        indices = cache.get(selection_string)
+        if indices is None:
+            indices = self._select(selection_string)
+            cache.resize(get_selection_cache_size())
+            cache.put(selection_string, indices)
+        # callers are free to modify the array they get back
+        return indices.copy()
+
+    def _select(self, selection_string: str) -> NDArray[np.integer]:
+        parsed = parse_selection(selection_string)  # type: ignore
+        try:
+            mask = selection_mask(parsed.astnode, self._atom_columns())
+        except UnsupportedSelection:
+            # evaluate atom by atom, which handles any python expression
+            filter_func = parsed.expr
+            return np.array([a.index for a in self.atoms if filter_func(a)])
+        return np.flatnonzero(mask)
+
+    def selection_cache_info(self) -> CacheInfo:
+        """Statistics of this topology's cache of selection results
 
-        filter_func = parse_selection(selection_string).expr  # type: ignore
-        indices = np.array([a.index for a in self.atoms if filter_func(a)])
-        return indices
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of ``(hits, misses, maxsize, currsize)``.
+
+        See Also
+        --------
+        mdtraj.core.selection.set_selection_cache_size
+        """
+        self._check_caches()
+        if self._selection_cache is None:
+            return CacheInfo(0, 0, get_selection_cache_size(), 0)
+        return self._selection_cache.info()
 
     def select_atom_indices(
         self,
@@ -1328,6 +1778,63 @@ class Topology:
             Each row gives the indices of two atoms.
 
         """
+        blocks = list(_pair_blocks(*self._pair_selections(selection1, selection2)))
+        if not blocks:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.concatenate(blocks)
+
+    def iter_select_pairs(
+        self,
+        selection1: str | NDArray[np.integer] | Sequence[int] | None = None,
+        selection2: str | NDArray[np.integer] | Sequence[int] | None = None,
+        chunk_size: int = 1000000,
+    ) -> Iterator[NDArray[np.integer]]:
+        """Generate unique pairs of atom indices, a block at a time.
+
+        This yields the same pairs, in the same order, as ``select_pairs``,
+        without ever holding all of them in memory.
+
+        Parameters
+        ----------
+        selection1 : str or array-like, shape=(n_indices, ), dtype=int
+            A selection for `select()` or an array of atom indices.
+        selection2 : str or array-like, shape=(n_indices, ), dtype=int
+            A selection for `select()` or an array of atom indices.
+        chunk_size : int, default=1000000
+            The approximate number of pairs in each block.
+
+        Returns
+        -------
+        pairs : generator of np.ndarray, shape=(n_pairs_in_block, 2), dtype=int
+            Each row gives the indices of two atoms.
+
+        See Also
+        --------
+        select_pairs
+        """
+        if int(chunk_size) != chunk_size or chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer. you supplied %s" % chunk_size)
+        return _pair_blocks(*self._pair_selections(selection1, selection2), chunk_size=int(chunk_size))
+
+    @classmethod
+    def _unique_pairs(cls, a_indices: NDArray[np.integer], b_indices: NDArray[np.integer]) -> NDArray[np.integer]:
+        a_indices, b_indices = np.asarray(a_indices), np.asarray(b_indices)
+        blocks = list(_overlapping_pair_blocks(a_indices, b_indices))
+        return np.concatenate(blocks) if blocks else np.zeros((0, 2), dtype=np.int64)
+
+    @classmethod
+    def _unique_pairs_mutually_exclusive(
+        cls,
+        a_indices: NDArray[np.integer],
+        b_indices: NDArray[np.integer],
+    ) -> NDArray[np.integer]:
+        return next(_product_blocks(np.asarray(a_indices), np.asarray(b_indices)), np.zeros((0, 2), dtype=np.int64))
+
+    @classmethod
+    def _unique_pairs_equal(cls, a_indices: NDArray[np.integer]) -> NDArray[np.integer]:
+        return next(_combination_blocks(np.asarray(a_indices)), np.zeros((0, 2), dtype=np.int64))
+
+    def _pair_selections(self, selection1, selection2) -> tuple[NDArray[np.integer], NDArray[np.integer]]:
         # Resolve selections using the atom selection DSL...
         if isinstance(selection1, str):
             a_indices = self.select(selection1)
@@ -1349,52 +1856,7 @@ class Topology:
                 name="b_indices",
                 warn_on_cast=False,
             )
-        a_indices.sort()
-        b_indices.sort()
-
-        # Create unique pairs from the indices.
-        # In the cases where a_indices and b_indices are identical or mutually
-        # exclusive, we can utilize a more efficient and memory friendly
-        # approach by removing the intermediate set creation required in
-        # the general case.
-        if np.array_equal(a_indices, b_indices):
-            pairs = self._unique_pairs_equal(a_indices)
-        elif len(np.intersect1d(a_indices, b_indices)) == 0:
-            pairs = self._unique_pairs_mutually_exclusive(a_indices, b_indices)
-        else:
-            pairs = self._unique_pairs(a_indices, b_indices)
-        return pairs
-
-    @classmethod
-    def _unique_pairs(cls, a_indices: Iterator[int], b_indices: Iterator[int]) -> NDArray[np.integer]:
-        return np.array(
-            list(
-                {(a, b) if a > b else (b, a) for a, b in itertools.product(a_indices, b_indices) if a != b},
-            ),
-            dtype=np.integer,
-        )
-
-    @classmethod
-    def _unique_pairs_mutually_exclusive(cls, a_indices: list[int], b_indices: list[int]) -> NDArray[np.integer]:
-        pairs = np.fromiter(
-            itertools.chain.from_iterable(
-                itertools.product(a_indices, b_indices),
-            ),
-            dtype=np.integer,
-            count=len(a_indices) * len(b_indices) * 2,
-        )
-        return np.vstack((pairs[::2], pairs[1::2])).T
-
-    @classmethod
-    def _unique_pairs_equal(cls, a_indices: list[int]) -> NDArray[np.integer]:
-        pairs = np.fromiter(
-            itertools.chain.from_iterable(
-                itertools.combinations(a_indices, 2),
-            ),
-            dtype=np.integer,
-            count=len(a_indices) * (len(a_indices) - 1),
-        )
-        return np.vstack((pairs[::2], pairs[1::2])).T
+        return np.sort(a_indices).astype(np.int64, copy=False), np.sort(b_indices).astype(np.int64, copy=False)
 
     def find_molecules(self) -> list[set[Atom]]:
         """Identify molecules based on bonds.
@@ -1407,57 +1869,16 @@ class Topology:
         molecules : list of sets
             Each entry represents one molecule, and is the set of all Atoms in that molecule
         """
+        atoms = self._atoms
+        return [{atoms[i] for i in molecule.tolist()} for molecule in self._molecule_indices()]
+
+    def _molecule_indices(self) -> list[NDArray[np.int32]]:
+        """Atom indices of each molecule, from the cached connectivity"""
         if len(self._bonds) == 0 and any(res.n_atoms > 1 for res in self._residues):
             raise ValueError(
                 "Cannot identify molecules because this Topology does not include bonds",
             )
-
-        # Make a list of every other atom to which each atom is connected.
-
-        num_atoms = self.n_atoms
-        atom_bonds: list[list[int]] = [[] for i in range(num_atoms)]
-        for atom1, atom2 in self.bonds:
-            atom_bonds[atom1.index].append(atom2.index)
-            atom_bonds[atom2.index].append(atom1.index)
-
-        # This is essentially a recursive algorithm, but it is reformulated as a loop to avoid
-        # stack overflows.  It selects an atom, marks it as a new molecule, then recursively
-        # marks every atom bonded to it as also being in that molecule.
-
-        atom_molecule = [-1] * num_atoms
-        num_molecules = 0
-        for i in range(num_atoms):
-            if atom_molecule[i] == -1:
-                # Start a new molecule.
-
-                atom_stack = [i]
-                neighbor_stack = [0]
-                molecule = num_molecules
-                num_molecules += 1
-
-                # Recursively tag all the bonded atoms.
-
-                while len(atom_stack) > 0:
-                    atom_index = atom_stack[-1]
-                    atom_molecule[atom_index] = molecule
-                    while (
-                        neighbor_stack[-1] < len(atom_bonds[atom_index])
-                        and atom_molecule[atom_bonds[atom_index][neighbor_stack[-1]]] != -1
-                    ):
-                        neighbor_stack[-1] += 1
-                    if neighbor_stack[-1] < len(atom_bonds[atom_index]):
-                        atom_stack.append(atom_bonds[atom_index][neighbor_stack[-1]])
-                        neighbor_stack.append(0)
-                    else:
-                        del atom_stack[-1]
-                        del neighbor_stack[-1]
-
-        # Build the final output.
-
-        molecules: list[set[Atom]] = [set() for i in range(num_molecules)]
-        for atom in self.atoms:
-            molecules[atom_molecule[atom.index]].add(atom)
-        return molecules
+        return self.connectivity.molecules
 
     def guess_anchor_molecules(self) -> list[set[Atom]]:
         """Guess anchor molecules for imaging
@@ -1471,24 +1892,29 @@ class Topology:
         --------
         Trajectory.image_molecules
         """
-        molecules = self.find_molecules()
+        atoms = self._atoms
+        molecules = self._molecule_indices()
+        return [{atoms[i] for i in molecules[anchor].tolist()} for anchor in self._guess_anchors()]
+
+    def _guess_anchors(self) -> NDArray[np.intp]:
+        """Indices of the anchor molecules (see ``guess_anchor_molecules``)
+        in ``connectivity.molecules``, largest molecule first"""
+        molecules = self._molecule_indices()
+        sizes = np.array([len(molecule) for molecule in molecules], dtype=np.intp)
 
         # Select the anchor molecules.
-        molecules.sort(key=lambda x: -len(x))
-        atoms_cutoff = max(
-            len(molecules[int(0.1 * len(molecules))]),
-            int(0.1 * len(molecules[0])),
-        )
-        anchor_molecules = [mol for mol in molecules if len(mol) > atoms_cutoff]
-        num_anchors = len(anchor_molecules)
-        if num_anchors == 0:
+        order = np.argsort(-sizes, kind="stable")
+        sizes = sizes[order]
+        atoms_cutoff = max(sizes[int(0.1 * len(molecules))], int(0.1 * sizes[0]))
+        anchors = order[sizes > atoms_cutoff]
+        if len(anchors) == 0:
             raise ValueError(
                 "Could not find any anchor molecules. Based on "
                 "our heuristic, those should be molecules with "
                 f"more than {atoms_cutoff} atoms. Perhaps your topology "
                 "doesn't give an accurate bond graph?",
             )
-        return anchor_molecules
+        return anchors
 
 
 class Chain:
@@ -1907,9 +2333,10 @@ def float_to_bond_type(bond_float: float) -> Singleton | None:
 
 
 class Bond(namedtuple("Bond", ["atom1", "atom2"])):
-    # Add type annotations for the extra attributes.
-    type: Singleton | None
-    order: int | None
+    # Add type annotations for the extra attributes. The class-level
+    # defaults let _untyped() skip setting them on every instance.
+    type: Singleton | None = None
+    order: int | None = None
     """A Bond object represents a bond between two Atoms within a Topology.
 
     Attributes
@@ -1941,6 +2368,12 @@ class Bond(namedtuple("Bond", ["atom1", "atom2"])):
         bond.order = order
         return bond
 
+    @classmethod
+    def _untyped(cls, atom1: Atom, atom2: Atom) -> Bond:
+        """Construct a Bond with no type or order, without the checks in
+        __new__. Used when creating bonds in bulk."""
+        return tuple.__new__(cls, (atom1, atom2))
+
     def __getnewargs__(
         self,
     ) -> tuple[Atom, Atom, Singleton | None, int | None]:
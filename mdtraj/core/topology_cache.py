@@ -0,0 +1,470 @@
+##############################################################################
+# MDTraj: A Python Library for Loading, Saving, and Manipulating
+#         Molecular Dynamics Trajectories.
+# Copyright 2012-2025 Stanford University and the Authors
+#
+# Authors: Robert McGibbon
+# Contributors:
+#
+# MDTraj is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with MDTraj. If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+"""On-disk cache of parsed topologies
+
+Parsing the topology of a large system (a PDB or PSF file with a million
+atoms, say) can take much longer than reading the coordinates that go with
+it, and ``md.load`` / ``md.iterload`` do it again on every call and in
+every worker process. When the cache is enabled, the first parse of a
+topology file is stored as a compressed ``.npz`` file of columnar arrays
+in a cache directory, and later calls rebuild the ``Topology`` from those
+arrays instead of parsing the file again.
+
+Entries are keyed on the absolute path, size and modification time of
+the topology file together with the keyword arguments given to the
+parser, so editing the file or loading it with different options (e.g.
+``standard_names=False``) never returns a stale topology. The cache is
+off by default; turn it on with :func:`enable_topology_cache`, or by
+setting the ``MDTRAJ_TOPOLOGY_CACHE`` environment variable to a cache
+directory (which also reaches worker processes).
+"""
+
+import hashlib
+import operator
+import os
+import tempfile
+
+import numpy as np
+
+from mdtraj.core import element as elem
+from mdtraj.core.topology import Atom, Bond, Chain, Residue, Topology, float_to_bond_type
+
+__all__ = [
+    "enable_topology_cache",
+    "disable_topology_cache",
+    "clear_topology_cache",
+    "topology_cache_directory",
+]
+
+# bumped whenever the layout of a cache entry changes, so that entries
+# written by an older version are never read back
+_FORMAT_VERSION = 1
+
+_DEFAULT_MAX_SIZE = 2**30
+
+# the cache directory, or None when the cache is disabled. until one of
+# the functions below is called, the MDTRAJ_TOPOLOGY_CACHE environment
+# variable decides
+_UNSET = object()
+_directory = _UNSET
+_max_size = _DEFAULT_MAX_SIZE
+
+
+def _default_directory():
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "mdtraj", "topologies")
+
+
+def topology_cache_directory():
+    """Get the directory parsed topologies are cached in
+
+    Returns
+    -------
+    directory : str or None
+        The cache directory, or None if the topology cache is disabled.
+    """
+    if _directory is _UNSET:
+        directory = os.environ.get("MDTRAJ_TOPOLOGY_CACHE")
+        if not directory or directory.lower() in ("0", "false", "no", "off"):
+            return None
+        if directory.lower() in ("1", "true", "yes", "on"):
+            return _default_directory()
+        return os.path.abspath(os.path.expanduser(directory))
+    return _directory
+
+
+def enable_topology_cache(directory=None, max_size=_DEFAULT_MAX_SIZE):
+    """Cache parsed topologies on disk
+
+    Once enabled, every topology that ``md.load``, ``md.iterload``,
+    ``md.load_frame`` or ``md.load_topology`` parses from a file is stored
+    in ``directory``, and reused for as long as the file's size and
+    modification time (and the parser's keyword arguments) stay the same.
+
+    Parameters
+    ----------
+    directory : path-like, optional
+        Where to store the cached topologies. Defaults to
+        ``$XDG_CACHE_HOME/mdtraj/topologies`` (``~/.cache/mdtraj/topologies``).
+    max_size : int, default=2**30
+        The total size, in bytes, the cache directory is allowed to grow
+        to. When an entry is added beyond this limit, the least recently
+        used entries are removed.
+    """
+    global _directory, _max_size
+    if int(max_size) != max_size or max_size < 0:
+        raise ValueError(f"max_size must be a non-negative integer. you supplied {max_size}")
+    if directory is None:
+        directory = _default_directory()
+    _directory = os.path.abspath(os.path.expanduser(os.fspath(directory)))
+    _max_size = int(max_size)
+
+
+def disable_topology_cache():
+    """Stop caching parsed topologies
+
+    Entries already on disk are kept; use :func:`clear_topology_cache`
+    to remove them.
+    """
+    global _directory
+    _directory = None
+
+
+def clear_topology_cache(directory=None):
+    """Remove every cached topology
+
+    Parameters
+    ----------
+    directory : path-like, optional
+        The cache directory to clear. Defaults to the current cache
+        directory.
+    """
+    if directory is None:
+        directory = topology_cache_directory()
+        if directory is None:
+            return
+    for path in _entries(os.fspath(directory)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+##############################################################################
+# lookup
+##############################################################################
+
+
+def cached_topology(filename, parse, **kwargs):
+    """Return the topology of ``filename``, from the cache if possible
+
+    Parameters
+    ----------
+    filename : path-like
+        The topology file.
+    parse : callable
+        ``parse(filename, **kwargs)`` parses the file into a Topology. It
+        is called directly when the cache is disabled, the file can't be
+        keyed, or the entry is missing. Any other keyword arguments are
+        passed on to ``parse``, and are part of the cache key.
+
+    Returns
+    -------
+    topology : md.Topology
+        A new Topology, which the caller is free to modify.
+    """
+    directory = topology_cache_directory()
+    key = None if directory is None else _cache_key(filename, kwargs)
+    if key is None:
+        return parse(filename, **kwargs)
+
+    path = os.path.join(directory, key + ".npz")
+    try:
+        topology = _load_entry(path)
+    except Exception:
+        # missing, truncated by a concurrent writer, or written by another
+        # version; parse the file instead
+        topology = None
+    if topology is not None:
+        try:
+            # bump the modification time, which eviction uses as the
+            # last-access time
+            os.utime(path)
+        except OSError:
+            pass
+        return topology
+
+    topology = parse(filename, **kwargs)
+    try:
+        columns = _topology_to_columns(topology)
+    except (TypeError, ValueError, OverflowError):
+        # something the columnar layout can't represent faithfully, like a
+        # custom element. don't cache it
+        return topology
+    try:
+        _save_entry(directory, path, columns)
+    except OSError:
+        pass
+    else:
+        _evict(directory, _max_size)
+    return topology
+
+
+def _cache_key(filename, kwargs):
+    """Hash identifying a parse of ``filename`` with ``kwargs``, or None"""
+    # only cache parses whose options have a stable, complete repr. a
+    # numpy array's repr is abbreviated, for instance, so two different
+    # arrays could produce the same key
+    for value in kwargs.values():
+        if not _is_plain(value):
+            return None
+    try:
+        path = os.path.abspath(os.fspath(filename))
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    fields = (_FORMAT_VERSION, path, stat.st_size, stat.st_mtime_ns, sorted(kwargs.items()))
+    return hashlib.sha256(repr(fields).encode("utf-8")).hexdigest()
+
+
+def _is_plain(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(v) for v in value)
+    return False
+
+
+##############################################################################
+# storage
+##############################################################################
+
+
+def _entries(directory):
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names if name.endswith(".npz")]
+
+
+def _save_entry(directory, path, columns):
+    os.makedirs(directory, exist_ok=True)
+    # write to a temporary file and move it into place, so that a reader
+    # in another process never sees a half-written entry
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _load_entry(path):
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != _FORMAT_VERSION:
+            return None
+        columns = {key: data[key] for key in data.files}
+    return _topology_from_columns(columns)
+
+
+def _evict(directory, max_size):
+    """Remove the least recently used entries until the cache fits in max_size bytes"""
+    entries = []
+    for path in _entries(directory):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+##############################################################################
+# serialization
+##############################################################################
+
+
+def _factorize(values):
+    """Integer codes and the table of distinct values, in order of appearance"""
+    table = {}
+    codes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(table)
+
+
+def _optional_ints(values):
+    """An int64 array and a mask of the entries that were None"""
+    missing = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    # operator.index() refuses floats, which would otherwise be truncated
+    out = np.fromiter((0 if v is None else operator.index(v) for v in values), dtype=np.int64, count=len(values))
+    return out, missing
+
+
+def _topology_to_columns(topology):
+    """Flatten a Topology into a dict of numpy arrays
+
+    Raises TypeError or ValueError if the topology holds something that
+    wouldn't survive the round trip.
+    """
+    atoms = topology._atoms
+    residues = topology._residues
+    chains = topology._chains
+
+    name_codes, names = _factorize([a.name for a in atoms])
+    element_codes, elements = _factorize([a.element for a in atoms])
+    symbols = []
+    for element in elements:
+        if element is None:
+            symbols.append("")
+            continue
+        # only elements from the registry can be looked up again
+        if elem.get_by_symbol(element.symbol) is not element:
+            raise ValueError(f"element {element!r} is not a registered element")
+        symbols.append(element.symbol)
+
+    serial, serial_missing = _optional_ints([a.serial for a in atoms])
+    charges = [a.formal_charge for a in atoms]
+    charge_missing = np.zeros(len(atoms), dtype=np.int8)
+    charge = np.zeros(len(atoms), dtype=np.int64)
+    for i, value in enumerate(charges):
+        if value is None:
+            charge_missing[i] = 1
+        elif isinstance(value, (int, np.integer)):
+            charge[i] = value
+        elif repr(value) == "<NA>":
+            # pandas.NA, from topologies built with from_dataframe
+            charge_missing[i] = 2
+        else:
+            raise TypeError(f"unsupported formal charge {value!r}")
+
+    residue_name_codes, residue_names = _factorize([r.name for r in residues])
+    segment_codes, segment_ids = _factorize([r.segment_id for r in residues])
+    chain_ids = [c.chain_id for c in chains]
+    for value in [*names, *residue_names, *segment_ids, *(c for c in chain_ids if c is not None)]:
+        if not isinstance(value, str):
+            raise TypeError(f"expected a string, got {value!r}")
+
+    bonds = topology._bonds
+    bond_types = [b.type for b in bonds]
+    bond_orders = [b.order for b in bonds]
+    bond_type = np.array([0.0 if t is None else float(t) for t in bond_types], dtype=np.float64)
+    for t, value in zip(bond_types, bond_type.tolist()):
+        if t is not None and float_to_bond_type(value) is not t:
+            raise ValueError(f"unsupported bond type {t!r}")
+    bond_order, bond_order_missing = _optional_ints(bond_orders)
+
+    return {
+        "version": np.array(_FORMAT_VERSION),
+        "atom_name": name_codes,
+        "atom_name_table": np.array(names, dtype=str),
+        "atom_element": element_codes,
+        "atom_element_table": np.array(symbols, dtype=str),
+        "atom_element_none": np.array([e is None for e in elements], dtype=bool),
+        "atom_residue": np.fromiter((a.residue.index for a in atoms), dtype=np.int64, count=len(atoms)),
+        "atom_serial": serial,
+        "atom_serial_missing": serial_missing,
+        "atom_formal_charge": charge,
+        "atom_formal_charge_missing": charge_missing,
+        "residue_name": residue_name_codes,
+        "residue_name_table": np.array(residue_names, dtype=str),
+        "residue_resSeq": np.array([r.resSeq for r in residues], dtype=np.int64).reshape(-1),
+        "residue_segment_id": segment_codes,
+        "residue_segment_id_table": np.array(segment_ids, dtype=str),
+        "residue_chain": np.fromiter((r.chain.index for r in residues), dtype=np.int64, count=len(residues)),
+        "chain_id": np.array(["" if c is None else c for c in chain_ids], dtype=str),
+        "chain_id_missing": np.array([c is None for c in chain_ids], dtype=bool),
+        "bond_atoms": np.array([(b[0].index, b[1].index) for b in bonds], dtype=np.int64).reshape(-1, 2),
+        "bond_type": bond_type,
+        "bond_order": bond_order,
+        "bond_order_missing": bond_order_missing,
+    }
+
+
+def _optional_list(values, missing, missing_value=None):
+    out = values.tolist()
+    for i in np.flatnonzero(missing).tolist():
+        out[i] = missing_value
+    return out
+
+
+def _topology_from_columns(columns):
+    """Build a new Topology from the arrays written by _topology_to_columns"""
+    out = Topology()
+
+    chain_ids = _optional_list(columns["chain_id"], columns["chain_id_missing"])
+    chains = [Chain(index, out, chain_id) for index, chain_id in enumerate(chain_ids)]
+    out._chains = chains
+
+    residue_names = columns["residue_name_table"].tolist()
+    segment_ids = columns["residue_segment_id_table"].tolist()
+    residues = []
+    for index, (name_code, chain_index, resSeq, segment_code) in enumerate(
+        zip(
+            columns["residue_name"].tolist(),
+            columns["residue_chain"].tolist(),
+            columns["residue_resSeq"].tolist(),
+            columns["residue_segment_id"].tolist(),
+        ),
+    ):
+        chain = chains[chain_index]
+        r = Residue(residue_names[name_code], index, chain, resSeq, segment_ids[segment_code])
+        chain._residues.append(r)
+        residues.append(r)
+    out._residues = residues
+    out._numResidues = len(residues)
+
+    names = columns["atom_name_table"].tolist()
+    elements = [
+        None if none else elem.get_by_symbol(symbol)
+        for symbol, none in zip(columns["atom_element_table"].tolist(), columns["atom_element_none"].tolist())
+    ]
+    serials = _optional_list(columns["atom_serial"], columns["atom_serial_missing"])
+    charges = columns["atom_formal_charge"].tolist()
+    charge_missing = columns["atom_formal_charge_missing"]
+    if charge_missing.any():
+        for i in np.flatnonzero(charge_missing == 1).tolist():
+            charges[i] = None
+        na_rows = np.flatnonzero(charge_missing == 2).tolist()
+        if na_rows:
+            from mdtraj.utils import import_
+
+            na = import_("pandas").NA
+            for i in na_rows:
+                charges[i] = na
+
+    atoms = [
+        Atom(names[name_code], elements[element_code], index, residues[residue_index], serial, formal_charge)
+        for index, (name_code, element_code, residue_index, serial, formal_charge) in enumerate(
+            zip(
+                columns["atom_name"].tolist(),
+                columns["atom_element"].tolist(),
+                columns["atom_residue"].tolist(),
+                serials,
+                charges,
+            ),
+        )
+    ]
+    for atom in atoms:
+        atom.residue._atoms.append(atom)
+    out._atoms = atoms
+    out._numAtoms = len(atoms)
+
+    types = {value: float_to_bond_type(value) for value in np.unique(columns["bond_type"]).tolist()}
+    orders = _optional_list(columns["bond_order"], columns["bond_order_missing"])
+    out._bonds = [
+        Bond(atoms[a], atoms[b], type=types[t], order=order)
+        for (a, b), t, order in zip(columns["bond_atoms"].tolist(), columns["bond_type"].tolist(), orders)
+    ]
+    return out
@@ -23,14 +23,15 @@
 
 import os
 import warnings
-from collections import defaultdict, deque
 from collections.abc import Iterable
 from copy import deepcopy
 
 import numpy as np
 
 from mdtraj.core.residue_names import _SOLVENT_TYPES
+from mdtraj.core.selection import iter_frame_masks, parse_selection, uses_coordinates
 from mdtraj.core.topology import Topology
+from mdtraj.core.topology_cache import cached_topology
 from mdtraj.formats import (
     AmberNetCDFRestartFile,
     AmberRestartFile,
@@ -73,6 +74,9 @@ __all__ = [
     "load_topology",
     "join",
     "Trajectory",
+    "TrajectoryBuilder",
+    "TrajectoryWriter",
+    "save_iter",
 ]
 # supported extensions for constructing topologies
 _TOPOLOGY_EXTS = [
@@ -150,40 +154,47 @@ def load_topology(filename, **kwargs):
 def _parse_topology(top, **kwargs):
     """Get the topology from a argument of indeterminate type
     If top is a string, we try loading a pdb, if its a trajectory
-    we extract its topology.
+    we extract its topology. Topologies parsed from files go through the
+    on-disk cache in mdtraj.core.topology_cache, when it is enabled.
 
     Returns
     -------
     topology : md.Topology
     """
 
-    if isinstance(top, (str, os.PathLike)):
-        ext = _get_extension(top)
-    else:
-        ext = None  # might not be a string
-
     if isinstance(top, Topology):
         topology = top
     elif isinstance(top, Trajectory):
         topology = top.topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".pdb", ".pdb.gz", ".pdbx", ".cif", ".h5", ".lh5"]):
+    elif isinstance(top, (str, os.PathLike)):
+        topology = cached_topology(top, _parse_topology_file, **kwargs)
+    else:
+        raise TypeError("A topology is required. You supplied top=%s" % str(top))
+
+    return topology
+
+
+def _parse_topology_file(top, **kwargs):
+    """Parse the topology in the file ``top``, picking the parser by extension"""
+    ext = _get_extension(top)
+    if ext in [".pdb", ".pdb.gz", ".pdbx", ".cif", ".h5", ".lh5"]:
         _traj = load_frame(top, 0, **kwargs)
         topology = _traj.topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".prmtop", ".parm7", ".prm7"]):
+    elif ext in [".prmtop", ".parm7", ".prm7"]:
         topology = load_prmtop(top, **kwargs)
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".psf"]):
+    elif ext in [".psf"]:
         topology = load_psf(top, **kwargs)
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".mol2"]):
+    elif ext in [".mol2"]:
         topology = load_mol2(top, **kwargs).topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".gro"]):
+    elif ext in [".gro"]:
         topology = load_gro(top, **kwargs).topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".arc"]):
+    elif ext in [".arc"]:
         topology = load_arc(top, **kwargs).topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".hoomdxml"]):
+    elif ext in [".hoomdxml"]:
         topology = load_hoomdxml(top, **kwargs).topology
-    elif isinstance(top, (str, os.PathLike)) and (ext in [".gsd"]):
+    elif ext in [".gsd"]:
         topology = load_gsd_topology(top, **kwargs)
-    elif isinstance(top, (str, os.PathLike)):
+    else:
         raise OSError(
             "The topology is loaded by filename extension, and the "
             'detected "{}" format is not supported. Supported topology '
@@ -193,8 +204,6 @@ def _parse_topology(top, **kwargs):
                 _TOPOLOGY_EXTS[-1],
             ),
         )
-    else:
-        raise TypeError("A topology is required. You supplied top=%s" % str(top))
 
     return topology
 
@@ -207,6 +216,31 @@ def _get_extension(filename):
     return extension
 
 
+def _streaming(file_class, write_chunk, per_frame=(), open_kwargs=()):
+    """Mark a ``Trajectory.save_*`` method as able to write one chunk at a time
+
+    Parameters
+    ----------
+    file_class : type
+        The TrajectoryFile class that the chunks are written to.
+    write_chunk : str
+        Name of the ``Trajectory`` method that writes the frames of a
+        trajectory to an open ``file_class``.
+    per_frame : tuple of str
+        Keyword arguments of ``write_chunk`` that may hold one entry per frame
+        (as a 2D array) and so have to be sliced to match each chunk.
+    open_kwargs : tuple of str
+        Keyword arguments of the ``save_*`` method that are passed to the
+        ``file_class`` constructor rather than to ``write_chunk``.
+    """
+
+    def decorator(save):
+        save._streaming = (file_class, write_chunk, per_frame, open_kwargs)
+        return save
+
+    return decorator
+
+
 def open(filename, mode="r", force_overwrite=True, **kwargs):
     """Open a trajectory file-like object
 
@@ -338,6 +372,13 @@ def load(filename_or_filenames, discard_overlapping_frames=False, **kwargs):
         and .pdb formats, which already contain topology information.
     stride : int, default=None
         Only read every stride-th frame
+    start : int, default=None
+        Index of the first frame to read from each file. Negative values count
+        back from the end of the file. Formats that support seeking jump
+        straight to this frame instead of reading the frames before it.
+    stop : int, default=None
+        Read frames up to, but not including, this index in each file.
+        Negative values count back from the end of the file.
     atom_indices : array_like, optional
         If not none, then read only a subset of the atoms coordinates from the
         file. This may be slightly slower than the standard read because it
@@ -358,8 +399,12 @@ def load(filename_or_filenames, discard_overlapping_frames=False, **kwargs):
     >>> print traj2
     <mdtraj.Trajectory with 250 frames, 423 atoms at 0x11136e410>
 
-    >>> traj3 = md.load_hdf5('output.xtc', atom_indices=[0,1], top='topology.pdb')
+    >>> traj3 = md.load('output.xtc', start=100, stop=200, top='topology.pdb')
     >>> print traj3
+    <mdtraj.Trajectory with 100 frames, 423 atoms at 0x11136e530>
+
+    >>> traj4 = md.load_hdf5('output.xtc', atom_indices=[0,1], top='topology.pdb')
+    >>> print traj4
     <mdtraj.Trajectory with 500 frames, 2 atoms at 0x18236e4a0>
 
     Returns
@@ -391,6 +436,7 @@ def load(filename_or_filenames, discard_overlapping_frames=False, **kwargs):
     topkwargs.pop("frame", None)
     topkwargs.pop("stride", None)
     topkwargs.pop("start", None)
+    topkwargs.pop("stop", None)
 
     # If top is not given try with one of the trajectory files
     top = topkwargs.pop("top", None)
@@ -614,6 +660,10 @@ def join(trajs, check_topology=True, discard_overlapping_frames=False):
         Make sure topologies match before joining
     discard_overlapping_frames : bool
         Check for overlapping frames and discard
+
+    See Also
+    --------
+    TrajectoryBuilder : collect frames incrementally, e.g. from ``iterload``
     """
     list_trajs = list(trajs)
     if len(list_trajs) == 1:
@@ -628,6 +678,48 @@ def join(trajs, check_topology=True, discard_overlapping_frames=False):
         return joined_traj
 
 
+def save_iter(trajs, filename, force_overwrite=True, **kwargs):
+    """Save a stream of trajectory chunks to a single file on disk
+
+    Each chunk is written as soon as it is produced, so a pipeline such as
+    ``iterload`` -> ``superpose`` -> ``atom_slice`` can be saved without
+    holding the whole trajectory in memory.
+
+    Parameters
+    ----------
+    trajs : iterable of Trajectory
+        The chunks to save, in order. They must all contain the same atoms.
+    filename : path-like
+        Filesystem path in which to save the trajectory. The extension will
+        be parsed and will control the format.
+    force_overwrite : bool, default=True
+        If `filename` already exists, overwrite it.
+
+    Other Parameters
+    ----------------
+    kwargs : dict
+        Format-specific options, as accepted by ``Trajectory.save``.
+
+    Returns
+    -------
+    n_frames : int
+        The number of frames written.
+
+    Examples
+    --------
+    >>> chunks = md.iterload('output.xtc', top='topology.pdb')
+    >>> md.save_iter((c.atom_slice(range(10)) for c in chunks), 'subset.dcd')
+
+    See Also
+    --------
+    TrajectoryWriter : the underlying chunk-at-a-time writer
+    """
+    with TrajectoryWriter(filename, force_overwrite=force_overwrite, **kwargs) as writer:
+        for traj in trajs:
+            writer.write(traj)
+    return writer.n_frames
+
+
 class Trajectory:
     """Container object for a molecular dynamics trajectory
 
@@ -1481,6 +1573,7 @@ class Trajectory:
         # run the saver, and return whatever output it gives
         return saver(filename, **kwargs)
 
+    @_streaming(HDF5TrajectoryFile, "_write_hdf5", open_kwargs=("mode",))
     def save_hdf5(self, filename, mode="w", force_overwrite=True):
         """Save trajectory to MDTraj HDF5 format
 
@@ -1499,22 +1592,26 @@ class Trajectory:
             raise ValueError("savemode must be either 'w' or 'a'")
 
         with HDF5TrajectoryFile(filename, mode, force_overwrite=force_overwrite) as f:
-            f.write(
-                coordinates=in_units_of(
-                    self.xyz,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                time=self.time,
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                cell_angles=self.unitcell_angles,
-            )
+            self._write_hdf5(f)
             f.topology = self.topology
 
+    def _write_hdf5(self, f):
+        f.write(
+            coordinates=in_units_of(
+                self.xyz,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            time=self.time,
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            cell_angles=self.unitcell_angles,
+        )
+
+    @_streaming(LAMMPSTrajectoryFile, "_write_lammpstrj")
     def save_lammpstrj(self, filename, force_overwrite=True):
         """Save trajectory to LAMMPS custom dump format
 
@@ -1526,16 +1623,20 @@ class Trajectory:
             Overwrite anything that exists at filename, if its already there
         """
         with LAMMPSTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                cell_angles=self.unitcell_angles,
-            )
+            self._write_lammpstrj(f)
+
+    def _write_lammpstrj(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            cell_angles=self.unitcell_angles,
+        )
 
+    @_streaming(XYZTrajectoryFile, "_write_xyz")
     def save_xyz(self, filename, force_overwrite=True):
         """Save trajectory to .xyz format.
 
@@ -1547,11 +1648,15 @@ class Trajectory:
             Overwrite anything that exists at filename, if its already there
         """
         with XYZTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                types=[a.name for a in self.top.atoms],
-            )
+            self._write_xyz(f)
+
+    def _write_xyz(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            types=[a.name for a in self.top.atoms],
+        )
 
+    @_streaming(PDBTrajectoryFile, "_write_pdb", per_frame=("bfactors",))
     def save_pdb(self, filename, force_overwrite=True, bfactors=None, ter=True, header=True):
         """Save trajectory to RCSB PDB format
 
@@ -1574,7 +1679,10 @@ class Trajectory:
 
         """
         self._check_valid_unitcell()
+        with PDBTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
+            self._write_pdb(f, bfactors=bfactors, ter=ter, header=header)
 
+    def _write_pdb(self, f, bfactors=None, ter=True, header=True, first_model=0):
         if bfactors is not None:
             if len(np.array(bfactors).shape) == 1:
                 if len(bfactors) != self.n_atoms:
@@ -1595,41 +1703,41 @@ class Trajectory:
         else:
             bfactors = [None] * self.n_frames
 
-        with PDBTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            for i in range(self.n_frames):
-                if self._have_unitcell:
-                    f.write(
-                        in_units_of(
-                            self._xyz[i],
-                            Trajectory._distance_unit,
-                            f.distance_unit,
-                        ),
-                        self.topology,
-                        modelIndex=i,
-                        bfactors=bfactors[i],
-                        unitcell_lengths=in_units_of(
-                            self.unitcell_lengths[i],
-                            Trajectory._distance_unit,
-                            f.distance_unit,
-                        ),
-                        unitcell_angles=self.unitcell_angles[i],
-                        ter=ter,
-                        header=header,
-                    )
-                else:
-                    f.write(
-                        in_units_of(
-                            self._xyz[i],
-                            Trajectory._distance_unit,
-                            f.distance_unit,
-                        ),
-                        self.topology,
-                        modelIndex=i,
-                        bfactors=bfactors[i],
-                        ter=ter,
-                        header=header,
-                    )
+        for i in range(self.n_frames):
+            if self._have_unitcell:
+                f.write(
+                    in_units_of(
+                        self._xyz[i],
+                        Trajectory._distance_unit,
+                        f.distance_unit,
+                    ),
+                    self.topology,
+                    modelIndex=first_model + i,
+                    bfactors=bfactors[i],
+                    unitcell_lengths=in_units_of(
+                        self.unitcell_lengths[i],
+                        Trajectory._distance_unit,
+                        f.distance_unit,
+                    ),
+                    unitcell_angles=self.unitcell_angles[i],
+                    ter=ter,
+                    header=header,
+                )
+            else:
+                f.write(
+                    in_units_of(
+                        self._xyz[i],
+                        Trajectory._distance_unit,
+                        f.distance_unit,
+                    ),
+                    self.topology,
+                    modelIndex=first_model + i,
+                    bfactors=bfactors[i],
+                    ter=ter,
+                    header=header,
+                )
 
+    @_streaming(XTCTrajectoryFile, "_write_xtc")
     def save_xtc(self, filename, force_overwrite=True):
         """Save trajectory to Gromacs XTC format
 
@@ -1645,16 +1753,20 @@ class Trajectory:
             "w",
             force_overwrite=force_overwrite,
         ) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                time=self.time,
-                box=in_units_of(
-                    self.unitcell_vectors,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-            )
+            self._write_xtc(f)
 
+    def _write_xtc(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            time=self.time,
+            box=in_units_of(
+                self.unitcell_vectors,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+        )
+
+    @_streaming(TRRTrajectoryFile, "_write_trr")
     def save_trr(self, filename, force_overwrite=True):
         """Save trajectory to Gromacs TRR format
 
@@ -1675,16 +1787,20 @@ class Trajectory:
             "w",
             force_overwrite=force_overwrite,
         ) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                time=self.time,
-                box=in_units_of(
-                    self.unitcell_vectors,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-            )
+            self._write_trr(f)
+
+    def _write_trr(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            time=self.time,
+            box=in_units_of(
+                self.unitcell_vectors,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+        )
 
+    @_streaming(DCDTrajectoryFile, "_write_dcd")
     def save_dcd(self, filename, force_overwrite=True):
         """Save trajectory to CHARMM/NAMD DCD format
 
@@ -1701,16 +1817,20 @@ class Trajectory:
             "w",
             force_overwrite=force_overwrite,
         ) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                cell_angles=self.unitcell_angles,
-            )
+            self._write_dcd(f)
+
+    def _write_dcd(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            cell_angles=self.unitcell_angles,
+        )
 
+    @_streaming(DTRTrajectoryFile, "_write_dtr")
     def save_dtr(self, filename, force_overwrite=True):
         """Save trajectory to DESMOND DTR format
 
@@ -1727,17 +1847,21 @@ class Trajectory:
             "w",
             force_overwrite=force_overwrite,
         ) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                cell_angles=self.unitcell_angles,
-                times=self.time,
-            )
+            self._write_dtr(f)
+
+    def _write_dtr(self, f):
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            cell_angles=self.unitcell_angles,
+            times=self.time,
+        )
 
+    @_streaming(MDCRDTrajectoryFile, "_write_mdcrd")
     def save_mdcrd(self, filename, force_overwrite=True):
         """Save trajectory to AMBER mdcrd format
 
@@ -1749,26 +1873,30 @@ class Trajectory:
             Overwrite anything that exists at filename, if its already there
         """
         self._check_valid_unitcell()
+        with MDCRDTrajectoryFile(
+            filename,
+            mode="w",
+            force_overwrite=force_overwrite,
+        ) as f:
+            self._write_mdcrd(f)
+
+    def _write_mdcrd(self, f):
         if self._have_unitcell:
             if not np.all(self.unitcell_angles == 90):
                 raise ValueError(
                     f"Only rectilinear boxes can be saved to mdcrd files. Your angles are {self.unitcell_angles}",
                 )
 
-        with MDCRDTrajectoryFile(
-            filename,
-            mode="w",
-            force_overwrite=force_overwrite,
-        ) as f:
-            f.write(
-                xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-            )
+        f.write(
+            xyz=in_units_of(self.xyz, Trajectory._distance_unit, f.distance_unit),
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+        )
 
+    @_streaming(NetCDFTrajectoryFile, "_write_netcdf")
     def save_netcdf(self, filename, force_overwrite=True):
         """Save trajectory in AMBER NetCDF format
 
@@ -1781,20 +1909,23 @@ class Trajectory:
         """
         self._check_valid_unitcell()
         with NetCDFTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            f.write(
-                coordinates=in_units_of(
-                    self._xyz,
-                    Trajectory._distance_unit,
-                    NetCDFTrajectoryFile.distance_unit,
-                ),
-                time=self.time,
-                cell_lengths=in_units_of(
-                    self.unitcell_lengths,
-                    Trajectory._distance_unit,
-                    f.distance_unit,
-                ),
-                cell_angles=self.unitcell_angles,
-            )
+            self._write_netcdf(f)
+
+    def _write_netcdf(self, f):
+        f.write(
+            coordinates=in_units_of(
+                self._xyz,
+                Trajectory._distance_unit,
+                NetCDFTrajectoryFile.distance_unit,
+            ),
+            time=self.time,
+            cell_lengths=in_units_of(
+                self.unitcell_lengths,
+                Trajectory._distance_unit,
+                f.distance_unit,
+            ),
+            cell_angles=self.unitcell_angles,
+        )
 
     def save_netcdfrst(self, filename, force_overwrite=True):
         """Save trajectory in AMBER NetCDF restart format
@@ -1922,6 +2053,7 @@ class Trajectory:
                         cell_angles=self.unitcell_angles[i],
                     )
 
+    @_streaming(LH5TrajectoryFile, "_write_lh5")
     def save_lh5(self, filename, force_overwrite=True):
         """Save trajectory in deprecated MSMBuilder2 LH5 (lossy HDF5) format.
 
@@ -1933,9 +2065,13 @@ class Trajectory:
             Overwrite anything that exists at filename, if it's already there
         """
         with LH5TrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            f.write(coordinates=self.xyz)
+            self._write_lh5(f)
             f.topology = self.topology
 
+    def _write_lh5(self, f):
+        f.write(coordinates=self.xyz)
+
+    @_streaming(GroTrajectoryFile, "_write_gro")
     def save_gro(self, filename, force_overwrite=True, precision=3):
         """Save trajectory in Gromacs .gro format
 
@@ -1950,13 +2086,16 @@ class Trajectory:
         """
         self._check_valid_unitcell()
         with GroTrajectoryFile(filename, "w", force_overwrite=force_overwrite) as f:
-            f.write(
-                self.xyz,
-                self.topology,
-                self.time,
-                self.unitcell_vectors,
-                precision=precision,
-            )
+            self._write_gro(f, precision=precision)
+
+    def _write_gro(self, f, precision=3):
+        f.write(
+            self.xyz,
+            self.topology,
+            self.time,
+            self.unitcell_vectors,
+            precision=precision,
+        )
 
     def save_gsd(self, filename, force_overwrite=True):
         """Save trajectory to HOOMD GSD format
@@ -2028,6 +2167,79 @@ class Trajectory:
         """
         return self.atom_slice(atom_indices, inplace=inplace)
 
+    def select(self, selection_string, periodic=True):
+        """Execute a selection against every frame of the trajectory
+
+        In addition to the topological queries of ``Topology.select``, the
+        selection can contain distance-based conditions, which are
+        evaluated against the coordinates of each frame::
+
+            traj.select("water and within 0.5 of resname LIG")
+            traj.select("same residue as around 0.3 of protein")
+
+        Parameters
+        ----------
+        selection_string : str
+            An expression in the MDTraj atom selection DSL
+        periodic : bool, default=True
+            If True and the trajectory contains unitcell information,
+            distances are computed under the minimum image convention.
+
+        Returns
+        -------
+        indices : list of np.ndarray, dtype=int, ndim=1
+            List of length n_frames. Each item is an array of the indices of
+            the atoms matching the selection in that frame.
+
+        See Also
+        --------
+        select_mask, Topology.select
+        """
+        parsed = parse_selection(selection_string)
+        if not uses_coordinates(parsed.astnode):
+            indices = self.topology.select(selection_string)
+            return [indices.copy() for _ in range(self.n_frames)]
+
+        masks = iter_frame_masks(parsed.astnode, self.topology._atom_columns(), self, periodic)
+        return [np.flatnonzero(mask) for chunk in masks for mask in chunk]
+
+    def select_mask(self, selection_string, periodic=True):
+        """Execute a selection against every frame, as a sparse mask
+
+        Parameters
+        ----------
+        selection_string : str
+            An expression in the MDTraj atom selection DSL, see ``select``.
+        periodic : bool, default=True
+            If True and the trajectory contains unitcell information,
+            distances are computed under the minimum image convention.
+
+        Returns
+        -------
+        mask : scipy.sparse.csr_matrix, shape=(n_frames, n_atoms), dtype=bool
+            ``mask[i, j]`` is True when atom ``j`` matches the selection in
+            frame ``i``.
+
+        See Also
+        --------
+        select
+        """
+        import scipy.sparse
+
+        shape = (self.n_frames, self.n_atoms)
+        parsed = parse_selection(selection_string)
+        if not uses_coordinates(parsed.astnode):
+            indices = self.topology.select(selection_string)
+            indptr = np.arange(self.n_frames + 1) * len(indices)
+            data = np.ones(len(indices) * self.n_frames, dtype=bool)
+            return scipy.sparse.csr_matrix((data, np.tile(indices, self.n_frames), indptr), shape=shape)
+
+        masks = iter_frame_masks(parsed.astnode, self.topology._atom_columns(), self, periodic)
+        blocks = [scipy.sparse.csr_matrix(chunk) for chunk in masks]
+        if not blocks:
+            return scipy.sparse.csr_matrix(shape, dtype=bool)
+        return scipy.sparse.vstack(blocks, format="csr")
+
     def atom_slice(self, atom_indices, inplace=False):
         """Create a new trajectory from a subset of atoms
 
@@ -2050,7 +2262,7 @@ class Trajectory:
         --------
         stack : stack multiple trajectories along the atom axis
         """
-        xyz = np.array(self.xyz[:, sorted(atom_indices)], order="C")
+        xyz = np.array(self.xyz[:, np.sort(np.asarray(atom_indices, dtype=np.intp))], order="C")
         topology = None
         if self._topology is not None:
             topology = self._topology.subset(atom_indices)
@@ -2107,7 +2319,9 @@ class Trajectory:
                     raise ValueError(type + "is not a valid solvent type")
                 solvent_types.remove(type)
 
-        atom_indices = [atom.index for atom in self.topology.atoms if atom.residue.name not in solvent_types]
+        arrays = self.topology.arrays
+        solvent = np.isin(arrays.residue_name, solvent_types)
+        atom_indices = np.flatnonzero(~solvent[arrays.atom_residue])
 
         return self.atom_slice(atom_indices, inplace=inplace)
 
@@ -2219,39 +2433,9 @@ class Trajectory:
         sorted_bonds: np.ndarray, shape=(m,2)
             Sorted array of bonds that define molecules as MSTs.
         """
-        bonds = np.asarray(
-            [[b0.index, b1.index] for b0, b1 in self._topology.bonds],
-            dtype=np.int32,
-        )
-        # Build an adjacency list for the molecular graph
-        adj = defaultdict(list)
-        for bond in bonds:
-            atom1, atom2 = bond
-            adj[atom1].append(atom2)
-            adj[atom2].append(atom1)
-
-        sorted_bonds = []
-        visited = set()
-        queue = deque()
-
-        atoms = set(bonds.flatten())
-
-        # Iterate through all atoms to handle disconnected subgraphs (molecules)
-        for atom in atoms:
-            if atom not in visited:
-                # Start BFS traversal from this atom
-                visited.add(atom)
-                queue.append(atom)
-                while queue:
-                    current_atom = queue.popleft()
-                    for neighbor in adj[current_atom]:
-                        if neighbor not in visited:
-                            visited.add(neighbor)
-                            queue.append(neighbor)
-                            # Add the bond with the known atom at index 0
-                            sorted_bonds.append([current_atom, neighbor])
-
-        return np.array(sorted_bonds, dtype=np.int32)
+        # the compiled kernels need a writeable buffer, so don't hand out
+        # the topology's cached (read-only) array
+        return self._topology.connectivity.sorted_bonds.copy()
 
     def make_molecules_whole(self, inplace=False, sorted_bonds=None):
         """Only make molecules whole
@@ -2338,19 +2522,30 @@ class Trajectory:
         if unitcell_vectors is None:
             raise ValueError("This Trajectory does not define a periodic unit cell")
 
-        if anchor_molecules is None:
-            anchor_molecules = self.topology.guess_anchor_molecules()
-
-        if other_molecules is None:
-            # Determine other molecules by which molecules are not anchor molecules
-            molecules = self._topology.find_molecules()
-            other_molecules = [mol for mol in molecules if mol not in anchor_molecules]
-
-        # Expand molecules into atom indices
-        anchor_molecules_atom_indices = [
-            np.fromiter((a.index for a in mol), dtype=np.int32) for mol in anchor_molecules
-        ]
-        other_molecules_atom_indices = [np.fromiter((a.index for a in mol), dtype=np.int32) for mol in other_molecules]
+        if anchor_molecules is None and other_molecules is None:
+            # Use the atom indices of the topology's cached molecules directly
+            molecules = self._topology._molecule_indices()
+            anchors = self._topology._guess_anchors()
+            is_anchor = np.zeros(len(molecules), dtype=bool)
+            is_anchor[anchors] = True
+            anchor_molecules_atom_indices = [molecules[i] for i in anchors]
+            other_molecules_atom_indices = [mol for mol, anchor in zip(molecules, is_anchor) if not anchor]
+        else:
+            if anchor_molecules is None:
+                anchor_molecules = self.topology.guess_anchor_molecules()
+
+            if other_molecules is None:
+                # Determine other molecules by which molecules are not anchor molecules
+                molecules = self._topology.find_molecules()
+                other_molecules = [mol for mol in molecules if mol not in anchor_molecules]
+
+            # Expand molecules into atom indices
+            anchor_molecules_atom_indices = [
+                np.fromiter((a.index for a in mol), dtype=np.int32) for mol in anchor_molecules
+            ]
+            other_molecules_atom_indices = [
+                np.fromiter((a.index for a in mol), dtype=np.int32) for mol in other_molecules
+            ]
 
         if inplace:
             result = self
@@ -2372,3 +2567,322 @@ class Trajectory:
         if not inplace:
             return result
         return self
+
+
+class TrajectoryBuilder:
+    """Accumulate frames into a single Trajectory without repeated copies
+
+    Growing a trajectory with ``traj = traj.join(chunk)`` copies every frame
+    collected so far on each call. A TrajectoryBuilder instead keeps
+    preallocated coordinate, time and unitcell buffers, copies each appended
+    chunk into them once, and grows their capacity geometrically when they
+    fill up. The topology is validated when a chunk with a new Topology object
+    is appended, not for every chunk.
+
+    Parameters
+    ----------
+    topology : Topology, optional
+        Topology of the resulting trajectory. If None, the topology of the
+        first appended trajectory is used.
+    n_frames : int, optional
+        Expected final number of frames. If given, the buffers are allocated
+        once at this size and only grown if more frames are appended.
+    check_topology : bool, default=True
+        Ensure that the topology of each appended trajectory is identical to
+        that of the builder.
+    discard_overlapping_frames : bool, default=False
+        If True, drop the first frame of an appended trajectory when it
+        matches the last frame collected so far, as in ``Trajectory.join``.
+
+    Examples
+    --------
+    >>> builder = md.TrajectoryBuilder()
+    >>> for chunk in md.iterload('output.xtc', top='topology.pdb'):
+    ...     builder.append(chunk[chunk.time % 10 == 0])
+    >>> traj = builder.finalize()
+
+    See Also
+    --------
+    Trajectory.join : join a fixed list of trajectories
+    """
+
+    def __init__(self, topology=None, n_frames=None, check_topology=True, discard_overlapping_frames=False):
+        self._initial_topology = topology
+        self._check_topology = check_topology
+        self._discard_overlapping_frames = discard_overlapping_frames
+        self._initial_capacity = 0 if n_frames is None else int(n_frames)
+        self._reset()
+
+    def _reset(self):
+        self._topology = self._initial_topology
+        self._n_frames = 0
+        self._xyz = None
+        self._time = None
+        self._unitcell_lengths = None
+        self._unitcell_angles = None
+        self._have_unitcell = None
+        self._checked_topology = None
+
+    def __len__(self):
+        return self._n_frames
+
+    @property
+    def n_frames(self):
+        """Number of frames appended so far"""
+        return self._n_frames
+
+    def _allocate(self, traj, capacity):
+        self._xyz = np.empty((capacity, traj.n_atoms, 3), dtype=np.float32)
+        self._time = np.empty(capacity, dtype=np.result_type(traj.time.dtype, np.float32))
+        if self._have_unitcell:
+            self._unitcell_lengths = np.empty((capacity, 3), dtype=np.float32)
+            self._unitcell_angles = np.empty((capacity, 3), dtype=np.float32)
+
+    def _grow(self, capacity):
+        def grow(buffer):
+            if buffer is None:
+                return None
+            new = np.empty((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            new[: self._n_frames] = buffer[: self._n_frames]
+            return new
+
+        self._xyz = grow(self._xyz)
+        self._time = grow(self._time)
+        self._unitcell_lengths = grow(self._unitcell_lengths)
+        self._unitcell_angles = grow(self._unitcell_angles)
+
+    def append(self, traj):
+        """Append the frames of a trajectory
+
+        Parameters
+        ----------
+        traj : Trajectory
+            The trajectory whose frames are appended. Its atoms must match
+            the frames already collected.
+        """
+        if not isinstance(traj, Trajectory):
+            raise TypeError("You can only append Trajectory instances")
+
+        if self._xyz is None:
+            if self._topology is None:
+                self._topology = traj.topology
+            self._have_unitcell = traj._have_unitcell
+        else:
+            if traj.n_atoms != self._xyz.shape[1]:
+                raise ValueError(
+                    "Number of atoms in the builder (%d) is not equal to number of atoms in other" % self._xyz.shape[1],
+                )
+            if self._have_unitcell != traj._have_unitcell:
+                raise ValueError("Mixing trajectories with and without unitcell")
+
+        if (
+            self._check_topology
+            and traj.topology is not None
+            and self._topology is not None
+            and traj.topology is not self._checked_topology
+        ):
+            if traj.topology is not self._topology and traj.topology != self._topology:
+                raise ValueError("The topologies of the Trajectories are not the same")
+            self._checked_topology = traj.topology
+
+        start = 0
+        if self._discard_overlapping_frames and self._n_frames > 0 and len(traj) > 0:
+            # check that all atoms are within 2e-3 nm, as in Trajectory.join
+            if np.all(np.abs(traj.xyz[0] - self._xyz[self._n_frames - 1]) < 2e-3):
+                start = 1
+
+        n_new = len(traj) - start
+        if self._xyz is None:
+            self._allocate(traj, max(self._initial_capacity, n_new))
+        if n_new <= 0:
+            return
+
+        end = self._n_frames + n_new
+        if end > len(self._xyz):
+            self._grow(max(end, 2 * len(self._xyz)))
+
+        self._xyz[self._n_frames : end] = traj.xyz[start:]
+        self._time[self._n_frames : end] = traj.time[start:]
+        if self._have_unitcell:
+            self._unitcell_lengths[self._n_frames : end] = traj.unitcell_lengths[start:]
+            self._unitcell_angles[self._n_frames : end] = traj.unitcell_angles[start:]
+        self._n_frames = end
+
+    def extend(self, trajs):
+        """Append the frames of each trajectory in an iterable
+
+        Parameters
+        ----------
+        trajs : iterable of Trajectory
+            Trajectories to append, in order. This may be a generator such
+            as the one returned by ``md.iterload``.
+        """
+        for traj in trajs:
+            self.append(traj)
+
+    def finalize(self):
+        """Build the Trajectory from the frames appended so far
+
+        The returned trajectory takes ownership of the builder's buffers
+        without copying them, and the builder is reset to an empty state.
+
+        Returns
+        -------
+        trajectory : md.Trajectory
+            The frames appended so far, in order.
+        """
+        if self._xyz is None:
+            raise ValueError("No frames have been appended to the TrajectoryBuilder")
+
+        n = self._n_frames
+        lengths = angles = None
+        if self._have_unitcell:
+            lengths = self._unitcell_lengths[:n]
+            angles = self._unitcell_angles[:n]
+
+        traj = Trajectory(
+            self._xyz[:n],
+            self._topology,
+            time=self._time[:n],
+            unitcell_lengths=lengths,
+            unitcell_angles=angles,
+        )
+        self._reset()
+        return traj
+
+
+class TrajectoryWriter:
+    """Write a trajectory to disk one chunk at a time
+
+    The file is opened once, when the first chunk is written, and each chunk
+    passed to ``write`` goes straight to disk, so peak memory stays at one
+    chunk. Formats whose writers cannot append (GSD and the AMBER restart
+    formats) are collected with a ``TrajectoryBuilder`` instead and saved
+    when the writer is closed.
+
+    Parameters
+    ----------
+    filename : path-like
+        Filesystem path in which to save the trajectory. The extension will
+        be parsed and will control the format.
+    force_overwrite : bool, default=True
+        If `filename` already exists, overwrite it.
+
+    Other Parameters
+    ----------------
+    kwargs : dict
+        Format-specific options, as accepted by ``Trajectory.save``.
+
+    Examples
+    --------
+    >>> with md.TrajectoryWriter('aligned.xtc') as writer:
+    ...     for chunk in md.iterload('output.xtc', top='topology.pdb'):
+    ...         writer.write(chunk.superpose(reference))
+
+    See Also
+    --------
+    save_iter : write an iterable of chunks in one call
+    """
+
+    def __init__(self, filename, force_overwrite=True, **kwargs):
+        self._filename = filename
+        self._force_overwrite = force_overwrite
+        self._kwargs = kwargs
+        self._extension = _get_extension(filename)
+        self._file = None
+        self._builder = None
+        self._n_atoms = None
+        self._have_unitcell = None
+        self._n_frames = 0
+        self._closed = False
+
+    @property
+    def n_frames(self):
+        """Number of frames written so far"""
+        return self._n_frames
+
+    def write(self, traj):
+        """Write the frames of a trajectory to the end of the file
+
+        Parameters
+        ----------
+        traj : Trajectory
+            The frames to write. They must contain the same atoms as the
+            chunks written before.
+        """
+        if self._closed:
+            raise ValueError("I/O operation on closed file")
+        if not isinstance(traj, Trajectory):
+            raise TypeError("You can only write Trajectory instances")
+
+        if self._n_atoms is None:
+            if self._extension not in traj._savers():
+                raise OSError(
+                    f"Sorry, no saver for filename={self._filename} (extension={self._extension}) "
+                    "was found. I can only save files "
+                    f"with extensions in {traj._savers().keys()}",
+                )
+            self._n_atoms = traj.n_atoms
+            self._have_unitcell = traj._have_unitcell
+        else:
+            if traj.n_atoms != self._n_atoms:
+                raise ValueError(
+                    "Number of atoms in the file (%d) is not equal to number of atoms in other" % self._n_atoms,
+                )
+            if traj._have_unitcell != self._have_unitcell:
+                raise ValueError("Mixing trajectories with and without unitcell")
+        traj._check_valid_unitcell()
+
+        streaming = getattr(traj._savers()[self._extension], "_streaming", None)
+        if streaming is None:
+            if self._builder is None:
+                self._builder = TrajectoryBuilder(check_topology=False)
+            self._builder.append(traj)
+            self._n_frames += len(traj)
+            return
+
+        file_class, write_chunk, per_frame, open_kwargs = streaming
+        write_chunk = getattr(traj, write_chunk)
+        kwargs = dict(self._kwargs)
+        options = {"mode": "w", "force_overwrite": self._force_overwrite}
+        for name in open_kwargs:
+            if name in kwargs:
+                options[name] = kwargs.pop(name)
+        for name in per_frame:
+            value = kwargs.get(name)
+            if value is not None and np.ndim(value) == 2:
+                # per-frame values were given for the whole stream
+                kwargs[name] = np.asarray(value)[self._n_frames : self._n_frames + len(traj)]
+        if file_class is PDBTrajectoryFile:
+            # number the models across chunks
+            kwargs["first_model"] = self._n_frames
+
+        if self._file is None:
+            self._file = file_class(os.fspath(self._filename), **options)
+            write_chunk(self._file, **kwargs)
+            if file_class in (HDF5TrajectoryFile, LH5TrajectoryFile):
+                self._file.topology = traj.topology
+        else:
+            write_chunk(self._file, **kwargs)
+        self._n_frames += len(traj)
+
+    def close(self):
+        """Close the file, saving any frames collected for non-streaming formats"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._builder is not None:
+            traj = self._builder.finalize()
+            self._builder = None
+            traj.save(self._filename, force_overwrite=self._force_overwrite, **self._kwargs)
+
+    def __enter__(self):
+        "Support the context manager protocol"
+        return self
+
+    def __exit__(self, *exc_info):
+        "Support the context manager protocol"
+        self.close()
@@ -51,7 +51,7 @@ __all__ = [
 @FormatRegistry.register_loader(".rst7")
 @FormatRegistry.register_loader(".restrt")
 @FormatRegistry.register_loader(".inpcrd")
-def load_restrt(filename, top=None, atom_indices=None):
+def load_restrt(filename, top=None, atom_indices=None, start=None, stop=None):
     """Load an AMBER ASCII restart/inpcrd file. Since this file doesn't contain
     information to specify the topology, you need to supply a topology
 
@@ -67,6 +67,12 @@ def load_restrt(filename, top=None, atom_indices=None):
     atom_indices : array_like, optional
         If not None, then read only a subset of the atoms coordinates from the
         file.
+    start : int, default=None
+        Index of the first frame to load. The file holds a single frame, so
+        the result is empty unless the window includes frame 0. Negative
+        values count back from the end of the file.
+    stop : int, default=None
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -83,7 +89,7 @@ def load_restrt(filename, top=None, atom_indices=None):
     atom_indices = cast_indices(atom_indices)
 
     with AmberRestartFile(filename) as f:
-        return f.read_as_traj(topology, atom_indices=atom_indices)
+        return f.read_as_traj(topology, atom_indices=atom_indices).slice(slice(start, stop), copy=False)
 
 
 @FormatRegistry.register_fileobject(".rst7")
@@ -478,7 +484,7 @@ class AmberRestartFile:
 
 
 @FormatRegistry.register_loader(".ncrst")
-def load_ncrestrt(filename, top=None, atom_indices=None):
+def load_ncrestrt(filename, top=None, atom_indices=None, start=None, stop=None):
     """Load an AMBER NetCDF restart/inpcrd file. Since this file doesn't
     contain information to specify the topology, you need to supply a topology
 
@@ -494,6 +500,12 @@ def load_ncrestrt(filename, top=None, atom_indices=None):
     atom_indices : array_like, optional
         If not None, then read only a subset of the atoms coordinates from the
         file.
+    start : int, default=None
+        Index of the first frame to load. The file holds a single frame, so
+        the result is empty unless the window includes frame 0. Negative
+        values count back from the end of the file.
+    stop : int, default=None
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -510,7 +522,7 @@ def load_ncrestrt(filename, top=None, atom_indices=None):
     atom_indices = cast_indices(atom_indices)
 
     with AmberNetCDFRestartFile(filename) as f:
-        return f.read_as_traj(topology, atom_indices=atom_indices)
+        return f.read_as_traj(topology, atom_indices=atom_indices).slice(slice(start, stop), copy=False)
 
 
 @FormatRegistry.register_fileobject(".ncrst")
@@ -27,7 +27,7 @@ import os
 import numpy as np
 
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, in_units_of
 
 __all__ = ["ArcTrajectoryFile", "load_arc"]
 
@@ -37,7 +37,7 @@ class _EOF(IOError):
 
 
 @FormatRegistry.register_loader(".arc")
-def load_arc(filename, stride=None, atom_indices=None, frame=None, top=None):
+def load_arc(filename, stride=None, atom_indices=None, frame=None, top=None, start=None, stop=None):
     """Load a TINKER .arc file from disk.
 
     Parameters
@@ -52,7 +52,14 @@ def load_arc(filename, stride=None, atom_indices=None, frame=None, top=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. ARC files cannot seek, so the
+        frames before ``start`` are still parsed and then discarded. Negative
+        values count back from the end of the file.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
     top : {str, Trajectory, Topology}, optional
         While the ARC format does does contain minimal topology information, it does
         not include residue information. Pass in either a file path
@@ -90,6 +97,21 @@ def load_arc(filename, stride=None, atom_indices=None, frame=None, top=None):
         if frame is not None:
             f.seek(frame)
             n_frames = 1
+        elif start is not None or stop is not None:
+            # There is no frame index to seek with, so read up to the end of
+            # the window and slice off the frames before ``start``. Negative
+            # bounds need the frame count, so then the whole file is parsed.
+            parsed = []
+
+            def length():
+                parsed.append(f.read_as_traj(atom_indices=atom_indices))
+                return parsed[0].n_frames
+
+            negative = min(start or 0, stop or 0) < 0
+            start, n_frames = cast_frame_range(start, stop, stride, length if negative else None)
+            end = None if n_frames is None else start + n_frames * (stride or 1)
+            traj = parsed[0] if parsed else f.read_as_traj(n_frames=end, atom_indices=atom_indices)
+            return traj[start:end:stride]
         else:
             n_frames = None
         return f.read_as_traj(
@@ -34,17 +34,19 @@ cimport numpy as np
 
 np.import_array()
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 from dcdlib cimport (
     close_file_read,
     close_file_write,
     dcd_rewind,
+    dcd_skip,
     dcdhandle,
     molfile_timestep_t,
     open_dcd_read,
     open_dcd_write,
     read_next_timestep,
+    read_next_timestep_subset,
     write_timestep,
 )
 from libc.stdlib cimport free, malloc
@@ -62,11 +64,13 @@ from dcdlib cimport (
     close_file_read,
     close_file_write,
     dcd_rewind,
+    dcd_skip,
     dcdhandle,
     molfile_timestep_t,
     open_dcd_read,
     open_dcd_write,
     read_next_timestep,
+    read_next_timestep_subset,
     write_timestep,
 )
 from libc.stdlib cimport free, malloc
@@ -99,8 +103,8 @@ cdef ERROR_MESSAGES = {
 ##############################################################################
 
 @FormatRegistry.register_loader('.dcd')
-def load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None):
-    """load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None)
+def load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
+    """load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None)
 
     Load an DCD file from disk.
 
@@ -120,12 +124,19 @@ def load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None):
         Only read every stride-th frame
     atom_indices : array_like, optional
         If not none, then read only a subset of the atoms coordinates from the
-        file. This may be slightly slower than the standard read because it
-        requires an extra copy, but will save memory.
+        file. Only the parts of each frame that contain these atoms are read
+        from disk.
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -167,7 +178,9 @@ def load_dcd(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
         return f.read_as_traj(topology, n_frames=n_frames, stride=stride, atom_indices=atom_indices)
 
 
@@ -336,15 +349,13 @@ cdef class DCDTrajectoryFile:
             raise IOError('Invalid argument')
 
         if advance is not None:
-            for i in range(advance):
-                status = read_next_timestep(self.fh, self.n_atoms, NULL)
+            status = dcd_skip(self.fh, advance)
         elif absolute is not None:
             result = dcd_rewind(self.fh)
             if result != 0:
                 raise IOError("Error seeking in %s" % self.filename)
 
-            for i in range(absolute):
-                status = read_next_timestep(self.fh, self.n_atoms, NULL)
+            status = dcd_skip(self.fh, absolute)
 
     def tell(self):
         """Current file position
@@ -394,8 +405,8 @@ cdef class DCDTrajectoryFile:
             Read only every stride-th frame.
         atom_indices : array_like, optional
             If not none, then read only a subset of the atoms coordinates from the
-            file. This may be slightly slower than the standard read because it required
-            an extra copy, but will save memory.
+            file. Only the parts of each frame that contain these atoms are
+            read from disk.
 
         Returns
         -------
@@ -436,8 +447,8 @@ cdef class DCDTrajectoryFile:
             Read only every stride-th frame.
         atom_indices : array_like, optional
             If not none, then read only a subset of the atoms coordinates from the
-            file. This may be slightly slower than the standard read because it required
-            an extra copy, but will save memory.
+            file. Only the parts of each frame that contain these atoms are
+            read from disk.
 
         Returns
         -------
@@ -461,48 +472,55 @@ cdef class DCDTrajectoryFile:
             raise IOError("file is not open")
 
         cdef int _n_frames, n_atoms_to_read, _stride
+        if stride is None:
+            _stride = 1
+        else:
+            _stride = stride
+
         if n_frames is None:
             # if the user specifies n_frames=None, they want to read to the
             # end of the file
-            _n_frames = self.n_frames - self.tell()
+            _n_frames = (self.n_frames - self.tell() + _stride - 1) // _stride
         else:
             _n_frames = int(n_frames)
 
+        # only used if atom_indices is given. `indices` is the gather order
+        # of the output, `sel` the sorted set of atoms to fetch from disk
+        cdef np.ndarray[dtype=np.int32_t, ndim=1, mode='c'] indices
+        cdef np.ndarray[dtype=np.int32_t, ndim=1, mode='c'] sel
         if atom_indices is None:
             n_atoms_to_read = self.n_atoms
-        elif isinstance(atom_indices, slice):
-            n_atoms_to_read = len(np.arange(self.n_atoms)[atom_indices])
         else:
-            if min(atom_indices) < 0:
+            if isinstance(atom_indices, slice):
+                atom_indices = np.arange(self.n_atoms)[atom_indices]
+            atom_indices = np.asarray(atom_indices)
+            if len(atom_indices) > 0 and atom_indices.min() < 0:
                 raise ValueError('atom_indices should be zero indexed. you gave an index less than zerp')
-            if max(atom_indices) >= self.n_atoms:
+            if len(atom_indices) > 0 and atom_indices.max() >= self.n_atoms:
                 raise ValueError('atom indices should be zero indexed. you gave an index bigger than the number of atoms')
             n_atoms_to_read = len(atom_indices)
-
-        if stride is None:
-            _stride = 1
-        else:
-            _stride = stride
+            indices = np.ascontiguousarray(atom_indices, dtype=np.int32)
+            sel = np.unique(indices)
 
         # malloc space to put the data that we're going to read off the disk
         cdef np.ndarray[dtype=np.float32_t, ndim=3] xyz = np.zeros((_n_frames, n_atoms_to_read, 3), dtype=np.float32)
         cdef np.ndarray[dtype=np.float32_t, ndim=2] cell_lengths = np.zeros((_n_frames, 3), dtype=np.float32)
         cdef np.ndarray[dtype=np.float32_t, ndim=2] cell_angles = np.zeros((_n_frames, 3), dtype=np.float32)
 
-        # only used if atom_indices is given
-        cdef np.ndarray[dtype=np.float32_t, ndim=2] framebuffer = np.zeros((self.n_atoms, 3), dtype=np.float32)
-
-        cdef int i, j
+        cdef int i
         cdef int status = _DCD_SUCCESS
 
         for i in range(_n_frames):
+            self.timestep.coords = <float*> np.PyArray_DATA(xyz) + 3 * i * n_atoms_to_read
             if atom_indices is None:
-                self.timestep.coords = &xyz[i,0,0]
                 status = read_next_timestep(self.fh, self.n_atoms, self.timestep)
             else:
-                self.timestep.coords = &framebuffer[0,0]
-                status = read_next_timestep(self.fh, self.n_atoms, self.timestep)
-                xyz[i, :, :] = framebuffer[atom_indices, :]
+                # gather the selected atoms in C, reading only the byte
+                # ranges of the frame that contain them
+                status = read_next_timestep_subset(
+                    self.fh, self.timestep,
+                    <int*> np.PyArray_DATA(sel), len(sel),
+                    <int*> np.PyArray_DATA(indices), n_atoms_to_read)
 
             cell_lengths[i, 0] = self.timestep.A
             cell_lengths[i, 1] = self.timestep.B
@@ -515,9 +533,10 @@ cdef class DCDTrajectoryFile:
                 # if the frame was not successfully read, then we're done
                 break
 
-            for j in range(_stride - 1):
-                if read_next_timestep(self.fh, self.n_atoms, NULL) != _DCD_SUCCESS:
-                    break
+            if _stride > 1:
+                # frames have a fixed size on disk, so the skipped frames
+                # are passed over with a single seek
+                dcd_skip(self.fh, _stride - 1)
 
         if np.all(cell_lengths < 1e-10):
             # in the DCD C code, if there's unitcell information inside the
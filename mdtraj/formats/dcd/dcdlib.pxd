@@ -19,6 +19,9 @@ cdef extern from "include/dcdplugin.h":
 
     dcdhandle* open_dcd_read(char *path, char *filetype, int *natoms, int* nsets)
     int read_next_timestep(dcdhandle *v, int natoms, molfile_timestep_t *ts)
+    int read_next_timestep_subset(dcdhandle *v, molfile_timestep_t *ts,
+                                  const int *sel, int nsel,
+                                  const int *indices, int nindices)
     void close_file_read(dcdhandle *v)
 
     dcdhandle* open_dcd_write(const char *path, const char *filetype, const int natoms, const int with_unitcell)
@@ -26,6 +29,7 @@ cdef extern from "include/dcdplugin.h":
     void close_file_write(dcdhandle *v)
     int dcd_nsets(dcdhandle* v)
     int dcd_rewind(dcdhandle* dcd)
+    int dcd_skip(dcdhandle *v, int nsteps)
 
 
 cdef extern from "include/molfile_plugin.h":
@@ -30,6 +30,10 @@ typedef struct {
 #define RECSCALE64BIT 2
 #define RECSCALEMAX   2
 
+/* Selected atoms closer together than this (in atoms) are read from disk */
+/* with a single contiguous read rather than seeking between them.        */
+#define DCD_SUBSET_MAXGAP 1024
+
 /* Define error codes that may be returned by the DCD routines */
 #define DCD_SUCCESS      0  /* No problems                     */
 #define DCD_EOF         -1  /* Normal EOF                      */
@@ -66,6 +70,9 @@ typedef struct {
 dcdhandle* open_dcd_read(const char *path, const char *filetype, int *natoms, int* nsets);
 void close_file_read(dcdhandle *v);
 int read_next_timestep(dcdhandle *v, int natoms, molfile_timestep_t *ts);
+int read_next_timestep_subset(dcdhandle *v, molfile_timestep_t *ts,
+                              const int *sel, int nsel,
+                              const int *indices, int nindices);
 
 dcdhandle* open_dcd_write(const char *path, const char *filetype, const int natoms,
                           const int with_unitcell);
@@ -73,5 +80,6 @@ int write_timestep(dcdhandle *v, const molfile_timestep_t *ts);
 void close_file_write(dcdhandle *v);
 int dcd_nsets(dcdhandle* v);
 int dcd_rewind(dcdhandle* dcd);
+int dcd_skip(dcdhandle *v, int nsteps);
 
 #endif
@@ -582,19 +582,12 @@ static int read_dcdstep(fio_fd fd, int N, float *X, float *Y, float *Z,
 
 
 /*
- * Skip past a timestep.  If there are fixed atoms, this cannot be used with
- * the first timestep.
- * Input: fd - a file struct from which the header has already been read
- *        natoms - number of atoms per timestep
- *        nfixed - number of fixed atoms
- *        charmm - charmm flags as returned by read_dcdheader
- * Output: 0 on success, negative error code on failure.
- * Side effects: One timestep will be skipped; fd will be positioned at the
- *               next timestep.
+ * Size in bytes of a timestep on disk. If there are fixed atoms, this does
+ * not apply to the first timestep.
  */
-static int skip_dcdstep(fio_fd fd, int natoms, int nfixed, int charmm) {
+static fio_size_t dcdstep_size(int natoms, int nfixed, int charmm) {
 
-  int seekoffset = 0;
+  fio_size_t stepsize = 0;
   int rec_scale;
 
   if (charmm & DCD_HAS_64BIT_REC) {
@@ -605,23 +598,147 @@ static int skip_dcdstep(fio_fd fd, int natoms, int nfixed, int charmm) {
 
   /* Skip charmm extra block */
   if ((charmm & DCD_IS_CHARMM) && (charmm & DCD_HAS_EXTRA_BLOCK)) {
-    seekoffset += 4*rec_scale + 48 + 4*rec_scale;
+    stepsize += 4*rec_scale + 48 + 4*rec_scale;
   }
 
   /* For each atom set, seek past an int, the free atoms, and another int. */
-  seekoffset += 3 * (2*rec_scale + natoms - nfixed) * 4;
+  stepsize += 3 * (fio_size_t) (2*rec_scale + natoms - nfixed) * 4;
 
   /* Assume that charmm 4th dim is the same size as the other three. */
   if ((charmm & DCD_IS_CHARMM) && (charmm & DCD_HAS_4DIMS)) {
-    seekoffset += (2*rec_scale + natoms - nfixed) * 4;
+    stepsize += (fio_size_t) (2*rec_scale + natoms - nfixed) * 4;
   }
 
+  return stepsize;
+}
+
+
+/*
+ * Skip past nsteps timesteps with a single seek.  If there are fixed atoms,
+ * this cannot be used with the first timestep.
+ * Input: fd - a file struct from which the header has already been read
+ *        natoms - number of atoms per timestep
+ *        nfixed - number of fixed atoms
+ *        charmm - charmm flags as returned by read_dcdheader
+ *        nsteps - number of timesteps to skip
+ * Output: 0 on success, negative error code on failure.
+ * Side effects: fd will be positioned nsteps timesteps further.
+ */
+static int skip_dcdsteps(fio_fd fd, int natoms, int nfixed, int charmm,
+                         int nsteps) {
+  fio_size_t seekoffset = dcdstep_size(natoms, nfixed, charmm) * nsteps;
+
   if (fio_fseek(fd, seekoffset, FIO_SEEK_CUR)) return DCD_BADEOF;
 
   return DCD_SUCCESS;
 }
 
 
+/*
+ * Skip past a timestep.  If there are fixed atoms, this cannot be used with
+ * the first timestep.
+ * Input: fd - a file struct from which the header has already been read
+ *        natoms - number of atoms per timestep
+ *        nfixed - number of fixed atoms
+ *        charmm - charmm flags as returned by read_dcdheader
+ * Output: 0 on success, negative error code on failure.
+ * Side effects: One timestep will be skipped; fd will be positioned at the
+ *               next timestep.
+ */
+static int skip_dcdstep(fio_fd fd, int natoms, int nfixed, int charmm) {
+  return skip_dcdsteps(fd, natoms, nfixed, charmm, 1);
+}
+
+
+/*
+ * Read a single X, Y or Z coordinate record, but only the byte ranges that
+ * hold the atoms in sel.
+ * Input: fd - positioned at the leading record marker of the coordinate set
+ *        N - number of atoms per timestep
+ *        sel - sorted, unique atom indices to read
+ *        nsel - number of entries in sel
+ * Output: 0 on success, negative error code on failure.
+ * Side effects: buf[sel[i]] holds the coordinate of atom sel[i]. Atoms that
+ *               fall in a gap shorter than DCD_SUBSET_MAXGAP between two
+ *               selected atoms are read as well; all other entries of buf
+ *               are left untouched. fd is positioned after the record.
+ */
+static int read_dcdrecord_subset(fio_fd fd, int N, float *buf, const int *sel,
+                                 int nsel, int reverseEndian, int rec_scale)
+{
+  int input_integer[2];
+  int i, first, last;
+  fio_size_t start;
+
+  input_integer[1] = 0;
+  if (fio_fread(input_integer, sizeof(int), rec_scale, fd) != rec_scale) return DCD_BADREAD;
+  if (reverseEndian) swap4_aligned(input_integer, rec_scale);
+  if ((input_integer[0]+input_integer[1]) != (int) sizeof(float)*N) return DCD_BADFORMAT;
+  start = fio_ftell(fd);
+
+  i = 0;
+  while (i < nsel) {
+    /* coalesce nearby atoms into one contiguous read */
+    first = sel[i];
+    last = sel[i];
+    while (i+1 < nsel && sel[i+1] - last <= DCD_SUBSET_MAXGAP) {
+      last = sel[++i];
+    }
+    i++;
+
+    if (fio_fseek(fd, start + sizeof(float)*first, FIO_SEEK_SET)) return DCD_BADREAD;
+    if (fio_fread(buf + first, sizeof(float)*(last-first+1), 1, fd) != 1) return DCD_BADREAD;
+    if (reverseEndian) swap4_aligned(buf + first, last-first+1);
+  }
+
+  if (fio_fseek(fd, start + sizeof(float)*N, FIO_SEEK_SET)) return DCD_BADREAD;
+  input_integer[1] = 0;
+  if (fio_fread(input_integer, sizeof(int), rec_scale, fd) != rec_scale) return DCD_BADREAD;
+  if (reverseEndian) swap4_aligned(input_integer, rec_scale);
+  if ((input_integer[0]+input_integer[1]) != (int) sizeof(float)*N) return DCD_BADFORMAT;
+
+  return DCD_SUCCESS;
+}
+
+
+/*
+ * Read a subset of the atoms of a dcd timestep from a dcd file. Only the
+ * byte ranges of the X, Y and Z records that contain the selected atoms are
+ * read from disk. This cannot be used for files with fixed atoms.
+ * Input: fd, N, reverseEndian, charmm - as for read_dcdstep
+ *        X, Y, Z - space for N floats each
+ *        unitcell - space for six floats to hold the unit cell data.
+ *        sel - sorted, unique atom indices to read
+ *        nsel - number of entries in sel
+ * Output: 0 on success, negative error code on failure.
+ */
+static int read_dcdstep_subset(fio_fd fd, int N, float *X, float *Y, float *Z,
+                               float *unitcell, const int *sel, int nsel,
+                               int reverseEndian, int charmm)
+{
+  int ret_val, rec_scale;
+
+  if (charmm & DCD_HAS_64BIT_REC) {
+    rec_scale=RECSCALE64BIT;
+  } else {
+    rec_scale=RECSCALE32BIT;
+  }
+
+  ret_val = read_charmm_extrablock(fd, charmm, reverseEndian, unitcell);
+  if (ret_val) return ret_val;
+  ret_val = read_dcdrecord_subset(fd, N, X, sel, nsel, reverseEndian, rec_scale);
+  if (ret_val) return ret_val;
+  ret_val = read_dcdrecord_subset(fd, N, Y, sel, nsel, reverseEndian, rec_scale);
+  if (ret_val) return ret_val;
+  ret_val = read_dcdrecord_subset(fd, N, Z, sel, nsel, reverseEndian, rec_scale);
+  if (ret_val) return ret_val;
+  ret_val = read_charmm_4dim(fd, charmm, reverseEndian);
+  if (ret_val) return ret_val;
+
+  return DCD_SUCCESS;
+}
+
+
 /*
  * Write a timestep to a dcd file
  * Input: fd - a file struct for which a dcd header has already been written
@@ -890,6 +1007,32 @@ dcdhandle* open_dcd_read(const char *path, const char *filetype, int *natoms, in
 }
 
 
+/* copy the unit cell read by read_dcdstep into a timestep */
+static void store_unitcell(const float *unitcell, molfile_timestep_t *ts) {
+  ts->A = unitcell[0];
+  ts->B = unitcell[2];
+  ts->C = unitcell[5];
+
+  if (unitcell[1] >= -1.0 && unitcell[1] <= 1.0 &&
+      unitcell[3] >= -1.0 && unitcell[3] <= 1.0 &&
+      unitcell[4] >= -1.0 && unitcell[4] <= 1.0) {
+    /* This file was generated by CHARMM, or by NAMD > 2.5, with the angle */
+    /* cosines of the periodic cell angles written to the DCD file.        */
+    /* This formulation improves rounding behavior for orthogonal cells    */
+    /* so that the angles end up at precisely 90 degrees, unlike acos().   */
+    ts->alpha = 90.0 - asin(unitcell[4]) * 90.0 / M_PI_2; /* cosBC */
+    ts->beta  = 90.0 - asin(unitcell[3]) * 90.0 / M_PI_2; /* cosAC */
+    ts->gamma = 90.0 - asin(unitcell[1]) * 90.0 / M_PI_2; /* cosAB */
+  } else {
+    /* This file was likely generated by NAMD 2.5 and the periodic cell    */
+    /* angles are specified in degrees rather than angle cosines.          */
+    ts->alpha = unitcell[4]; /* angle between B and C */
+    ts->beta  = unitcell[3]; /* angle between A and C */
+    ts->gamma = unitcell[1]; /* angle between A and B */
+  }
+}
+
+
 int read_next_timestep(dcdhandle *v, int natoms, molfile_timestep_t *ts) {
   dcdhandle *dcd;
   int i, j, rc;
@@ -945,32 +1088,89 @@ int read_next_timestep(dcdhandle *v, int natoms, molfile_timestep_t *ts) {
     }
   }
 
-  ts->A = unitcell[0];
-  ts->B = unitcell[2];
-  ts->C = unitcell[5];
+  store_unitcell(unitcell, ts);
 
-  if (unitcell[1] >= -1.0 && unitcell[1] <= 1.0 &&
-      unitcell[3] >= -1.0 && unitcell[3] <= 1.0 &&
-      unitcell[4] >= -1.0 && unitcell[4] <= 1.0) {
-    /* This file was generated by CHARMM, or by NAMD > 2.5, with the angle */
-    /* cosines of the periodic cell angles written to the DCD file.        */
-    /* This formulation improves rounding behavior for orthogonal cells    */
-    /* so that the angles end up at precisely 90 degrees, unlike acos().   */
-    ts->alpha = 90.0 - asin(unitcell[4]) * 90.0 / M_PI_2; /* cosBC */
-    ts->beta  = 90.0 - asin(unitcell[3]) * 90.0 / M_PI_2; /* cosAC */
-    ts->gamma = 90.0 - asin(unitcell[1]) * 90.0 / M_PI_2; /* cosAB */
+  return MOLFILE_SUCCESS;
+}
+
+
+int read_next_timestep_subset(dcdhandle *v, molfile_timestep_t *ts,
+                              const int *sel, int nsel,
+                              const int *indices, int nindices) {
+  dcdhandle *dcd;
+  int i, j, rc;
+  float unitcell[6];
+  unitcell[0] = unitcell[2] = unitcell[5] = 0.0f;
+  unitcell[1] = unitcell[3] = unitcell[4] = 90.0f;
+  dcd = (dcdhandle *)v;
+
+  if (dcd->setsread == dcd->nsets) return MOLFILE_EOF;
+  dcd->setsread++;
+
+  if (dcd->nfixed) {
+    /* the free atoms are stored compactly, so there is no fixed layout */
+    /* to seek through. decode the full frame and gather afterwards.    */
+    rc = read_dcdstep(dcd->fd, dcd->natoms, dcd->x, dcd->y, dcd->z, unitcell,
+               dcd->nfixed, dcd->first, dcd->freeind, dcd->fixedcoords,
+               dcd->reverse, dcd->charmm);
   } else {
-    /* This file was likely generated by NAMD 2.5 and the periodic cell    */
-    /* angles are specified in degrees rather than angle cosines.          */
-    ts->alpha = unitcell[4]; /* angle between B and C */
-    ts->beta  = unitcell[3]; /* angle between A and C */
-    ts->gamma = unitcell[1]; /* angle between A and B */
+    rc = read_dcdstep_subset(dcd->fd, dcd->natoms, dcd->x, dcd->y, dcd->z,
+               unitcell, sel, nsel, dcd->reverse, dcd->charmm);
+  }
+  dcd->first = 0;
+  if (rc < 0) {
+    print_dcderror("read_dcdstep_subset", rc);
+    return MOLFILE_ERROR;
+  }
+
+  {
+    float *nts = ts->coords;
+    const float *bufx = dcd->x;
+    const float *bufy = dcd->y;
+    const float *bufz = dcd->z;
+
+    for (i=0, j=0; i<nindices; i++, j+=3) {
+      nts[j    ] = bufx[indices[i]];
+      nts[j + 1] = bufy[indices[i]];
+      nts[j + 2] = bufz[indices[i]];
+    }
   }
 
+  store_unitcell(unitcell, ts);
+
   return MOLFILE_SUCCESS;
 }
 
 
+int dcd_skip(dcdhandle *v, int nsteps) {
+  dcdhandle *dcd;
+  int rc, nskip;
+  dcd = (dcdhandle *)v;
+
+  if (nsteps <= 0) return MOLFILE_SUCCESS;
+  if (dcd->first && dcd->nfixed) {
+    /* We can't just skip it because we need the fixed atom coordinates */
+    rc = read_next_timestep(v, dcd->natoms, NULL);
+    if (rc != MOLFILE_SUCCESS) return rc;
+    nsteps--;
+  }
+
+  nskip = nsteps;
+  if (nskip > dcd->nsets - dcd->setsread) nskip = dcd->nsets - dcd->setsread;
+  if (nskip > 0) {
+    rc = skip_dcdsteps(dcd->fd, dcd->natoms, dcd->nfixed, dcd->charmm, nskip);
+    if (rc < 0) {
+      print_dcderror("skip_dcdsteps", rc);
+      return MOLFILE_ERROR;
+    }
+    dcd->setsread += nskip;
+    dcd->first = 0;
+  }
+  if (nskip < nsteps) return MOLFILE_EOF;
+
+  return MOLFILE_SUCCESS;
+}
+
 void close_file_read(dcdhandle *v) {
   dcdhandle *dcd = (dcdhandle *)v;
   close_dcd_read(dcd->freeind, dcd->fixedcoords);
@@ -39,7 +39,7 @@ cimport numpy as np
 
 np.import_array()
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 from dtrlib cimport (
     close_file_read,
@@ -50,6 +50,7 @@ from dtrlib cimport (
     open_file_write,
     read_times,
     read_timestep2,
+    read_timestep2_subset,
     read_timestep_metadata,
     write_timestep,
 )
@@ -70,7 +71,7 @@ cdef int _DTR_EOF    = -1   # No problems
 ##############################################################################
 
 
-def _load_desmond_traj(filename, top=None, stride=None, atom_indices=None, frame=None):
+def _load_desmond_traj(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """
     """
     from mdtraj.core.trajectory import _parse_topology
@@ -87,14 +88,16 @@ def _load_desmond_traj(filename, top=None, stride=None, atom_indices=None, frame
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
 
         return f.read_as_traj(topology, n_frames=n_frames, atom_indices=atom_indices, stride=stride)
 
 
 @FormatRegistry.register_loader('.dtr')
-def load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None):
-    """load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None)
+def load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
+    """load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None)
 
     Load a dtr file from disk.
 
@@ -142,7 +145,14 @@ def load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -167,13 +177,14 @@ def load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None):
     --------
     mdtraj.DTRTrajectoryFile :  Low level interface to dtr files
     """
-    return _load_desmond_traj(filename, top=top, stride=stride, atom_indices=atom_indices, frame=frame)
+    return _load_desmond_traj(filename, top=top, stride=stride, atom_indices=atom_indices, frame=frame,
+                              start=start, stop=stop)
 
 
 @FormatRegistry.register_loader('.stk')
-def load_stk(filename, top=None, stride=None, atom_indices=None, frame=None):
+def load_stk(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
 
-    """load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None)
+    """load_dtr(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None)
 
     Load a stk file from disk.
 
@@ -200,7 +211,14 @@ def load_stk(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -218,7 +236,8 @@ def load_stk(filename, top=None, stride=None, atom_indices=None, frame=None):
     --------
     mdtraj.DTRTrajectoryFile :  Low level interface to dtr files
     """
-    return _load_desmond_traj(filename, top=top, stride=stride, atom_indices=atom_indices, frame=frame)
+    return _load_desmond_traj(filename, top=top, stride=stride, atom_indices=atom_indices, frame=frame,
+                              start=start, stop=stop)
 
 cdef class DTRTrajectoryFile:
     """DTRTrajectoryFile(filename, mode='r', force_overwrite=True)
@@ -468,7 +487,7 @@ cdef class DTRTrajectoryFile:
         if atom_indices is not None:
             topology = topology.subset(atom_indices)
 
-        xyz, time, box_length, box_angle = self.read(stride=stride, atom_indices=atom_indices)
+        xyz, time, box_length, box_angle = self.read(n_frames=n_frames, stride=stride, atom_indices=atom_indices)
         if len(xyz) == 0:
             return Trajectory(xyz=np.zeros((0, topology.n_atoms, 3)), topology=topology)
 
@@ -549,16 +568,20 @@ cdef class DTRTrajectoryFile:
 
         _n_frames = len(times)
 
+        # only used if atom_indices is given
+        cdef np.ndarray[dtype=np.int32_t, ndim=1, mode='c'] indices
         if atom_indices is None:
             n_atoms_to_read = self.n_atoms
-        elif isinstance(atom_indices, slice):
-            n_atoms_to_read = len(np.arange(self.n_atoms)[atom_indices])
         else:
-            if min(atom_indices) < 0:
+            if isinstance(atom_indices, slice):
+                atom_indices = np.arange(self.n_atoms)[atom_indices]
+            atom_indices = np.asarray(atom_indices)
+            if len(atom_indices) > 0 and atom_indices.min() < 0:
                 raise ValueError('atom_indices should be zero indexed. you gave an index less than zero')
-            if max(atom_indices) >= self.n_atoms:
+            if len(atom_indices) > 0 and atom_indices.max() >= self.n_atoms:
                 raise ValueError('atom indices should be zero indexed. you gave an index bigger than the number of atoms')
             n_atoms_to_read = len(atom_indices)
+            indices = np.ascontiguousarray(atom_indices, dtype=np.int32)
 
         # allocate space to store the data that we are going to read off the disk
         # Desmond trajectory has different format, the storage could be very different
@@ -567,8 +590,10 @@ cdef class DTRTrajectoryFile:
         cdef np.ndarray[dtype=np.float32_t, ndim=2] cell_lengths = np.zeros((_n_frames, 3), dtype=np.float32)
         cdef np.ndarray[dtype=np.float32_t, ndim=2] cell_angles = np.zeros((_n_frames, 3), dtype=np.float32)
 
-        # only used if atom_indices is given
-        cdef np.ndarray[dtype=np.float32_t, ndim=2] framebuffer = np.zeros((self.n_atoms, 3), dtype=np.float32)
+        # only used if atom_indices is given, as decode space for the full frame
+        cdef np.ndarray[dtype=np.float32_t, ndim=2] framebuffer
+        if atom_indices is not None:
+            framebuffer = np.empty((self.n_atoms, 3), dtype=np.float32)
 
         cdef int i, j
         cdef int status = _DTR_SUCCESS
@@ -576,17 +601,18 @@ cdef class DTRTrajectoryFile:
         for j in range(_n_frames):
             i = j*_stride + _start
 
+            self.timestep.coords = <float*> np.PyArray_DATA(xyz) + 3 * j * n_atoms_to_read
+            # set velocities to NULL, otherwise it will cause segmentation fault if the trajectory
+            # happen to contain velocities
+            self.timestep.velocities = NULL
             if atom_indices is None:
-                self.timestep.coords = &xyz[j,0,0]
-                # set velocities to NULL, otherwise it will cause segmentation fault if the trajectory
-                # happen to contain velocities
-                self.timestep.velocities = NULL
                 status = read_timestep2(self.fh, i, self.timestep)
             else:
-                self.timestep.coords = &framebuffer[0,0]
-                self.timestep.velocities = NULL
-                status = read_timestep2(self.fh, i, self.timestep)
-                xyz[j, :, :] = framebuffer[atom_indices, :]
+                # the selected atoms are gathered in C
+                status = read_timestep2_subset(self.fh, i, self.timestep,
+                                               &framebuffer[0, 0],
+                                               <int*> np.PyArray_DATA(indices),
+                                               n_atoms_to_read)
 
             cell_lengths[j, 0] = self.timestep.A
             cell_lengths[j, 1] = self.timestep.B
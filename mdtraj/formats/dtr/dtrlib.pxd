@@ -16,6 +16,8 @@ cdef extern from "include/dtrplugin.hxx":
 
     void* open_file_read(const char *path, const char *filetype, int *natoms)
     int read_timestep2(void *v, molfile_ssize_t n, molfile_timestep_t *ts)
+    int read_timestep2_subset(void *v, molfile_ssize_t n, molfile_timestep_t *ts,
+                              float *buffer, const int *indices, int nindices)
     molfile_ssize_t read_times(void *v, molfile_ssize_t start, molfile_ssize_t count, double *times)
     void close_file_read(void *v)
 
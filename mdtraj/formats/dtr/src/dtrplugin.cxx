@@ -2235,6 +2235,28 @@ int read_timestep2(void *v, molfile_ssize_t n, molfile_timestep_t *ts) {
   return h->frame(n, ts);
 }
 
+int read_timestep2_subset(void *v, molfile_ssize_t n, molfile_timestep_t *ts,
+                          float *buffer, const int *indices, int nindices) {
+  FrameSetReader *h = reinterpret_cast<FrameSetReader *>(v);
+  float *coords = ts->coords;
+  int rc;
+
+  // frames are self-describing (and possibly double precision or fixed
+  // point), so decode the full frame into buffer and gather the selected
+  // atoms here rather than in the caller.
+  ts->coords = buffer;
+  rc = h->frame(n, ts);
+  ts->coords = coords;
+  if (rc != MOLFILE_SUCCESS) return rc;
+
+  for (int i=0; i<nindices; i++) {
+    coords[3*i  ] = buffer[3*indices[i]  ];
+    coords[3*i+1] = buffer[3*indices[i]+1];
+    coords[3*i+2] = buffer[3*indices[i]+2];
+  }
+  return MOLFILE_SUCCESS;
+}
+
 molfile_ssize_t read_times(void *v,
                                   molfile_ssize_t start,
                                   molfile_ssize_t count,
@@ -55,11 +55,11 @@ import mdtraj as md
 from mdtraj.core import element as elem
 from mdtraj.formats import pdb
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 
 @FormatRegistry.register_loader(".gro")
-def load_gro(filename, stride=None, atom_indices=None, frame=None, top=None):
+def load_gro(filename, stride=None, atom_indices=None, frame=None, top=None, start=None, stop=None):
     """Load a GROMACS GRO file.
 
     Parameters
@@ -74,7 +74,14 @@ def load_gro(filename, stride=None, atom_indices=None, frame=None, top=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. GRO files cannot seek, so the
+        frames before ``start`` are still parsed and then discarded. Negative
+        values count back from the end of the file.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
     top : mdtraj.core.Topology, default=None
         if you give a topology as input the topology won't be parsed from the gro file
         it saves time if you have to parse a big number of files
@@ -84,6 +91,21 @@ def load_gro(filename, stride=None, atom_indices=None, frame=None, top=None):
         if frame is not None:
             f.seek(frame)
             n_frames = 1
+        elif start is not None or stop is not None:
+            # There is no frame index to seek with, so read up to the end of
+            # the window and slice off the frames before ``start``. Negative
+            # bounds need the frame count, so then the whole file is parsed.
+            parsed = []
+
+            def length():
+                parsed.append(f.read_as_traj(atom_indices=atom_indices))
+                return parsed[0].n_frames
+
+            negative = min(start or 0, stop or 0) < 0
+            start, n_frames = cast_frame_range(start, stop, stride, length if negative else None)
+            end = None if n_frames is None else start + n_frames * (stride or 1)
+            traj = parsed[0] if parsed else f.read_as_traj(n_frames=end, atom_indices=atom_indices)
+            return traj[start:end:stride]
         else:
             n_frames = None
         return f.read_as_traj(
@@ -246,6 +268,7 @@ class GroTrajectoryFile:
             topology = topology.subset(atom_indices)
 
         coordinates, time, unitcell_vectors = self.read(
+            n_frames=n_frames,
             stride=stride,
             atom_indices=atom_indices,
         )
@@ -27,7 +27,7 @@ import numpy as np
 from mdtraj.core.element import virtual_site
 from mdtraj.core.topology import Topology
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, lengths_and_angles_to_tilt_factors
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, lengths_and_angles_to_tilt_factors
 
 __all__ = ["load_gsd", "write_gsd", "load_gsd_topology"]
 
@@ -41,6 +41,7 @@ def load_gsd(
     stride=None,
     atom_indices=None,
     frame=None,
+    stop=None,
 ):
     """Load a GSD trajectory file.
 
@@ -52,7 +53,8 @@ def load_gsd(
         A pdb file, a trajectory, or a topology to supply topology information
         If None, topology information will be parsed from the GSD file
     start : int, None
-        First frame to convert
+        First frame to convert. Negative values count back from the end of
+        the file.
     n_frames : int, None
         Number of frames after `start` to convert
     stride : int
@@ -63,7 +65,11 @@ def load_gsd(
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    stop : int, None
+        Convert frames up to, but not including, this index. Negative values
+        count back from the end of the file. Cannot be combined with
+        `n_frames`.
 
     Returns
     -------
@@ -99,6 +105,11 @@ def load_gsd(
             return t
 
         else:
+            start, span = cast_frame_range(start, stop, length=f.__len__)
+            if span is not None:
+                if n_frames is not None:
+                    raise ValueError("n_frames and stop cannot both be given")
+                n_frames = span
             return hoomdtraj_to_traj(
                 f,
                 topology,
@@ -47,7 +47,7 @@ import mdtraj
 import mdtraj.core.element as elem
 from mdtraj.core.topology import Topology
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, import_, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, import_, in_units_of
 
 __all__ = ["HDF5TrajectoryFile", "load_hdf5"]
 
@@ -73,7 +73,7 @@ Frames = namedtuple(
 
 @FormatRegistry.register_loader(".h5")
 @FormatRegistry.register_loader(".hdf5")
-def load_hdf5(filename, stride=None, atom_indices=None, frame=None):
+def load_hdf5(filename, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """Load an MDTraj hdf5 trajectory file from disk.
 
     Parameters
@@ -89,7 +89,14 @@ def load_hdf5(filename, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -123,7 +130,12 @@ def load_hdf5(filename, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
+            if n_frames is not None and stride is not None:
+                # read() counts n_frames before striding
+                n_frames *= stride
         return f.read_as_traj(n_frames=n_frames, stride=stride, atom_indices=atom_indices)
 
 
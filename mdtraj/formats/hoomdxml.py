@@ -31,7 +31,7 @@ __all__ = ["load_hoomdxml"]
 
 
 @FormatRegistry.register_loader(".hoomdxml")
-def load_hoomdxml(filename, top=None):
+def load_hoomdxml(filename, top=None, start=None, stop=None):
     """Load a single conformation from an HOOMD-Blue XML file.
 
     For more information on this file format, see:
@@ -48,6 +48,12 @@ def load_hoomdxml(filename, top=None):
         The path on disk to the XML file
     top : None
         This argumet is ignored
+    start : int, default=None
+        Index of the first frame to load. The file holds a single frame, so
+        the result is empty unless the window includes frame 0. Negative
+        values count back from the end of the file.
+    stop : int, default=None
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -142,7 +148,7 @@ def load_hoomdxml(filename, top=None):
     traj = Trajectory(xyz=np.array(positions), topology=topology)
     traj.unitcell_vectors = unitcell_vectors
 
-    return traj
+    return traj.slice(slice(start, stop), copy=False)
 
 
 def _find_chains(bond_list):
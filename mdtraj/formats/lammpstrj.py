@@ -32,7 +32,7 @@ import numpy as np
 
 from mdtraj.formats.registry import FormatRegistry
 from mdtraj.utils.unit import in_units_of
-from mdtraj.utils.validation import cast_indices, ensure_type
+from mdtraj.utils.validation import cast_frame_range, cast_indices, ensure_type
 
 __all__ = ["LAMMPSTrajectoryFile", "load_lammpstrj"]
 
@@ -49,6 +49,8 @@ def load_lammpstrj(
     atom_indices=None,
     frame=None,
     unit_set="real",
+    start=None,
+    stop=None,
 ):
     """Load a LAMMPS trajectory file.
 
@@ -68,7 +70,12 @@ def load_lammpstrj(
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Frames before ``start`` are skipped
+        with a seek rather than read.
+    stop : int, optional
+        Load frames up to, but not including, this index.
     unit_set : str, optional
         The LAMMPS unit set that the simulation was performed in. See
         http://lammps.sandia.gov/doc/units.html for options. Currently supported
@@ -109,7 +116,13 @@ def load_lammpstrj(
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride)
+            if start:
+                try:
+                    f.seek(start)
+                except _EOF:
+                    # the window begins past the end of the file, so it is empty
+                    n_frames = 0
 
         return f.read_as_traj(
             topology,
@@ -35,7 +35,7 @@ import numpy as np
 from mdtraj.core import element as elem
 from mdtraj.formats.hdf5 import _check_mode
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, import_, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, import_, in_units_of
 
 MAXINT16 = np.iinfo(np.int16).max
 MAXINT32 = np.iinfo(np.int32).max
@@ -126,7 +126,7 @@ def _convert_to_lossy_integers(X, precision=DEFAULT_PRECISION):
 
 
 @FormatRegistry.register_loader(".lh5")
-def load_lh5(filename, top=None, stride=None, atom_indices=None, frame=None):
+def load_lh5(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """Load an deprecated MSMBuilder2 LH5 trajectory file.
 
     Parameters
@@ -146,7 +146,14 @@ def load_lh5(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     See Also
     --------
@@ -158,7 +165,12 @@ def load_lh5(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
+            if n_frames is not None and stride is not None:
+                # read() counts n_frames before striding
+                n_frames *= stride
         return f.read_as_traj(
             n_frames=n_frames,
             stride=stride,
@@ -28,7 +28,7 @@ import numpy as np
 
 from mdtraj.formats.registry import FormatRegistry
 from mdtraj.utils.unit import in_units_of
-from mdtraj.utils.validation import cast_indices, ensure_type
+from mdtraj.utils.validation import cast_frame_range, cast_indices, ensure_type
 
 __all__ = ["MDCRDTrajectoryFile", "load_mdcrd"]
 
@@ -39,7 +39,7 @@ class _EOF(IOError):
 
 @FormatRegistry.register_loader(".mdcrd")
 @FormatRegistry.register_loader(".crd")
-def load_mdcrd(filename, top=None, stride=None, atom_indices=None, frame=None):
+def load_mdcrd(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """Load an AMBER mdcrd file.
 
     Parameters
@@ -58,7 +58,12 @@ def load_mdcrd(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Frames before ``start`` are skipped
+        with a seek rather than read.
+    stop : int, optional
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -91,7 +96,13 @@ def load_mdcrd(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride)
+            if start:
+                try:
+                    f.seek(start)
+                except _EOF:
+                    # the window begins past the end of the file, so it is empty
+                    n_frames = 0
         return f.read_as_traj(
             topology,
             n_frames=n_frames,
@@ -57,13 +57,19 @@ __all__ = ["load_mol2", "mol2_to_dataframes"]
 
 
 @FormatRegistry.register_loader(".mol2")
-def load_mol2(filename):
+def load_mol2(filename, start=None, stop=None):
     """Load a TRIPOS mol2 file from disk.
 
     Parameters
     ----------
     filename : path-like
         Path to the prmtop file on disk.
+    start : int, default=None
+        Index of the first frame to load. The file holds a single frame, so
+        the result is empty unless the window includes frame 0. Negative
+        values count back from the end of the file.
+    stop : int, default=None
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -160,7 +166,7 @@ def load_mol2(filename):
 
     traj = Trajectory(xyzlist, top)
 
-    return traj
+    return traj.slice(slice(start, stop), copy=False)
 
 
 def mol2_to_dataframes(filename):
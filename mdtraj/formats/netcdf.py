@@ -36,7 +36,7 @@ import numpy as np
 
 import mdtraj
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 __all__ = ["NetCDFTrajectoryFile", "load_netcdf"]
 
@@ -48,7 +48,7 @@ __all__ = ["NetCDFTrajectoryFile", "load_netcdf"]
 @FormatRegistry.register_loader(".nc")
 @FormatRegistry.register_loader(".netcdf")
 @FormatRegistry.register_loader(".ncdf")
-def load_netcdf(filename, top=None, stride=None, atom_indices=None, frame=None):
+def load_netcdf(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """Load an AMBER NetCDF file. Since the NetCDF format doesn't contain
     information to specify the topology, you need to supply a topology
 
@@ -69,7 +69,14 @@ def load_netcdf(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Returns
     -------
@@ -93,7 +100,9 @@ def load_netcdf(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
 
         return f.read_as_traj(
             topology,
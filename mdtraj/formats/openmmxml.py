@@ -28,7 +28,7 @@ __all__ = ["load_xml"]
 
 
 @FormatRegistry.register_loader(".xml")
-def load_xml(filename, top=None):
+def load_xml(filename, top=None, start=None, stop=None):
     """Load a single conformation from an OpenMM XML file.
 
     The OpenMM serialized state XML format contains additional information that
@@ -42,6 +42,12 @@ def load_xml(filename, top=None):
     top : {str, Trajectory, Topology}
         The XML format does not contain topology information. Pass in either the
         path to a pdb file, a trajectory, or a topology to supply this information.
+    start : int, default=None
+        Index of the first frame to load. The file holds a single frame, so
+        the result is empty unless the window includes frame 0. Negative
+        values count back from the end of the file.
+    stop : int, default=None
+        Load frames up to, but not including, this index.
 
     Returns
     -------
@@ -82,4 +88,4 @@ def load_xml(filename, top=None):
     traj = Trajectory(xyz=np.array(positions), topology=topology)
     traj.unitcell_vectors = np.array(box).reshape(1, 3, 3)
 
-    return traj
+    return traj.slice(slice(start, stop), copy=False)
@@ -89,6 +89,8 @@ def load_pdb(
     no_boxchk=False,
     standard_names=True,
     top=None,
+    start=None,
+    stop=None,
 ):
     """Load a RCSB Protein Data Bank file from disk.
 
@@ -107,7 +109,7 @@ def load_pdb(
     frame : int, default=None
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
     no_boxchk : bool, default=False
         By default, a heuristic check based on the particle density will be
         performed to determine if the unit cell dimensions are absurd. If the
@@ -123,6 +125,12 @@ def load_pdb(
     top : mdtraj.core.Topology, default=None
         if you give a topology as input the topology won't be parsed from the pdb file
         it saves time if you have to parse a big number of files
+    start : int, default=None
+        Index of the first model to load. Negative values count back from the
+        end of the file. All models are parsed, so this only limits the frames
+        that are kept.
+    stop : int, default=None
+        Load models up to, but not including, this index.
 
     Returns
     -------
@@ -153,9 +161,11 @@ def load_pdb(
         if frame is not None:
             coords = f.positions[[frame], atom_slice, :]
         else:
-            coords = f.positions[::stride, atom_slice, :]
+            frames = slice(start, stop, stride)
+            coords = f.positions[frames, atom_slice, :]
         assert coords.ndim == 3, "internal shape error"
         n_frames = len(coords)
+        n_models = len(f.positions)
 
         topology = f.topology
         if atom_indices is not None:
@@ -164,8 +174,8 @@ def load_pdb(
             topology = topology.subset(atom_indices)
 
         if f.unitcell_angles is not None and f.unitcell_lengths is not None:
-            unitcell_lengths = np.array([f.unitcell_lengths] * n_frames)
-            unitcell_angles = np.array([f.unitcell_angles] * n_frames)
+            unitcell_lengths = np.tile(f.unitcell_lengths, (n_frames, 1))
+            unitcell_angles = np.tile(f.unitcell_angles, (n_frames, 1))
         else:
             unitcell_lengths = None
             unitcell_angles = None
@@ -181,8 +191,8 @@ def load_pdb(
     time = np.arange(len(coords))
     if frame is not None:
         time *= frame
-    elif stride is not None:
-        time *= stride
+    else:
+        time = np.arange(n_models)[frames]
 
     traj = Trajectory(
         xyz=coords,
@@ -192,7 +202,7 @@ def load_pdb(
         unitcell_angles=unitcell_angles,
     )
 
-    if not no_boxchk and traj.unitcell_lengths is not None:
+    if not no_boxchk and traj.unitcell_lengths is not None and traj.n_frames > 0:
         # Only one CRYST1 record is allowed, so only do this check for the first
         # frame. Some RCSB PDB files do not *really* have a unit cell, but still
         # have a CRYST1 record with a dummy definition. These boxes are usually
@@ -49,6 +49,14 @@ extern "C" {
   extern int read_trr(XDRFILE *xd,int natoms,int *step,float *t,float *lambda,
 		      matrix box,rvec *x,rvec *v,rvec *f);
 
+  /* Read one frame of an open trr file, but only the atoms in indices.
+     sel holds the same atoms sorted and without duplicates; only the
+     parts of the frame that contain them are read from disk. x, v and
+     f, if not NULL, receive the atoms in the order given by indices. */
+  extern int read_trr_subset(XDRFILE *xd,int natoms,int *step,float *t,float *lambda,
+			     matrix box,rvec *x,rvec *v,rvec *f,
+			     const int *sel,int nsel,const int *indices,int nindices);
+
   /* Write a frame to xtc file */
   extern int write_trr(XDRFILE *xd,int natoms,int step,float t,float lambda,
 		       matrix box,rvec *x,rvec *v,rvec *f);
@@ -27,6 +27,7 @@
  * OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
  */
 
+#include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 
@@ -36,8 +37,12 @@
 
 #include "xdrfile.h"
 #include "xdrfile_trr.h"
+#include "xdr_seek.h"
 
 #define BUFSIZE		128
+/* Selected atoms closer together than this (in atoms) are read with a
+   single contiguous read rather than seeking between them. */
+#define TRR_SUBSET_MAXGAP 1024
 #define GROMACS_MAGIC   1993
 
 typedef struct		/* This struct describes the order and the	*/
@@ -427,6 +432,110 @@ static int do_htrn(XDRFILE *xd,mybool bRead,t_trnheader *sh,
 	return exdrOK;
 }
 
+/* Read the rows of sel from one x, v or f block into buf (laid out like the
+   full block), then gather the rows of indices into out. Rows that are not
+   wanted are skipped with a seek. If out is NULL, the whole block is skipped. */
+static int do_htrn_block_subset(XDRFILE *xd,mybool bDouble,int block_size,
+								void *buf,rvec *out,const int *sel,int nsel,
+								const int *indices,int nindices)
+{
+	int64_t start;
+	int     i,j,first,last,n;
+	int     nflsz = bDouble ? sizeof(double) : sizeof(float);
+
+	if (block_size == 0)
+		return exdrOK;
+	start = xdr_tell(xd);
+	if (NULL != out)
+	{
+		i = 0;
+		while (i < nsel)
+		{
+			/* coalesce nearby atoms into one contiguous read */
+			first = last = sel[i];
+			while ((i+1 < nsel) && (sel[i+1]-last <= TRR_SUBSET_MAXGAP))
+				last = sel[++i];
+			i++;
+
+			if (xdr_seek(xd,start+(int64_t)first*DIM*nflsz,SEEK_SET) != exdrOK)
+				return exdrNR;
+			n = (last-first+1)*DIM;
+			if (bDouble)
+			{
+				if (xdrfile_read_double((double *)buf+first*DIM,n,xd) != n)
+					return exdrDOUBLE;
+			}
+			else
+			{
+				if (xdrfile_read_float((float *)buf+first*DIM,n,xd) != n)
+					return exdrFLOAT;
+			}
+		}
+		for(i=0; (i<nindices); i++)
+			for(j=0; (j<DIM); j++)
+			{
+				if (bDouble)
+					out[i][j] = ((double *)buf)[indices[i]*DIM+j];
+				else
+					out[i][j] = ((float *)buf)[indices[i]*DIM+j];
+			}
+	}
+	if (xdr_seek(xd,start+block_size,SEEK_SET) != exdrOK)
+		return exdrNR;
+
+	return exdrOK;
+}
+
+static int do_htrn_subset(XDRFILE *xd,t_trnheader *sh,
+						  matrix box,rvec *x,rvec *v,rvec *f,
+						  const int *sel,int nsel,const int *indices,int nindices)
+{
+	double pvd[DIM*DIM];
+	float  pvf[DIM*DIM];
+	void   *buf=NULL;
+	int    i,j,result;
+
+	if (sh->box_size != 0)
+	{
+		if (sh->bDouble)
+		{
+			if (xdrfile_read_double(pvd,DIM*DIM,xd) != DIM*DIM)
+				return exdrDOUBLE;
+			for(i=0; (i<DIM); i++)
+				for(j=0; (j<DIM); j++)
+					if (NULL != box)
+						box[i][j] = pvd[i*DIM+j];
+		}
+		else
+		{
+			if (xdrfile_read_float(pvf,DIM*DIM,xd) != DIM*DIM)
+				return exdrFLOAT;
+			for(i=0; (i<DIM); i++)
+				for(j=0; (j<DIM); j++)
+					if (NULL != box)
+						box[i][j] = pvf[i*DIM+j];
+		}
+	}
+
+	/* the virial and pressure are never used */
+	if (xdr_seek(xd,sh->vir_size+sh->pres_size,SEEK_CUR) != exdrOK)
+		return exdrNR;
+
+	if ((sh->x_size != 0) || (sh->v_size != 0) || (sh->f_size != 0)) {
+		buf = malloc(sh->natoms*DIM*(sh->bDouble ? sizeof(double) : sizeof(float)));
+		if (NULL == buf)
+			return exdrNOMEM;
+	}
+	result = do_htrn_block_subset(xd,sh->bDouble,sh->x_size,buf,x,sel,nsel,indices,nindices);
+	if (result == exdrOK)
+		result = do_htrn_block_subset(xd,sh->bDouble,sh->v_size,buf,v,sel,nsel,indices,nindices);
+	if (result == exdrOK)
+		result = do_htrn_block_subset(xd,sh->bDouble,sh->f_size,buf,f,sel,nsel,indices,nindices);
+	free(buf);
+
+	return result;
+}
+
 static int do_trn(XDRFILE *xd,mybool bRead,int *step,float *t,float *lambda,
 				  matrix box,int *natoms,rvec *x,rvec *v,rvec *f)
 {
@@ -530,3 +639,21 @@ int read_trr(XDRFILE *xd,int natoms,int *step,float *t,float *lambda,
 {
 	return do_trn(xd,1,step,t,lambda,box,&natoms,x,v,f);
 }
+
+int read_trr_subset(XDRFILE *xd,int natoms,int *step,float *t,float *lambda,
+					matrix box,rvec *x,rvec *v,rvec *f,
+					const int *sel,int nsel,const int *indices,int nindices)
+{
+	t_trnheader sh;
+	int result;
+
+	memset(&sh,0,sizeof(sh));
+	if ((result = do_trnheader(xd,1,&sh)) != exdrOK)
+		return result;
+
+	*step   = sh.step;
+	*t      = sh.td;
+	*lambda = sh.lambdad;
+
+	return do_htrn_subset(xd,&sh,box,x,v,f,sel,nsel,indices,nindices);
+}
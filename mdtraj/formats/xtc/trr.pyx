@@ -36,12 +36,12 @@ cimport numpy as np
 np.import_array()
 
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 cimport xdrlib
 
 cimport trrlib
-from libc.stdio cimport SEEK_CUR, SEEK_SET
+from libc.stdio cimport SEEK_CUR, SEEK_END, SEEK_SET
 
 ctypedef np.npy_int64   int64_t
 
@@ -80,8 +80,8 @@ if sizeof(float) != sizeof(np.float32_t):
 ###############################################################################
 
 @FormatRegistry.register_loader('.trr')
-def load_trr(filename, top=None, stride=None, atom_indices=None, frame=None):
-    """load_trr(filename, top=None, stride=None, atom_indices=None, frame=None)
+def load_trr(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
+    """load_trr(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None)
 
     Load a Gromacs TRR file from disk.
 
@@ -100,12 +100,19 @@ def load_trr(filename, top=None, stride=None, atom_indices=None, frame=None):
         Only read every stride-th frame
     atom_indices : array_like, optional
         If not none, then read only a subset of the atoms coordinates from the
-        file. This may be slightly slower than the standard read because it
-        requires an extra copy, but will save memory.
+        file. Only the parts of each frame that contain these atoms are read
+        from disk.
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -142,7 +149,12 @@ def load_trr(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start and start == len(f):
+                # the window begins at the end of the file, so it is empty
+                n_frames = 0
+            elif start:
+                f.seek(start)
 
         return f.read_as_traj(topology, n_frames=n_frames, stride=stride,
                               atom_indices=atom_indices)
@@ -205,6 +217,10 @@ cdef class TRRTrajectoryFile(object):
     cdef char with_unitcell    # used in mode='w' to know if we're writing unitcells or nor
     cdef readonly char* distance_unit
     cdef np.ndarray _offsets
+    cdef int64_t frame_size       # size in bytes of every frame, or 0 if the frames are not all alike
+    cdef int64_t uniform_n_frames # number of frames in the file, if they are all frame_size long
+    cdef trrlib.t_trnheader first_header
+    cdef int64_t step_increment   # difference in step between consecutive frames, if they are all alike
     cdef int has_velocities
     cdef int has_forces
 
@@ -217,6 +233,8 @@ cdef class TRRTrajectoryFile(object):
         self.n_frames = -1
         self.filename = filename
         self._offsets = None
+        self.frame_size = 0
+        self.uniform_n_frames = 0
 
         if str(mode) == 'r':
             self.n_atoms = 0
@@ -240,6 +258,9 @@ cdef class TRRTrajectoryFile(object):
                                    " or forces are present!")
 
             self.approx_n_frames = self._estimate_n_frames_from_filesize(os.stat(filename).st_size)
+            self.frame_size = self._calc_uniform_frame_size(os.stat(filename).st_size)
+            if self.frame_size > 0:
+                self.uniform_n_frames = os.stat(filename).st_size // self.frame_size
 
             self.min_chunk_size = max(kwargs.pop('min_chunk_size', 100), 1)
             self.chunk_size_multiplier = max(kwargs.pop('chunk_size_multiplier', 1.5), 0.01)
@@ -301,6 +322,49 @@ cdef class TRRTrajectoryFile(object):
 
         return n_frames
 
+    def _calc_uniform_frame_size(self, filesize):
+        # If every frame stores the same fields, every frame has the same size
+        # on disk and frame i starts at byte i * frame_size. This is only a
+        # candidate: the file size must be a multiple of the first frame's
+        # size, and the second and last frames, found by that rule, must have
+        # the same header layout and steps that go up by the same nonzero
+        # increment. _seek_uniform() still checks the header of every frame
+        # it lands on, since files that mix frame layouts can pass this test.
+        cdef trrlib.t_trnheader header, second_header, last_header
+        cdef int64_t frame_size, old_pos, n_frames, increment
+
+        old_pos = xdrlib.xdr_tell(self.fh)
+        try:
+            xdrlib.xdr_seek(self.fh, 0, SEEK_SET)
+            if trrlib.do_trnheader(self.fh, 1, &header) != 0:
+                return 0
+            frame_size = xdrlib.xdr_tell(self.fh) + sum((<int*> &header)[i] for i in range(1, 11))
+            if frame_size <= 0 or filesize % frame_size != 0:
+                return 0
+
+            n_frames = filesize // frame_size
+            if n_frames < 2:
+                return 0
+            xdrlib.xdr_seek(self.fh, frame_size, SEEK_SET)
+            if trrlib.do_trnheader(self.fh, 1, &second_header) != 0:
+                return 0
+            xdrlib.xdr_seek(self.fh, filesize - frame_size, SEEK_SET)
+            if trrlib.do_trnheader(self.fh, 1, &last_header) != 0:
+                return 0
+            for i in range(12):
+                if ((<int*> &header)[i] != (<int*> &second_header)[i]
+                        or (<int*> &header)[i] != (<int*> &last_header)[i]):
+                    return 0
+            increment = <int64_t> second_header.step - header.step
+            if increment == 0 or last_header.step != header.step + (n_frames - 1) * increment:
+                return 0
+        finally:
+            xdrlib.xdr_seek(self.fh, old_pos, SEEK_SET)
+
+        self.first_header = header
+        self.step_increment = increment
+        return frame_size
+
     def __dealloc__(self):
         self.close()
 
@@ -326,8 +390,8 @@ cdef class TRRTrajectoryFile(object):
             Read only every stride-th frame.
         atom_indices : array_like, optional
             If not none, then read only a subset of the atoms coordinates from the
-            file. This may be slightly slower than the standard read because it required
-            an extra copy, but will save memory.
+            file. Only the parts of each frame that contain these atoms are
+            read from disk.
 
         Returns
         -------
@@ -368,8 +432,8 @@ cdef class TRRTrajectoryFile(object):
             Read only every stride-th frame.
         atom_indices : array_like, optional
             If not none, then read only a subset of the atoms coordinates from the
-            file. This may be slightly slower than the standard read because it required
-            an extra copy, but will save memory.
+            file. Only the parts of each frame that contain these atoms are
+            read from disk.
 
         Returns
         -------
@@ -416,7 +480,7 @@ cdef class TRRTrajectoryFile(object):
         while True:
             # guess the size of the chunk to read, based on how many frames we
             # think are in the file and how many we've currently read
-            chunk = max(abs(int((self.approx_n_frames - self.frame_counter) * self.chunk_size_multiplier)),
+            chunk = max(abs(int((self.approx_n_frames - self.frame_counter) * self.chunk_size_multiplier / stride)),
                         self.min_chunk_size)
 
             xyz, time, step, box, lambd, vel, forces = \
@@ -447,7 +511,6 @@ cdef class TRRTrajectoryFile(object):
         cdef int status = _EXDROK
         cdef int status_seek = _EXDROK
         cdef int n_atoms_to_read
-        cdef bint efficient_striding = stride > 1 and self._offsets is not None
 
         # check that velocities/forces are present if requested
         if get_velocities and self.has_velocities == 0:
@@ -455,17 +518,23 @@ cdef class TRRTrajectoryFile(object):
         if get_forces and self.has_forces == 0:
             raise RuntimeError("Forces requested, but none in file")
 
+        # only used if atom_indices is given. `indices` is the gather order
+        # of the output, `sel` the sorted set of atoms to fetch from disk
+        cdef np.ndarray[ndim=1, dtype=np.int32_t, mode='c'] indices
+        cdef np.ndarray[ndim=1, dtype=np.int32_t, mode='c'] sel
         if atom_indices is None:
             n_atoms_to_read = self.n_atoms
-        elif isinstance(atom_indices, slice):
-            n_atoms_to_read = len(np.arange(self.n_atoms)[atom_indices])
         else:
+            if isinstance(atom_indices, slice):
+                atom_indices = np.arange(self.n_atoms)[atom_indices]
             atom_indices = np.asarray(atom_indices)
-            if min(atom_indices) < 0:
+            if len(atom_indices) > 0 and atom_indices.min() < 0:
                 raise ValueError('atom_indices should be zero indexed. you gave an index less than zero')
-            if max(atom_indices) >= self.n_atoms:
+            if len(atom_indices) > 0 and atom_indices.max() >= self.n_atoms:
                 raise ValueError('atom indices should be zero indexed. you gave an index bigger than the number of atoms')
             n_atoms_to_read = len(atom_indices)
+            indices = np.ascontiguousarray(atom_indices, dtype=np.int32)
+            sel = np.unique(indices)
 
         cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] xyz = \
             np.empty((n_frames, n_atoms_to_read, 3), dtype=np.float32)
@@ -478,45 +547,26 @@ cdef class TRRTrajectoryFile(object):
         cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] box = \
             np.empty((n_frames, 3, 3), dtype=np.float32)
 
-        # striding dummy, only used if efficient_striding is false or at the end of the file.
-        cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] xyz_stride = \
-            np.empty([1, n_atoms_to_read, 3], dtype=np.float32)
-        cdef np.ndarray[ndim=1, dtype=np.float32_t, mode='c'] time_stride = \
-            np.empty(1, dtype=np.float32)
-        cdef np.ndarray[ndim=1, dtype=np.int32_t, mode='c'] step_stride = \
-            np.empty(1, dtype=np.int32)
-        cdef np.ndarray[ndim=1, dtype=np.float32_t, mode='c'] lambd_stride = \
-            np.empty(1, dtype=np.float32)
-        cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] box_stride = \
-            np.empty((1, 3, 3), dtype=np.float32)
-
         # only used if get_velocities/get_forces is True
         cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] vel
         cdef np.ndarray[ndim=3, dtype=np.float32_t, mode='c'] forces
 
-        # only used if atom_indices is given
-        cdef np.ndarray[dtype=np.float32_t, ndim=2] xyz_buffer
-        cdef np.ndarray[dtype=np.float32_t, ndim=2] vel_buffer
-        cdef np.ndarray[dtype=np.float32_t, ndim=2] forces_buffer
-        if atom_indices is not None:
-            xyz_buffer = np.zeros((self.n_atoms, 3), dtype=np.float32)
-            vel_buffer = np.zeros((self.n_atoms, 3), dtype=np.float32)
-            forces_buffer = np.zeros((self.n_atoms, 3), dtype=np.float32)
-
         if get_velocities:
             vel = np.empty((n_frames, n_atoms_to_read, 3), dtype=np.float32)
         if get_forces:
             forces = np.empty((n_frames, n_atoms_to_read, 3), dtype=np.float32)
 
+        cdef trrlib.rvec* frame_vel
+        cdef trrlib.rvec* frame_forces
 
         while (i < n_frames) and (status != _EXDRENDOFFILE):
+            frame_vel = NULL
+            if get_velocities:
+                frame_vel = <trrlib.rvec*> np.PyArray_DATA(vel) + i * n_atoms_to_read
+            frame_forces = NULL
+            if get_forces:
+                frame_forces = <trrlib.rvec*> np.PyArray_DATA(forces) + i * n_atoms_to_read
             if atom_indices is None:
-                frame_vel = NULL
-                if get_velocities:
-                    frame_vel = <trrlib.rvec*>&vel[i,0,0]
-                frame_forces = NULL
-                if get_forces:
-                    frame_forces = <trrlib.rvec*>&forces[i,0,0]
                 status = trrlib.read_trr(self.fh, self.n_atoms,
                                          <int*> &step[i],
                                          &time[i], &lambd[i],
@@ -524,42 +574,25 @@ cdef class TRRTrajectoryFile(object):
                                          <trrlib.rvec*>&xyz[i,0,0],
                                          frame_vel, frame_forces)
             else:
-                frame_vel = NULL
-                if get_velocities:
-                    frame_vel = <trrlib.rvec*>&vel_buffer[0,0]
-                frame_forces = NULL
-                if get_forces:
-                    frame_forces = <trrlib.rvec*>&forces_buffer[0,0]
-                status = trrlib.read_trr(self.fh, self.n_atoms,
-                                         <int*> &step[i],
-                                         &time[i], &lambd[i],
-                                         <trrlib.matrix> &box[i,0,0],
-                                         <trrlib.rvec*>&xyz_buffer[0,0],
-                                         frame_vel, frame_forces)
-                xyz[i, :, :] = xyz_buffer[atom_indices, :]
-                if get_velocities:
-                    vel[i, :, :] = vel_buffer[atom_indices, :]
-                if get_forces:
-                    forces[i, :, :] = forces_buffer[atom_indices, :]
+                # gather the selected atoms in C, reading only the byte
+                # ranges of the frame that contain them
+                status = trrlib.read_trr_subset(self.fh, self.n_atoms,
+                                                <int*> &step[i],
+                                                &time[i], &lambd[i],
+                                                <trrlib.matrix> &box[i,0,0],
+                                                <trrlib.rvec*> np.PyArray_DATA(xyz) + i * n_atoms_to_read,
+                                                frame_vel, frame_forces,
+                                                <int*> np.PyArray_DATA(sel), len(sel),
+                                                <int*> np.PyArray_DATA(indices), n_atoms_to_read)
 
             if status != _EXDRENDOFFILE and status != _EXDROK:
                 raise RuntimeError('TRR read error: %s' % _EXDR_ERROR_MESSAGES.get(status, 'unknown'))
             i += 1
+            if status == _EXDROK:
+                self.frame_counter += 1
 
-            if stride > 1:
-                if efficient_striding and self.frame_counter + stride < len(self):
-                    self.seek(stride, whence=1)
-                else:
-                    for _ in range(stride - 1):
-                        seek_status = trrlib.read_trr(self.fh, self.n_atoms,
-                                                      <int*> &step_stride[0],
-                                                      &time_stride[0],
-                                                      &lambd_stride[0],
-                                                      <trrlib.matrix> &box_stride[0,0,0],
-                                                      <xdrlib.rvec*>&xyz_stride[0,0,0],
-                                                      NULL, NULL)
-                        if seek_status != _EXDROK:
-                            break
+            if stride > 1 and status == _EXDROK:
+                self._skip(stride - 1)
 
         if status == _EXDRENDOFFILE:
             xyz = xyz[:i-1]
@@ -572,16 +605,73 @@ cdef class TRRTrajectoryFile(object):
             if get_forces:
                 forces = forces[:i-1]
 
-        # if we are using seek, the framecounter already points to the right absolute position,
-        # otherwise we increment the counter relatively
-        if not efficient_striding:
-            self.frame_counter += i
-
         vel_return = vel if get_velocities else None
         forces_return = forces if get_forces else None
 
         return xyz, time, step, box, lambd, vel_return, forces_return
 
+    cdef _skip(self, int64_t n_frames):
+        """Advance past `n_frames` frames without decoding them"""
+        cdef trrlib.t_trnheader header
+        cdef int64_t pos, target
+        cdef int status
+
+        target = self.frame_counter + n_frames
+        if self._offsets is not None:
+            # jump straight to the frame, using its byte offset
+            target = min(target, len(self))
+            if target < len(self):
+                status = xdrlib.xdr_seek(self.fh, self.offsets[target], SEEK_SET)
+            else:
+                status = xdrlib.xdr_seek(self.fh, 0, SEEK_END)
+            if status != 0:
+                raise RuntimeError('TRR seek error: %s' % status)
+            self.frame_counter = target
+            return
+
+        if self.frame_size > 0 and target < self.uniform_n_frames:
+            if self._seek_uniform(target):
+                self.frame_counter = target
+                return
+            # the frames are not all alike after all
+            self.frame_size = 0
+
+        # hop from header to header
+        for _ in range(n_frames):
+            pos = xdrlib.xdr_tell(self.fh)
+            if trrlib.do_trnheader(self.fh, 1, &header) != 0:
+                xdrlib.xdr_seek(self.fh, pos, SEEK_SET)
+                break
+            xdrlib.xdr_seek(self.fh, sum((<int*> &header)[i] for i in range(1, 11)), SEEK_CUR)
+            self.frame_counter += 1
+
+    cdef int _seek_uniform(self, int64_t target):
+        """Move to frame `target`, assuming every frame is frame_size long.
+
+        The header found there must be valid (with the magic number), have
+        the first frame's layout, and have the step that frame `target`
+        would have if the steps went up evenly. Only that one header is
+        read. If it doesn't match, the position is left alone and 0 is
+        returned.
+        """
+        cdef trrlib.t_trnheader header
+        cdef int64_t pos, offset
+        cdef int j
+
+        pos = xdrlib.xdr_tell(self.fh)
+        offset = target * self.frame_size
+        if (xdrlib.xdr_seek(self.fh, offset, SEEK_SET) != 0
+                or trrlib.do_trnheader(self.fh, 1, &header) != 0
+                or header.step != self.first_header.step + target * self.step_increment):
+            xdrlib.xdr_seek(self.fh, pos, SEEK_SET)
+            return 0
+        for j in range(12):
+            if (<int*> &header)[j] != (<int*> &self.first_header)[j]:
+                xdrlib.xdr_seek(self.fh, pos, SEEK_SET)
+                return 0
+        xdrlib.xdr_seek(self.fh, offset, SEEK_SET)
+        return 1
+
     def write(self, xyz, time=None, step=None, box=None, lambd=None):
         """write(xyz, time=None, step=None, box=None, lambd=None)
 
@@ -769,6 +859,7 @@ cdef class TRRTrajectoryFile(object):
 
         import os
         file_size = os.stat(self.filename).st_size
+
         cdef int64_t old_pos = xdrlib.xdr_tell(self.fh)
 
         try:
@@ -793,7 +884,7 @@ cdef class TRRTrajectoryFile(object):
 
                 frame_size = sum((<int*> &header)[i] for i in range(1, 11))
                 if n_frames == len(offsets):
-                    offsets = np.resize(offsets, int(len(offsets)*1.2))
+                    offsets = np.resize(offsets, max(int(len(offsets)*1.2), len(offsets) + 1))
                 offsets[n_frames] = frame_offset
                 n_frames += 1
         finally:
@@ -17,6 +17,12 @@ cdef extern from "include/xdrfile_trr.h":
     int read_trr(XDRFILE *xd, int natoms, int *step, float *t, float* lambd,
         matrix box, rvec* x, rvec* v, rvec* f)
 
+    # Read only the atoms in `indices` of one frame of an open trr file. `sel`
+    # holds the same atoms sorted and unique; only those byte ranges are read.
+    int read_trr_subset(XDRFILE *xd, int natoms, int *step, float *t, float* lambd,
+        matrix box, rvec* x, rvec* v, rvec* f, const int *sel, int nsel,
+        const int *indices, int nindices)
+
     # Write a frame to xtc file
     int write_trr(XDRFILE *xd, int natoms, int step, float t, float lambd,
         matrix box, rvec* x, rvec* v, rvec* f)
@@ -25,6 +31,7 @@ cdef extern from "include/trr_header.h":
     ctypedef struct t_trnheader:
         int v_size
         int f_size
+        int step
 
     # header
     int do_trnheader(XDRFILE *xd, int bRead, t_trnheader *sh)
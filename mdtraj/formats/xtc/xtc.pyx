@@ -35,7 +35,7 @@ cimport numpy as np
 np.import_array()
 
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of
 
 cimport xdrlib
 
@@ -108,8 +108,8 @@ cdef int XTC_HEADER_SIZE = 11*sizeof(np.int32_t) + 2*sizeof(np.float32_t) + DIM*
 ###############################################################################
 
 @FormatRegistry.register_loader('.xtc')
-def load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None):
-    """load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None)
+def load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
+    """load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None)
 
     Load a Gromacs XTC file from disk.
 
@@ -135,7 +135,14 @@ def load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Examples
     --------
@@ -169,7 +176,12 @@ def load_xtc(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start and start == len(f):
+                # the window begins at the end of the file, so it is empty
+                n_frames = 0
+            elif start:
+                f.seek(start)
 
         return f.read_as_traj(topology, n_frames=n_frames, stride=stride,
                               atom_indices=atom_indices)
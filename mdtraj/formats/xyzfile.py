@@ -29,7 +29,7 @@ import numpy as np
 
 import mdtraj
 from mdtraj.formats.registry import FormatRegistry
-from mdtraj.utils import cast_indices, ensure_type, in_units_of, open_maybe_zipped
+from mdtraj.utils import cast_frame_range, cast_indices, ensure_type, in_units_of, open_maybe_zipped
 
 __all__ = ["XYZTrajectoryFile", "load_xyz"]
 
@@ -40,7 +40,7 @@ class _EOF(IOError):
 
 @FormatRegistry.register_loader(".xyz")
 @FormatRegistry.register_loader(".xyz.gz")
-def load_xyz(filename, top=None, stride=None, atom_indices=None, frame=None):
+def load_xyz(filename, top=None, stride=None, atom_indices=None, frame=None, start=None, stop=None):
     """Load a xyz trajectory file.
 
     While there is no universal standard for this format, this plugin adheres
@@ -67,7 +67,14 @@ def load_xyz(filename, top=None, stride=None, atom_indices=None, frame=None):
     frame : int, optional
         Use this option to load only a single frame from a trajectory on disk.
         If frame is None, the default, the entire trajectory will be loaded.
-        If supplied, ``stride`` will be ignored.
+        If supplied, ``stride``, ``start`` and ``stop`` will be ignored.
+    start : int, optional
+        Index of the first frame to load. Negative values count back from the
+        end of the file. Frames before ``start`` are skipped with a seek rather
+        than read.
+    stop : int, optional
+        Load frames up to, but not including, this index. Negative values
+        count back from the end of the file.
 
     Returns
     -------
@@ -100,7 +107,9 @@ def load_xyz(filename, top=None, stride=None, atom_indices=None, frame=None):
             f.seek(frame)
             n_frames = 1
         else:
-            n_frames = None
+            start, n_frames = cast_frame_range(start, stop, stride, f.__len__)
+            if start:
+                f.seek(start)
         return f.read_as_traj(
             topology,
             n_frames=n_frames,
@@ -372,7 +381,7 @@ class XYZTrajectoryFile:
                     self._read()  # advance and throw away these frames
             elif absolute is not None:
                 self._fh.close()
-                self._fh = open(self._filename)
+                self._fh = open_maybe_zipped(self._filename, "r")
                 self._frame_index = 0
                 self._line_counter = 0
                 for i in range(absolute):
@@ -400,7 +409,7 @@ class XYZTrajectoryFile:
         if not self._is_open:
             raise ValueError("I/O operation on closed file")
         if self._n_frames is None:
-            with open(self._filename) as fh:
+            with open_maybe_zipped(self._filename, "r") as fh:
                 n_atoms = int(fh.readline())
                 self._n_frames = (sum(1 for line in fh) + 1) // (n_atoms + 2)
         return self._n_frames
@@ -37,14 +37,18 @@ from .rg import *
 from .sasa import *
 from .shape import *
 from .thermodynamic_properties import *
+from .threads import *
 
 __all__ = [
     "baker_hubbard",
     "shrake_rupley",
+    "lcpo",
+    "compute_sasa",
     "kabsch_sander",
     "compute_distances",
     "compute_distances_t",
     "compute_displacements",
+    "compute_distance_matrix",
     "compute_angles",
     "compute_dihedrals",
     "compute_phi",
@@ -65,12 +69,15 @@ __all__ = [
     "compute_dssp",
     "compute_neighbors",
     "compute_neighborlist",
+    "compute_neighborlist_csr",
     "compute_rdf",
     "compute_rdf_t",
     "compute_nematic_order",
     "compute_inertia_tensor",
     "compute_gyration_tensor",
     "find_closest_contact",
+    "set_num_threads",
+    "get_num_threads",
     "compute_directors",
     "principal_moments",
     "asphericity",
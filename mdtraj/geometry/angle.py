@@ -29,7 +29,15 @@ from mdtraj.utils import ensure_type
 __all__ = ["compute_angles"]
 
 
-def compute_angles(traj, angle_indices, periodic=True, opt=True):
+def compute_angles(
+    traj,
+    angle_indices,
+    periodic=True,
+    opt=True,
+    out=None,
+    chunk_frames=None,
+    memory_limit=None,
+):
     """Compute the bond angles between the supplied triplets of indices in each frame of a trajectory.
 
     Parameters
@@ -46,6 +54,16 @@ def compute_angles(traj, angle_indices, periodic=True, opt=True):
         Use an optimized native library to calculate distances. Our optimized
         SSE angle calculation implementation is 10-20x faster than the
         (itself optimized) numpy implementation.
+    out : np.ndarray, shape=(n_frames, n_angles), optional
+        An array to store the angles in, for example a ``np.memmap`` to
+        stream them to disk. It is filled and returned. If None, a new
+        float32 array is allocated.
+    chunk_frames : int, optional
+        Compute the angles in blocks of at most this many frames.
+    memory_limit : int, optional
+        Compute the angles in blocks of frames whose angles take up at most
+        about this many bytes. With a memory-mapped `out`, this bounds the
+        memory used however many frames there are.
 
     Returns
     -------
@@ -71,10 +89,10 @@ def compute_angles(traj, angle_indices, periodic=True, opt=True):
     if not np.all(np.logical_and(triplets < traj.n_atoms, triplets >= 0)):
         raise ValueError("angle_indices must be between 0 and %d" % traj.n_atoms)
 
+    shape = (len(xyz), len(triplets))
     if len(triplets) == 0:
-        return np.zeros((len(xyz), 0), dtype=np.float32)
+        return distance._output_array(out, shape)
 
-    out = np.zeros((xyz.shape[0], triplets.shape[0]), dtype=np.float32)
     if periodic is True and traj._have_unitcell:
         box = ensure_type(
             traj.unitcell_vectors,
@@ -87,23 +105,24 @@ def compute_angles(traj, angle_indices, periodic=True, opt=True):
 
         if opt:
             orthogonal = np.allclose(traj.unitcell_angles, 90)
-            _geometry._angle_mic(
-                xyz,
-                triplets,
-                box.transpose(0, 2, 1).copy(),
-                out,
-                orthogonal,
-            )
-            return out
-        else:
-            _angle(traj, triplets, periodic, out)
-            return out
+            box = box.transpose(0, 2, 1).copy()
+
+            def kernel(frames, block):
+                _geometry._angle_mic(xyz[frames], triplets, box[frames], block, orthogonal)
+
+            return distance._compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
 
     if opt:
-        _geometry._angle(xyz, triplets, out)
+
+        def kernel(frames, block):
+            _geometry._angle(xyz[frames], triplets, block)
+
     else:
-        _angle(traj, triplets, periodic, out)
-    return out
+
+        def kernel(frames, block):
+            _angle(traj.slice(frames, copy=False), triplets, periodic, block)
+
+    return distance._compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
 
 
 def _angle(traj, angle_indices, periodic, out):
@@ -31,6 +31,10 @@ from mdtraj.utils import ensure_type
 
 __all__ = ["compute_contacts", "squareform"]
 
+# the largest number of atom distances compute_contacts holds in memory at
+# once (32 MB, plus 64 MB for the atom pairs)
+_MAX_ATOM_DISTANCES = 2**23
+
 
 def compute_contacts(
     traj,
@@ -40,6 +44,7 @@ def compute_contacts(
     periodic=True,
     soft_min=False,
     soft_min_beta=20,
+    cutoff=None,
 ):
     """Compute the distance between pairs of residues in a trajectory.
 
@@ -81,17 +86,28 @@ def compute_contacts(
     soft_min_beta : float, default=20nm
         The value of beta to use for the soft_min distance option.
         Very large values might cause small contact distances to go to 0.
+    cutoff : float, optional
+        If given, only keep the contacts between residues closer than
+        `cutoff` nm (by the closest distance between their atoms in the
+        scheme), and return the distances as a sparse matrix. The close
+        residues are found with a neighbor search in each frame, so the
+        distances between all the residue pairs never have to be computed,
+        or even enumerated.
 
     Returns
     -------
     distances : np.ndarray, shape=(n_frames, n_pairs), dtype=np.float32
         Distances for each residue-residue contact in each frame
-        of the trajectory
+        of the trajectory. With a cutoff, this is a
+        ``scipy.sparse.csr_matrix`` holding only the distances below the
+        cutoff, so e.g. ``distances.getnnz(axis=0) / traj.n_frames`` is the
+        frequency of each contact.
     residue_pairs : np.ndarray, shape=(n_pairs, 2), dtype=int
         Each row of this return value gives the indices of the residues
         involved in the contact. This argument mirrors the `contacts` input
         parameter. When `all` is specified as input, this return value
-        gives the actual residue pairs resolved from `all`. Furthermore,
+        gives the actual residue pairs resolved from `all` (with a cutoff,
+        only the pairs in contact in at least one frame). Furthermore,
         when scheme=='ca', any contact pair supplied as input corresponding
         to a residue without an alpha carbon (e.g. HOH) is ignored from the
         input contacts list, meanings that the indexing of the
@@ -113,6 +129,9 @@ def compute_contacts(
     [(0, 10), (0, 11), (1, 10), (1, 11), (2, 10), (2, 11)]
     >>> md.compute_contacts(t, pairs)
 
+    >>> # the residue pairs within 0.5 nm of each other in any frame
+    >>> distances, pairs = md.compute_contacts(t, cutoff=0.5)
+
     See Also
     --------
     mdtraj.geometry.squareform : turn the result from this function
@@ -128,21 +147,25 @@ def compute_contacts(
                 "(%s) is not a valid contacts specifier" % contacts.lower(),
             )
 
-        residue_pairs = []
-        for i in range(traj.n_residues):
-            residue_i = traj.topology.residue(i)
-            if ignore_nonprotein and not any(a for a in residue_i.atoms if a.name.lower() == "ca"):
-                continue
-            for j in range(i + 3, traj.n_residues):
-                residue_j = traj.topology.residue(j)
-                if ignore_nonprotein and not any(a for a in residue_j.atoms if a.name.lower() == "ca"):
+        if cutoff is None:
+            residue_pairs = []
+            for i in range(traj.n_residues):
+                residue_i = traj.topology.residue(i)
+                if ignore_nonprotein and not any(a for a in residue_i.atoms if a.name.lower() == "ca"):
                     continue
-                if residue_i.chain == residue_j.chain:
-                    residue_pairs.append((i, j))
-
-        residue_pairs = np.array(residue_pairs)
-        if len(residue_pairs) == 0:
-            raise ValueError("No acceptable residue pairs found")
+                for j in range(i + 3, traj.n_residues):
+                    residue_j = traj.topology.residue(j)
+                    if ignore_nonprotein and not any(a for a in residue_j.atoms if a.name.lower() == "ca"):
+                        continue
+                    if residue_i.chain == residue_j.chain:
+                        residue_pairs.append((i, j))
+
+            residue_pairs = np.array(residue_pairs)
+            if len(residue_pairs) == 0:
+                raise ValueError("No acceptable residue pairs found")
+        else:
+            # resolved from the residues found in contact
+            residue_pairs = None
 
     else:
         residue_pairs = ensure_type(
@@ -173,31 +196,40 @@ def compute_contacts(
             warnings.warn(
                 "The soft_min=True option with scheme=ca givesthe same results as soft_min=False",
             )
+        residue_membership = [
+            [a.index for a in residue.atoms if a.name.lower() == "ca"] for residue in traj.topology.residues
+        ]
         filtered_residue_pairs = []
         atom_pairs = []
 
-        for r0, r1 in residue_pairs:
-            ca_atoms_0 = [a.index for a in traj.top.residue(r0).atoms if a.name.lower() == "ca"]
-            ca_atoms_1 = [a.index for a in traj.top.residue(r1).atoms if a.name.lower() == "ca"]
-            if len(ca_atoms_0) == 1 and len(ca_atoms_1) == 1:
-                atom_pairs.append((ca_atoms_0[0], ca_atoms_1[0]))
-                filtered_residue_pairs.append((r0, r1))
-            elif len(ca_atoms_0) == 0 or len(ca_atoms_1) == 0:
-                # residue does not contain a CA atom, skip it
-                if contacts != "all":
-                    # if the user manually asked for this residue, and didn't use "all"
-                    import warnings
-
-                    warnings.warn(
-                        "Ignoring contacts pair %d-%d. No alpha carbon." % (r0, r1),
+        if residue_pairs is None:
+            if any(len(ca_atoms) > 1 for ca_atoms in residue_membership):
+                raise ValueError("More than 1 alpha carbon detected in a residue")
+        else:
+            for r0, r1 in residue_pairs:
+                ca_atoms_0 = residue_membership[r0]
+                ca_atoms_1 = residue_membership[r1]
+                if len(ca_atoms_0) == 1 and len(ca_atoms_1) == 1:
+                    atom_pairs.append((ca_atoms_0[0], ca_atoms_1[0]))
+                    filtered_residue_pairs.append((r0, r1))
+                elif len(ca_atoms_0) == 0 or len(ca_atoms_1) == 0:
+                    # residue does not contain a CA atom, skip it
+                    if contacts != "all":
+                        # if the user manually asked for this residue, and didn't use "all"
+                        import warnings
+
+                        warnings.warn(
+                            "Ignoring contacts pair %d-%d. No alpha carbon." % (r0, r1),
+                        )
+                else:
+                    raise ValueError(
+                        "More than 1 alpha carbon detected in residue %d or %d" % (r0, r1),
                     )
-            else:
-                raise ValueError(
-                    "More than 1 alpha carbon detected in residue %d or %d" % (r0, r1),
-                )
 
-        residue_pairs = np.array(filtered_residue_pairs)
-        distances = md.compute_distances(traj, atom_pairs, periodic=periodic)
+            residue_pairs = np.array(filtered_residue_pairs)
+
+        if cutoff is None:
+            distances = md.compute_distances(traj, atom_pairs, periodic=periodic)
 
     elif scheme in ["closest", "closest-heavy", "sidechain", "sidechain-heavy"]:
         if scheme == "closest":
@@ -236,49 +268,208 @@ def compute_contacts(
                 for residue in traj.topology.residues
             ]
 
-        residue_lens = [len(ainds) for ainds in residue_membership]
-
-        atom_pairs = []
-        n_atom_pairs_per_residue_pair = []
-        for pair in residue_pairs:
-            atom_pairs.extend(
-                list(
-                    itertools.product(
-                        residue_membership[pair[0]],
-                        residue_membership[pair[1]],
-                    ),
-                ),
-            )
-            n_atom_pairs_per_residue_pair.append(
-                residue_lens[pair[0]] * residue_lens[pair[1]],
+        if cutoff is None:
+            distances = _residue_distances(
+                traj,
+                residue_pairs,
+                residue_membership,
+                periodic,
+                soft_min,
+                soft_min_beta,
             )
 
-        atom_distances = md.compute_distances(traj, atom_pairs, periodic=periodic)
+    else:
+        raise ValueError("This is not supposed to happen!")
 
-        # now squash the results based on residue membership
-        n_residue_pairs = len(residue_pairs)
-        distances = np.zeros((len(traj), n_residue_pairs), dtype=np.float32)
-        n_atom_pairs_per_residue_pair = np.asarray(n_atom_pairs_per_residue_pair)
+    if cutoff is not None:
+        distances, residue_pairs = _sparse_contacts(
+            traj,
+            residue_pairs,
+            residue_membership,
+            cutoff,
+            ignore_nonprotein,
+            periodic,
+            soft_min and scheme != "ca",
+            soft_min_beta,
+        )
 
-        for i in range(n_residue_pairs):
-            index = int(np.sum(n_atom_pairs_per_residue_pair[:i]))
-            n = n_atom_pairs_per_residue_pair[i]
+    return distances, residue_pairs
+
+
+def _residue_distances(traj, residue_pairs, residue_membership, periodic, soft_min, soft_min_beta):
+    """The (soft) minimum distance between the member atoms of each pair of
+    residues, shape=(n_frames, n_residue_pairs)"""
+    residue_lens = np.array([len(ainds) for ainds in residue_membership], dtype=np.int64)
+    member_starts = np.concatenate([[0], np.cumsum(residue_lens)])
+    members = np.fromiter(itertools.chain.from_iterable(residue_membership), dtype=np.int32, count=member_starts[-1])
+
+    residue_pairs = np.reshape(residue_pairs, (-1, 2)).astype(np.int64)
+    n_residue_pairs = len(residue_pairs)
+    n_atom_pairs_per_residue_pair = residue_lens[residue_pairs[:, 0]] * residue_lens[residue_pairs[:, 1]]
+    if np.any(n_atom_pairs_per_residue_pair == 0):
+        raise ValueError("Every residue in contacts needs at least one atom in the scheme")
+    # the atom pairs of residue pair i are atom_pairs[offsets[i]:offsets[i + 1]]
+    offsets = np.concatenate([[0], np.cumsum(n_atom_pairs_per_residue_pair)])
+
+    distances = np.zeros((len(traj), n_residue_pairs), dtype=np.float32)
+
+    # work through blocks of residue pairs, and of frames, so that no more
+    # than about _MAX_ATOM_DISTANCES atom distances are held at once
+    start = 0
+    while start < n_residue_pairs:
+        stop = np.searchsorted(offsets, offsets[start] + _MAX_ATOM_DISTANCES, side="right") - 1
+        stop = min(max(stop, start + 1), n_residue_pairs)
+        atom_pairs = _atom_pairs(residue_pairs[start:stop], member_starts, residue_lens, members)
+        segments = offsets[start:stop] - offsets[start]
+        chunk = max(1, _MAX_ATOM_DISTANCES // len(atom_pairs))
+
+        for frame in range(0, len(traj), chunk):
+            frames = traj.slice(slice(frame, frame + chunk), copy=False)
+            atom_distances = md.compute_distances(frames, atom_pairs, periodic=periodic)
             if not soft_min:
-                distances[:, i] = atom_distances[:, index : index + n].min(axis=1)
+                reduced = np.minimum.reduceat(atom_distances, segments, axis=1)
             else:
-                distances[:, i] = soft_min_beta / np.log(
-                    np.sum(
-                        np.exp(
-                            soft_min_beta / atom_distances[:, index : index + n],
-                            casting="safe",
-                        ),
+                reduced = soft_min_beta / np.log(
+                    np.add.reduceat(
+                        np.exp(soft_min_beta / atom_distances, casting="safe"),
+                        segments,
                         axis=1,
                     ),
                 )
+            distances[frame : frame + chunk, start:stop] = reduced
+        start = stop
+
+    return distances
+
+
+def _atom_pairs(residue_pairs, member_starts, residue_lens, members):
+    """Every pair of member atoms of each pair of residues, in the order of
+    itertools.product"""
+    lens_0 = residue_lens[residue_pairs[:, 0]]
+    lens_1 = residue_lens[residue_pairs[:, 1]]
+    counts = lens_0 * lens_1
+    pair = np.repeat(np.arange(len(residue_pairs)), counts)
+    # the index of each atom pair within its residue pair
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    atom_0 = members[member_starts[residue_pairs[pair, 0]] + local // lens_1[pair]]
+    atom_1 = members[member_starts[residue_pairs[pair, 1]] + local % lens_1[pair]]
+    return np.column_stack([atom_0, atom_1])
 
-    else:
-        raise ValueError("This is not supposed to happen!")
 
+def _sparse_contacts(
+    traj,
+    residue_pairs,
+    residue_membership,
+    cutoff,
+    ignore_nonprotein,
+    periodic,
+    soft_min,
+    soft_min_beta,
+):
+    """The contacts closer than cutoff, as a sparse (n_frames, n_residue_pairs)
+    matrix. If residue_pairs is None, every pair of residues in the same chain,
+    separated by two or more residues, is considered."""
+    import scipy.sparse
+
+    n_residues = traj.n_residues
+    atoms = np.unique(np.fromiter(itertools.chain.from_iterable(residue_membership), dtype=int))
+    atom_residue = np.array([a.residue.index for a in traj.topology.atoms], dtype=np.int64)[atoms]
+    members = traj.atom_slice(atoms)
+
+    if residue_pairs is None:
+        chain = np.array([r.chain.index for r in traj.topology.residues])
+        if ignore_nonprotein:
+            is_protein = np.array(
+                [any(a.name.lower() == "ca" for a in r.atoms) for r in traj.topology.residues],
+                dtype=bool,
+            )
+        unique_keys = None
+        columns = None
+    else:
+        requested = np.sort(np.reshape(residue_pairs, (-1, 2)), axis=1).astype(np.int64)
+        unique_keys, columns = np.unique(requested[:, 0] * n_residues + requested[:, 1], return_inverse=True)
+
+    # work through blocks of frames and reduce each block to the closest atom
+    # pair of each residue pair in each frame before moving on. Each atom pair
+    # within the cutoff takes about 64 bytes of temporaries below, so a block
+    # holds no more than _MAX_ATOM_DISTANCES // 4 of them, which keeps the
+    # peak close to that of _residue_distances. The first block is a single
+    # frame, which sizes the rest.
+    max_neighbors = _MAX_ATOM_DISTANCES // 4
+    rows = [np.empty(0, dtype=np.int64)]
+    keys = [np.empty(0, dtype=np.int64)]
+    values = [np.empty(0, dtype=np.float32)]
+    start, chunk = 0, 1
+    while start < traj.n_frames:
+        stop = min(start + chunk, traj.n_frames)
+        neighbors = md.compute_neighborlist_csr(
+            members,
+            cutoff,
+            frames=np.arange(start, stop),
+            periodic=periodic,
+            half=True,
+            return_distances=True,
+        )
+        n_neighbors = np.diff(neighbors.indptr, axis=1)
+        first = np.repeat(np.tile(atom_residue, stop - start), n_neighbors.ravel())
+        second = atom_residue[neighbors.indices]
+        lo, hi = np.minimum(first, second), np.maximum(first, second)
+        block_keys = lo * n_residues + hi
+
+        if unique_keys is None:
+            allowed = (hi - lo >= 3) & (chain[lo] == chain[hi])
+            if ignore_nonprotein:
+                allowed &= is_protein[lo] & is_protein[hi]
+        else:
+            allowed = np.zeros(len(block_keys), dtype=bool)
+            if len(unique_keys):
+                found = np.minimum(np.searchsorted(unique_keys, block_keys), len(unique_keys) - 1)
+                allowed = unique_keys[found] == block_keys
+        frame = np.repeat(np.arange(start, stop), n_neighbors.sum(axis=1))[allowed]
+        atom_distances = neighbors.distances[allowed]
+        block_keys, inverse = np.unique(block_keys[allowed], return_inverse=True)
+        del neighbors, first, second, lo, hi, allowed
+
+        entries = (frame - start) * len(block_keys) + inverse.ravel()
+        order = np.argsort(entries, kind="stable")
+        entries = entries[order]
+        firsts = np.flatnonzero(np.r_[True, entries[1:] != entries[:-1]]) if len(entries) else np.empty(0, int)
+        block_rows, block_cols = np.divmod(entries[firsts], max(len(block_keys), 1))
+        rows.append(block_rows + start)
+        keys.append(block_keys[block_cols])
+        if len(firsts):
+            values.append(np.minimum.reduceat(atom_distances[order], firsts))
+        else:
+            values.append(np.empty(0, dtype=np.float32))
+
+        chunk = max(1, max_neighbors * (stop - start) // max(n_neighbors.sum(), 1))
+        start = stop
+
+    rows, keys, values = np.concatenate(rows), np.concatenate(keys), np.concatenate(values)
+    if unique_keys is None:
+        unique_keys = np.unique(keys)
+        residue_pairs = np.column_stack(np.divmod(unique_keys, n_residues)).astype(int)
+    n_unique = len(unique_keys)
+    cols = np.searchsorted(unique_keys, keys)
+
+    if soft_min and len(values):
+        # the soft minimum depends on every atom pair, not just on those
+        # within the cutoff, so recompute it for the pairs in contact
+        in_contact = np.unique(cols)
+        pairs = np.column_stack(np.divmod(unique_keys[in_contact], n_residues))
+        soft = _residue_distances(traj, pairs, residue_membership, periodic, soft_min, soft_min_beta)
+        values = soft[rows, np.searchsorted(in_contact, cols)]
+
+    # the blocks come in frame order and each is sorted by residue pair, so
+    # stacking them gives the rows of the CSR matrix directly
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=traj.n_frames))])
+    distances = scipy.sparse.csr_matrix(
+        (values.astype(np.float32), cols, indptr),
+        shape=(traj.n_frames, n_unique),
+        dtype=np.float32,
+    )
+    if columns is not None:
+        distances = distances[:, columns.ravel()]
     return distances, residue_pairs
 
 
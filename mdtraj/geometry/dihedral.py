@@ -87,7 +87,15 @@ def _dihedral(traj, indices, periodic, out=None):
     return np.arctan2(p1, p2, out)
 
 
-def compute_dihedrals(traj, indices, periodic=True, opt=True):
+def compute_dihedrals(
+    traj,
+    indices,
+    periodic=True,
+    opt=True,
+    out=None,
+    chunk_frames=None,
+    memory_limit=None,
+):
     """Compute the dihedral angles between the supplied quartets of atoms in each frame in a trajectory.
 
     Parameters
@@ -105,6 +113,16 @@ def compute_dihedrals(traj, indices, periodic=True, opt=True):
         using the minimum image convention.
     opt : bool, default=True
         Use an optimized native library to calculate angles.
+    out : np.ndarray, shape=(n_frames, n_dihedrals), optional
+        An array to store the angles in, for example a ``np.memmap`` to
+        stream them to disk. It is filled and returned. If None, a new
+        float32 array is allocated.
+    chunk_frames : int, optional
+        Compute the angles in blocks of at most this many frames.
+    memory_limit : int, optional
+        Compute the angles in blocks of frames whose angles take up at most
+        about this many bytes. With a memory-mapped `out`, this bounds the
+        memory used however many frames there are.
 
     Returns
     -------
@@ -132,10 +150,10 @@ def compute_dihedrals(traj, indices, periodic=True, opt=True):
     if not np.all(np.logical_and(quartets < traj.n_atoms, quartets >= 0)):
         raise ValueError("indices must be between 0 and %d" % traj.n_atoms)
 
+    shape = (len(xyz), len(quartets))
     if len(quartets) == 0:
-        return np.zeros((len(xyz), 0), dtype=np.float32)
+        return distance._output_array(out, shape)
 
-    out = np.zeros((xyz.shape[0], quartets.shape[0]), dtype=np.float32)
     if periodic and traj._have_unitcell:
         box = ensure_type(
             traj.unitcell_vectors,
@@ -146,23 +164,24 @@ def compute_dihedrals(traj, indices, periodic=True, opt=True):
         )
         if opt:
             orthogonal = np.allclose(traj.unitcell_angles, 90)
-            _geometry._dihedral_mic(
-                xyz,
-                quartets,
-                box.transpose(0, 2, 1).copy(),
-                out,
-                orthogonal,
-            )
-            return out
-        else:
-            _dihedral(traj, quartets, periodic, out)
-            return out
+            box = box.transpose(0, 2, 1).copy()
+
+            def kernel(frames, block):
+                _geometry._dihedral_mic(xyz[frames], quartets, box[frames], block, orthogonal)
+
+            return distance._compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
 
     if opt:
-        _geometry._dihedral(xyz, quartets, out)
+
+        def kernel(frames, block):
+            _geometry._dihedral(xyz[frames], quartets, block)
+
     else:
-        _dihedral(traj, quartets, periodic, out)
-    return out
+
+        def kernel(frames, block):
+            _dihedral(traj.slice(frames, copy=False), quartets, periodic, block)
+
+    return distance._compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
 
 
 def _construct_atom_dict(topology):
@@ -33,6 +33,7 @@ __all__ = [
     "compute_distances",
     "compute_distances_t",
     "compute_displacements",
+    "compute_distance_matrix",
     "compute_center_of_mass",
     "compute_center_of_geometry",
     "find_closest_contact",
@@ -45,6 +46,9 @@ def compute_distances_core(
     unitcell_vectors=None,
     periodic=True,
     opt=True,
+    out=None,
+    chunk_frames=None,
+    memory_limit=None,
 ):
     """Compute the distances between pairs of atoms in each frame.
 
@@ -69,6 +73,19 @@ def compute_distances_core(
         SSE minimum image convention calculation implementation is over 1000x
         faster than the naive numpy implementation.
 
+    out : np.ndarray, shape=(n_frames, num_pairs), optional
+        An array to store the distances in, for example a ``np.memmap`` to
+        stream them to disk. It is filled and returned. If None, a new
+        float32 array is allocated.
+
+    chunk_frames : int, optional
+        Compute the distances in blocks of at most this many frames.
+
+    memory_limit : int, optional
+        Compute the distances in blocks of frames whose distances take up at
+        most about this many bytes. With a memory-mapped `out`, this bounds
+        the memory used however many frames there are.
+
     Returns
     -------
 
@@ -95,8 +112,9 @@ def compute_distances_core(
     if not np.all(np.logical_and(pairs < positions.shape[1], pairs >= 0)):
         raise ValueError(f"atom_pairs must be between 0 and {positions.shape[0]}")
 
+    shape = (len(xyz), len(pairs))
     if len(pairs) == 0:
-        return np.zeros((len(xyz), 0), dtype=np.float32)
+        return _output_array(out, shape)
 
     if periodic and (unitcell_vectors is not None):
         box = ensure_type(
@@ -108,42 +126,49 @@ def compute_distances_core(
             warn_on_cast=False,
         )
 
-        # convert to angles
-        unitcell_angles = []
-        for fr_unitcell_vectors in unitcell_vectors:
-            _, _, _, alpha, beta, gamma = box_vectors_to_lengths_and_angles(
-                fr_unitcell_vectors[0],
-                fr_unitcell_vectors[1],
-                fr_unitcell_vectors[2],
-            )
-            unitcell_angles.append(np.array([alpha, beta, gamma]))
-
-        orthogonal = np.allclose(np.array(unitcell_angles), 90)
+        # convert to angles, for all frames at once
+        unitcell_vectors = np.asarray(unitcell_vectors)
+        _, _, _, alpha, beta, gamma = box_vectors_to_lengths_and_angles(
+            unitcell_vectors[:, 0],
+            unitcell_vectors[:, 1],
+            unitcell_vectors[:, 2],
+        )
+        orthogonal = np.allclose(alpha, 90) and np.allclose(beta, 90) and np.allclose(gamma, 90)
+        box = box.transpose(0, 2, 1).copy()
 
         if opt:
-            out = np.empty((xyz.shape[0], pairs.shape[0]), dtype=np.float32)
-            _geometry._dist_mic(
-                xyz,
-                pairs,
-                box.transpose(0, 2, 1).copy(),
-                out,
-                orthogonal,
-            )
-            return out
+
+            def kernel(frames, block):
+                _geometry._dist_mic(xyz[frames], pairs, box[frames], block, orthogonal)
 
         else:
-            return _distance_mic(xyz, pairs, box.transpose(0, 2, 1), orthogonal)
+
+            def kernel(frames, block):
+                block[...] = _distance_mic(xyz[frames], pairs, box[frames], orthogonal)
 
     # either there are no unitcell vectors or they dont want to use them
-    if opt:
-        out = np.empty((xyz.shape[0], pairs.shape[0]), dtype=np.float32)
-        _geometry._dist(xyz, pairs, out)
-        return out
+    elif opt:
+
+        def kernel(frames, block):
+            _geometry._dist(xyz[frames], pairs, block)
+
     else:
-        return _distance(xyz, pairs)
+
+        def kernel(frames, block):
+            block[...] = _distance(xyz[frames], pairs)
+
+    return _compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
 
 
-def compute_distances(traj, atom_pairs, periodic=True, opt=True):
+def compute_distances(
+    traj,
+    atom_pairs,
+    periodic=True,
+    opt=True,
+    out=None,
+    chunk_frames=None,
+    memory_limit=None,
+):
     """Compute the distances between pairs of atoms in each frame.
 
     Parameters
@@ -160,6 +185,16 @@ def compute_distances(traj, atom_pairs, periodic=True, opt=True):
         Use an optimized native library to calculate distances. Our optimized
         SSE minimum image convention calculation implementation is over 1000x
         faster than the naive numpy implementation.
+    out : np.ndarray, shape=(n_frames, num_pairs), optional
+        An array to store the distances in, for example a ``np.memmap`` to
+        stream them to disk. It is filled and returned. If None, a new
+        float32 array is allocated.
+    chunk_frames : int, optional
+        Compute the distances in blocks of at most this many frames.
+    memory_limit : int, optional
+        Compute the distances in blocks of frames whose distances take up at
+        most about this many bytes. With a memory-mapped `out`, this bounds
+        the memory used however many frames there are.
 
     Returns
     -------
@@ -173,6 +208,9 @@ def compute_distances(traj, atom_pairs, periodic=True, opt=True):
         unitcell_vectors=traj.unitcell_vectors,
         periodic=periodic,
         opt=opt,
+        out=out,
+        chunk_frames=chunk_frames,
+        memory_limit=memory_limit,
     )
 
 
@@ -275,7 +313,15 @@ def compute_distances_t(traj, atom_pairs, time_pairs, periodic=True, opt=True):
         return _distance_t(xyz, pairs, times)
 
 
-def compute_displacements(traj, atom_pairs, periodic=True, opt=True):
+def compute_displacements(
+    traj,
+    atom_pairs,
+    periodic=True,
+    opt=True,
+    out=None,
+    chunk_frames=None,
+    memory_limit=None,
+):
     """Compute the displacement vector between pairs of atoms in each frame of a trajectory.
 
     Parameters
@@ -292,6 +338,16 @@ def compute_displacements(traj, atom_pairs, periodic=True, opt=True):
         Use an optimized native library to calculate distances. Our
         optimized minimum image convention calculation implementation is
         over 1000x faster than the naive numpy implementation.
+    out : np.ndarray, shape=(n_frames, n_pairs, 3), optional
+        An array to store the displacements in, for example a ``np.memmap`` to
+        stream them to disk. It is filled and returned. If None, a new
+        float32 array is allocated.
+    chunk_frames : int, optional
+        Compute the displacements in blocks of at most this many frames.
+    memory_limit : int, optional
+        Compute the displacements in blocks of frames whose displacements take up at
+        most about this many bytes. With a memory-mapped `out`, this bounds
+        the memory used however many frames there are.
 
     Returns
     -------
@@ -316,8 +372,9 @@ def compute_displacements(traj, atom_pairs, periodic=True, opt=True):
     )
     if not np.all(np.logical_and(pairs < traj.n_atoms, pairs >= 0)):
         raise ValueError("atom_pairs must be between 0 and %d" % traj.n_atoms)
+    shape = (len(xyz), len(pairs), 3)
     if len(pairs) == 0:  # If pairs is an empty slice of an array
-        return np.zeros((len(xyz), 0, 3), dtype=np.float32)
+        return _output_array(out, shape)
 
     if periodic and traj._have_unitcell:
         box = ensure_type(
@@ -329,25 +386,115 @@ def compute_displacements(traj, atom_pairs, periodic=True, opt=True):
             warn_on_cast=False,
         )
         orthogonal = np.allclose(traj.unitcell_angles, 90)
+        box = box.transpose(0, 2, 1).copy()
         if opt:
-            out = np.empty((xyz.shape[0], pairs.shape[0], 3), dtype=np.float32)
-            _geometry._dist_mic_displacement(
-                xyz,
-                pairs,
-                box.transpose(0, 2, 1).copy(),
-                out,
-                orthogonal,
-            )
-            return out
+
+            def kernel(frames, block):
+                _geometry._dist_mic_displacement(xyz[frames], pairs, box[frames], block, orthogonal)
+
         else:
-            return _displacement_mic(xyz, pairs, box.transpose(0, 2, 1), orthogonal)
+
+            def kernel(frames, block):
+                block[...] = _displacement_mic(xyz[frames], pairs, box[frames], orthogonal)
 
     # either there are no unitcell vectors or they dont want to use them
-    if opt:
-        out = np.empty((xyz.shape[0], pairs.shape[0], 3), dtype=np.float32)
-        _geometry._dist_displacement(xyz, pairs, out)
+    elif opt:
+
+        def kernel(frames, block):
+            _geometry._dist_displacement(xyz[frames], pairs, block)
+
+    else:
+
+        def kernel(frames, block):
+            block[...] = _displacement(xyz[frames], pairs)
+
+    return _compute_blocks(kernel, shape, out, chunk_frames, memory_limit)
+
+
+def compute_distance_matrix(traj, atom_indices=None, periodic=True, condensed=True):
+    """Compute the distances between all pairs of a set of atoms in each frame.
+
+    This gives the same distances as calling ``compute_distances`` with every
+    pair of the atoms, but computes them with a dedicated kernel that needs no
+    array of atom pairs.
+
+    Parameters
+    ----------
+    traj : Trajectory
+        An mtraj trajectory.
+    atom_indices : array_like, dtype=int, shape=(n_atoms,), optional
+        The indices of the atoms whose distances to compute. If None, use
+        every atom.
+    periodic : bool, default=True
+        If `periodic` is True and the trajectory contains unitcell
+        information, we will compute distances under the minimum image
+        convention.
+    condensed : bool, default=True
+        If True, return the distances in condensed form, i.e. the upper
+        triangle of each distance matrix, row by row, as returned by
+        ``scipy.spatial.distance.pdist``. If False, return the full square
+        matrices.
+
+    Returns
+    -------
+    distances : np.ndarray, shape=(n_frames, n_atoms * (n_atoms - 1) / 2) or (n_frames, n_atoms, n_atoms), dtype=float32
+        The distances between the atoms in each frame. In condensed form,
+        the distance between ``atom_indices[i]`` and ``atom_indices[j]``,
+        for ``i < j``, is in column ``n_atoms*i - i*(i+1)/2 + j - i - 1``,
+        which is the order of ``itertools.combinations(atom_indices, 2)``.
+
+    See Also
+    --------
+    compute_distances
+    scipy.spatial.distance.squareform : Convert between condensed and square forms
+    """
+    xyz = ensure_type(
+        traj.xyz,
+        dtype=np.float32,
+        ndim=3,
+        name="traj.xyz",
+        shape=(None, None, 3),
+        warn_on_cast=False,
+    )
+    if atom_indices is None:
+        atom_indices = np.arange(traj.n_atoms)
+    indices = ensure_type(
+        atom_indices,
+        dtype=np.int32,
+        ndim=1,
+        name="atom_indices",
+        warn_on_cast=False,
+    )
+    if not np.all(np.logical_and(indices < traj.n_atoms, indices >= 0)):
+        raise ValueError("atom_indices must be between 0 and %d" % traj.n_atoms)
+
+    n = len(indices)
+    out = np.empty((len(xyz), n * (n - 1) // 2), dtype=np.float32)
+    if out.size > 0:
+        box = None
+        orthogonal = True
+        if periodic and traj._have_unitcell:
+            box = ensure_type(
+                traj.unitcell_vectors,
+                dtype=np.float32,
+                ndim=3,
+                name="unitcell_vectors",
+                shape=(len(xyz), 3, 3),
+                warn_on_cast=False,
+            )
+            box = box.transpose(0, 2, 1).copy()
+            orthogonal = np.allclose(traj.unitcell_angles, 90)
+        _geometry._dist_matrix(xyz, indices, box, out, orthogonal)
+
+    if condensed:
         return out
-    return _displacement(xyz, pairs)
+
+    square = np.zeros((len(xyz), n, n), dtype=np.float32)
+    rows, columns = np.triu_indices(n, k=1)
+    for frame, distances in zip(square, out):
+        frame[rows, columns] = distances
+        frame[columns, rows] = distances
+    return square
 
 
 def compute_center_of_mass(traj, select=None):
@@ -472,6 +619,53 @@ def find_closest_contact(traj, group1, group2, frame=0, periodic=True):
     return _geometry._find_closest_contact(xyz, atoms1, atoms2, box)
 
 
+def _output_array(out, shape):
+    """Check a user-supplied output array, or allocate one."""
+    if out is None:
+        return np.empty(shape, dtype=np.float32)
+    if not isinstance(out, np.ndarray) or out.shape != shape:
+        raise ValueError(f"out must be an array of shape {shape}")
+    if not np.issubdtype(out.dtype, np.floating):
+        raise ValueError(f"out must have a floating point dtype, not {out.dtype}")
+    return out
+
+
+def _frame_blocks(n_frames, frame_nbytes, chunk_frames=None, memory_limit=None):
+    """Split the frames into slices of at most `chunk_frames` frames, or of as
+    many frames of `frame_nbytes` bytes as fit in `memory_limit` bytes."""
+    block_frames = max(n_frames, 1)
+    if chunk_frames is not None:
+        if int(chunk_frames) < 1:
+            raise ValueError(f"chunk_frames must be a positive integer, got {chunk_frames}")
+        block_frames = min(block_frames, int(chunk_frames))
+    if memory_limit is not None:
+        if memory_limit <= 0:
+            raise ValueError(f"memory_limit must be positive, got {memory_limit}")
+        block_frames = min(block_frames, max(1, int(memory_limit // max(frame_nbytes, 1))))
+    for start in range(0, n_frames, block_frames):
+        yield slice(start, min(start + block_frames, n_frames))
+
+
+def _compute_blocks(kernel, shape, out=None, chunk_frames=None, memory_limit=None):
+    """Fill an array of the given shape, block of frames by block of frames.
+
+    ``kernel(frames, block)`` computes the results for the slice `frames`
+    into the float32 array `block`. Blocks of `out` that the native kernels
+    can't write to directly (other dtypes or layouts) go through a buffer.
+    """
+    out = _output_array(out, shape)
+    frame_nbytes = np.float32().itemsize * int(np.prod(shape[1:]))
+    for frames in _frame_blocks(shape[0], frame_nbytes, chunk_frames, memory_limit):
+        block = out[frames]
+        if block.dtype == np.float32 and block.flags.c_contiguous:
+            kernel(frames, block)
+        else:
+            buffer = np.empty(block.shape, dtype=np.float32)
+            kernel(frames, buffer)
+            block[...] = buffer
+    return out
+
+
 def _distance(xyz, pairs):
     "Distance between pairs of points in each frame"
     delta = np.diff(xyz[:, pairs], axis=2)[:, :, 0]
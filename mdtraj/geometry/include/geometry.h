@@ -4,6 +4,10 @@
 extern "C" {
 #endif
 
+void set_geometry_num_threads(int n_threads);
+
+int get_geometry_num_threads();
+
 void dist_mic(const float* xyz, const int* pairs, const float* box_matrix,
               float* distance_out, float* displacement_out,
               const int n_frames, const int n_atoms, const int n_pairs);
@@ -30,6 +34,10 @@ void dist_mic_triclinic_t(const float* xyz, const int* pairs, const int* times,
                         float* distance_out, float* displacement_out,
                         const int n_frames, const int n_atoms, const int n_pairs);
 
+void dist_matrix(const float* xyz, const int* indices, const float* box_matrix,
+                 const int triclinic, float* out, const int n_frames,
+                 const int n_atoms, const int n_indices);
+
 void angle(const float* xyz, const int* triplets, float* out,
            const int n_frames, const int n_atoms, const int n_angles);
 
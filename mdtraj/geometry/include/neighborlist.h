@@ -5,4 +5,13 @@
 
 std::vector<std::vector<int> > _compute_neighborlist(const float* atomLocations, int numAtoms, float maxDistance, const float* boxVectors);
 
+/**
+ * Build the neighbor list of every frame in compressed sparse row form. For each frame, the neighbors of atom
+ * i are indices[frame][indptr[frame][i]:indptr[frame][i+1]], in increasing order. A half list only keeps the
+ * neighbors with a higher index than the atom itself, so that each pair appears once.
+ */
+void _compute_neighborlist_csr(const float* xyz, int numFrames, int numAtoms, float maxDistance, const float* boxVectors,
+                               bool half, bool withDistances, std::vector<std::vector<long long> >& indptr,
+                               std::vector<std::vector<int> >& indices, std::vector<std::vector<float> >& distances);
+
 #endif
@@ -1,10 +1,19 @@
 #ifndef MDTRAJ_NEIGHBORS_H
 #define MDTRAJ_NEIGHBORS_H
 
-std::vector<int> _compute_neighbors(
-    float* frame_xyz, int n_atoms, float cutoff,
-    const std::vector<int>& query_indices,
-    const std::vector<int>& haystack_indices,
-    float* box_matrix);
+#include <vector>
+
+/**
+ * For every frame, find the haystack atoms within cutoff of at least one
+ * query atom, in haystack order. With use_cell_list, the query atoms are
+ * binned into a grid first so that each haystack atom is only compared
+ * with nearby query atoms; the results are the same either way.
+ */
+void _compute_neighbors(
+    const float* xyz, int n_frames, int n_atoms, float cutoff,
+    const int* query_indices, int n_query,
+    const int* haystack_indices, int n_haystack,
+    const float* box_matrix, int use_cell_list,
+    std::vector<std::vector<int> >& result);
 
 #endif
@@ -25,15 +25,77 @@
 # Imports
 ##############################################################################
 
+from collections import namedtuple
+
 import numpy as np
 from mdtraj.utils import ensure_type
 
+from libcpp cimport bool as cbool
 from libcpp.vector cimport vector
 
-__all__ = ['compute_neighborlist']
+__all__ = ['compute_neighborlist', 'compute_neighborlist_csr', 'NeighborList']
 
 cdef extern from "neighborlist.h":
     vector[vector[int]] _compute_neighborlist(float* positions, int n_atoms, float cutoff, float* box_matrix) nogil
+    void _compute_neighborlist_csr(const float* xyz, int n_frames, int n_atoms, float cutoff,
+        const float* box_matrix, cbool half, cbool with_distances, vector[vector[long long]]& indptr,
+        vector[vector[int]]& indices, vector[vector[float]]& distances) nogil
+
+
+class NeighborList(namedtuple("NeighborList", ["indptr", "indices", "distances"])):
+    """Neighbor lists of several frames, in compressed sparse row (CSR) form
+
+    The neighbors of atom ``i`` in the ``f``-th frame are
+    ``indices[indptr[f, i]:indptr[f, i + 1]]``, in increasing order, and
+    their distances from it are the same slice of ``distances``. Obtain one
+    with ``compute_neighborlist_csr``.
+
+    Attributes
+    ----------
+    indptr : np.ndarray, shape=(n_frames, n_atoms + 1), dtype=np.int64
+        Where each atom's neighbors start and end in ``indices``. The rows
+        of all frames share one ``indices`` array, so ``indptr[f, 0]`` is
+        where the f-th frame starts.
+    indices : np.ndarray, shape=(n_entries,), dtype=np.int32
+        The neighbors of each atom, frame by frame and atom by atom.
+    distances : np.ndarray, shape=(n_entries,), dtype=np.float32, or None
+        The distance from each atom to each of its neighbors, in nm, if
+        they were requested.
+    """
+
+    __slots__ = ()
+
+    @property
+    def n_frames(self):
+        return self.indptr.shape[0]
+
+    def neighbors(self, frame, atom):
+        """The indices of the neighbors of ``atom`` in the given frame"""
+        return self.indices[self.indptr[frame, atom]:self.indptr[frame, atom + 1]]
+
+    def coordination_numbers(self):
+        """The number of neighbors of every atom, shape=(n_frames, n_atoms)"""
+        return np.diff(self.indptr, axis=1)
+
+    def to_scipy(self, frame):
+        """The neighbor list of one frame as a ``scipy.sparse.csr_matrix``
+
+        Entries are the neighbor distances, if they were computed, and
+        one otherwise.
+        """
+        from mdtraj.utils import import_
+
+        sparse = import_("scipy.sparse")
+        start, stop = self.indptr[frame, 0], self.indptr[frame, -1]
+        if self.distances is None:
+            data = np.ones(stop - start, dtype=np.float32)
+        else:
+            data = self.distances[start:stop]
+        n_atoms = self.indptr.shape[1] - 1
+        return sparse.csr_matrix(
+            (data, self.indices[start:stop], self.indptr[frame] - start),
+            shape=(n_atoms, n_atoms),
+        )
 
 
 ##############################################################################
@@ -96,3 +158,109 @@ def compute_neighborlist(traj, cutoff, frame=0, periodic=True):
         else:
             neighbors.append(np.empty(0, dtype=int))
     return neighbors
+
+
+def compute_neighborlist_csr(traj, cutoff, frames=None, periodic=True,
+                             half=False, return_distances=False):
+    """compute_neighborlist_csr(traj, cutoff, frames=None, periodic=True, half=False, return_distances=False)
+
+    Build the neighbor lists of many frames at once.
+
+    Like ``compute_neighborlist``, this finds every atom within a cutoff
+    distance of each atom, but for any number of frames, which are
+    processed in parallel, and the result is a compact CSR structure
+    rather than a list of arrays per atom.
+
+    Parameters
+    ----------
+    traj : md.Trajectory
+        An MDTraj trajectory
+    cutoff : float
+        Distance cutoff to define 'neighboring'
+    frames : int or array_like of int, optional
+        The frames to build neighbor lists for. Defaults to every frame.
+    periodic : bool
+        If `periodic` is True and the trajectory contains unitcell
+        information, we will compute distances under the minimum image
+        convention.
+    half : bool, default=False
+        If True, list each pair of neighbors only once, under the atom
+        with the lower index, i.e. only the neighbors j > i of atom i.
+    return_distances : bool, default=False
+        If True, also return the distance to every neighbor.
+
+    Returns
+    -------
+    neighbors : NeighborList
+        Named tuple of ``(indptr, indices, distances)``. The neighbors of
+        atom ``i`` in the ``f``-th requested frame are
+        ``indices[indptr[f, i]:indptr[f, i + 1]]``, sorted. ``distances``
+        is None unless ``return_distances`` is True.
+
+    See Also
+    --------
+    compute_neighborlist : the neighbor list of a single frame
+    compute_neighbors : the atoms near a set of query atoms
+    """
+    if frames is None:
+        frames = np.arange(traj.n_frames)
+    frames = np.atleast_1d(np.asarray(frames))
+    if frames.ndim != 1 or not (np.issubdtype(frames.dtype, np.integer) or frames.size == 0):
+        raise ValueError("frames must be an integer or a 1D array of integers")
+    frames = frames.astype(np.intp)
+    if np.any((frames < -traj.n_frames) | (frames >= traj.n_frames)):
+        raise IndexError("frames out of range for a trajectory with %d frames" % traj.n_frames)
+
+    cdef int n_frames = len(frames)
+    cdef int n_atoms = traj.n_atoms
+    cdef float cutoff_ = cutoff
+    cdef cbool half_ = half
+    cdef cbool with_distances = return_distances
+    if n_frames == 0 or n_atoms == 0:
+        return NeighborList(
+            np.zeros((n_frames, n_atoms + 1), dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float32) if return_distances else None,
+        )
+
+    cdef float[:, :, ::1] xyz = np.ascontiguousarray(traj.xyz[frames], dtype=np.float32)
+    cdef float[:, :, ::1] box_matrix
+    cdef float* box_matrix_pointer = NULL
+    if periodic and traj.unitcell_vectors is not None:
+        box_matrix = np.ascontiguousarray(traj.unitcell_vectors[frames], dtype=np.float32)
+        box_matrix_pointer = &box_matrix[0, 0, 0]
+
+    cdef vector[vector[long long]] indptr_
+    cdef vector[vector[int]] indices_
+    cdef vector[vector[float]] distances_
+    with nogil:
+        _compute_neighborlist_csr(&xyz[0, 0, 0], n_frames, n_atoms, cutoff_,
+                                  box_matrix_pointer, half_, with_distances,
+                                  indptr_, indices_, distances_)
+
+    # copy the per-frame vectors into one set of numpy arrays, with every
+    # frame's row offsets shifted to where the frame starts
+    cdef long long[:, ::1] indptr = np.empty((n_frames, n_atoms + 1), dtype=np.int64)
+    cdef long long offset = 0
+    cdef int i, j
+    for i in range(n_frames):
+        for j in range(n_atoms + 1):
+            indptr[i, j] = indptr_[i][j] + offset
+        offset += indices_[i].size()
+
+    cdef int[::1] indices = np.empty(offset, dtype=np.int32)
+    cdef float[::1] distances = np.empty(offset if return_distances else 0, dtype=np.float32)
+    cdef size_t k, start
+    for i in range(n_frames):
+        start = indptr[i, 0]
+        for k in range(indices_[i].size()):
+            indices[start + k] = indices_[i][k]
+        if return_distances:
+            for k in range(distances_[i].size()):
+                distances[start + k] = distances_[i][k]
+
+    return NeighborList(
+        np.asarray(indptr),
+        np.asarray(indices),
+        np.asarray(distances) if return_distances else None,
+    )
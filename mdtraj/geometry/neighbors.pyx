@@ -34,9 +34,15 @@ from libcpp.vector cimport vector
 __all__ = ['compute_neighbors']
 
 cdef extern from "neighbors.hpp":
-    vector[int] _compute_neighbors(float* xyz, int n_atoms, float cutoff,
-        vector[int]& query_indices, vector[int]& haystack_indices,
-        float* box_matrix) nogil
+    void _compute_neighbors(const float* xyz, int n_frames, int n_atoms,
+        float cutoff, const int* query_indices, int n_query,
+        const int* haystack_indices, int n_haystack, const float* box_matrix,
+        int use_cell_list, vector[vector[int]]& result) nogil
+
+# Comparing every haystack atom with every query atom is quicker than
+# building a cell list for small searches. Above this many atom pairs per
+# frame, the query atoms are binned into a grid of cells first.
+_CELL_LIST_MIN_PAIRS = 250000
 
 ##############################################################################
 # Functions
@@ -74,6 +80,14 @@ def compute_neighbors(traj, cutoff, query_indices, haystack_indices=None,
     matches : list of np.ndarray, shape=(n_matches,), dtype=int
         List of arrays, of length n_frames. Each item in the list is a 1D array
         of the indices of the matching atoms.
+
+    Notes
+    -----
+    For large searches the query atoms are first binned into a grid of
+    cells (a cell list), in orthorhombic and triclinic boxes alike, so each
+    haystack atom is only compared with the query atoms nearby. Frames are
+    searched in parallel with OpenMP. The results are the same as comparing
+    every pair of atoms.
     """
 
     query_indices = ensure_type(query_indices, dtype=np.int32, ndim=1,
@@ -82,7 +96,7 @@ def compute_neighbors(traj, cutoff, query_indices, haystack_indices=None,
                                    name='haystack_indices', warn_on_cast=False,
                                    can_be_none=True)
     if haystack_indices is None:
-        haystack_indices = np.arange(traj.xyz.shape[1])
+        haystack_indices = np.arange(traj.xyz.shape[1], dtype=np.int32)
 
     if not np.all((query_indices >= 0) * (query_indices < traj.xyz.shape[1]) * (query_indices < traj.xyz.shape[1])):
         raise ValueError("query_indices must be valid positive indices")
@@ -91,36 +105,40 @@ def compute_neighbors(traj, cutoff, query_indices, haystack_indices=None,
 
     cdef int i
     cdef int n_frames = traj.xyz.shape[0]
-    cdef float[:, :, ::1] xyz = traj.xyz
+    cdef int n_atoms = traj.xyz.shape[1]
+    cdef float cutoff_ = cutoff
+    cdef float[:, :, ::1] xyz = ensure_type(traj.xyz, dtype=np.float32, ndim=3, name='traj.xyz', warn_on_cast=False)
     cdef float[:, :, ::1] box_matrix
-    cdef float* box_matrix_pointer
-    cdef vector[int] query_indices_ = query_indices
-    cdef vector[int] haystack_indices_ = haystack_indices
-    cdef vector[int] frame_neighbors
+    cdef float* box_matrix_pointer = NULL
+    cdef int[::1] query_ = query_indices
+    cdef int[::1] haystack_ = haystack_indices
+    cdef int n_query = len(query_indices)
+    cdef int n_haystack = len(haystack_indices)
+    cdef int use_cell_list = n_query * <long> n_haystack >= _CELL_LIST_MIN_PAIRS
+    cdef vector[vector[int]] neighbors
     cdef int[::1] frame_neighbors_mview
     cdef int is_periodic = periodic and (traj.unitcell_vectors is not None)
     if is_periodic:
         unitcell_vectors = ensure_type(traj.unitcell_vectors, dtype=np.float32, ndim=3, name='unitcell_vectors', warn_on_cast=False)
         box_matrix = np.asarray(unitcell_vectors, order='c')
-    else:
-        box_matrix_pointer = NULL
+        box_matrix_pointer = &box_matrix[0,0,0]
+
+    if n_frames == 0:
+        return []
+    if n_query == 0 or n_haystack == 0:
+        return [np.empty(0, dtype=int) for i in range(n_frames)]
+
+    with nogil:
+        _compute_neighbors(&xyz[0,0,0], n_frames, n_atoms, cutoff_,
+                           &query_[0], n_query, &haystack_[0], n_haystack,
+                           box_matrix_pointer, use_cell_list, neighbors)
 
     results = []  # list of numpy arrays
     for i in range(n_frames):
-        if is_periodic:
-            box_matrix_pointer = &box_matrix[i,0,0]
-        frame_neighbors = _compute_neighbors(
-            &xyz[i,0,0], traj.xyz.shape[1], cutoff, query_indices_,
-            haystack_indices_, box_matrix_pointer)
-        # now, we need to go from STL vector[int] to a numpy array without
-        # egregious copying performance.
-        # I can't find any great cython docs on this...
-        # first, convert to a memoryview by casting the pointer to the memory
-        # block. this implements the python buffer protocol...
-        if frame_neighbors.size() > 0:
-            frame_neighbors_mview = <int[:frame_neighbors.size()]> (<int*> (&frame_neighbors[0]))
-        # so then we can copy it into numpy-managed memory. copy is necessary,
-        # because once we exit this scope, C++ will clean up the vector.
+        # copy each frame's matches out of the STL vector into
+        # numpy-managed memory, since C++ frees the vector once we return
+        if neighbors[i].size() > 0:
+            frame_neighbors_mview = <int[:neighbors[i].size()]> (<int*> (&neighbors[i][0]))
             results.append(np.array(frame_neighbors_mview, dtype=int, copy=True))
         else:
             results.append(np.empty(0, dtype=int))
@@ -21,14 +21,14 @@
 ##############################################################################
 
 
-from copy import deepcopy
+import warnings
 
 import numpy as np
 
 from mdtraj.geometry import _geometry
 from mdtraj.utils import ensure_type
 
-__all__ = ["shrake_rupley"]
+__all__ = ["shrake_rupley", "lcpo", "compute_sasa"]
 
 # These van der waals radii are taken from
 # https://en.wikipedia.org/wiki/Atomic_radii_of_the_elements_(data_page)
@@ -175,6 +175,56 @@ _ATOMIC_RADII = {
     "Uuo": 0.200,
 }
 
+# The radii and parameters of the LCPO method, from
+# J. Weiser, P. S. Shenkin and W. C. Still (1999). "Approximate atomic surfaces
+#   from linear combinations of pairwise overlaps (LCPO)". J. Comput. Chem. 20:
+#   217--230. doi:10.1002/(SICI)1096-987X(19990130)20:2<217::AID-JCC4>3.0.CO;2-A
+# The parameters (P1, P2, P3, P4) depend on the element, the hybridization and
+# the number of bonded heavy atoms. P4 is in inverse square angstroms.
+_LCPO_RADII = {"C": 0.170, "N": 0.165, "O": 0.160, "S": 0.190, "P": 0.190}
+
+_LCPO_PARAMETERS = {
+    ("C", "sp3"): {
+        1: (0.77887, -0.28063, -0.0012968, 0.00039328),
+        2: (0.56482, -0.19608, -0.0010219, 0.0002658),
+        3: (0.23348, -0.072627, -0.00020079, 0.00007967),
+        4: (0.00000, 0.00000, 0.00000, 0.00000),
+    },
+    ("C", "sp2"): {
+        2: (0.51245, -0.15966, -0.00019781, 0.00016392),
+        3: (0.070344, -0.019015, -0.000022009, 0.000016875),
+    },
+    ("O", "sp3"): {
+        1: (0.77914, -0.25262, -0.0016056, 0.00035071),
+        2: (0.49392, -0.16038, -0.00015512, 0.00016453),
+    },
+    ("O", "sp2"): {
+        1: (0.68563, -0.1868, -0.00135573, 0.00023743),
+    },
+    # carboxylate and phosphate oxygens
+    ("O", "O2"): {
+        1: (0.88857, -0.33421, -0.0018683, 0.00049372),
+    },
+    ("N", "sp3"): {
+        1: (0.78602, -0.29198, -0.0006537, 0.00036247),
+        2: (0.22599, -0.036648, -0.0012297, 0.000080038),
+        3: (0.051481, -0.012603, -0.00032006, 0.000024774),
+    },
+    ("N", "sp2"): {
+        1: (0.73511, -0.22116, -0.00089148, 0.0002523),
+        2: (0.41102, -0.12254, -0.000075448, 0.00011804),
+        3: (0.062577, -0.017874, -0.00008312, 0.000019849),
+    },
+    ("S", None): {
+        1: (0.7722, -0.26393, 0.0010629, 0.0002179),
+        2: (0.54581, -0.19477, -0.0012873, 0.00029247),
+    },
+    ("P", None): {
+        3: (0.3865, -0.18249, -0.0036598, 0.0004264),
+        4: (0.03873, -0.0089339, 0.0000083582, 0.0000030381),
+    },
+}
+
 
 def shrake_rupley(
     traj,
@@ -253,11 +303,178 @@ def shrake_rupley(
     roughly, the icosahedral tesselation works something like this
     http://www.ziyan.info/2008/11/sphere-tessellation-using-icosahedron.html
 
+    Only atoms closer than the sum of their radii can hide each other's
+    points, so the atoms of each frame are first binned into a grid of cells
+    twice as wide as the largest radius, and each atom is only checked
+    against the atoms in neighboring cells. The cost of each frame thus
+    grows linearly with the number of atoms. Frames are computed in parallel
+    with OpenMP.
+
     References
     ----------
     .. [1] Shrake, A; Rupley, JA. (1973) J Mol Biol 79 (2): 351--71.
     """
 
+    xyz, atom_mapping, atom_selection_mask, out = _prepare_sasa(traj, mode, atom_indices)
+    radii = _atom_radii(traj.topology, _ATOMIC_RADII, change_radii) + probe_radius
+
+    _geometry._sasa(xyz, radii, int(n_sphere_points), atom_mapping, atom_selection_mask, out)
+
+    if get_mapping is True:
+        return out, atom_mapping
+    else:
+        return out
+
+
+def lcpo(
+    traj,
+    probe_radius=0.14,
+    mode="atom",
+    change_radii=None,
+    get_mapping=False,
+    atom_indices=None,
+):
+    """Compute the approximate solvent accessible surface area of each atom or residue with LCPO.
+
+    Parameters
+    ----------
+    traj : Trajectory
+        An mtraj trajectory. Its topology must have bonds and hydrogens.
+    probe_radius : float, optional
+        The radius of the probe, in nm.
+    mode : {'atom', 'residue'}
+        In mode == 'atom', the extracted areas are resolved per-atom
+        In mode == 'residue', this is consolidated down to the
+        per-residue SASA by summing over the atoms in each residue.
+    change_radii : dict, optional
+        A partial or complete dict containing the radii to change from the
+        defaults. Should take the form {"Symbol" : radii_in_nm }, e.g.
+        {"S" : 0.180 } to change the radii of Sulfur to 180 pm.
+    get_mapping : bool, optional
+        Instead of returning only the areas, also return the indices of the
+        atoms or the residue-to-atom mapping. If True, will return a tuple
+        that contains the areas and the mapping (np.array, shape=(n_atoms)).
+    atom_indices : iterable, optional
+        Selection of atoms indices for which the SASA will be computed.
+        Default is all atoms. As with :func:`shrake_rupley`, the selection
+        doesn't affect what atoms are considered accessibility blockers.
+        The excluded atoms/residues get a SASA value -1.
+
+    Returns
+    -------
+    areas : np.array, shape=(n_frames, n_features)
+        The accessible surface area of each atom or residue in every frame.
+        If mode == 'atom', the second dimension will index the atoms in
+        the trajectory, whereas if mode == 'residue', the second
+        dimension will index the residues.
+
+    See Also
+    --------
+    shrake_rupley, compute_sasa
+
+    Notes
+    -----
+    The linear combination of pairwise overlaps (LCPO) method [1]_ estimates
+    the accessible area of an atom from the areas of its sphere buried by
+    each of its neighbors, and by the neighbors they have in common,
+
+    .. math::
+
+        A_i = P_1 S_i + P_2 \\sum_j A_{ij} + P_3 \\sum_j \\sum_k A_{jk}
+              + P_4 \\sum_j A_{ij} \\sum_k A_{jk}
+
+    where the parameters P depend on the element, hybridization and number
+    of bonded heavy atoms of atom i. These are inferred from the bonds of the
+    topology, so hydrogens have to be present, even though they take no part
+    in the calculation and always get an area of zero. Atoms of elements
+    without parameters are treated like sp3 carbons.
+
+    There is no sampling of the atomic surfaces, so LCPO is much faster
+    than :func:`shrake_rupley`. The price is accuracy: the total area of a
+    protein is typically within 10-15% of the Shrake-Rupley value,
+    but the areas of individual atoms can be off by much more. The
+    parameters were fit to proteins in vacuum, so strip the solvent first.
+
+    References
+    ----------
+    .. [1] Weiser, J; Shenkin, PS; Still, WC. (1999) J Comput Chem 20 (2): 217--230.
+    """
+    xyz, atom_mapping, atom_selection_mask, out = _prepare_sasa(traj, mode, atom_indices)
+
+    parameters = _lcpo_parameters(traj.topology)
+    radii = _atom_radii(traj.topology, {**_ATOMIC_RADII, **_LCPO_RADII}, change_radii) + probe_radius
+    # hydrogens are neither counted nor do they bury other atoms
+    hydrogens = np.array([a.element.atomic_number == 1 for a in traj.topology.atoms], dtype=bool)
+    radii[hydrogens] = 0
+
+    _geometry._lcpo(xyz, radii, parameters, atom_mapping, atom_selection_mask, out)
+
+    if get_mapping is True:
+        return out, atom_mapping
+    else:
+        return out
+
+
+def compute_sasa(
+    traj,
+    probe_radius=0.14,
+    mode="atom",
+    change_radii=None,
+    get_mapping=False,
+    atom_indices=None,
+    method="shrake_rupley",
+    n_sphere_points=960,
+):
+    """Compute the solvent accessible surface area of each atom or residue in each simulation frame.
+
+    Parameters
+    ----------
+    traj : Trajectory
+        An mtraj trajectory.
+    probe_radius : float, optional
+        The radius of the probe, in nm.
+    mode : {'atom', 'residue'}
+        Whether to return the area of each atom or of each residue.
+    change_radii : dict, optional
+        The radii to change from the defaults, e.g. {"Cl" : 0.175 }.
+    get_mapping : bool, optional
+        Also return the mapping of atoms to columns of the output.
+    atom_indices : iterable, optional
+        The atoms for which the SASA will be computed. The excluded
+        atoms/residues get a SASA value -1.
+    method : {'shrake_rupley', 'lcpo'}
+        The numerical Shrake-Rupley algorithm, or the faster but less
+        accurate analytical LCPO approximation.
+    n_sphere_points : int, optional
+        The number of points representing the surface of each atom, with
+        method == 'shrake_rupley'.
+
+    Returns
+    -------
+    areas : np.array, shape=(n_frames, n_features)
+        The accessible surface area of each atom or residue in every frame.
+
+    See Also
+    --------
+    shrake_rupley, lcpo
+    """
+    kwargs = dict(
+        probe_radius=probe_radius,
+        mode=mode,
+        change_radii=change_radii,
+        get_mapping=get_mapping,
+        atom_indices=atom_indices,
+    )
+    if method == "shrake_rupley":
+        return shrake_rupley(traj, n_sphere_points=n_sphere_points, **kwargs)
+    elif method == "lcpo":
+        return lcpo(traj, **kwargs)
+    raise ValueError('method must be one of "shrake_rupley", "lcpo". "%s" supplied' % method)
+
+
+def _prepare_sasa(traj, mode, atom_indices):
+    """The coordinates, atom mapping, selection mask and output array
+    shared by the SASA methods"""
     xyz = ensure_type(
         traj.xyz,
         dtype=np.float32,
@@ -288,30 +505,77 @@ def shrake_rupley(
         atom_selection_mask = np.ones(traj.n_atoms, dtype=np.int32)
         out = np.zeros((xyz.shape[0], dim1), dtype=np.float32)
     else:
-        atom_selection_mask = np.array(
-            [[1 if ii in atom_indices else 0][0] for ii in range(traj.n_atoms)],
-            dtype=np.int32,
-        )
+        atom_selection_mask = np.zeros(traj.n_atoms, dtype=np.int32)
+        atom_selection_mask[atom_indices] = 1
         out = np.full((xyz.shape[0], dim1), -1, dtype=np.float32)
         out[:, atom_mapping[atom_indices]] = 0
 
-    modified_radii = {}
+    return xyz, atom_mapping, atom_selection_mask, out
+
+
+def _atom_radii(topology, default_radii, change_radii):
+    """The radius of each atom, in nm, with the defaults for each element
+    partially replaced by change_radii"""
+    radii = default_radii
     if change_radii is not None:
-        # in case _ATOMIC_RADII is in use elsehwere...
-        modified_radii = deepcopy(_ATOMIC_RADII)
-        # Now, modify the values specified in 'change_radii'
-        for k, v in change_radii.items():
-            modified_radii[k] = v
-
-    if bool(modified_radii):
-        atom_radii = [modified_radii[atom.element.symbol] for atom in traj.topology.atoms]
-    else:
-        atom_radii = [_ATOMIC_RADII[atom.element.symbol] for atom in traj.topology.atoms]
-    radii = np.array(atom_radii, np.float32) + probe_radius
+        # copy, so that the defaults are left alone
+        radii = dict(default_radii)
+        radii.update(change_radii)
+    return np.array([radii[atom.element.symbol] for atom in topology.atoms], np.float32)
 
-    _geometry._sasa(xyz, radii, int(n_sphere_points), atom_mapping, atom_selection_mask, out)
 
-    if get_mapping is True:
-        return out, atom_mapping
-    else:
-        return out
+def _lcpo_parameters(topology):
+    """The LCPO parameters of each atom, shape=(n_atoms, 4), with P4 in nm^-2"""
+    if topology.n_bonds == 0:
+        raise ValueError(
+            "LCPO needs the bonds of the topology to assign parameters. "
+            "Try Topology.create_standard_bonds()",
+        )
+
+    is_heavy = np.array([a.element.atomic_number != 1 for a in topology.atoms], dtype=bool)
+    if is_heavy.all():
+        warnings.warn(
+            "The topology has no hydrogens, so the LCPO parameters, which depend "
+            "on the hybridization of each atom, will be poorly chosen",
+        )
+
+    bonds = np.array([[a.index, b.index] for a, b in topology.bonds], dtype=np.intp)
+    degree = np.bincount(bonds.ravel(), minlength=topology.n_atoms)
+    heavy_degree = np.zeros(topology.n_atoms, dtype=np.intp)
+    np.add.at(heavy_degree, bonds[:, 0], is_heavy[bonds[:, 1]])
+    np.add.at(heavy_degree, bonds[:, 1], is_heavy[bonds[:, 0]])
+    # the sole partner of each atom with one bond, and the number of such
+    # oxygens on each atom, to tell carboxylate and phosphate oxygens apart
+    partner = np.full(topology.n_atoms, -1, dtype=np.intp)
+    partner[bonds[:, 0]] = bonds[:, 1]
+    partner[bonds[:, 1]] = bonds[:, 0]
+    is_oxygen = np.array([a.element.symbol == "O" for a in topology.atoms], dtype=bool)
+    terminal_oxygens = np.bincount(partner[is_oxygen & (degree == 1)], minlength=topology.n_atoms)
+
+    parameters = np.zeros((topology.n_atoms, 4), dtype=np.float64)
+    for atom in topology.atoms:
+        i = atom.index
+        if not is_heavy[i]:
+            continue
+        symbol = atom.element.symbol
+        if symbol in ("C", "N"):
+            key = (symbol, "sp3" if degree[i] == 4 else "sp2")
+        elif symbol == "O":
+            if degree[i] == 1 and terminal_oxygens[partner[i]] >= 2:
+                key = ("O", "O2")
+            elif degree[i] == 1:
+                key = ("O", "sp2")
+            else:
+                key = ("O", "sp3")
+        elif symbol in ("S", "P"):
+            key = (symbol, None)
+        else:
+            key = ("C", "sp3")
+        table = _LCPO_PARAMETERS[key]
+        # fall back to the closest number of neighbors with parameters
+        n_neighbors = min(table, key=lambda n: (abs(n - heavy_degree[i]), n))
+        parameters[i] = table[n_neighbors]
+
+    # P4 multiplies an area by an area
+    parameters[:, 3] *= 100
+    return parameters.astype(np.float32)
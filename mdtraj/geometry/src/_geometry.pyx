@@ -29,6 +29,9 @@ import sys
 ##############################################################################
 
 cdef extern from "geometry.h" nogil:
+    void set_geometry_num_threads(int n_threads)
+    int get_geometry_num_threads()
+
     void dist(const float* xyz, const int* pairs, float* distance_out,
               float* displacement_out, int n_frames,  int n_atoms,
               int n_pairs)
@@ -50,6 +53,9 @@ cdef extern from "geometry.h" nogil:
                               const float* box_matrix, float* distance_out,
                               float* displacement_out, int n_frames, int n_atoms,
                               int n_pairs)
+    void dist_matrix(const float* xyz, const int* indices, const float* box_matrix,
+                     int triclinic, float* out, int n_frames, int n_atoms,
+                     int n_indices)
 
     void angle(const float* xyz, const int* triplets, float* out,
                int n_frames, int n_atoms, int n_angles)
@@ -87,12 +93,23 @@ cdef extern from "sasa.h":
     void sasa(const int n_frames, const int n_atoms, const float* xyzlist,
               const float* atom_radii, const int n_sphere_points,
               const int* atom_mapping, const int* atom_selection, const int n_groups, float* out) nogil
+    void lcpo(const int n_frames, const int n_atoms, const float* xyzlist,
+              const float* atom_radii, const float* parameters,
+              const int* atom_mapping, const int* atom_selection, const int n_groups, float* out) nogil
 
 
 ##############################################################################
 # Wrappers
 ##############################################################################
 
+def _set_num_threads(int n_threads):
+    set_geometry_num_threads(n_threads)
+
+
+def _get_num_threads():
+    return get_geometry_num_threads()
+
+
 def _dist(float[:, :, ::1] xyz,
           int[:, ::1] pairs,
           float[:, ::1] out):
@@ -164,6 +181,22 @@ def _dist_mic_displacement(float[:, :, ::1] xyz,
         dist_mic_triclinic(&xyz[0,0,0], <int*> &pairs[0,0], &box_matrix[0,0,0], NULL, &out[0,0, 0], n_frames, n_atoms, n_pairs)
 
 
+def _dist_matrix(float[:, :, ::1] xyz,
+                 int[::1] indices,
+                 box_matrix,
+                 float[:, ::1] out,
+                 orthogonal):
+    cdef int n_frames = xyz.shape[0]
+    cdef int n_atoms = xyz.shape[1]
+    cdef int n_indices = indices.shape[0]
+    cdef float[:, :, ::1] box
+    cdef float* box_pointer = NULL
+    if box_matrix is not None:
+        box = box_matrix
+        box_pointer = &box[0,0,0]
+    dist_matrix(&xyz[0,0,0], &indices[0], box_pointer, not orthogonal, &out[0,0], n_frames, n_atoms, n_indices)
+
+
 def _angle(float[:, :, ::1] xyz,
            int[:, ::1] triplets,
            float[:, ::1] out):
@@ -236,6 +269,18 @@ def _sasa(float[:, :, ::1] xyz,
          &atom_outmapping[0], &atom_selection_mask[0], out.shape[1], &out[0,0])
 
 
+def _lcpo(float[:, :, ::1] xyz,
+          float[::1] atom_radii,
+          float[:, ::1] parameters,
+          int[::1] atom_outmapping,
+          int[::1] atom_selection_mask,
+          float[:, ::1] out):
+    cdef int n_frames = xyz.shape[0]
+    cdef int n_atoms = xyz.shape[1]
+    lcpo(n_frames, n_atoms, &xyz[0,0,0], &atom_radii[0], &parameters[0,0],
+         &atom_outmapping[0], &atom_selection_mask[0], out.shape[1], &out[0,0])
+
+
 def _dssp(float[:, :, ::1] xyz,
           int[:, ::1] nco_indices,
           int[::1] ca_indices,
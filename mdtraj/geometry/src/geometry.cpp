@@ -26,10 +26,75 @@
 #include <math.h>
 #include <float.h>
 #include <vector>
+#include <algorithm>
 #include "math_patch.h"
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 using std::vector;
 
+/****************************************************************************/
+/* Threading                                                                */
+/****************************************************************************/
+
+// The number of threads the distance, angle and dihedral kernels use, or 0
+// for the OpenMP default (i.e. OMP_NUM_THREADS)
+static int geometry_num_threads = 0;
+
+// Below this many (frame, pair) elements, starting threads costs more than
+// it saves
+static const long long MIN_PARALLEL_WORK = 20000;
+
+void set_geometry_num_threads(int n_threads) {
+    geometry_num_threads = (n_threads > 0) ? n_threads : 0;
+}
+
+int get_geometry_num_threads() {
+#ifdef _OPENMP
+    return (geometry_num_threads > 0) ? geometry_num_threads : omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+/**
+ * Call kernel(frame, begin, end) to process the pairs [begin, end) of each
+ * frame, covering all n_items pairs of all n_frames frames, in parallel.
+ *
+ * With enough frames, whole frames are divided between the threads;
+ * otherwise the pairs of each frame are. The kernel computes every element
+ * the same way no matter how the work is divided, so the results are
+ * bitwise identical to those of a serial loop.
+ */
+template <class Index, class Kernel>
+static void for_each_frame(const int n_frames, const Index n_items, const Kernel& kernel) {
+#ifdef _OPENMP
+    int n_threads = get_geometry_num_threads();
+    if (n_threads > 1 && (long long) n_frames*n_items >= MIN_PARALLEL_WORK) {
+        if (n_frames >= n_threads) {
+            #pragma omp parallel for num_threads(n_threads) schedule(static)
+            for (int i = 0; i < n_frames; i++)
+                kernel(i, (Index) 0, n_items);
+        }
+        else {
+            #pragma omp parallel num_threads(n_threads)
+            {
+                int thread = omp_get_thread_num();
+                int n_team = omp_get_num_threads();
+                Index begin = (Index) ((long long) n_items*thread/n_team);
+                Index end = (Index) ((long long) n_items*(thread+1)/n_team);
+                for (int i = 0; i < n_frames; i++)
+                    kernel(i, begin, end);
+            }
+        }
+        return;
+    }
+#endif
+    for (int i = 0; i < n_frames; i++)
+        kernel(i, (Index) 0, n_items);
+}
+
 /****************************************************************************/
 /* Distance, Angle and Dihedral kernels                                     */
 /****************************************************************************/
@@ -57,157 +122,296 @@ using std::vector;
 #include "anglekernels.h"
 #include "dihedralkernels.h"
 
-#define COMPILE_WITH_TRICLINIC
-#include "anglekernels.h"
-#include "dihedralkernels.h"
-
-void dist_mic_triclinic(const float* xyz, const int* pairs, const float* box_matrix,
-                        float* distance_out, float* displacement_out, const int n_frames,
-                        const int n_atoms, const int n_pairs) {
-    bool store_displacement = (displacement_out != NULL);
-    bool store_distance = (distance_out != NULL);
-    for (int i = 0; i < n_frames; i++) {
-        // Load the periodic box vectors and make sure they're in reduced form.
+/**
+ * A triclinic periodic box in reduced form, for finding the minimum image of
+ * displacement vectors.
+ *
+ * After wrapping a displacement into the box, the minimum image is one of 27
+ * periodic copies of it: the wrapped vector r12 itself, or r12 + L for one
+ * of the 26 lattice vectors L = x*a + y*b + z*c with x, y, z in {-1, 0, 1}.
+ * Rather than computing all of them, minimum_image() only computes the
+ * copies that can be nearer than r12, which are those with
+ * 2*r12.L + |L|^2 < 0. That needs no more than r12.a, r12.b and r12.c.
+ * When r12 is shorter than half of the shortest L (the radius of the
+ * sphere inscribed in the box, for a rectangular box), there are none.
+ */
+struct TriclinicBox {
+    fvec4 box_vec1, box_vec2, box_vec3;
+    float recip_box_size[3];
 
-        fvec4 box_vec1(box_matrix[0], box_matrix[3], box_matrix[6], 0);
-        fvec4 box_vec2(box_matrix[1], box_matrix[4], box_matrix[7], 0);
-        fvec4 box_vec3(box_matrix[2], box_matrix[5], box_matrix[8], 0);
+    // For each of the 26 nonzero lattice vectors L = x*a + y*b + z*c, in
+    // the order of a search through all 27 copies: 2*x, 2*y, 2*z and |L|^2.
+    // r12 itself comes between the first and last 13.
+    float image_coef[26][4];
+    float min_image_len2;
+
+    // Load the periodic box vectors from a (3, 3) box matrix whose columns
+    // are the box vectors, and make sure they're in reduced form.
+    TriclinicBox(const float* box_matrix) :
+            box_vec1(box_matrix[0], box_matrix[3], box_matrix[6], 0),
+            box_vec2(box_matrix[1], box_matrix[4], box_matrix[7], 0),
+            box_vec3(box_matrix[2], box_matrix[5], box_matrix[8], 0) {
         box_vec3 -= box_vec2*roundf(box_vec3[1]/box_vec2[1]);
         box_vec3 -= box_vec1*roundf(box_vec3[0]/box_vec1[0]);
         box_vec2 -= box_vec1*roundf(box_vec2[0]/box_vec1[0]);
-        float recip_box_size[3] = {1.0f/box_vec1[0], 1.0f/box_vec2[1], 1.0f/box_vec3[2]};
-        for (int j = 0; j < n_pairs; j++) {
-            // Compute the displacement.
-
-            int offset1 = 3*pairs[2*j + 0];
-            fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
-            int offset2 = 3*pairs[2*j + 1];
-            fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
-            fvec4 r12 = pos2-pos1;
-            r12 -= box_vec3*round(r12[2]*recip_box_size[2]);
-            r12 -= box_vec2*round(r12[1]*recip_box_size[1]);
-            r12 -= box_vec1*round(r12[0]*recip_box_size[0]);
-
-            // We need to consider 27 possible periodic copies.
-
-            float min_dist2 = FLT_MAX;
-            fvec4 min_r = r12;
-            for (int x = -1; x < 2; x++) {
-                fvec4 ra = r12 + box_vec1*x;
-                for (int y = -1; y < 2; y++) {
-                    fvec4 rb = ra + box_vec2*y;
-                    for (int z = -1; z < 2; z++) {
-                        fvec4 rc = rb + box_vec3*z;
-                        float dist2 = dot3(rc, rc);
-                        if (dist2 <= min_dist2) {
-                            min_dist2 = dist2;
-                            min_r = rc;
-                        }
-                    }
+        recip_box_size[0] = 1.0f/box_vec1[0];
+        recip_box_size[1] = 1.0f/box_vec2[1];
+        recip_box_size[2] = 1.0f/box_vec3[2];
+
+        min_image_len2 = FLT_MAX;
+        int k = 0;
+        for (int x = -1; x < 2; x++)
+            for (int y = -1; y < 2; y++)
+                for (int z = -1; z < 2; z++) {
+                    if (x == 0 && y == 0 && z == 0)
+                        continue;
+                    fvec4 image = box_vec1*x + box_vec2*y + box_vec3*z;
+                    image_coef[k][0] = 2.0f*x;
+                    image_coef[k][1] = 2.0f*y;
+                    image_coef[k][2] = 2.0f*z;
+                    image_coef[k][3] = dot3(image, image);
+                    min_image_len2 = std::min(min_image_len2, image_coef[k][3]);
+                    k++;
                 }
-            }
+    }
 
-            // Store results.
+    // Compute the copy r12 + L for the k'th lattice vector (or r12 itself,
+    // for k = -1) exactly as a search through all 27 copies would, and keep
+    // it if it is the nearest so far.
+    void try_image(fvec4 r12, int k, fvec4& min_r, float& min_dist2) const {
+        float x = (k < 0) ? 0.0f : 0.5f*image_coef[k][0];
+        float y = (k < 0) ? 0.0f : 0.5f*image_coef[k][1];
+        float z = (k < 0) ? 0.0f : 0.5f*image_coef[k][2];
+        fvec4 rc = r12 + box_vec1*x;
+        rc = rc + box_vec2*y;
+        rc = rc + box_vec3*z;
+        float dist2 = dot3(rc, rc);
+        if (dist2 <= min_dist2) {
+            min_dist2 = dist2;
+            min_r = rc;
+        }
+    }
 
-            if (store_displacement) {
-                float temp[4];
-                min_r.store(temp);
-                *displacement_out = temp[0];
-                displacement_out++;
-                *displacement_out = temp[1];
-                displacement_out++;
-                *displacement_out = temp[2];
-                displacement_out++;
-            }
-            if (store_distance) {
-                *distance_out = sqrtf(min_dist2);
-                distance_out++;
-            }
+    // Return the minimum image of the displacement r12, and store its
+    // squared length in min_dist2. The result is the same, bit for bit, as
+    // that of searching through all 27 copies.
+    fvec4 minimum_image(fvec4 r12, float& min_dist2) const {
+        r12 -= box_vec3*round(r12[2]*recip_box_size[2]);
+        r12 -= box_vec2*round(r12[1]*recip_box_size[1]);
+        r12 -= box_vec1*round(r12[0]*recip_box_size[0]);
+
+        float dist2 = dot3(r12, r12);
+        if (4.004f*dist2 < min_image_len2) {
+            min_dist2 = dist2;
+            return r12;
         }
 
-        // Advance to the next frame.
+        // Try the copies that could be nearer, with a margin that is
+        // generous compared to rounding errors so that every copy left out
+        // is clearly farther than r12, and r12 itself. Trying them in the
+        // order of the full search breaks ties the same way.
+
+        float proj1 = dot3(r12, box_vec1);
+        float proj2 = dot3(r12, box_vec2);
+        float proj3 = dot3(r12, box_vec3);
+        float margin = 1e-4f*dist2;
+        min_dist2 = FLT_MAX;
+        fvec4 min_r = r12;
+        for (int k = 0; k < 26; k++) {
+            if (k == 13)
+                try_image(r12, -1, min_r, min_dist2);
+            const float* coef = image_coef[k];
+            if (coef[0]*proj1 + coef[1]*proj2 + coef[2]*proj3 + coef[3] < 1e-4f*coef[3] + margin)
+                try_image(r12, k, min_r, min_dist2);
+        }
+        return min_r;
+    }
+};
 
-        xyz += n_atoms*3;
-        box_matrix += 9;
+/**
+ * Compute the distance/displacement between the pairs of atoms with indices
+ * [pair_begin, pair_end) in a single frame with a triclinic box, under the
+ * minimum image convention. The arguments are the same as for dist_mic_frame().
+ */
+static void dist_mic_triclinic_frame(const float* xyz, const int* pairs, const float* box_matrix,
+                                     float* distance_out, float* displacement_out,
+                                     const int pair_begin, const int pair_end) {
+    TriclinicBox box(box_matrix);
+    for (int j = pair_begin; j < pair_end; j++) {
+        // Compute the displacement.
+
+        int offset1 = 3*pairs[2*j + 0];
+        fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
+        int offset2 = 3*pairs[2*j + 1];
+        fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
+        float min_dist2;
+        fvec4 min_r = box.minimum_image(pos2-pos1, min_dist2);
+
+        // Store results.
+
+        if (displacement_out != NULL) {
+            float temp[4];
+            min_r.store(temp);
+            displacement_out[3*j] = temp[0];
+            displacement_out[3*j+1] = temp[1];
+            displacement_out[3*j+2] = temp[2];
+        }
+        if (distance_out != NULL)
+            distance_out[j] = sqrtf(min_dist2);
     }
 }
 
+#define COMPILE_WITH_TRICLINIC
+#include "anglekernels.h"
+#include "dihedralkernels.h"
+
+void dist_mic_triclinic(const float* xyz, const int* pairs, const float* box_matrix,
+                        float* distance_out, float* displacement_out, const int n_frames,
+                        const int n_atoms, const int n_pairs) {
+    for_each_frame(n_frames, n_pairs, [&](int i, int begin, int end) {
+        dist_mic_triclinic_frame(xyz + (size_t) 3*i*n_atoms, pairs, box_matrix + (size_t) 9*i,
+                                 (distance_out == NULL) ? NULL : distance_out + (size_t) i*n_pairs,
+                                 (displacement_out == NULL) ? NULL : displacement_out + (size_t) 3*i*n_pairs,
+                                 begin, end);
+    });
+}
+
 void dist_mic_triclinic_t(const float* xyz, const int* pairs, const int* times,
                         const float* box_matrix, float* distance_out,
                         float* displacement_out, const int n_frames,
                         const int n_atoms, const int n_pairs) {
-    bool store_displacement = (displacement_out != NULL);
-    bool store_distance = (distance_out != NULL);
-    for (int i = 0; i < n_frames; i++) {
-        // Load the periodic box vectors and make sure they're in reduced form.
-        // Get box from frame of first index of time pair
-        int box_offset = times[2*i + 0] * 9;
-        box_matrix += box_offset;
-
-        fvec4 box_vec1(box_matrix[0], box_matrix[3], box_matrix[6], 0);
-        fvec4 box_vec2(box_matrix[1], box_matrix[4], box_matrix[7], 0);
-        fvec4 box_vec3(box_matrix[2], box_matrix[5], box_matrix[8], 0);
-        box_vec3 -= box_vec2*roundf(box_vec3[1]/box_vec2[1]);
-        box_vec3 -= box_vec1*roundf(box_vec3[0]/box_vec1[0]);
-        box_vec2 -= box_vec1*roundf(box_vec2[0]/box_vec1[0]);
-        float recip_box_size[3] = {1.0f/box_vec1[0], 1.0f/box_vec2[1], 1.0f/box_vec3[2]};
-        for (int j = 0; j < n_pairs; j++) {
+    // Each time pair is processed like a frame with the positions of the
+    // first atoms taken from one frame and those of the second from another,
+    // and the box of the first.
+    for_each_frame(n_frames, n_pairs, [&](int i, int begin, int end) {
+        const float* xyz1 = xyz + (size_t) 3*n_atoms*times[2*i + 0];
+        const float* xyz2 = xyz + (size_t) 3*n_atoms*times[2*i + 1];
+        TriclinicBox box(box_matrix + (size_t) 9*times[2*i + 0]);
+        for (int j = begin; j < end; j++) {
             // Compute the displacement.
 
-            int time_offset1 = 3*n_atoms*times[2*i + 0];
-            int time_offset2 = 3*n_atoms*times[2*i + 1];
-            int pair_offset1 = 3*pairs[2*j + 0];
-            int pair_offset2 = 3*pairs[2*j + 1];
-            int offset1 = time_offset1 + pair_offset1;
-            int offset2 = time_offset2 + pair_offset2;
-            fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
-            fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
-            fvec4 r12 = pos2-pos1;
-            r12 -= box_vec3*round(r12[2]*recip_box_size[2]);
-            r12 -= box_vec2*round(r12[1]*recip_box_size[1]);
-            r12 -= box_vec1*round(r12[0]*recip_box_size[0]);
-
-            // We need to consider 27 possible periodic copies.
-
-            float min_dist2 = FLT_MAX;
-            fvec4 min_r = r12;
-            for (int x = -1; x < 2; x++) {
-                fvec4 ra = r12 + box_vec1*x;
-                for (int y = -1; y < 2; y++) {
-                    fvec4 rb = ra + box_vec2*y;
-                    for (int z = -1; z < 2; z++) {
-                        fvec4 rc = rb + box_vec3*z;
-                        float dist2 = dot3(rc, rc);
-                        if (dist2 <= min_dist2) {
-                            min_dist2 = dist2;
-                            min_r = rc;
-                        }
-                    }
-                }
-            }
+            int offset1 = 3*pairs[2*j + 0];
+            int offset2 = 3*pairs[2*j + 1];
+            fvec4 pos1(xyz1[offset1], xyz1[offset1+1], xyz1[offset1+2], 0);
+            fvec4 pos2(xyz2[offset2], xyz2[offset2+1], xyz2[offset2+2], 0);
+            float min_dist2;
+            fvec4 min_r = box.minimum_image(pos2-pos1, min_dist2);
 
             // Store results.
 
-            if (store_displacement) {
+            size_t k = (size_t) i*n_pairs + j;
+            if (displacement_out != NULL) {
                 float temp[4];
                 min_r.store(temp);
-                *displacement_out = temp[0];
-                displacement_out++;
-                *displacement_out = temp[1];
-                displacement_out++;
-                *displacement_out = temp[2];
-                displacement_out++;
-            }
-            if (store_distance) {
-                *distance_out = sqrtf(min_dist2);
-                distance_out++;
+                displacement_out[3*k] = temp[0];
+                displacement_out[3*k+1] = temp[1];
+                displacement_out[3*k+2] = temp[2];
             }
+            if (distance_out != NULL)
+                distance_out[k] = sqrtf(min_dist2);
         }
-        // Reset box offset
-        box_matrix -= box_offset;
+    });
+}
+
+/**
+ * Compute the condensed distances [begin, end) between all pairs of n atoms
+ * in a single frame, where pos holds the positions of the atoms padded to 4
+ * floats each, and distance(r12) is the distance for the displacement r12.
+ */
+template <class Distance>
+static void dist_matrix_frame(const float* pos, const long long n, float* out,
+                              const long long begin, const long long end,
+                              const Distance& distance) {
+    // Find the row and column of the first pair: row i starts at
+    // i*n - i*(i+1)/2.
+
+    long long i = (long long) (n - 0.5 - sqrt((n - 0.5)*(n - 0.5) - 2.0*begin));
+    i = std::max(0LL, std::min(i, n-2));
+    while (i > 0 && i*n - i*(i+1)/2 > begin)
+        i--;
+    while ((i+1)*n - (i+1)*(i+2)/2 <= begin)
+        i++;
+    long long j = i + 1 + begin - (i*n - i*(i+1)/2);
+
+    for (long long k = begin; k < end; i++, j = i+1) {
+        fvec4 pos1(pos + 4*i);
+        long long row_end = std::min(end, k + n - j);
+        for (; k < row_end; k++, j++)
+            out[k] = distance(fvec4(pos + 4*j) - pos1);
     }
 }
 
+/**
+ * Compute the distances between all pairs of the atoms in `indices` in every
+ * frame, in condensed form: for each frame, the distances from atom 0 to
+ * atoms 1, 2, ..., n-1, then from atom 1 to atoms 2, ..., n-1, and so on.
+ *
+ * Parameters
+ * ----------
+ * xyz : array, shape=(n_frames, n_atoms, 3)
+ *     Cartesian coordinates of the atoms in every frame, in contiguous C order.
+ * indices : array, shape=(n_indices,)
+ *     The atoms whose distances you want to compute.
+ * box_matrix : array, shape=(n_frames, 3, 3), optional
+ *     The box matrix for a each frame in the trajectory, in contiguous C
+ *     order. If NULL, distances are computed without periodic boundary
+ *     conditions.
+ * triclinic : int
+ *     Whether the boxes are triclinic, rather than rectangular.
+ * out : array, shape=(n_frames, n_indices*(n_indices-1)/2)
+ *     Array where the distances will be stored, in contiguous C order.
+ *
+ * The distances are the same, bit for bit, as those that dist(), dist_mic()
+ * and dist_mic_triclinic() compute for the same pairs.
+ */
+void dist_matrix(const float* xyz, const int* indices, const float* box_matrix,
+                 const int triclinic, float* out, const int n_frames,
+                 const int n_atoms, const int n_indices) {
+    const long long n = n_indices;
+    const long long n_pairs = n*(n-1)/2;
+    for_each_frame(n_frames, n_pairs, [&](int frame, long long begin, long long end) {
+        if (begin >= end)
+            return;
+
+        // Gather the positions of the selected atoms into a compact, padded
+        // buffer, so that the rows stream through it.
+
+        const float* frame_xyz = xyz + (size_t) 3*frame*n_atoms;
+        vector<float> pos(4*n);
+        for (long long i = 0; i < n; i++) {
+            const float* atom = frame_xyz + (size_t) 3*indices[i];
+            pos[4*i] = atom[0];
+            pos[4*i+1] = atom[1];
+            pos[4*i+2] = atom[2];
+            pos[4*i+3] = 0;
+        }
+
+        float* frame_out = out + (size_t) frame*n_pairs;
+        if (box_matrix == NULL) {
+            dist_matrix_frame(&pos[0], n, frame_out, begin, end, [](fvec4 r12) {
+                return sqrtf(dot3(r12, r12));
+            });
+        }
+        else if (!triclinic) {
+            const float* frame_box = box_matrix + (size_t) 9*frame;
+            fvec4 box_size(frame_box[0], frame_box[4], frame_box[8], 0);
+            fvec4 inv_box_size(1.0f/frame_box[0], 1.0f/frame_box[4], 1.0f/frame_box[8], 0);
+            dist_matrix_frame(&pos[0], n, frame_out, begin, end, [&](fvec4 r12) {
+                r12 -= round(r12*inv_box_size)*box_size;
+                return sqrtf(dot3(r12, r12));
+            });
+        }
+        else {
+            TriclinicBox box(box_matrix + (size_t) 9*frame);
+            dist_matrix_frame(&pos[0], n, frame_out, begin, end, [&](fvec4 r12) {
+                float min_dist2;
+                box.minimum_image(r12, min_dist2);
+                return sqrtf(min_dist2);
+            });
+        }
+    });
+}
+
 /**
  * Identify the closest contact between two groups of atoms.
  */
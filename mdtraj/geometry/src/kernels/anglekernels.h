@@ -37,23 +37,27 @@ void angle(const float* xyz, const int* triplets, float* out,
            const int n_frames, const int n_atoms, const int n_angles)
 #endif
 {
-    std::vector<float> distances(2*n_frames);
-    std::vector<float> displacements(6*n_frames);
-    for (int i = 0; i < n_angles; i++) {
-        int pairs[4] = {triplets[3*i+1], triplets[3*i], triplets[3*i+1], triplets[3*i+2]};
+    for_each_frame(n_frames, n_angles, [&](int j, int begin, int end) {
+        const float* frame_xyz = xyz + (size_t) 3*j*n_atoms;
+#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
+        const float* frame_box = box_matrix + (size_t) 9*j;
+#endif
+        for (int i = begin; i < end; i++) {
+            int pairs[4] = {triplets[3*i+1], triplets[3*i], triplets[3*i+1], triplets[3*i+2]};
+            float distances[2];
+            float displacements[6];
 #ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
 #ifdef COMPILE_WITH_TRICLINIC
-        dist_mic_triclinic(xyz, pairs, box_matrix, &distances[0], &displacements[0], n_frames, n_atoms, 2);
+            dist_mic_triclinic_frame(frame_xyz, pairs, frame_box, distances, displacements, 0, 2);
 #else
-        dist_mic(xyz, pairs, box_matrix, &distances[0], &displacements[0], n_frames, n_atoms, 2);
+            dist_mic_frame(frame_xyz, pairs, frame_box, distances, displacements, 0, 2);
 #endif
 #else
-        dist(xyz, pairs, &distances[0], &displacements[0], n_frames, n_atoms, 2);
+            dist_frame(frame_xyz, pairs, distances, displacements, 0, 2);
 #endif
-        for (int j = 0; j < n_frames; j++) {
-            fvec4 v1(displacements[6*j], displacements[6*j+1], displacements[6*j+2], 0);
-            fvec4 v2(displacements[6*j+3], displacements[6*j+4], displacements[6*j+5], 0);
-            float cosine = (float) dot3(v1, v2)/(distances[2*j]*distances[2*j+1]);
+            fvec4 v1(displacements[0], displacements[1], displacements[2], 0);
+            fvec4 v2(displacements[3], displacements[4], displacements[5], 0);
+            float cosine = (float) dot3(v1, v2)/(distances[0]*distances[1]);
             if (cosine < -1.0f) {
                 cosine = -1.0f;
             }
@@ -61,7 +65,7 @@ void angle(const float* xyz, const int* triplets, float* out,
                cosine = 1.0f;
             }
             float angle = (float) acos(cosine);
-            out[n_angles*j + i] = angle;
+            out[(size_t) n_angles*j + i] = angle;
         }
-    }
+    });
 }
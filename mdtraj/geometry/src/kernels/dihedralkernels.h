@@ -38,28 +38,32 @@ void dihedral(const float* xyz, const int* quartets, float* out,
               const int n_frames, const int n_atoms, const int n_quartets)
 #endif
 {
-    std::vector<float> distances(3*n_frames);
-    std::vector<float> displacements(9*n_frames);
-    for (int i = 0; i < n_quartets; i++) {
-        int pairs[6] = {quartets[4*i], quartets[4*i+1], quartets[4*i+1], quartets[4*i+2], quartets[4*i+2], quartets[4*i+3]};
+    for_each_frame(n_frames, n_quartets, [&](int j, int begin, int end) {
+        const float* frame_xyz = xyz + (size_t) 3*j*n_atoms;
+#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
+        const float* frame_box = box_matrix + (size_t) 9*j;
+#endif
+        for (int i = begin; i < end; i++) {
+            int pairs[6] = {quartets[4*i], quartets[4*i+1], quartets[4*i+1], quartets[4*i+2], quartets[4*i+2], quartets[4*i+3]};
+            float distances[3];
+            float displacements[9];
 #ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
 #ifdef COMPILE_WITH_TRICLINIC
-        dist_mic_triclinic(xyz, pairs, box_matrix, &distances[0], &displacements[0], n_frames, n_atoms, 3);
+            dist_mic_triclinic_frame(frame_xyz, pairs, frame_box, distances, displacements, 0, 3);
 #else
-        dist_mic(xyz, pairs, box_matrix, &distances[0], &displacements[0], n_frames, n_atoms, 3);
+            dist_mic_frame(frame_xyz, pairs, frame_box, distances, displacements, 0, 3);
 #endif
 #else
-        dist(xyz, pairs, &distances[0], &displacements[0], n_frames, n_atoms, 3);
+            dist_frame(frame_xyz, pairs, distances, displacements, 0, 3);
 #endif
-        for (int j = 0; j < n_frames; j++) {
-            fvec4 v1(displacements[9*j], displacements[9*j+1], displacements[9*j+2], 0);
-            fvec4 v2(displacements[9*j+3], displacements[9*j+4], displacements[9*j+5], 0);
-            fvec4 v3(displacements[9*j+6], displacements[9*j+7], displacements[9*j+8], 0);
+            fvec4 v1(displacements[0], displacements[1], displacements[2], 0);
+            fvec4 v2(displacements[3], displacements[4], displacements[5], 0);
+            fvec4 v3(displacements[6], displacements[7], displacements[8], 0);
             fvec4 c1 = cross(v2, v3);
             fvec4 c2 = cross(v1, v2);
-            float p1 = dot3(v1, c1)*distances[3*j+1];
+            float p1 = dot3(v1, c1)*distances[1];
             float p2 = dot3(c1, c2);
-            out[n_quartets*j + i] = atan2f(p1, p2);
+            out[(size_t) n_quartets*j + i] = atan2f(p1, p2);
         }
-    }
+    });
 }
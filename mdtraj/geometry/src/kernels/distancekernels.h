@@ -1,3 +1,68 @@
+/**
+ * Compute the distance/displacement between the pairs of atoms with indices
+ * [pair_begin, pair_end) in a single frame.
+ *
+ * Two versions of this function can be compiled, one of which takes an extra
+ * `box_matrix` argument that uses the minimum image convention and periodic
+ * boundary conditions.
+ *
+ * Parameters
+ * ----------
+ * xyz : array, shape=(n_atoms, 3)
+ *     Cartesian coordinates of the atoms in the frame, in contiguous C order.
+ * pairs : array, shape=(n_pairs, 2)
+ *     The specific pairs of atoms whose distance you want to compute. A 2d
+ *     array of pairs, in C order.
+ * box_matrix : array, shape=(3, 3)
+ *     The box matrix of the frame, in contiguous C order.
+ * distance_out : array, shape=(n_pairs,), optional
+ *     Array where the distances between pairs will be stored. If NULL is
+ *     passed in, this return value will not be saved
+ * displacement_out : array, shape=(n_pairs, 3), optional
+ *     Array where the displacement vectors between pairs will be stored.
+ *     If NULL is passed in, this return value will not be saved
+ */
+#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
+static void dist_mic_frame(const float* xyz, const int* pairs, const float* box_matrix,
+                           float* distance_out, float* displacement_out,
+                           const int pair_begin, const int pair_end)
+#else
+static void dist_frame(const float* xyz, const int* pairs,
+                       float* distance_out, float* displacement_out,
+                       const int pair_begin, const int pair_end)
+#endif
+{
+    // Load the periodic box vectors.
+
+#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
+    fvec4 box_size(box_matrix[0], box_matrix[4], box_matrix[8], 0);
+    fvec4 inv_box_size(1.0f/box_matrix[0], 1.0f/box_matrix[4], 1.0f/box_matrix[8], 0);
+#endif
+    for (int j = pair_begin; j < pair_end; j++) {
+        // Compute the displacement.
+        int offset1 = 3*pairs[2*j + 0];
+        fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
+        int offset2 = 3*pairs[2*j + 1];
+        fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
+        fvec4 r12 = pos2-pos1;
+#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
+        r12 -= round(r12*inv_box_size)*box_size;
+#endif
+
+        // Store results.
+
+        if (displacement_out != NULL) {
+            float temp[4];
+            r12.store(temp);
+            displacement_out[3*j] = temp[0];
+            displacement_out[3*j+1] = temp[1];
+            displacement_out[3*j+2] = temp[2];
+        }
+        if (distance_out != NULL)
+            distance_out[j] = sqrtf(dot3(r12, r12));
+    }
+}
+
 /**
  * Compute the distance/displacement  between pairs of atoms in every frame
  * of xyz.
@@ -39,51 +104,17 @@ void dist(const float* xyz, const int* pairs, float* distance_out,
          const int n_pairs)
 #endif
 {
-    bool store_displacement = (displacement_out != NULL);
-    bool store_distance = (distance_out != NULL);
-    for (int i = 0; i < n_frames; i++) {
-        // Load the periodic box vectors.
-
-#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
-        fvec4 box_size(box_matrix[0], box_matrix[4], box_matrix[8], 0);
-        fvec4 inv_box_size(1.0f/box_matrix[0], 1.0f/box_matrix[4], 1.0f/box_matrix[8], 0);
-#endif
-        for (int j = 0; j < n_pairs; j++) {
-            // Compute the displacement.
-            int offset1 = 3*pairs[2*j + 0];
-            fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
-            int offset2 = 3*pairs[2*j + 1];
-            fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
-            fvec4 r12 = pos2-pos1;
-#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
-            r12 -= round(r12*inv_box_size)*box_size;
-#endif
-
-            // Store results.
-
-            if (store_displacement) {
-                float temp[4];
-                r12.store(temp);
-                *displacement_out = temp[0];
-                displacement_out++;
-                *displacement_out = temp[1];
-                displacement_out++;
-                *displacement_out = temp[2];
-                displacement_out++;
-            }
-            if (store_distance) {
-                *distance_out = sqrtf(dot3(r12, r12));
-                distance_out++;
-            }
-        }
-
-        // Advance to the next frame.
-
-        xyz += n_atoms*3;
+    for_each_frame(n_frames, n_pairs, [&](int i, int begin, int end) {
+        float* frame_distance_out = (distance_out == NULL) ? NULL : distance_out + (size_t) i*n_pairs;
+        float* frame_displacement_out = (displacement_out == NULL) ? NULL : displacement_out + (size_t) 3*i*n_pairs;
 #ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
-        box_matrix += 9;
+        dist_mic_frame(xyz + (size_t) 3*i*n_atoms, pairs, box_matrix + (size_t) 9*i,
+                       frame_distance_out, frame_displacement_out, begin, end);
+#else
+        dist_frame(xyz + (size_t) 3*i*n_atoms, pairs,
+                   frame_distance_out, frame_displacement_out, begin, end);
 #endif
-    }
+    });
 }
 
 /**
@@ -133,25 +164,18 @@ void dist_t(const float* xyz, const int* pairs, const int* times,
             const int n_atoms, const int n_pairs)
 #endif
 {
-    bool store_displacement = (displacement_out != NULL);
-    bool store_distance = (distance_out != NULL);
-    for (int i = 0; i < n_times; i++) {
+    for_each_frame(n_times, n_pairs, [&](int i, int begin, int end) {
 #ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
         // Based on first index of time pair
-        int box_offset = times[2*i + 0] * 9;
-        box_matrix += box_offset;
-        fvec4 box_size(box_matrix[0], box_matrix[4], box_matrix[8], 0);
-        fvec4 inv_box_size(1.0f/box_matrix[0], 1.0f/box_matrix[4], 1.0f/box_matrix[8], 0);
+        const float* frame_box = box_matrix + (size_t) times[2*i + 0] * 9;
+        fvec4 box_size(frame_box[0], frame_box[4], frame_box[8], 0);
+        fvec4 inv_box_size(1.0f/frame_box[0], 1.0f/frame_box[4], 1.0f/frame_box[8], 0);
 #endif
 
-        for (int j = 0; j < n_pairs; j++) {
+        for (int j = begin; j < end; j++) {
             // Find where in xyz to find the appropriate coordinates
-            int time_offset1 = times[2*i + 0] * n_atoms * 3;
-            int time_offset2 = times[2*i + 1] * n_atoms * 3;
-            int pair_offset1 = pairs[2*j + 0] * 3;
-            int pair_offset2 = pairs[2*j + 1] * 3;
-            int offset1 = time_offset1 + pair_offset1;
-            int offset2 = time_offset2 + pair_offset2;
+            size_t offset1 = (size_t) times[2*i + 0] * n_atoms * 3 + pairs[2*j + 0] * 3;
+            size_t offset2 = (size_t) times[2*i + 1] * n_atoms * 3 + pairs[2*j + 1] * 3;
             fvec4 pos1(xyz[offset1], xyz[offset1+1], xyz[offset1+2], 0);
             fvec4 pos2(xyz[offset2], xyz[offset2+1], xyz[offset2+2], 0);
             fvec4 r12 = pos2-pos1;
@@ -161,24 +185,16 @@ void dist_t(const float* xyz, const int* pairs, const int* times,
 
             // Store results.
 
-            if (store_displacement) {
+            size_t k = (size_t) i*n_pairs + j;
+            if (displacement_out != NULL) {
                 float temp[4];
                 r12.store(temp);
-                *displacement_out = temp[0];
-                displacement_out++;
-                *displacement_out = temp[1];
-                displacement_out++;
-                *displacement_out = temp[2];
-                displacement_out++;
-            }
-            if (store_distance) {
-                *distance_out = sqrtf(dot3(r12, r12));
-                distance_out++;
+                displacement_out[3*k] = temp[0];
+                displacement_out[3*k+1] = temp[1];
+                displacement_out[3*k+2] = temp[2];
             }
+            if (distance_out != NULL)
+                distance_out[k] = sqrtf(dot3(r12, r12));
         }
-// Reset box_matrix
-#ifdef COMPILE_WITH_PERIODIC_BOUNDARY_CONDITIONS
-        box_matrix -= box_offset;
-#endif
-    }
+    });
 }
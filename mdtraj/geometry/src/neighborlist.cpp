@@ -146,8 +146,10 @@ public:
         return VoxelIndex(y, z);
     }
 
-    void getNeighbors(vector<int>& neighbors, int atomIndex, float maxDistance, const float* atomLocations, VoxelIndex atomVoxelIndex) const {
+    void getNeighbors(vector<int>& neighbors, vector<float>* distances2, int atomIndex, float maxDistance, const float* atomLocations, VoxelIndex atomVoxelIndex) const {
         neighbors.resize(0);
+        if (distances2 != NULL)
+            distances2->resize(0);
         fvec4 boxSize(periodicBoxSize[0], periodicBoxSize[1], periodicBoxSize[2], 0);
         fvec4 invBoxSize(recipBoxSize[0], recipBoxSize[1], recipBoxSize[2], 0);
         fvec4 periodicBoxVec4[3];
@@ -320,6 +322,8 @@ public:
                         // Add this atom to the list of neighbors.
 
                         neighbors.push_back(index);
+                        if (distances2 != NULL)
+                            distances2->push_back(dSquared);
                     }
                 }
             }
@@ -337,7 +341,12 @@ private:
     vector<vector<vector<pair<float, int> > > > bins;
 };
 
-vector<vector<int> > _compute_neighborlist(const float* atomLocations, int numAtoms, float maxDistance, const float* boxVectors) {
+/**
+ * Find the neighbors of every atom with a lower index than itself, along with their squared distances if
+ * distances2 is not NULL. The atoms are processed in parallel unless this is called from a parallel region.
+ */
+static void computeLowerNeighbors(const float* atomLocations, int numAtoms, float maxDistance, const float* boxVectors,
+                                  vector<vector<int> >& neighbors, vector<vector<float> >* distances2) {
     float periodicBoxVectors[3][3];
     bool usePeriodic = (boxVectors != NULL);
     if (usePeriodic) {
@@ -381,10 +390,17 @@ vector<vector<int> > _compute_neighborlist(const float* atomLocations, int numAt
 
     // Compute neighbors.
 
-    vector<vector<int> > neighbors(numAtoms);
+    neighbors.resize(numAtoms);
+    if (distances2 != NULL)
+        distances2->resize(numAtoms);
 #pragma omp parallel for default(shared)
     for (int i = 0; i < numAtoms; i++)
-        voxels.getNeighbors(neighbors[i], i, maxDistance, atomLocations, voxels.getVoxelIndex(&atomLocations[3*i]));
+        voxels.getNeighbors(neighbors[i], (distances2 == NULL ? NULL : &(*distances2)[i]), i, maxDistance, atomLocations, voxels.getVoxelIndex(&atomLocations[3*i]));
+}
+
+vector<vector<int> > _compute_neighborlist(const float* atomLocations, int numAtoms, float maxDistance, const float* boxVectors) {
+    vector<vector<int> > neighbors;
+    computeLowerNeighbors(atomLocations, numAtoms, maxDistance, boxVectors, neighbors, NULL);
 
     // Add in the symmetric entries.
 
@@ -393,3 +409,78 @@ vector<vector<int> > _compute_neighborlist(const float* atomLocations, int numAt
             neighbors[neighbors[i][j]].push_back(i);
     return neighbors;
 }
+
+void _compute_neighborlist_csr(const float* xyz, int numFrames, int numAtoms, float maxDistance, const float* boxVectors,
+                               bool half, bool withDistances, vector<vector<long long> >& indptr,
+                               vector<vector<int> >& indices, vector<vector<float> >& distances) {
+    indptr.assign(numFrames, vector<long long>());
+    indices.assign(numFrames, vector<int>());
+    distances.assign(numFrames, vector<float>());
+
+    // Frames are processed in parallel. With a single frame, the atoms are instead.
+
+#pragma omp parallel for schedule(dynamic) if(numFrames > 1)
+    for (int frame = 0; frame < numFrames; frame++) {
+        const float* atomLocations = &xyz[(size_t) 3*numAtoms*frame];
+        vector<vector<int> > lower;
+        vector<vector<float> > lowerDistances2;
+        computeLowerNeighbors(atomLocations, numAtoms, maxDistance, (boxVectors == NULL ? NULL : &boxVectors[9*frame]),
+                              lower, (withDistances ? &lowerDistances2 : NULL));
+
+        // Sort each atom's lower neighbors, so every row of the CSR structure comes out in increasing order.
+
+        for (int i = 0; i < numAtoms; i++) {
+            if (withDistances) {
+                vector<pair<int, float> > row(lower[i].size());
+                for (int j = 0; j < (int) lower[i].size(); j++)
+                    row[j] = make_pair(lower[i][j], lowerDistances2[i][j]);
+                sort(row.begin(), row.end());
+                for (int j = 0; j < (int) row.size(); j++) {
+                    lower[i][j] = row[j].first;
+                    lowerDistances2[i][j] = row[j].second;
+                }
+            }
+            else
+                sort(lower[i].begin(), lower[i].end());
+        }
+
+        // Count the entries of each row: the lower neighbors (unless this is a half list) and the atoms that
+        // have this one as a lower neighbor.
+
+        vector<long long>& rowStart = indptr[frame];
+        rowStart.assign(numAtoms+1, 0);
+        for (int i = 0; i < numAtoms; i++) {
+            if (!half)
+                rowStart[i+1] += lower[i].size();
+            for (int j = 0; j < (int) lower[i].size(); j++)
+                rowStart[lower[i][j]+1]++;
+        }
+        for (int i = 0; i < numAtoms; i++)
+            rowStart[i+1] += rowStart[i];
+
+        // Fill in the rows. Within a row, the lower neighbors come first, then the higher ones, which are
+        // visited in increasing order.
+
+        vector<int>& frameIndices = indices[frame];
+        vector<float>& frameDistances = distances[frame];
+        frameIndices.resize(rowStart[numAtoms]);
+        if (withDistances)
+            frameDistances.resize(rowStart[numAtoms]);
+        vector<long long> fill(rowStart.begin(), rowStart.end()-1);
+        if (!half) {
+            for (int i = 0; i < numAtoms; i++)
+                for (int j = 0; j < (int) lower[i].size(); j++) {
+                    if (withDistances)
+                        frameDistances[fill[i]] = sqrtf(lowerDistances2[i][j]);
+                    frameIndices[fill[i]++] = lower[i][j];
+                }
+        }
+        for (int i = 0; i < numAtoms; i++)
+            for (int j = 0; j < (int) lower[i].size(); j++) {
+                int k = lower[i][j];
+                if (withDistances)
+                    frameDistances[fill[k]] = sqrtf(lowerDistances2[i][j]);
+                frameIndices[fill[k]++] = i;
+            }
+    }
+}
@@ -1,3 +1,4 @@
+#include <algorithm>
 #include <cmath>
 #include <vector>
 #include "msvccompat.h"
@@ -5,62 +6,326 @@
 #include "neighbors.hpp"
 #include "math_patch.h"
 
-std::vector<int> _compute_neighbors(
-    float* frame_xyz, int n_atoms, float cutoff,
-    const std::vector<int>& query_indices,
-    const std::vector<int>& haystack_indices,
-    float* box_matrix)
-{
-    float cutoff2 = cutoff*cutoff;
-    bool periodic = (box_matrix != NULL);
-    bool triclinic = periodic && (box_matrix[1] != 0 || box_matrix[2] != 0 ||
-            box_matrix[3] != 0 || box_matrix[5] != 0 || box_matrix[6] != 0 || box_matrix[7] != 0);
-    float recip_box_size[3] = {0.0f, 0.0f, 0.0f};
-    fvec4 box_size, inv_box_size, box_vec1, box_vec2, box_vec3;
-    if (periodic) {
-        recip_box_size[0] = 1.0f/box_matrix[0];
-        recip_box_size[1] = 1.0f/box_matrix[4];
-        recip_box_size[2] = 1.0f/box_matrix[8];
-        box_size = fvec4(box_matrix[0], box_matrix[4], box_matrix[8], 0);
-        inv_box_size = fvec4(recip_box_size[0], recip_box_size[1], recip_box_size[2], 0);
-        box_vec1 = fvec4(box_matrix[0], box_matrix[1], box_matrix[2], 0);
-        box_vec2 = fvec4(box_matrix[3], box_matrix[4], box_matrix[5], 0);
-        box_vec3 = fvec4(box_matrix[6], box_matrix[7], box_matrix[8], 0);
-        box_vec3 -= box_vec2*roundf(box_vec3[1]/box_vec2[1]);
-        box_vec3 -= box_vec1*roundf(box_vec3[0]/box_vec1[0]);
-        box_vec2 -= box_vec1*roundf(box_vec2[0]/box_vec1[0]);
+namespace {
+
+/**
+ * The minimum image displacement between two atoms in one frame. Both
+ * search strategies below measure every candidate pair with this, so
+ * they agree exactly on which pairs fall inside the cutoff.
+ */
+class MinimumImage {
+public:
+    MinimumImage(const float* box_matrix) {
+        periodic = (box_matrix != NULL);
+        triclinic = periodic && (box_matrix[1] != 0 || box_matrix[2] != 0 ||
+                box_matrix[3] != 0 || box_matrix[5] != 0 || box_matrix[6] != 0 || box_matrix[7] != 0);
+        recip_box_size[0] = recip_box_size[1] = recip_box_size[2] = 0.0f;
+        if (periodic) {
+            recip_box_size[0] = 1.0f/box_matrix[0];
+            recip_box_size[1] = 1.0f/box_matrix[4];
+            recip_box_size[2] = 1.0f/box_matrix[8];
+            box_size = fvec4(box_matrix[0], box_matrix[4], box_matrix[8], 0);
+            inv_box_size = fvec4(recip_box_size[0], recip_box_size[1], recip_box_size[2], 0);
+            box_vec1 = fvec4(box_matrix[0], box_matrix[1], box_matrix[2], 0);
+            box_vec2 = fvec4(box_matrix[3], box_matrix[4], box_matrix[5], 0);
+            box_vec3 = fvec4(box_matrix[6], box_matrix[7], box_matrix[8], 0);
+            box_vec3 -= box_vec2*roundf(box_vec3[1]/box_vec2[1]);
+            box_vec3 -= box_vec1*roundf(box_vec3[0]/box_vec1[0]);
+            box_vec2 -= box_vec1*roundf(box_vec2[0]/box_vec1[0]);
+        }
     }
-    std::vector<int> result;
-    std::vector<int>::const_iterator hit;
-    for (hit = haystack_indices.begin(); hit != haystack_indices.end(); ++hit) {
-        // Is this haystack atom within cutoff of _any_ query atom?
 
-        int i = *hit;
+    float distance2(const float* frame_xyz, int i, int j) const {
         fvec4 pos1(frame_xyz[3*i], frame_xyz[3*i+1], frame_xyz[3*i+2], 0);
-        std::vector<int>::const_iterator qit;
-        for (qit = query_indices.begin(); qit != query_indices.end(); ++qit) {
-            // Compute distance from haystack atom *hit to query atom *qit
+        fvec4 pos2(frame_xyz[3*j], frame_xyz[3*j+1], frame_xyz[3*j+2], 0);
+        fvec4 delta = pos1-pos2;
+        if (triclinic) {
+            delta -= box_vec3*roundf(delta[2]*recip_box_size[2]);
+            delta -= box_vec2*roundf(delta[1]*recip_box_size[1]);
+            delta -= box_vec1*roundf(delta[0]*recip_box_size[0]);
+        }
+        else if (periodic)
+            delta -= round(delta*inv_box_size)*box_size;
+        return dot3(delta, delta);
+    }
+
+private:
+    bool periodic, triclinic;
+    float recip_box_size[3];
+    fvec4 box_size, inv_box_size, box_vec1, box_vec2, box_vec3;
+};
+
+/**
+ * The query atoms of one frame, binned into a grid of cells at least
+ * `reach` wide, so that every atom within `reach` of a point lies in the
+ * point's cell or one of its immediate neighbors.
+ *
+ * Periodic boxes (orthorhombic or triclinic) are gridded in fractional
+ * coordinates, with each axis divided into as many cells as fit across
+ * the perpendicular width of the box. Without a box, the grid covers the
+ * bounding box of the query atoms.
+ */
+class CellGrid {
+public:
+    /**
+     * Bin the atoms. Returns false if the box is degenerate, in which
+     * case the grid can't be used.
+     */
+    bool build(const float* frame_xyz, float reach, const int* atoms, int n_atoms, const float* box_matrix) {
+        periodic = (box_matrix != NULL);
+        // limit the grid to a few cells per atom, however small the cutoff
+        long max_cells = 2*(long) n_atoms + 27;
+        std::vector<int> atom_cell(n_atoms, -1);
+
+        if (periodic) {
+            double m[3][3];
+            for (int i = 0; i < 3; i++)
+                for (int j = 0; j < 3; j++)
+                    m[i][j] = box_matrix[3*i+j];
+            double det = m[0][0]*(m[1][1]*m[2][2]-m[1][2]*m[2][1])
+                       - m[0][1]*(m[1][0]*m[2][2]-m[1][2]*m[2][0])
+                       + m[0][2]*(m[1][0]*m[2][1]-m[1][1]*m[2][0]);
+            if (!(std::fabs(det) > 0) || !std::isfinite(det))
+                return false;
+            // inverse[k] maps a position onto fractional coordinate k
+            for (int k = 0; k < 3; k++) {
+                int k1 = (k+1)%3, k2 = (k+2)%3;
+                inverse[k][0] = (m[k1][1]*m[k2][2]-m[k1][2]*m[k2][1])/det;
+                inverse[k][1] = (m[k1][2]*m[k2][0]-m[k1][0]*m[k2][2])/det;
+                inverse[k][2] = (m[k1][0]*m[k2][1]-m[k1][1]*m[k2][0])/det;
+                // the planes of constant fractional coordinate k are
+                // 1/|inverse[k]| apart
+                double norm = std::sqrt(inverse[k][0]*inverse[k][0] + inverse[k][1]*inverse[k][1] + inverse[k][2]*inverse[k][2]);
+                double cells = std::floor(1.0/(norm*reach));
+                n[k] = (cells >= 1.0 ? (int) std::min(cells, 1024.0) : 1);
+            }
+            while ((long) n[0]*n[1]*n[2] > max_cells) {
+                int k = (int) (std::max_element(n, n+3)-n);
+                n[k] = std::max(1, n[k]/2);
+            }
+        }
+        else {
+            double lo[3] = {HUGE_VAL, HUGE_VAL, HUGE_VAL};
+            double hi[3] = {-HUGE_VAL, -HUGE_VAL, -HUGE_VAL};
+            for (int a = 0; a < n_atoms; a++) {
+                const float* pos = &frame_xyz[3*atoms[a]];
+                if (!(std::isfinite(pos[0]) && std::isfinite(pos[1]) && std::isfinite(pos[2])))
+                    continue;
+                for (int k = 0; k < 3; k++) {
+                    lo[k] = std::min(lo[k], (double) pos[k]);
+                    hi[k] = std::max(hi[k], (double) pos[k]);
+                }
+            }
+            double edge = reach;
+            for (int k = 0; k < 3; k++) {
+                if (!(hi[k] >= lo[k]))
+                    lo[k] = hi[k] = 0.0;
+                origin[k] = lo[k];
+            }
+            // grow the cells until the grid spans the bounding box in at
+            // most 1024 cells per axis, and stays within max_cells
+            while (true) {
+                double total = 1;
+                bool fits = true;
+                for (int k = 0; k < 3; k++) {
+                    double cells = std::floor((hi[k]-lo[k])/edge) + 1.0;
+                    fits = fits && cells <= 1024.0;
+                    total *= cells;
+                }
+                if (fits && total <= max_cells)
+                    break;
+                edge *= 2;
+            }
+            for (int k = 0; k < 3; k++)
+                n[k] = (int) std::floor((hi[k]-lo[k])/edge) + 1;
+            scale = 1.0/edge;
+        }
 
-            int j = *qit;
+        // counting sort of the atoms by cell
+        cell_start.assign((size_t) n[0]*n[1]*n[2] + 1, 0);
+        for (int a = 0; a < n_atoms; a++) {
+            int cell[3];
+            if (locate(&frame_xyz[3*atoms[a]], cell) && inside(cell))
+                atom_cell[a] = (cell[0]*n[1] + cell[1])*n[2] + cell[2];
+            if (atom_cell[a] >= 0)
+                cell_start[atom_cell[a]+1]++;
+        }
+        for (size_t c = 1; c < cell_start.size(); c++)
+            cell_start[c] += cell_start[c-1];
+        cell_atoms.resize(cell_start.back());
+        std::vector<int> fill(cell_start.begin(), cell_start.end()-1);
+        for (int a = 0; a < n_atoms; a++)
+            if (atom_cell[a] >= 0)
+                cell_atoms[fill[atom_cell[a]]++] = atoms[a];
+        return true;
+    }
+
+    /**
+     * The cell containing a position. Without a box, this can lie one
+     * cell outside the grid. Returns false for positions that can't be
+     * near any binned atom.
+     */
+    bool locate(const float* pos, int cell[3]) const {
+        for (int k = 0; k < 3; k++) {
+            double c;
+            if (periodic) {
+                double s = pos[0]*inverse[k][0] + pos[1]*inverse[k][1] + pos[2]*inverse[k][2];
+                c = std::floor((s-std::floor(s))*n[k]);
+                if (!(c >= 0))
+                    return false;
+                c = std::min(c, (double) (n[k]-1));
+            }
+            else {
+                c = std::floor((pos[k]-origin[k])*scale);
+                if (!(c >= -1 && c <= n[k]))
+                    return false;
+            }
+            cell[k] = (int) c;
+        }
+        return true;
+    }
+
+    /**
+     * The distinct cell coordinates along axis k adjacent to coordinate c
+     * (including c itself). Returns how many were written to out.
+     */
+    int adjacent(int k, int c, int out[3]) const {
+        int count = 0;
+        if (periodic) {
+            if (n[k] < 3) {
+                for (int i = 0; i < n[k]; i++)
+                    out[count++] = i;
+            }
+            else {
+                out[count++] = (c+n[k]-1)%n[k];
+                out[count++] = c;
+                out[count++] = (c+1)%n[k];
+            }
+        }
+        else {
+            for (int i = std::max(c-1, 0); i <= std::min(c+1, n[k]-1); i++)
+                out[count++] = i;
+        }
+        return count;
+    }
+
+    int index(int x, int y, int z) const {
+        return (x*n[1] + y)*n[2] + z;
+    }
+
+    std::vector<int> cell_start;
+    std::vector<int> cell_atoms;
+
+private:
+    bool inside(const int cell[3]) const {
+        return cell[0] >= 0 && cell[0] < n[0] && cell[1] >= 0 && cell[1] < n[1] && cell[2] >= 0 && cell[2] < n[2];
+    }
+
+    bool periodic;
+    int n[3];
+    double inverse[3][3];
+    double origin[3];
+    double scale;
+};
+
+void brute_force_frame(const float* frame_xyz, float cutoff,
+    const int* query_indices, int n_query,
+    const int* haystack_indices, int n_haystack,
+    const float* box_matrix, std::vector<int>& result)
+{
+    float cutoff2 = cutoff*cutoff;
+    MinimumImage image(box_matrix);
+    for (int h = 0; h < n_haystack; h++) {
+        // Is this haystack atom within cutoff of _any_ query atom?
+        int i = haystack_indices[h];
+        for (int q = 0; q < n_query; q++) {
+            int j = query_indices[q];
             if (i == j)
                 continue;
-            fvec4 pos2(frame_xyz[3*j], frame_xyz[3*j+1], frame_xyz[3*j+2], 0);
-            fvec4 delta = pos1-pos2;
-            if (triclinic) {
-                delta -= box_vec3*roundf(delta[2]*recip_box_size[2]);
-                delta -= box_vec2*roundf(delta[1]*recip_box_size[1]);
-                delta -= box_vec1*roundf(delta[0]*recip_box_size[0]);
-            }
-            else if (periodic)
-                delta -= round(delta*inv_box_size)*box_size;
-            float dist2 = dot3(delta, delta);
-            if (dist2 < cutoff2) {
+            if (image.distance2(frame_xyz, i, j) < cutoff2) {
                 // The haystack atom is within cutoff of this query atom.
-
                 result.push_back(i);
                 break;
-             }
+            }
         }
     }
-    return result;
+}
+
+void cell_list_frame(const float* frame_xyz, float cutoff,
+    const int* query_indices, int n_query,
+    const int* haystack_indices, int n_haystack,
+    const float* box_matrix, bool parallel, std::vector<int>& result)
+{
+    // widen the cells a little, so that rounding in the fractional
+    // coordinates never hides a pair that distance2() puts inside the cutoff
+    float scale = 0.0f;
+    if (box_matrix != NULL)
+        for (int i = 0; i < 9; i++)
+            scale = std::max(scale, std::fabs(box_matrix[i]));
+    float reach = cutoff*1.001f + 1e-5f*scale + 1e-6f;
+
+    CellGrid grid;
+    if (!grid.build(frame_xyz, reach, query_indices, n_query, box_matrix)) {
+        brute_force_frame(frame_xyz, cutoff, query_indices, n_query, haystack_indices, n_haystack, box_matrix, result);
+        return;
+    }
+
+    float cutoff2 = cutoff*cutoff;
+    MinimumImage image(box_matrix);
+    std::vector<char> found(n_haystack, 0);
+#pragma omp parallel for schedule(dynamic, 1024) if(parallel)
+    for (int h = 0; h < n_haystack; h++) {
+        int i = haystack_indices[h];
+        int cell[3];
+        if (!grid.locate(&frame_xyz[3*i], cell))
+            continue;
+        int xs[3], ys[3], zs[3];
+        int nx = grid.adjacent(0, cell[0], xs);
+        int ny = grid.adjacent(1, cell[1], ys);
+        int nz = grid.adjacent(2, cell[2], zs);
+        bool hit = false;
+        for (int a = 0; a < nx && !hit; a++)
+            for (int b = 0; b < ny && !hit; b++)
+                for (int c = 0; c < nz && !hit; c++) {
+                    int cell_index = grid.index(xs[a], ys[b], zs[c]);
+                    for (int q = grid.cell_start[cell_index]; q < grid.cell_start[cell_index+1]; q++) {
+                        int j = grid.cell_atoms[q];
+                        if (i != j && image.distance2(frame_xyz, i, j) < cutoff2) {
+                            hit = true;
+                            break;
+                        }
+                    }
+                }
+        found[h] = hit;
+    }
+
+    // report matches in haystack order, like the brute force search
+    for (int h = 0; h < n_haystack; h++)
+        if (found[h])
+            result.push_back(haystack_indices[h]);
+}
+
+}  // namespace
+
+void _compute_neighbors(
+    const float* xyz, int n_frames, int n_atoms, float cutoff,
+    const int* query_indices, int n_query,
+    const int* haystack_indices, int n_haystack,
+    const float* box_matrix, int use_cell_list,
+    std::vector<std::vector<int> >& result)
+{
+    result.assign(n_frames, std::vector<int>());
+    // with a single frame, parallelize over the haystack atoms instead
+    bool parallel_frames = (n_frames > 1);
+#pragma omp parallel for schedule(dynamic) if(parallel_frames)
+    for (int f = 0; f < n_frames; f++) {
+        const float* frame_xyz = &xyz[(size_t) 3*n_atoms*f];
+        const float* frame_box = (box_matrix == NULL ? NULL : &box_matrix[9*f]);
+        if (use_cell_list)
+            cell_list_frame(frame_xyz, cutoff, query_indices, n_query, haystack_indices, n_haystack,
+                            frame_box, !parallel_frames, result[f]);
+        else
+            brute_force_frame(frame_xyz, cutoff, query_indices, n_query, haystack_indices, n_haystack,
+                              frame_box, result[f]);
+    }
 }
@@ -20,9 +20,11 @@
 /* License along with MDTraj. If not, see <http://www.gnu.org/licenses/>.*/
 /*=======================================================================*/
 
+#include <algorithm>
 #include <cstdlib>
 #include <cstdio>
 #include <cmath>
+#include <vector>
 //#include <pmmintrin.h>
 
 #include "sasa.h"
@@ -33,6 +35,70 @@
 #endif
 
 
+/**
+ * Bin the atoms of a frame into a grid of cubic cells, so that the atoms
+ * within `reach` of an atom can be found by looking only in its own cell and
+ * the 26 surrounding ones.
+ *
+ * cell_start, cell_atoms : output
+ *     the atoms in cell c are cell_atoms[cell_start[c]:cell_start[c+1]]
+ * atom_cell : output, shape=[n_atoms]
+ *     the (x, y, z) cell coordinates of each atom
+ * n_cells : output, shape=[3]
+ *     the number of cells along each axis
+ */
+static void bin_atoms(const float* frame, const int n_atoms, const float reach,
+                      std::vector<int>& cell_start, std::vector<int>& cell_atoms,
+                      std::vector<int>& atom_cell, int* n_cells)
+{
+    float lo[3] = {frame[0], frame[1], frame[2]};
+    float hi[3] = {frame[0], frame[1], frame[2]};
+    for (int i = 1; i < n_atoms; i++)
+        for (int k = 0; k < 3; k++) {
+            lo[k] = std::min(lo[k], frame[3*i+k]);
+            hi[k] = std::max(hi[k], frame[3*i+k]);
+        }
+
+    // don't let a sparse system make the grid much bigger than the number
+    // of atoms. larger cells are still correct, just less selective
+    double edge = reach;
+    long max_cells = 2*(long) n_atoms + 27;
+    while (true) {
+        long total = 1;
+        for (int k = 0; k < 3; k++) {
+            double extent = (double) hi[k] - lo[k];
+            if (!(extent >= 0) || !std::isfinite(extent))
+                n_cells[k] = 1;
+            else
+                n_cells[k] = (extent/edge < 1024.0) ? (int) (extent/edge) + 1 : 1024;
+            total *= n_cells[k];
+        }
+        if (total <= max_cells)
+            break;
+        edge *= 2;
+    }
+
+    cell_start.assign((size_t) n_cells[0]*n_cells[1]*n_cells[2] + 1, 0);
+    cell_atoms.resize(n_atoms);
+    atom_cell.resize(3*n_atoms);
+    std::vector<int> cell_of(n_atoms);
+    for (int i = 0; i < n_atoms; i++) {
+        for (int k = 0; k < 3; k++) {
+            double c = std::floor((frame[3*i+k]-lo[k])/edge);
+            // NaN coordinates land in cell 0
+            atom_cell[3*i+k] = (c >= 0) ? (int) std::min(c, (double) (n_cells[k]-1)) : 0;
+        }
+        cell_of[i] = (atom_cell[3*i]*n_cells[1] + atom_cell[3*i+1])*n_cells[2] + atom_cell[3*i+2];
+        cell_start[cell_of[i]+1]++;
+    }
+    for (size_t c = 1; c < cell_start.size(); c++)
+        cell_start[c] += cell_start[c-1];
+    std::vector<int> fill(cell_start.begin(), cell_start.end()-1);
+    for (int i = 0; i < n_atoms; i++)
+        cell_atoms[fill[cell_of[i]]++] = i;
+}
+
+
 /**
  * Calculate the accessible surface area of each atom in a single snapshot
  *
@@ -70,7 +136,22 @@ static void asa_frame(const float* frame, const int n_atoms, const float* atom_r
 {
     float constant = 4.0 * M_PI / n_sphere_points;
 
+    if (n_atoms == 0)
+        return;
+
+    // Two atoms can only be neighbors if they are closer than the sum of
+    // their radii, so bin the atoms into cells a little wider than twice
+    // the largest radius and only look for neighbors in adjacent cells.
+    float max_radius = 0;
+    for (int i = 0; i < n_atoms; i++)
+        max_radius = std::max(max_radius, atom_radii[i]);
+    std::vector<int> cell_start, cell_atoms, atom_cell;
+    int n_cells[3];
+    bin_atoms(frame, n_atoms, 2*max_radius*1.001f + 1e-6f, cell_start, cell_atoms, atom_cell, n_cells);
+
     for (int i = 0; i < n_atoms; i++) {
+        areas[i] = 0;
+
         // Skip atom if not in selection
         int in_selection = atom_selection_mask[i];
         if (in_selection == 0)
@@ -79,29 +160,37 @@ static void asa_frame(const float* frame, const int n_atoms, const float* atom_r
         float atom_radius_i = atom_radii[i];
         fvec4 r_i(frame[i*3], frame[i*3+1], frame[i*3+2], 0);
 
-        // Get all the atoms close to atom `i`
+        // Get all the atoms close to atom `i`, in increasing order of
+        // index within each cell
         int n_neighbor_indices = 0;
-        for (int j = 0; j < n_atoms; j++) {
-            if (i == j)
-                continue;
-
-            fvec4 r_j(frame[j*3], frame[j*3+1], frame[j*3+2], 0);
-            fvec4 r_ij = r_i-r_j;
-            float atom_radius_j = atom_radii[j];
-
-            // Look for atoms `j` that are nearby atom `i`
-            float radius_cutoff = atom_radius_i+atom_radius_j;
-            float radius_cutoff2 = radius_cutoff*radius_cutoff;
-            float r2 = dot3(r_ij, r_ij);
-            if (r2 < radius_cutoff2) {
-                neighbor_indices[n_neighbor_indices]  = j;
-                n_neighbor_indices++;
-            }
-            if (r2 < 1e-10f) {
-                printf("ERROR: THIS CODE IS KNOWN TO FAIL WHEN ATOMS ARE VIRTUALLY");
-                printf("ON TOP OF ONE ANOTHER. YOU SUPPLIED TWO ATOMS %f", sqrtf(r2));
-                printf("APART. QUITTING NOW");
-                exit(1);
+        int cx = atom_cell[3*i], cy = atom_cell[3*i+1], cz = atom_cell[3*i+2];
+        for (int x = std::max(cx-1, 0); x <= std::min(cx+1, n_cells[0]-1); x++)
+        for (int y = std::max(cy-1, 0); y <= std::min(cy+1, n_cells[1]-1); y++)
+        for (int z = std::max(cz-1, 0); z <= std::min(cz+1, n_cells[2]-1); z++) {
+            int cell = (x*n_cells[1] + y)*n_cells[2] + z;
+            for (int c = cell_start[cell]; c < cell_start[cell+1]; c++) {
+                int j = cell_atoms[c];
+                if (i == j)
+                    continue;
+
+                fvec4 r_j(frame[j*3], frame[j*3+1], frame[j*3+2], 0);
+                fvec4 r_ij = r_i-r_j;
+                float atom_radius_j = atom_radii[j];
+
+                // Look for atoms `j` that are nearby atom `i`
+                float radius_cutoff = atom_radius_i+atom_radius_j;
+                float radius_cutoff2 = radius_cutoff*radius_cutoff;
+                float r2 = dot3(r_ij, r_ij);
+                if (r2 < radius_cutoff2) {
+                    neighbor_indices[n_neighbor_indices]  = j;
+                    n_neighbor_indices++;
+                }
+                if (r2 < 1e-10f) {
+                    printf("ERROR: THIS CODE IS KNOWN TO FAIL WHEN ATOMS ARE VIRTUALLY");
+                    printf("ON TOP OF ONE ANOTHER. YOU SUPPLIED TWO ATOMS %f", sqrtf(r2));
+                    printf("APART. QUITTING NOW");
+                    exit(1);
+                }
             }
         }
 
@@ -255,3 +344,164 @@ void sasa(const int n_frames, const int n_atoms, const float* xyzlist,
 
   free(sphere_points);
 }
+
+
+/**
+ * Calculate the LCPO approximation to the accessible surface area of each
+ * atom in a single snapshot
+ *
+ * Parameters
+ * ----------
+ * frame : 2d array, shape=[n_atoms, 3]
+ *     The coordinates of the nuclei
+ * n_atoms : int
+ *     the major axis length of frame
+ * atom_radii : 1d array, shape=[n_atoms]
+ *     the radii of the atoms PLUS the probe radius. Atoms with a radius of
+ *     zero (i.e. hydrogens) take no part in the calculation
+ * parameters : 2d array, shape=[n_atoms, 4]
+ *     the P1, P2, P3 and P4 parameters of each atom
+ * atom_selection_mask : 1d array, shape[n_atoms]
+ *    one index per atom indicating whether the SASA
+ *    should be computed for this atom
+ * neighbor_start, neighbor_indices, neighbor_overlaps, stamp : WORK BUFFERS
+ *    reused between calls
+ * areas : 1d array, shape=[n_atoms]
+ *     the output buffer to place the results in
+ */
+static void lcpo_frame(const float* frame, const int n_atoms, const float* atom_radii,
+                       const float* parameters, const int* atom_selection_mask,
+                       std::vector<int>& neighbor_start, std::vector<int>& neighbor_indices,
+                       std::vector<float>& neighbor_overlaps, std::vector<int>& stamp,
+                       float* areas)
+{
+    for (int i = 0; i < n_atoms; i++)
+        areas[i] = 0;
+
+    // Only the atoms with a radius are binned, using a compacted copy of
+    // their coordinates
+    std::vector<int> atoms;
+    float max_radius = 0;
+    for (int i = 0; i < n_atoms; i++)
+        if (atom_radii[i] > 0) {
+            atoms.push_back(i);
+            max_radius = std::max(max_radius, atom_radii[i]);
+        }
+    const int n = (int) atoms.size();
+    if (n == 0)
+        return;
+    std::vector<float> positions(3*n);
+    for (int a = 0; a < n; a++)
+        for (int k = 0; k < 3; k++)
+            positions[3*a+k] = frame[3*atoms[a]+k];
+
+    std::vector<int> cell_start, cell_atoms, atom_cell;
+    int n_cells[3];
+    bin_atoms(&positions[0], n, 2*max_radius*1.001f + 1e-6f, cell_start, cell_atoms, atom_cell, n_cells);
+
+    // N(i), the atoms whose spheres overlap that of atom i, along with the
+    // area of the sphere of i buried in each of them
+    neighbor_start.assign(n+1, 0);
+    neighbor_indices.clear();
+    neighbor_overlaps.clear();
+    for (int a = 0; a < n; a++) {
+        float r_a = atom_radii[atoms[a]];
+        int cx = atom_cell[3*a], cy = atom_cell[3*a+1], cz = atom_cell[3*a+2];
+        for (int x = std::max(cx-1, 0); x <= std::min(cx+1, n_cells[0]-1); x++)
+        for (int y = std::max(cy-1, 0); y <= std::min(cy+1, n_cells[1]-1); y++)
+        for (int z = std::max(cz-1, 0); z <= std::min(cz+1, n_cells[2]-1); z++) {
+            int cell = (x*n_cells[1] + y)*n_cells[2] + z;
+            for (int c = cell_start[cell]; c < cell_start[cell+1]; c++) {
+                int b = cell_atoms[c];
+                if (a == b)
+                    continue;
+                float dx = positions[3*a]-positions[3*b];
+                float dy = positions[3*a+1]-positions[3*b+1];
+                float dz = positions[3*a+2]-positions[3*b+2];
+                float r2 = dx*dx + dy*dy + dz*dz;
+                float r_b = atom_radii[atoms[b]];
+                if (r2 > 0 && r2 < (r_a+r_b)*(r_a+r_b)) {
+                    float d = sqrtf(r2);
+                    neighbor_indices.push_back(b);
+                    neighbor_overlaps.push_back((float) M_PI*r_a*(2*r_a - d - (r_a*r_a - r_b*r_b)/d));
+                }
+            }
+        }
+        neighbor_start[a+1] = (int) neighbor_indices.size();
+    }
+
+    // stamp[b] == a+1 marks the members of N(a)
+    stamp.assign(n, 0);
+    for (int a = 0; a < n; a++) {
+        int i = atoms[a];
+        if (atom_selection_mask[i] == 0)
+            continue;
+        for (int m = neighbor_start[a]; m < neighbor_start[a+1]; m++)
+            stamp[neighbor_indices[m]] = a+1;
+
+        // the overlaps of i with its neighbors j, and of each j with the
+        // neighbors k that it has in common with i
+        double sum_ij = 0, sum_jk = 0, sum_ijk = 0;
+        for (int m = neighbor_start[a]; m < neighbor_start[a+1]; m++) {
+            int b = neighbor_indices[m];
+            double inner = 0;
+            for (int l = neighbor_start[b]; l < neighbor_start[b+1]; l++)
+                if (stamp[neighbor_indices[l]] == a+1)
+                    inner += neighbor_overlaps[l];
+            sum_ij += neighbor_overlaps[m];
+            sum_jk += inner;
+            sum_ijk += neighbor_overlaps[m]*inner;
+        }
+
+        const float* p = parameters + 4*i;
+        double r_i = atom_radii[i];
+        double area = p[0]*4*M_PI*r_i*r_i + p[1]*sum_ij + p[2]*sum_jk + p[3]*sum_ijk;
+        areas[i] = (float) std::max(area, 0.0);
+    }
+}
+
+
+void lcpo(const int n_frames, const int n_atoms, const float* xyzlist,
+          const float* atom_radii, const float* parameters,
+          const int* atom_mapping, const int* atom_selection_mask, const int n_groups, float* out)
+{
+  /*
+  // Calculate the accessible surface area of each atom in each frame of
+  // a trajectory, with the linear combination of pairwise overlaps (LCPO)
+  // approximation
+  //
+  // Parameters
+  // ----------
+  // atom_radii : 1d array, shape=[n_atoms]
+  //     the radii of the atoms PLUS the probe radius, or zero for the
+  //     atoms that should be ignored
+  // parameters : 2d array, shape=[n_atoms, 4]
+  //     the P1, P2, P3 and P4 parameters of each atom, with P4 in inverse
+  //     units of area
+  //
+  // The other arguments are the same as for sasa().
+  */
+
+#ifdef _OPENMP
+  #pragma omp parallel
+#endif
+  {
+  std::vector<int> neighbor_start, neighbor_indices, stamp;
+  std::vector<float> neighbor_overlaps;
+  std::vector<float> outframebuffer(n_atoms);
+
+#ifdef _OPENMP
+  #pragma omp for
+#endif
+  for (int i = 0; i < n_frames; i++) {
+    if (n_atoms == 0)
+      continue;
+    lcpo_frame(xyzlist + (size_t) i*n_atoms*3, n_atoms, atom_radii, parameters,
+               atom_selection_mask, neighbor_start, neighbor_indices,
+               neighbor_overlaps, stamp, &outframebuffer[0]);
+    float* outframe = out + (size_t) n_groups*i;
+    for (int j = 0; j < n_atoms; j++)
+      outframe[atom_mapping[j]] += outframebuffer[j];
+  }
+  }
+}
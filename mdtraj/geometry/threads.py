@@ -0,0 +1,73 @@
+##############################################################################
+# MDTraj: A Python Library for Loading, Saving, and Manipulating
+#         Molecular Dynamics Trajectories.
+# Copyright 2012-2015 Stanford University and the Authors
+#
+# Authors: Robert McGibbon
+# Contributors:
+#
+# MDTraj is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with MDTraj. If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+from mdtraj.geometry import _geometry
+
+__all__ = ["set_num_threads", "get_num_threads"]
+
+
+def set_num_threads(n_threads=None):
+    """Set the number of threads used by the native geometry kernels.
+
+    This is one setting shared by all of the OpenMP geometry kernels: the
+    ones behind ``compute_distances``, ``compute_distances_t``,
+    ``compute_displacements``, ``compute_distance_matrix``,
+    ``compute_angles`` and ``compute_dihedrals``, and everything built on
+    them. Other parallel code, such as ``shrake_rupley`` and the neighbor
+    searches, uses the OpenMP default instead. Trajectories with many frames are divided
+    between the threads frame by frame, and short trajectories pair by pair;
+    small inputs are always computed serially. Each result is computed the
+    same way however the work is divided, so the output does not depend on
+    the number of threads.
+
+    Parameters
+    ----------
+    n_threads : int or None, default=None
+        The number of threads to use. If None, use the OpenMP default, which
+        can be set with the ``OMP_NUM_THREADS`` environment variable.
+
+    See Also
+    --------
+    get_num_threads
+    """
+    if n_threads is None:
+        n_threads = 0
+    elif int(n_threads) < 1:
+        raise ValueError(f"n_threads must be a positive integer or None, got {n_threads}")
+    _geometry._set_num_threads(int(n_threads))
+
+
+def get_num_threads():
+    """Get the number of threads used by the native geometry kernels.
+
+    Returns
+    -------
+    n_threads : int
+        The number of threads the kernels use for large inputs. This is 1 if
+        MDTraj was built without OpenMP.
+
+    See Also
+    --------
+    set_num_threads
+    """
+    return _geometry._get_num_threads()
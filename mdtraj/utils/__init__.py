@@ -10,7 +10,7 @@ from mdtraj.utils.unitcell import (
     lengths_and_angles_to_box_vectors,
     lengths_and_angles_to_tilt_factors,
 )
-from mdtraj.utils.validation import cast_indices, check_random_state, ensure_type
+from mdtraj.utils.validation import cast_frame_range, cast_indices, check_random_state, ensure_type
 from mdtraj.utils.zipped import open_maybe_zipped
 
 __all__ = [
@@ -23,6 +23,7 @@ __all__ = [
     "ilen",
     "timing",
     "cast_indices",
+    "cast_frame_range",
     "check_random_state",
     "rotation_matrix_from_quaternion",
     "uniform_quaternion",
@@ -187,6 +187,70 @@ def cast_indices(indices):
     return out
 
 
+def cast_frame_range(start=None, stop=None, stride=None, length=None):
+    """Convert a ``start``/``stop``/``stride`` frame window into a seek
+    position and a frame count
+
+    Parameters
+    ----------
+    start : int, optional
+        Index of the first frame in the window. Negative values count back
+        from the end of the file. Defaults to the beginning of the file.
+    stop : int, optional
+        Index one past the last frame in the window. Negative values count
+        back from the end of the file. Defaults to the end of the file.
+    stride : int, optional
+        Only every stride-th frame of the window will be read.
+    length : callable, optional
+        Returns the number of frames in the file. It is called at most once,
+        to resolve negative bounds and to clamp the window to the end of the
+        file, so that a window starting past the end is empty rather than an
+        out-of-bounds seek. Without it, negative bounds are rejected and the
+        window is returned unclamped.
+
+    Returns
+    -------
+    start : int
+        The frame to seek to before reading.
+    n_frames : {int, None}
+        The number of (strided) frames in the window, or None if the window
+        extends to the end of the file.
+    """
+    if stride is None:
+        stride = 1
+    if int(stride) != stride or stride < 1:
+        raise ValueError("stride must be a positive integer. you supplied %s" % stride)
+    stride = int(stride)
+
+    n_total = []
+
+    def _length():
+        if not n_total:
+            n_total.append(int(length()))
+        return n_total[0]
+
+    def _resolve(index, name):
+        if int(index) != index:
+            raise ValueError(f"{name} must be an integer. you supplied {index}")
+        index = int(index)
+        if index < 0:
+            if length is None:
+                raise ValueError(f"negative {name} is not supported for this file")
+            index = max(_length() + index, 0)
+        return index
+
+    start = 0 if start is None else _resolve(start, "start")
+    if start > 0 and length is not None:
+        start = min(start, _length())
+    if stop is None:
+        return start, None
+
+    stop = _resolve(stop, "stop")
+    if n_total:
+        stop = min(stop, n_total[0])
+    return start, max(0, (stop - start + stride - 1) // stride)
+
+
 def check_random_state(seed):
     """Turn seed into a np.random.RandomState instance
 
@@ -24,6 +24,7 @@
 import itertools
 
 import numpy as np
+import pytest
 
 import mdtraj as md
 from mdtraj.testing import eq
@@ -127,3 +128,60 @@ def test_contact_4(get_fn):
         contacts="all",
         scheme="sidechain-heavy",
     )  # test passes if this doesn't raise an exception
+
+
+def _sparsity(matrix):
+    coo = matrix.tocoo()
+    mask = np.zeros(matrix.shape, dtype=bool)
+    mask[coo.row, coo.col] = True
+    return mask
+
+
+@pytest.mark.parametrize("scheme", ["ca", "closest", "closest-heavy", "sidechain", "sidechain-heavy"])
+@pytest.mark.parametrize("soft_min", [False, True])
+def test_contact_cutoff(get_fn, scheme, soft_min):
+    # the sparse contacts are the dense ones closer than the cutoff
+    traj = md.load(get_fn("1vii_sustiva_water.pdb"))
+    cutoff = 0.6
+    ref, ref_pairs = md.compute_contacts(traj, scheme=scheme, soft_min=soft_min)
+    closest, _ = md.compute_contacts(traj, scheme=scheme)
+    in_contact = closest < cutoff
+
+    dists, pairs = md.compute_contacts(traj, scheme=scheme, soft_min=soft_min, cutoff=cutoff)
+    keep = in_contact.any(axis=0)
+    eq(pairs, ref_pairs[keep])
+    eq(_sparsity(dists), in_contact[:, keep])
+    np.testing.assert_allclose(dists.toarray()[in_contact[:, keep]], ref[in_contact], rtol=1e-5)
+
+    # explicit contacts keep their order, duplicates and orientation
+    contacts = np.concatenate([ref_pairs[::5], ref_pairs[::5, ::-1], ref_pairs[:2]])
+    dists, pairs = md.compute_contacts(traj, contacts, scheme=scheme, soft_min=soft_min, cutoff=cutoff)
+    ref, ref_pairs = md.compute_contacts(traj, contacts, scheme=scheme, soft_min=soft_min)
+    closest, _ = md.compute_contacts(traj, contacts, scheme=scheme)
+    eq(pairs, ref_pairs)
+    eq(_sparsity(dists), closest < cutoff)
+    np.testing.assert_allclose(dists.toarray()[closest < cutoff], ref[closest < cutoff], rtol=1e-5)
+
+
+def test_contact_chunks(get_fn, monkeypatch):
+    # the distances don't depend on how the atom pairs and frames are split
+    # up to bound the memory use
+    traj = md.load(get_fn("1vii_sustiva_water.pdb"))
+    for soft_min in [False, True]:
+        ref, ref_pairs = md.compute_contacts(traj, scheme="closest", soft_min=soft_min)
+        with monkeypatch.context() as m:
+            m.setattr(md.geometry.contact, "_MAX_ATOM_DISTANCES", 500)
+            dists, pairs = md.compute_contacts(traj, scheme="closest", soft_min=soft_min)
+        eq(pairs, ref_pairs)
+        eq(dists, ref)
+
+    # and the sparse contacts don't depend on how the frames are split up
+    traj = md.join([traj] * 4)
+    traj.xyz += np.random.RandomState(0).normal(scale=0.02, size=traj.xyz.shape).astype(np.float32)
+    for contacts in ["all", [[0, 5], [12, 3], [3, 12]]]:
+        ref, ref_pairs = md.compute_contacts(traj, contacts, scheme="closest", cutoff=0.6)
+        with monkeypatch.context() as m:
+            m.setattr(md.geometry.contact, "_MAX_ATOM_DISTANCES", 500)
+            dists, pairs = md.compute_contacts(traj, contacts, scheme="closest", cutoff=0.6)
+        eq(pairs, ref_pairs)
+        eq(dists.toarray(), ref.toarray())
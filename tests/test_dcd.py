@@ -128,6 +128,24 @@ def test_read_6(get_fn):
     assert eq(xyz_ref[:, ::2, :], xyz)
 
 
+def test_read_atomindices_sparse(tmpdir):
+    # unordered indices with gaps wider than a single contiguous read
+    fn = f"{tmpdir}/x.dcd"
+    xyz = np.array(np.random.randn(5, 3000, 3), dtype=np.float32)
+    box_lengths = np.array(np.random.uniform(1, 2, size=(5, 3)), dtype=np.float32)
+    box_angles = np.full((5, 3), 90, dtype=np.float32)
+    with DCDTrajectoryFile(fn, "w") as f:
+        f.write(xyz, box_lengths, box_angles)
+
+    atom_indices = [2999, 5, 4, 1700, 0, 1701]
+    with DCDTrajectoryFile(fn) as f:
+        xyz2, box_lengths2, box_angles2 = f.read(atom_indices=atom_indices)
+
+    eq(xyz[:, atom_indices], xyz2)
+    eq(box_lengths, box_lengths2)
+    eq(box_angles, box_angles2)
+
+
 def test_write_0(tmpdir, get_fn):
     fn_dcd = get_fn("frame0.dcd")
     fn = f"{tmpdir}/x.dcd"
@@ -30,11 +30,13 @@ from mdtraj.geometry.distance import (
     _displacement,
     _displacement_mic,
     compute_displacements,
+    compute_distance_matrix,
     compute_distances,
     compute_distances_core,
     compute_distances_t,
     find_closest_contact,
 )
+from mdtraj.geometry.threads import get_num_threads, set_num_threads
 from mdtraj.testing import assert_allclose, eq
 
 
@@ -314,3 +316,172 @@ class Test_Distance:
         )
         traj = md.load(get_fn("test_good.nc"), top=get_fn("test.parm7"))
         self._run_amber_traj_t(traj, ext_ref)
+
+
+def test_distances_t_triclinic_boxes():
+    # each time pair uses the box of its first frame
+    rng = np.random.default_rng(0)
+    xyz = rng.uniform(0, 3, (4, 10, 3)).astype(np.float32)
+    lengths = np.float32([[3.0, 3.1, 3.2], [3.5, 3.3, 3.1], [2.9, 3.0, 3.4], [3.2, 3.2, 3.2]])
+    angles = np.tile(np.float32([70, 80, 100]), (4, 1))
+    traj = md.Trajectory(xyz, None, unitcell_lengths=lengths, unitcell_angles=angles)
+    pairs = np.array(list(itertools.combinations(range(10), 2)))
+    times = np.array([[0, 1], [2, 0], [3, 3], [1, 2]])
+    a = compute_distances_t(traj, pairs, times, opt=True)
+    b = compute_distances_t(traj, pairs, times, opt=False)
+    assert_allclose(a, b, rtol=1e-5)
+
+
+@pytest.mark.parametrize("n_frames", [1, 3, 40])
+@pytest.mark.parametrize("box", [None, "orthogonal", "triclinic"])
+def test_num_threads(n_frames, box):
+    rng = np.random.default_rng(0)
+    n_atoms = 200
+    xyz = rng.uniform(0, 3, (n_frames, n_atoms, 3)).astype(np.float32)
+    lengths = angles = None
+    if box is not None:
+        lengths = np.full((n_frames, 3), 3.0, dtype=np.float32)
+        angles = np.full((n_frames, 3), 90.0 if box == "orthogonal" else 75.0, dtype=np.float32)
+    traj = md.Trajectory(xyz, None, unitcell_lengths=lengths, unitcell_angles=angles)
+    # enough work that the kernels run in parallel
+    pairs = rng.integers(0, n_atoms, (25000, 2))
+    triplets = rng.integers(0, n_atoms, (25000, 3))
+    quartets = rng.integers(0, n_atoms, (25000, 4))
+    times = rng.integers(0, n_frames, (n_frames, 2))
+
+    def compute():
+        return [
+            compute_distances(traj, pairs),
+            compute_displacements(traj, pairs),
+            compute_distances_t(traj, pairs, times),
+            compute_distance_matrix(traj),
+            md.compute_angles(traj, triplets),
+            md.compute_dihedrals(traj, quartets),
+        ]
+
+    default = get_num_threads()
+    try:
+        set_num_threads(1)
+        assert get_num_threads() == 1
+        serial = compute()
+        set_num_threads(4)
+        parallel = compute()
+    finally:
+        set_num_threads(None)
+    assert get_num_threads() == default
+    for a, b in zip(serial, parallel):
+        np.testing.assert_array_equal(a, b)
+
+    with pytest.raises(ValueError):
+        set_num_threads(0)
+
+
+@pytest.mark.parametrize("periodic", [False, True])
+@pytest.mark.parametrize("opt", [True, False])
+def test_blocks_and_out(get_fn, tmp_path, periodic, opt):
+    traj = md.load(get_fn("1vii_sustiva_water.pdb"))[:1]
+    traj = md.join([traj] * 7)
+    traj.xyz += np.random.default_rng(0).normal(0, 0.05, traj.xyz.shape).astype(np.float32)
+    rng = np.random.default_rng(1)
+    indices = rng.choice(traj.n_atoms, (100, 4))
+    functions = [
+        (compute_distances, indices[:, :2], ()),
+        (compute_displacements, indices[:, :2], (3,)),
+        (md.compute_angles, indices[:, :3], ()),
+        (md.compute_dihedrals, indices, ()),
+    ]
+    for function, atoms, extra in functions:
+        ref = function(traj, atoms, periodic=periodic, opt=opt)
+        shape = (traj.n_frames, len(atoms)) + extra
+
+        for kwargs in [{"chunk_frames": 3}, {"chunk_frames": 100}, {"memory_limit": 2 * ref[0].nbytes}, {"memory_limit": 1}]:
+            np.testing.assert_array_equal(function(traj, atoms, periodic=periodic, opt=opt, **kwargs), ref)
+
+        mmap = np.lib.format.open_memmap(tmp_path / "out.npy", mode="w+", dtype=np.float32, shape=shape)
+        result = function(traj, atoms, periodic=periodic, opt=opt, out=mmap, chunk_frames=2)
+        assert result is mmap
+        mmap.flush()
+        np.testing.assert_array_equal(np.load(tmp_path / "out.npy"), ref)
+
+        # outputs the kernels can't write to directly
+        out = np.zeros(shape, dtype=np.float64)
+        function(traj, atoms, periodic=periodic, opt=opt, out=out, chunk_frames=4)
+        np.testing.assert_array_equal(out, ref)
+        out = np.zeros(shape[:1] + (2 * shape[1],) + extra, dtype=np.float32)[:, ::2]
+        function(traj, atoms, periodic=periodic, opt=opt, out=out, memory_limit=1)
+        np.testing.assert_array_equal(out, ref)
+
+        empty = np.empty(shape[:1] + (0,) + extra, dtype=np.float32)
+        assert function(traj, atoms[:0], out=empty) is empty
+
+        with pytest.raises(ValueError):
+            function(traj, atoms, out=np.zeros(shape[1:], dtype=np.float32))
+        with pytest.raises(ValueError):
+            function(traj, atoms, out=np.zeros(shape, dtype=np.int32))
+        with pytest.raises(ValueError):
+            function(traj, atoms, chunk_frames=0)
+        with pytest.raises(ValueError):
+            function(traj, atoms, memory_limit=0)
+
+
+@pytest.mark.parametrize("angles", [None, 90.0, 70.0])
+def test_distance_matrix(angles):
+    rng = np.random.default_rng(0)
+    xyz = rng.uniform(0, 4, (3, 60, 3)).astype(np.float32)
+    kwargs = {}
+    if angles is not None:
+        kwargs = dict(
+            unitcell_lengths=np.full((3, 3), 3.0, dtype=np.float32),
+            unitcell_angles=np.full((3, 3), angles, dtype=np.float32),
+        )
+    traj = md.Trajectory(xyz, None, **kwargs)
+    indices = rng.choice(60, 25, replace=False)
+    pairs = np.array(list(itertools.combinations(indices, 2)))
+
+    for periodic in [True, False]:
+        condensed = compute_distance_matrix(traj, indices, periodic=periodic)
+        np.testing.assert_array_equal(condensed, compute_distances(traj, pairs, periodic=periodic))
+        square = compute_distance_matrix(traj, indices, periodic=periodic, condensed=False)
+        assert square.shape == (3, 25, 25)
+        np.testing.assert_array_equal(square, square.transpose(0, 2, 1))
+        np.testing.assert_array_equal(square[:, 0, 0], 0)
+        rows, columns = np.triu_indices(25, k=1)
+        np.testing.assert_array_equal(square[:, rows, columns], condensed)
+
+    all_pairs = np.array(list(itertools.combinations(range(60), 2)))
+    np.testing.assert_array_equal(compute_distance_matrix(traj), compute_distances(traj, all_pairs))
+    assert compute_distance_matrix(traj, [5]).shape == (3, 0)
+    assert compute_distance_matrix(traj, [5], condensed=False).shape == (3, 1, 1)
+    assert compute_distance_matrix(traj[:0], indices).shape == (0, 300)
+    with pytest.raises(ValueError):
+        compute_distance_matrix(traj, [0, 60])
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        # rhombic dodecahedron, truncated octahedron and a skewed box
+        [[3, 0, 0], [0, 3, 0], [1.5, 1.5, 3 * np.sqrt(2) / 2]],
+        [[3, 0, 0], [1, 2 * np.sqrt(2), 0], [-1, np.sqrt(2), np.sqrt(6)]],
+        [[3, 0, 0], [1.2, 2.8, 0], [0.9, -1.3, 2.6]],
+    ],
+)
+def test_triclinic_minimum_image(box):
+    box = np.array(box, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    fractional = rng.uniform(-0.5, 1.5, (3, 40, 3))
+    traj = md.Trajectory((fractional @ box).astype(np.float32), None)
+    traj.unitcell_vectors = np.tile(box, (3, 1, 1))
+    pairs = np.array(list(itertools.combinations(range(40), 2)))
+
+    distances = compute_distances(traj, pairs)
+    displacements = compute_displacements(traj, pairs)
+    assert_allclose(distances, compute_distances(traj, pairs, opt=False), rtol=1e-5)
+    assert_allclose(displacements, compute_displacements(traj, pairs, opt=False), atol=1e-5)
+    assert_allclose(distances, np.linalg.norm(displacements, axis=-1), rtol=1e-5)
+
+    # no periodic copy of a displacement is shorter than the minimum image
+    raw = traj.xyz[:, pairs[:, 1]] - traj.xyz[:, pairs[:, 0]]
+    shifts = np.array(list(itertools.product(range(-3, 4), repeat=3))) @ box
+    brute = np.linalg.norm(raw[..., np.newaxis, :] + shifts, axis=-1).min(axis=-1)
+    assert_allclose(distances, brute, rtol=1e-5)
@@ -46,3 +46,41 @@ def test_periodic():
 
 def test_triclinic():
     _run_one_test(True, True)
+
+
+def test_neighborlist_csr():
+    n_frames, n_atoms = 4, 100
+    cutoff = 1.5
+    box_size = np.array([3.0, 4.0, 5.0])
+    traj = md.Trajectory(
+        xyz=random.rand(n_frames, n_atoms, 3) * box_size,
+        topology=None,
+        unitcell_lengths=np.tile(box_size, (n_frames, 1)),
+        unitcell_angles=np.tile([80.0, 90.0, 100.0], (n_frames, 1)),
+    )
+
+    nl = md.compute_neighborlist_csr(traj, cutoff, return_distances=True)
+    assert nl.indptr.shape == (n_frames, n_atoms + 1)
+    assert nl.indptr[0, 0] == 0 and nl.indptr[-1, -1] == len(nl.indices) == len(nl.distances)
+    for frame in range(n_frames):
+        reference = md.compute_neighborlist(traj, cutoff, frame=frame)
+        for i in range(n_atoms):
+            neighbors = nl.neighbors(frame, i)
+            np.testing.assert_array_equal(neighbors, np.sort(reference[i]))
+            if len(neighbors):
+                pairs = np.column_stack([np.full(len(neighbors), i), neighbors])
+                distances = nl.distances[nl.indptr[frame, i] : nl.indptr[frame, i + 1]]
+                np.testing.assert_allclose(distances, md.compute_distances(traj[frame], pairs)[0], atol=1e-5)
+    np.testing.assert_array_equal(
+        nl.coordination_numbers()[2],
+        [len(n) for n in md.compute_neighborlist(traj, cutoff, frame=2)],
+    )
+
+    half = md.compute_neighborlist_csr(traj, cutoff, frames=[3, 1], half=True, periodic=False)
+    assert half.distances is None
+    for k, frame in enumerate([3, 1]):
+        reference = md.compute_neighborlist(traj, cutoff, frame=frame, periodic=False)
+        for i in range(n_atoms):
+            np.testing.assert_array_equal(half.neighbors(k, i), np.sort(reference[i][reference[i] > i]))
+        # each pair appears once
+        assert half.indptr[k, -1] - half.indptr[k, 0] == sum(len(n) for n in reference) // 2
@@ -1,6 +1,8 @@
 import numpy as np
+import pytest
 
 import mdtraj as md
+from mdtraj.geometry import neighbors
 from mdtraj.testing import eq
 
 random = np.random.RandomState(0)
@@ -54,3 +56,49 @@ def test_compute_neighbors_3(get_fn):
     reference = compute_neighbors_reference(traj, cutoff, query_indices)
     for i in range(traj.n_frames):
         eq(value[i], reference[i])
+
+
+
+def test_compute_neighbors_cell_list_spread_out(monkeypatch):
+    # without a box, a grid of cutoff-sized cells can't span 300 nm
+    n_atoms = 2000
+    xyz = np.zeros((1, n_atoms, 3), dtype=np.float32)
+    xyz[0, :, 0] = np.linspace(0, 300, n_atoms)
+    xyz[0, :, 1] = random.uniform(0, 0.1, size=n_atoms)
+    traj = md.Trajectory(xyz=xyz, topology=None)
+    query_indices = np.arange(0, n_atoms, 2)
+    haystack_indices = np.arange(1, n_atoms, 2)
+
+    monkeypatch.setattr(neighbors, "_CELL_LIST_MIN_PAIRS", np.inf)
+    brute_force = md.compute_neighbors(traj, 0.2, query_indices, haystack_indices, periodic=False)
+    monkeypatch.setattr(neighbors, "_CELL_LIST_MIN_PAIRS", 0)
+    cell_list = md.compute_neighbors(traj, 0.2, query_indices, haystack_indices, periodic=False)
+    assert len(brute_force[0]) == len(haystack_indices)
+    eq(cell_list[0], brute_force[0])
+
+
+@pytest.mark.parametrize("box", ["none", "orthorhombic", "triclinic"])
+def test_compute_neighbors_cell_list(monkeypatch, box):
+    n_frames, n_atoms = 3, 600
+    box_vectors = np.array([[2.0, 0.0, 0.0], [0.0, 1.8, 0.0], [0.0, 0.0, 2.2]])
+    if box == "triclinic":
+        box_vectors[1, 0], box_vectors[2, 0], box_vectors[2, 1] = 0.6, -0.7, 0.5
+    fractional = random.uniform(-0.5, 1.5, size=(n_frames, n_atoms, 3))
+    traj = md.Trajectory(xyz=fractional @ box_vectors, topology=None)
+    if box != "none":
+        traj.unitcell_vectors = np.tile(box_vectors, (n_frames, 1, 1))
+
+    query_indices = random.choice(n_atoms, size=80, replace=False)
+    haystack_indices = random.choice(n_atoms, size=400)
+    for cutoff in [0.1, 0.45, 1.5]:
+        monkeypatch.setattr(neighbors, "_CELL_LIST_MIN_PAIRS", np.inf)
+        brute_force = md.compute_neighbors(traj, cutoff, query_indices, haystack_indices)
+        monkeypatch.setattr(neighbors, "_CELL_LIST_MIN_PAIRS", 0)
+        cell_list = md.compute_neighbors(traj, cutoff, query_indices, haystack_indices)
+        for i in range(n_frames):
+            eq(cell_list[i], brute_force[i])
+        # matches come back in haystack order, duplicates included
+        eq(
+            np.unique(cell_list[0]),
+            compute_neighbors_reference(traj[0], cutoff, query_indices, np.unique(haystack_indices))[0],
+        )
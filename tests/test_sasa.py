@@ -22,10 +22,11 @@
 
 
 import numpy as np
+import pytest
 
 import mdtraj as md
 from mdtraj import element
-from mdtraj.geometry.sasa import _ATOMIC_RADII
+from mdtraj.geometry.sasa import _ATOMIC_RADII, _LCPO_PARAMETERS, _LCPO_RADII
 from mdtraj.testing import eq
 
 # set up a mock topology with 1 atom
@@ -234,3 +235,88 @@ def test_sasa_7(get_fn):
     # Nothing changes if you do "residue" mode bc only one atom is contributing
     SASA_resid1_HB3_per_residue = md.geometry.shrake_rupley(t, atom_indices=atoms_resid1_HB3, mode="residue")
     np.testing.assert_equal(SASA_resid1_HB3_per_atom[:, atoms_resid1_HB3[0]], SASA_resid1_HB3_per_residue[:, 1])
+
+
+def test_sasa_frames_independent(get_fn):
+    # each frame's areas don't depend on which other frames are computed
+    # alongside it
+    t = md.load(get_fn("frame0.h5"))[:5]
+    together = md.shrake_rupley(t, n_sphere_points=100)
+    for i in range(t.n_frames):
+        eq(together[i], md.shrake_rupley(t[i], n_sphere_points=100)[0])
+    eq(together[[2, 2, 2]], md.shrake_rupley(t[[2, 2, 2]], n_sphere_points=100))
+
+
+def test_sasa_distant_atoms():
+    # atoms spread far apart don't block each other, however the neighbor
+    # search bins them
+    n_atoms = 50
+    topology = md.Topology()
+    residue = topology.add_residue("res", topology.add_chain())
+    for _ in range(n_atoms):
+        topology.add_atom("H", element.hydrogen, residue)
+    xyz = np.zeros((1, n_atoms, 3))
+    xyz[0, :, 0] = np.arange(n_atoms) + np.arange(n_atoms) ** 3 * 0.01
+    xyz[0, 1, 0] = 0.1  # one close pair
+    traj = md.Trajectory(xyz=xyz, topology=topology)
+
+    areas = md.shrake_rupley(traj, probe_radius=0.14)[0]
+    single = 4 * np.pi * (_ATOMIC_RADII["H"] + 0.14) ** 2
+    np.testing.assert_allclose(areas[2:], single, rtol=1e-6)
+    assert np.all(areas[:2] < single)
+
+
+def test_lcpo(get_fn):
+    t = md.load(get_fn("2EQQ.pdb"))
+    areas = md.lcpo(t)
+    hydrogens = t.top.select("element H")
+    assert np.all(areas[:, hydrogens] == 0)
+
+    # LCPO approximates the Shrake-Rupley areas of the heavy atoms, with the
+    # same radii
+    heavy = t.top.select("not element H")
+    reference = md.shrake_rupley(t.atom_slice(heavy), change_radii=_LCPO_RADII)
+    np.testing.assert_allclose(areas[:, heavy].sum(axis=1), reference.sum(axis=1), rtol=0.05)
+    assert np.corrcoef(areas[:, heavy].ravel(), reference.ravel())[0, 1] > 0.9
+
+
+def test_lcpo_pair():
+    # two overlapping carbons have no common neighbors, so each one's area is
+    # P1 * S + P2 * A_12
+    topology = md.Topology()
+    residue = topology.add_residue("res", topology.add_chain())
+    a = topology.add_atom("C1", element.carbon, residue)
+    b = topology.add_atom("C2", element.carbon, residue)
+    topology.add_bond(a, b)
+    traj = md.Trajectory(xyz=np.array([[[0, 0, 0], [0.15, 0, 0]]]), topology=topology)
+
+    with pytest.warns(UserWarning, match="no hydrogens"):
+        areas = md.lcpo(traj)
+    r, d = _LCPO_RADII["C"] + 0.14, 0.15
+    p1, p2, _, _ = _LCPO_PARAMETERS["C", "sp2"][2]
+    expected = p1 * 4 * np.pi * r**2 + p2 * np.pi * r * (2 * r - d)
+    np.testing.assert_allclose(areas, [[expected, expected]], rtol=1e-5)
+
+
+def test_lcpo_options(get_fn):
+    t = md.load(get_fn("frame0.h5"))[:5]
+    atoms = md.lcpo(t)
+    residues, mapping = md.lcpo(t, mode="residue", get_mapping=True)
+    expected = np.zeros_like(residues)
+    np.add.at(expected.T, mapping, atoms.T)
+    np.testing.assert_allclose(residues, expected, rtol=1e-5)
+
+    selection = t.top.select("resid 1")
+    selected = md.lcpo(t, atom_indices=selection)
+    np.testing.assert_equal(selected[:, selection], atoms[:, selection])
+    np.testing.assert_equal(np.delete(selected, selection, axis=1), -1)
+
+    eq(md.compute_sasa(t, method="lcpo"), atoms)
+    eq(md.compute_sasa(t, n_sphere_points=100), md.shrake_rupley(t, n_sphere_points=100))
+    with pytest.raises(ValueError):
+        md.compute_sasa(t, method="unknown")
+
+    t.topology = t.topology.copy()
+    t.topology._bonds = []
+    with pytest.raises(ValueError, match="bonds"):
+        md.lcpo(t)
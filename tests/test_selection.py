@@ -26,7 +26,13 @@ import numpy as np
 import pytest
 
 import mdtraj
-from mdtraj.core.selection import parse_selection
+from mdtraj.core.selection import (
+    AtomColumns,
+    get_selection_cache_size,
+    parse_selection,
+    selection_mask,
+    set_selection_cache_size,
+)
 from mdtraj.testing import eq
 
 
@@ -264,10 +270,9 @@ def test_re():
     eq(sp.source, "re.match('C.*', atom.name) is not None and True")
 
 
-@pytest.mark.skip("failed to parse selection")
-def test_within(self):
+def test_within():
     sp = parse_selection("within 5 of (backbone or sidechain)")
-    eq(sp.source, "atom.within == 5 of atom.residue.is_backbone or atom.residue.is_sidechain")
+    eq(sp.source, "within(5, atom.is_backbone or atom.is_sidechain)")
 
 
 def test_quotes():
@@ -341,3 +346,139 @@ def test_in():
 
     sp = parse_selection("resid 100 101 102")
     eq(sp.source, "atom.residue.index in [100, 101, 102]")
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        "all",
+        "none",
+        "protein",
+        "not water",
+        "backbone and resid 1 to 4",
+        "sidechain or name CA",
+        "name CA CB N",
+        "resname ALA and name 'H.*'",
+        "name =~ 'H.*'",
+        "not (name =~ 'C[AB]')",
+        "resSeq 5 to 12 and not element H",
+        "1 < resid",
+        "mass > 2 and mass < 15",
+        "type O or symbol N",
+        "code A",
+        "rescode C W",
+        "chainid 0",
+        "index 0 to 10",
+        "index != 5 and index 3 to 7",
+        "n_bonds 1",
+        "segment_id ''",
+        "name 1",
+        "resSeq ALA",
+        "resname ALA 1 GLY",
+        "name and not protein",
+    ],
+)
+def test_vectorized_selection(ala, gbp, selection):
+    for top in [ala.topology, gbp.topology, tt]:
+        sp = parse_selection(selection)
+        ref = [a.index for a in top.atoms if sp.expr(a)]
+        mask = selection_mask(sp.astnode, AtomColumns(top.arrays))
+        eq(np.flatnonzero(mask), np.asarray(ref, dtype=int))
+        eq(top.select(selection), np.asarray(ref, dtype=int))
+
+
+def test_vectorized_selection_fallback(gbp):
+    # ordering a number against a string raises in python, so the
+    # vectorized engine hands this to the per-atom path
+    with pytest.raises(TypeError):
+        gbp.topology.select("resSeq < ALA")
+
+
+def test_selection_cache(gbp):
+    top = gbp.topology.copy()
+    ca = top.select("name CA")
+    assert top.selection_cache_info().misses == 1
+    ca[:] = -1
+    eq(top.select("name CA"), gbp.topology.select("name CA"))
+    assert top.selection_cache_info().hits == 1
+
+    top.atom(0).name = "CA"
+    eq(top.select("name CA"), gbp.topology.select("name CA"))
+    top.invalidate_caches()
+    eq(top.select("name CA")[1:], gbp.topology.select("name CA"))
+    top.add_atom("CA", mdtraj.element.carbon, top.residue(0))
+    assert top.select("name CA")[-1] == top.n_atoms - 1
+    top.add_bond(top.atom(0), top.atom(top.n_atoms - 1))
+    assert top.n_atoms - 1 in top.select("n_bonds 1")
+    top.delete_atom_by_index(0)
+    eq(top.select("name CA")[:-1], gbp.topology.select("name CA") - 1)
+
+    parsed = parse_selection("resname ALA and name CA")
+    hits = parse_selection.cache_info().hits
+    assert parse_selection("resname ALA and name CA") is parsed
+    assert parse_selection.cache_info().hits == hits + 1
+
+
+def test_selection_cache_size(gbp):
+    maxsize = get_selection_cache_size()
+    try:
+        set_selection_cache_size(0)
+        top = gbp.topology.copy()
+        top.select("name CA")
+        top.select("name CA")
+        assert top.selection_cache_info() == (0, 2, 0, 0)
+        assert parse_selection.cache_info().currsize == 0
+        with pytest.raises(ValueError):
+            set_selection_cache_size(-1)
+    finally:
+        set_selection_cache_size(maxsize)
+
+
+def test_distance_selection_parse():
+    sp = parse_selection("water and not within 0.3 of protein")
+    eq(sp.source, "atom.residue.is_water and (not within(0.3, atom.residue.is_protein))")
+    sp = parse_selection("same residue as around 0.5 of resname LIG")
+    eq(sp.source, "same_residue(around(0.5, atom.residue.name == 'LIG'))")
+    with pytest.raises(ValueError):
+        parse_selection("within LIG of name CA")
+    with pytest.raises(ValueError):
+        parse_selection("within 0.5 of 3")
+
+
+def test_same_residue(gbp):
+    top = gbp.topology
+    ref = [a.index for a in top.atoms if a.residue.name == "ALA" or any(b.name == "OG1" for b in a.residue.atoms)]
+    eq(top.select("same residue as (name OG1 or resname ALA)"), np.asarray(ref))
+    with pytest.raises(ValueError):
+        parse_selection("same residue as name CA").expr(tt.atom(0))
+
+
+def test_within_frames(get_fn):
+    traj = mdtraj.load(get_fn("1vii_sustiva_water.pdb"))
+    traj.xyz[1:] += np.random.RandomState(0).normal(scale=0.1, size=traj.xyz[1:].shape).astype(np.float32)
+    top = traj.topology
+    lig = top.select("resname LIG")
+    water = top.select("water")
+
+    near = mdtraj.compute_neighbors(traj, 0.5, lig)
+    within = traj.select("water and within 0.5 of resname LIG")
+    around = traj.select("around 0.5 of resname LIG")
+    same_residue = traj.select("same residue as (water and within 0.5 of resname LIG)")
+    assert len(within) == traj.n_frames
+    for i in range(traj.n_frames):
+        eq(within[i], np.intersect1d(near[i], water))
+        eq(around[i], np.setdiff1d(near[i], lig))
+        residues = {top.atom(j).residue.index for j in within[i]}
+        eq(same_residue[i], np.asarray([a.index for a in top.atoms if a.residue.index in residues]))
+    eq(traj.select("within 0.5 of resname LIG")[0], np.union1d(near[0], lig))
+    assert not np.array_equal(within[0], within[1])
+
+    mask = traj.select_mask("water and within 0.5 of resname LIG")
+    assert mask.shape == (traj.n_frames, traj.n_atoms)
+    for i in range(traj.n_frames):
+        eq(mask[i].indices, within[i])
+    eq(traj.select_mask("resname LIG").toarray()[1], np.isin(np.arange(traj.n_atoms), lig))
+    eq(traj.select("resname LIG")[2], lig)
+
+    with pytest.raises(ValueError):
+        top.select("within 0.5 of resname LIG")
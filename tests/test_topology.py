@@ -20,6 +20,7 @@
 # License along with MDTraj. If not, see <http://www.gnu.org/licenses/>.
 ##############################################################################
 
+import itertools
 import os
 import pickle
 import tempfile
@@ -179,6 +180,52 @@ def test_topology_pandas_2residues_same_resSeq(get_fn):
     eq(topology, topology2)
 
 
+def test_topology_pandas_boundaries(get_fn):
+    topology = md.load(get_fn("2EQQ.pdb")).topology
+    atoms, bonds = topology.to_dataframe()
+    # a chain change splits a residue, and a resSeq change inside a chain
+    # starts a new residue
+    atoms.loc[5:9, "chainID"] = 7
+    atoms.loc[12:14, "resSeq"] = 99
+    atoms.loc[3, "formal_charge"] = -1
+
+    topology2 = md.Topology.from_dataframe(atoms, bonds)
+    assert topology2.n_chains == 3
+    assert [r.n_atoms for r in topology2.chain(0).residues] == [5]
+    assert [r.n_atoms for r in topology2.chain(1).residues] == [5]
+    assert [(r.resSeq, r.n_atoms) for r in topology2.residues][:6] == [(1, 5), (1, 5), (1, 2), (99, 3), (1, 2), (2, 14)]
+    assert topology2.atom(3).formal_charge == -1
+    assert [(b.atom1.index, b.atom2.index, b.type, b.order) for b in topology2.bonds] == [
+        (b.atom1.index, b.atom2.index, b.type, b.order) for b in topology.bonds
+    ]
+
+    atoms2, bonds2 = topology2.to_dataframe()
+    eq(atoms2["chainID"].values[:15], np.array([0] * 5 + [1] * 5 + [2] * 5))
+    eq(bonds2, bonds)
+
+    # bonds without type and order
+    topology3 = md.Topology.from_dataframe(atoms, bonds[:, :2])
+    assert all(b.type is None and b.order is None for b in topology3.bonds)
+    eq(topology3.arrays.bonds, topology2.arrays.bonds)
+
+
+def test_create_standard_bonds(get_fn):
+    topology = md.load(get_fn("4ZUO.pdb")).topology
+    atoms, _ = topology.to_dataframe()
+    topology2 = md.Topology.from_dataframe(atoms)
+    assert topology2.n_bonds == 0
+    topology2.create_standard_bonds()
+
+    # the PDB loader adds the same template bonds first, then CONECT records
+    bonds = [(b.atom1.index, b.atom2.index) for b in topology.bonds]
+    bonds2 = [(b.atom1.index, b.atom2.index) for b in topology2.bonds]
+    assert len(bonds2) > 0
+    assert bonds2 == bonds[: len(bonds2)]
+    assert all(b.atom1.index < b.atom2.index for b in topology2.bonds)
+    # peptide bonds never link the end of one chain to the start of the next
+    assert all(b.atom1.residue.chain is b.atom2.residue.chain for b in topology2.bonds)
+
+
 def test_topology_numbers(get_fn):
     topology = md.load(get_fn("1bpi.pdb")).topology
     assert len(list(topology.atoms)) == topology.n_atoms
@@ -367,6 +414,79 @@ def test_subset_re_index_residues(get_fn):
     np.testing.assert_array_equal([0, 1], [rr.index for rr in t2.residues])
 
 
+def test_subset_chains_and_bonds(get_fn):
+    t1 = md.load(get_fn("4ZUO.pdb")).top
+    indices = np.concatenate([t1.select("chainid 1 and resid 300 to 310"), t1.select("water")[:9]])
+    t2 = t1.subset(indices)
+
+    assert t2.n_atoms == len(indices)
+    assert [c.index for c in t2.chains] == list(range(t2.n_chains))
+    assert [r.index for r in t2.residues] == list(range(t2.n_residues))
+    assert [a.name for a in t2.atoms] == [t1.atom(i).name for i in indices]
+    residues = dict.fromkeys(t1.atom(i).residue for i in indices)
+    assert [(r.name, r.resSeq) for r in t2.residues] == [(r.name, r.resSeq) for r in residues]
+
+    kept = set(indices.tolist())
+    new_index = {old: new for new, old in enumerate(indices)}
+    expected = [(new_index[a.index], new_index[b.index]) for a, b in t1.bonds if a.index in kept and b.index in kept]
+    assert [(a.index, b.index) for a, b in t2.bonds] == expected
+    assert all(b.atom1.index < b.atom2.index for b in t2.bonds)
+
+    # out-of-range indices are ignored, just as they always were
+    assert t1.subset([0, 1, t1.n_atoms + 5]).n_atoms == 2
+    assert t1.subset([]).n_atoms == 0
+
+
+def test_topology_arrays(get_fn):
+    top = md.load(get_fn("2EQQ.pdb")).topology
+    arrays = top.arrays
+    assert top.arrays is arrays
+
+    eq(arrays.atom_name, np.array([a.name for a in top.atoms]))
+    assert list(arrays.atom_element) == [a.element for a in top.atoms]
+    eq(arrays.atom_residue, np.array([a.residue.index for a in top.atoms]))
+    eq(arrays.atom_chain, np.array([a.residue.chain.index for a in top.atoms]))
+    eq(arrays.atom_serial, np.array([a.serial for a in top.atoms]))
+    eq(arrays.residue_name, np.array([r.name for r in top.residues]))
+    eq(arrays.residue_resSeq, np.array([r.resSeq for r in top.residues]))
+    eq(arrays.residue_chain, np.array([r.chain.index for r in top.residues]))
+    eq(arrays.bonds, np.array([[a.index, b.index] for a, b in top.bonds]))
+    with pytest.raises(ValueError):
+        arrays.atom_name[0] = "XX"
+
+
+def test_topology_arrays_invalidation(get_fn):
+    top = md.load(get_fn("2EQQ.pdb")).topology
+    top.atom(0).name = "XX"
+    assert top.arrays.atom_name[0] == "XX"
+    # in-place edits aren't tracked until the caches are invalidated
+    top.residue(0).resSeq = 1000
+    top.chain(0).chain_id = "Z"
+    assert top.arrays.residue_resSeq[0] != 1000
+    top.invalidate_caches()
+    assert top.arrays.residue_resSeq[0] == 1000
+    assert top.arrays.chain_id[0] == "Z"
+
+    n_bonds = len(top.arrays.bonds)
+    top.add_bond(top.atom(0), top.atom(10))
+    assert len(top.arrays.bonds) == n_bonds + 1
+
+    residue = top.add_residue("HOH", top.add_chain())
+    top.add_atom("O", md.element.oxygen, residue)
+    assert top.arrays.atom_residue[-1] == top.n_residues - 1
+    assert top.arrays.atom_chain[-1] == top.n_chains - 1
+    assert np.isnan(top.arrays.atom_formal_charge[-1])
+    assert top.arrays.atom_serial[-1] == -1
+
+    top.delete_atom_by_index(0)
+    assert len(top.arrays.atom_name) == top.n_atoms
+    assert [a.index for a in top.atoms] == list(range(top.n_atoms))
+
+    top.insert_atom("H", md.element.hydrogen, top.residue(0), index=0, rindex=0)
+    assert top.arrays.atom_name[0] == "H"
+    assert [a.index for a in top.atoms] == list(range(top.n_atoms))
+
+
 def test_molecules(get_fn):
     top = md.load(get_fn("4OH9.pdb")).topology
     molecules = top.find_molecules()
@@ -374,6 +494,33 @@ def test_molecules(get_fn):
     assert sum(1 for mol in molecules if len(mol) > 1) == 2  # All but two molecules are water
 
 
+def test_connectivity(get_fn):
+    top = md.load(get_fn("4OH9.pdb")).topology
+    connectivity = top.connectivity
+    assert top.connectivity is connectivity
+
+    molecules = top.find_molecules()
+    assert [sorted(a.index for a in mol) for mol in molecules] == [mol.tolist() for mol in connectivity.molecules]
+    for i, mol in enumerate(connectivity.molecules):
+        assert (connectivity.atom_molecule[mol] == i).all()
+    assert connectivity.adjacency.nnz == 2 * top.n_bonds
+
+    # one tree bond per atom, minus one per molecule, and every bond starts
+    # from an atom that is already in place
+    sorted_bonds = connectivity.sorted_bonds
+    assert len(sorted_bonds) == top.n_atoms - len(molecules)
+    placed = {int(mol[0]) for mol in connectivity.molecules}
+    for atom1, atom2 in sorted_bonds.tolist():
+        assert atom1 in placed and atom2 not in placed
+        placed.add(atom2)
+    bonds = {tuple(sorted(bond)) for bond in top.arrays.bonds.tolist()}
+    assert {tuple(sorted(bond)) for bond in sorted_bonds.tolist()} <= bonds
+
+    top.add_bond(top.atom(0), top.atom(top.n_atoms - 1))
+    assert top.connectivity is not connectivity
+    assert len(top.find_molecules()) == len(molecules) - 1
+
+
 def test_copy_and_hash(get_fn):
     t = md.load(get_fn("traj.h5"))
     t1 = t.topology
@@ -453,3 +600,25 @@ def test_delete_atom_by_index(get_fn):
     assert top.n_bonds == n_bonds_original - 4
     assert all([atom_to_remove not in bond for bond in top.bonds])
     assert eq(list(range(top.n_atoms)), [atom.index for atom in top.atoms])
+
+
+def test_select_pairs_vectorized(get_fn):
+    top = md.load(get_fn("4ZUO.pdb")).topology
+    ca, cb = top.select("name CA"), top.select("name CB")
+    eq(top.select_pairs(ca, ca), np.array(list(itertools.combinations(ca, 2))))
+    eq(top.select_pairs("name CA", "name CB"), np.array(list(itertools.product(ca, cb))))
+
+    # overlapping selections give each unordered pair once, larger index first
+    a, b = ca[:30], np.concatenate([ca[20:40], cb[:10]])
+    pairs = top.select_pairs(a, b)
+    expected = {(max(i, j), min(i, j)) for i in a for j in b if i != j}
+    assert sorted(map(tuple, pairs.tolist())) == sorted(expected)
+
+    assert top.select_pairs("none", "name CA").shape == (0, 2)
+
+    for selection1, selection2 in [(ca, ca), (ca, cb), (a, b)]:
+        blocks = list(top.iter_select_pairs(selection1, selection2, chunk_size=50))
+        assert len(blocks) > 1
+        eq(np.concatenate(blocks), top.select_pairs(selection1, selection2))
+    with pytest.raises(ValueError):
+        top.iter_select_pairs(ca, ca, chunk_size=0)
@@ -0,0 +1,156 @@
+##############################################################################
+# MDTraj: A Python Library for Loading, Saving, and Manipulating
+#         Molecular Dynamics Trajectories.
+# Copyright 2012-2025 Stanford University and the Authors
+#
+# Authors: Robert McGibbon
+# Contributors:
+#
+# MDTraj is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with MDTraj. If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import mdtraj as md
+from mdtraj.core import topology_cache
+from mdtraj.core.trajectory import _parse_topology_file
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(topology_cache, "_directory", topology_cache._UNSET)
+    monkeypatch.setattr(topology_cache, "_max_size", topology_cache._DEFAULT_MAX_SIZE)
+    directory = tmp_path / "cache"
+    topology_cache.enable_topology_cache(directory)
+    return directory
+
+
+def _entries(directory):
+    return sorted(os.listdir(directory)) if os.path.exists(directory) else []
+
+
+def assert_same_topology(top1, top2):
+    assert top1 == top2
+    for a1, a2 in zip(top1.atoms, top2.atoms):
+        assert (a1.serial, repr(a1.formal_charge)) == (a2.serial, repr(a2.formal_charge))
+    for r1, r2 in zip(top1.residues, top2.residues):
+        assert (r1.resSeq, r1.segment_id) == (r2.resSeq, r2.segment_id)
+    assert [c.chain_id for c in top1.chains] == [c.chain_id for c in top2.chains]
+    for b1, b2 in zip(top1.bonds, top2.bonds):
+        assert (repr(b1.type), b1.order) == (repr(b2.type), b2.order)
+
+
+@pytest.mark.parametrize(
+    "fn",
+    ["2EQQ.pdb", "1vii_sustiva_water.pdb", "alanine-dipeptide-explicit.prmtop", "ala_ala_ala.psf", "imatinib.mol2", "frame0.gro"],
+)
+def test_round_trip(get_fn, cache_dir, fn):
+    ref = _parse_topology_file(get_fn(fn))
+
+    first = md.load_topology(get_fn(fn))
+    assert len(_entries(cache_dir)) == 1
+    second = md.load_topology(get_fn(fn))
+    assert len(_entries(cache_dir)) == 1
+
+    assert_same_topology(ref, first)
+    assert_same_topology(ref, second)
+    # every hit builds a new topology
+    assert second is not md.load_topology(get_fn(fn))
+
+
+def test_load_uses_cache(get_fn, cache_dir, monkeypatch):
+    ref = md.load(get_fn("frame0.xtc"), top=get_fn("native.pdb"))
+    assert len(_entries(cache_dir)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the topology should come from the cache")
+
+    monkeypatch.setattr(md.core.trajectory, "_parse_topology_file", fail)
+    traj = md.load(get_fn("frame0.xtc"), top=get_fn("native.pdb"))
+    assert traj.topology == ref.topology
+    np.testing.assert_array_equal(traj.xyz, ref.xyz)
+
+
+def test_key(get_fn, cache_dir, tmp_path):
+    fn = str(tmp_path / "native.pdb")
+    shutil.copy(get_fn("native.pdb"), fn)
+
+    md.load_topology(fn)
+    md.load_topology(fn, standard_names=False)
+    assert len(_entries(cache_dir)) == 2
+
+    # a modified file is parsed again
+    top = md.load_topology(fn)
+    stat = os.stat(fn)
+    os.utime(fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert md.load_topology(fn) == top
+    assert len(_entries(cache_dir)) == 3
+
+    # options without a reliable repr aren't keyed
+    assert topology_cache._cache_key(fn, {"standard_names": True}) is not None
+    assert topology_cache._cache_key(fn, {"atom_indices": np.arange(10)}) is None
+
+
+def test_disable_and_clear(get_fn, cache_dir):
+    md.load_topology(get_fn("native.pdb"))
+    assert len(_entries(cache_dir)) == 1
+
+    topology_cache.disable_topology_cache()
+    assert topology_cache.topology_cache_directory() is None
+    md.load_topology(get_fn("2EQQ.pdb"))
+    assert len(_entries(cache_dir)) == 1
+
+    topology_cache.clear_topology_cache(cache_dir)
+    assert _entries(cache_dir) == []
+
+
+def test_environment_variable(cache_dir, monkeypatch, tmp_path):
+    monkeypatch.setattr(topology_cache, "_directory", topology_cache._UNSET)
+    monkeypatch.delenv("MDTRAJ_TOPOLOGY_CACHE", raising=False)
+    assert topology_cache.topology_cache_directory() is None
+    monkeypatch.setenv("MDTRAJ_TOPOLOGY_CACHE", str(tmp_path))
+    assert topology_cache.topology_cache_directory() == str(tmp_path)
+    monkeypatch.setenv("MDTRAJ_TOPOLOGY_CACHE", "0")
+    assert topology_cache.topology_cache_directory() is None
+
+
+def test_eviction(get_fn, cache_dir, tmp_path):
+    fn1, fn2 = str(tmp_path / "a.pdb"), str(tmp_path / "b.pdb")
+    shutil.copy(get_fn("native.pdb"), fn1)
+    shutil.copy(get_fn("native.pdb"), fn2)
+
+    md.load_topology(fn1)
+    (entry,) = _entries(cache_dir)
+    size = os.path.getsize(cache_dir / entry)
+
+    # room for one entry only, so the older one is evicted
+    topology_cache.enable_topology_cache(cache_dir, max_size=size)
+    md.load_topology(fn2)
+    assert len(_entries(cache_dir)) == 1
+    assert entry not in _entries(cache_dir)
+
+    with pytest.raises(ValueError):
+        topology_cache.enable_topology_cache(cache_dir, max_size=-1)
+
+
+def test_corrupt_entry(get_fn, cache_dir):
+    ref = md.load_topology(get_fn("native.pdb"))
+    (entry,) = _entries(cache_dir)
+    with open(cache_dir / entry, "wb") as f:
+        f.write(b"not a topology")
+    assert md.load_topology(get_fn("native.pdb")) == ref
@@ -503,6 +503,99 @@ def test_md_join(get_fn):
     eq(loaded.unitcell_lengths, iterloaded.unitcell_lengths)
 
 
+def test_trajectory_builder(get_fn):
+    fn = get_fn("traj.h5")
+    t_ref = md.load(get_fn("frame0.h5"))[:20]
+    loaded = md.load(fn, top=t_ref, stride=2)
+    for n_frames in [None, 3, 100]:
+        builder = md.TrajectoryBuilder(n_frames=n_frames)
+        builder.extend(md.iterload(fn, top=t_ref, stride=2, chunk=4))
+        assert len(builder) == len(loaded)
+        built = builder.finalize()
+        eq(loaded.xyz, built.xyz)
+        eq(loaded.time, built.time)
+        eq(loaded.unitcell_angles, built.unitcell_angles)
+        eq(loaded.unitcell_lengths, built.unitcell_lengths)
+        assert len(builder) == 0
+
+
+def test_trajectory_builder_overlapping_frames():
+    xyz = np.random.rand(10, 5, 3)
+    builder = md.TrajectoryBuilder(discard_overlapping_frames=True)
+    builder.append(md.Trajectory(xyz=xyz[:5], topology=None))
+    builder.append(md.Trajectory(xyz=xyz[4:], topology=None))
+    eq(builder.finalize().xyz, xyz.astype(np.float32))
+
+
+def test_trajectory_builder_mismatch(get_fn):
+    t = md.load(get_fn("native.pdb"))
+    builder = md.TrajectoryBuilder()
+    builder.append(t)
+    with pytest.raises(ValueError):
+        builder.append(t.atom_slice(range(5)))
+    top = t.topology.copy()
+    top.atom(0).name = "XX"
+    with pytest.raises(ValueError):
+        builder.append(md.Trajectory(xyz=t.xyz, topology=top))
+    with pytest.raises(ValueError):
+        md.TrajectoryBuilder().finalize()
+
+
+def test_save_iter(write_traj, get_fn):
+    if write_traj.fext in ("ncrst", "rst7"):
+        pytest.skip(f"{write_traj.fext} can only store 1 frame per file")
+    if write_traj.fext in ("mdcrd"):
+        pytest.skip(f"{write_traj.fext} can only store rectilinear boxes")
+
+    t = md.load(get_fn("traj.h5"))
+    if t.unitcell_vectors is None:
+        if write_traj.fext in ("dtr", "lammpstrj"):
+            pytest.skip(f"{write_traj.fext} needs to write unitcells")
+
+    t.save(write_traj.fn.replace("traj.", "ref."))
+    ref = md.load(write_traj.fn.replace("traj.", "ref."), top=t)
+    n_frames = md.save_iter((t[i : i + 7] for i in range(0, len(t), 7)), write_traj.fn)
+    assert n_frames == len(t)
+
+    t2 = md.load(write_traj.fn, top=t)
+    eq(ref.xyz, t2.xyz)
+    if has_time_info(write_traj.fext):
+        eq(ref.time, t2.time)
+    eq(ref.unitcell_vectors, t2.unitcell_vectors)
+
+
+def test_save_iter_per_frame_bfactors(get_fn, tmpdir):
+    t = md.load(get_fn("frame0.h5"))[:10]
+    bfactors = np.round(np.random.uniform(0, 50, size=(t.n_frames, t.n_atoms)), 2)
+    md.save_iter([t[:4], t[4:]], f"{tmpdir}/traj.pdb", bfactors=bfactors)
+
+    with open(f"{tmpdir}/traj.pdb") as f:
+        atom_lines = [line for line in f if line.startswith("ATOM")]
+    eq(bfactors.ravel(), np.array([float(line[60:66]) for line in atom_lines]))
+
+
+def test_save_iter_hdf5_mode(get_fn, tmpdir):
+    t = md.load(get_fn("frame0.h5"))[:10]
+    fn = f"{tmpdir}/traj.h5"
+    md.save_iter([t[:4], t[4:]], fn, mode="w")
+    eq(md.load(fn).xyz, t.xyz)
+    md.save_iter([t[:4], t[4:]], fn, mode="a")
+    eq(md.load(fn).xyz, np.concatenate([t.xyz, t.xyz]))
+
+
+def test_trajectory_writer_mismatch(get_fn, tmpdir):
+    t = md.load(get_fn("native.pdb"))
+    with md.TrajectoryWriter(f"{tmpdir}/traj.xtc") as writer:
+        writer.write(t)
+        with pytest.raises(ValueError):
+            writer.write(t.atom_slice(range(5)))
+        assert writer.n_frames == 1
+    with pytest.raises(ValueError):
+        writer.write(t)
+    with pytest.raises(IOError):
+        md.TrajectoryWriter(f"{tmpdir}/traj.foo").write(t)
+
+
 def test_stack_1(get_fn):
     t1 = md.load(get_fn("native.pdb"))
     t2 = t1.stack(t1)
@@ -604,8 +697,6 @@ def test_load_frame(ref_traj, get_fn, monkeypatch):
         rand = np.random.randint(len(trajectory))
         frame = md.load_frame(get_fn(ref_traj.fn), index=rand, top=get_fn("native.pdb"))
 
-        if ref_traj.fobj is md.formats.DTRTrajectoryFile:
-            pytest.xfail("DTR doesn't load a single frame properly")
         eq(trajectory[rand].xyz, frame.xyz)
         eq(trajectory[rand].unitcell_vectors, frame.unitcell_vectors)
         if has_time_info(ref_traj.fext):
@@ -620,6 +711,66 @@ def test_load_frame(ref_traj, get_fn, monkeypatch):
     test_base(ref_traj, get_fn)
 
 
+def test_load_frame_range(ref_traj, get_fn):
+    trajectory = md.load(get_fn(ref_traj.fn), top=get_fn("native.pdb"))
+    for start, stop, stride in [(2, 11, 3), (5, None, None), (None, 7, 2), (4, 4, None)]:
+        t = md.load(
+            get_fn(ref_traj.fn),
+            top=get_fn("native.pdb"),
+            start=start,
+            stop=stop,
+            stride=stride,
+        )
+        ref = trajectory[start:stop:stride]
+        assert t.n_frames == ref.n_frames
+        eq(ref.xyz, t.xyz)
+        if has_time_info(ref_traj.fext):
+            eq(ref.time, t.time)
+
+
+def test_load_frame_range_past_end(ref_traj, get_fn):
+    n_frames = md.load(get_fn(ref_traj.fn), top=get_fn("native.pdb")).n_frames
+    for stop in [None, n_frames + 20]:
+        t = md.load(
+            get_fn(ref_traj.fn),
+            top=get_fn("native.pdb"),
+            start=n_frames + 10,
+            stop=stop,
+        )
+        assert t.n_frames == 0
+
+
+@pytest.mark.parametrize("fext", ["xtc", "trr", "dcd", "nc", "h5", "dtr", "pdb", "gro"])
+def test_load_frame_range_negative(fext, get_fn):
+    fn = get_fn(f"frame0.{fext}")
+    trajectory = md.load(fn, top=get_fn("native.pdb"))
+    t = md.load(fn, top=get_fn("native.pdb"), start=-10, stop=-2, stride=3)
+    eq(trajectory[-10:-2:3].xyz, t.xyz)
+
+
+@pytest.mark.parametrize(
+    "fn, top",
+    [
+        ("imatinib.mol2", None),
+        ("no_ions.hoomdxml", None),
+        ("native2.xml", "native2.pdb"),
+        ("frame0.rst7", "native.pdb"),
+        ("frame0.ncrst", "native.pdb"),
+    ],
+)
+def test_load_frame_range_single_frame(fn, top, get_fn, tmpdir):
+    if fn.startswith("frame0."):
+        md.load(get_fn("frame0.nc"), top=get_fn(top))[0].save(f"{tmpdir}/{fn}")
+        fn = f"{tmpdir}/{fn}"
+    else:
+        fn = get_fn(fn)
+    kwargs = {} if top is None else {"top": get_fn(top)}
+    trajectory = md.load(fn, **kwargs)
+    for start, stop in [(0, None), (None, 1), (-1, None), (1, None), (0, 0)]:
+        t = md.load(fn, start=start, stop=stop, **kwargs)
+        eq(trajectory[start:stop].xyz, t.xyz)
+
+
 def test_load_frame_2eqq(get_fn):
     t1 = md.load(get_fn("2EQQ.pdb"))
     r = np.random.randint(len(t1))
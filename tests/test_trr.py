@@ -238,6 +238,81 @@ def test_malformed():
     assert os.path.realpath(temp) not in paths
 
 
+def test_read_stride_mixed_frames():
+    # frames with and without velocities differ in size on disk
+    xyz = np.array(np.random.randn(10, 50, 3), dtype=np.float32)
+    vel = np.array(np.random.randn(10, 50, 3), dtype=np.float32)
+    time = np.arange(10, dtype=np.float32)
+    step = np.arange(10, dtype=np.int32)
+    box = np.zeros((10, 3, 3), dtype=np.float32)
+    lambd = np.zeros(10, dtype=np.float32)
+
+    with TRRTrajectoryFile(temp, "w") as f:
+        for i in range(10):
+            f._write(
+                xyz=xyz[i : i + 1],
+                time=time[i : i + 1],
+                step=step[i : i + 1],
+                box=box[i : i + 1],
+                lambd=lambd[i : i + 1],
+                vel=vel[i : i + 1] if i % 3 == 0 else None,
+            )
+
+    for s in (2, 3, 4):
+        with TRRTrajectoryFile(temp) as f:
+            xyz_s, time_s, step_s, box_s, lambd_s = f.read(stride=s)
+            assert f.tell() == 10
+        assert eq(xyz_s, xyz[::s])
+        assert eq(step_s, step[::s])
+
+
+def test_mixed_frames_uniform_size():
+    # x+v, x, x, x, x+v: the file size is a multiple of the first frame's
+    # size and the first and last headers match, but the frames differ
+    xyz = np.array(np.random.randn(5, 10, 3), dtype=np.float32)
+    vel = np.array(np.random.randn(5, 10, 3), dtype=np.float32)
+    with TRRTrajectoryFile(temp, "w") as f:
+        for i in range(5):
+            f._write(
+                xyz=xyz[i : i + 1],
+                time=np.array([i], dtype=np.float32),
+                step=np.array([i], dtype=np.int32),
+                box=np.zeros((1, 3, 3), dtype=np.float32),
+                lambd=np.zeros(1, dtype=np.float32),
+                vel=vel[i : i + 1] if i in (0, 4) else None,
+            )
+    with TRRTrajectoryFile(temp) as f:
+        sizes = np.diff(np.append(f.offsets, os.path.getsize(temp)))
+    assert os.path.getsize(temp) % sizes[0] == 0
+
+    with TRRTrajectoryFile(temp) as f:
+        assert len(f) == 5
+    for i in range(5):
+        with TRRTrajectoryFile(temp) as f:
+            f.seek(i)
+            assert eq(f.read(1)[0], xyz[i : i + 1])
+    for s in (2, 3):
+        with TRRTrajectoryFile(temp) as f:
+            xyz_s, _, step_s, _, _ = f.read(stride=s)
+        assert eq(xyz_s, xyz[::s])
+        assert eq(step_s, np.arange(5, dtype=np.int32)[::s])
+
+
+@pytest.mark.parametrize("step", [np.arange(7) * 10, np.zeros(7), [0, 1, 2, 4, 5, 6, 7]])
+def test_read_stride_uniform_frames(step):
+    # every frame is the same size, so strided reads seek straight to each
+    # frame they read, as long as its step is where the step sequence puts it
+    xyz = np.array(np.random.randn(7, 10, 3), dtype=np.float32)
+    step = np.asarray(step, dtype=np.int32)
+    with TRRTrajectoryFile(temp, "w") as f:
+        f.write(xyz, step=step)
+    for s in (2, 3, 6, 10):
+        with TRRTrajectoryFile(temp) as f:
+            xyz_s, _, step_s, _, _ = f.read(stride=s)
+        assert eq(xyz_s, xyz[::s])
+        assert eq(step_s, step[::s])
+
+
 def test_tell(get_fn):
     with TRRTrajectoryFile(get_fn("frame0.trr")) as f:
         eq(f.tell(), 0)
@@ -451,6 +526,46 @@ def test_get_velocities_forces_atom_indices_2():
     pass
 
 
+def test_get_velocities_forces_atom_indices_sparse():
+    # NOTE: this is a test of a hidden API
+    # unordered indices with gaps wider than a single contiguous read
+    xyz = np.array(np.random.randn(5, 3000, 3), dtype=np.float32)
+    vel = np.array(np.random.randn(5, 3000, 3), dtype=np.float32)
+    forces = np.array(np.random.randn(5, 3000, 3), dtype=np.float32)
+    box = np.array(np.random.randn(5, 3, 3), dtype=np.float32)
+    time = np.array(np.random.randn(5), dtype=np.float32)
+    step = np.array(np.arange(5), dtype=np.int32)
+    lambd = np.array(np.random.randn(5), dtype=np.float32)
+
+    with TRRTrajectoryFile(temp, "w") as f:
+        f._write(
+            xyz=xyz,
+            time=time,
+            step=step,
+            box=box,
+            lambd=lambd,
+            vel=vel,
+            forces=forces,
+        )
+
+    atom_indices = [2999, 5, 4, 1700, 0, 1701]
+    with TRRTrajectoryFile(temp) as f:
+        xyz2, time2, step2, box2, lambd2, vel2, forces2 = f._read(
+            n_frames=5,
+            atom_indices=atom_indices,
+            get_velocities=True,
+            get_forces=True,
+        )
+
+    assert eq(xyz[:, atom_indices], xyz2)
+    assert eq(vel[:, atom_indices], vel2)
+    assert eq(forces[:, atom_indices], forces2)
+    assert eq(box, box2)
+    assert eq(time, time2)
+    assert eq(step, step2)
+    assert eq(lambd, lambd2)
+
+
 def test_read_velocities_do_not_exist():
     """Requesting velocities from a file that does not have them"""
     # NOTE: this is a test of a hidden API
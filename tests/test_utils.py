@@ -30,6 +30,7 @@ import pytest
 from mdtraj.testing import eq
 from mdtraj.utils import (
     box_vectors_to_lengths_and_angles,
+    cast_frame_range,
     ensure_type,
     import_,
     lengths_and_angles_to_box_vectors,
@@ -173,6 +174,29 @@ def test_ensure_type_15():
     eq(value, ref)
 
 
+def test_cast_frame_range():
+    assert cast_frame_range() == (0, None)
+    assert cast_frame_range(5) == (5, None)
+    assert cast_frame_range(2, 11, 3) == (2, 3)
+    assert cast_frame_range(2, 12, 3) == (2, 4)
+    assert cast_frame_range(7, 3) == (7, 0)
+    assert cast_frame_range(-10, -2, 3, length=lambda: 100) == (90, 3)
+    # a window starting past the end of the file is empty
+    assert cast_frame_range(150, length=lambda: 100) == (100, None)
+    assert cast_frame_range(150, 160, length=lambda: 100) == (100, 0)
+    assert cast_frame_range(-150, 2, length=lambda: 100) == (0, 2)
+
+
+def test_cast_frame_range_fail():
+    with pytest.raises(ValueError):
+        cast_frame_range(stride=0)
+    with pytest.raises(ValueError):
+        cast_frame_range(start=1.5)
+    with pytest.raises(ValueError):
+        # negative bounds need the length of the file
+        cast_frame_range(-10)
+
+
 def test_delay_import_fail_1():
     with pytest.raises(ImportError):
         import_("sdfsdfsfsfdsdf")